@@ -16,6 +16,7 @@
 # to the current version of the project delivered to anyone in the future.
 
 from paas_wl.infras.cluster.models import Cluster
+from paas_wl.infras.cluster.registry import cluster_registry
 from paasng.platform.modules.constants import ExposedURLType
 
 from .constants import AGENT_SANDBOX_ROUTER_SUBDOMAIN_PREFIX
@@ -34,7 +35,7 @@ def get_router_endpoint(cluster_name: str) -> str:
     :raises RuntimeError: If the cluster or its ingress config is missing.
     """
     try:
-        cluster = Cluster.objects.get(name=cluster_name)
+        cluster = cluster_registry.get(cluster_name)
     except Cluster.DoesNotExist:
         raise RuntimeError(f"cluster {cluster_name!r} not found")
 
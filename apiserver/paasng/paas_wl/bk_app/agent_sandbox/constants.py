@@ -36,3 +36,8 @@ DAEMON_BIND_PORT = 30000
 # The prefix for 'agent sandbox router' domain, the full domain is expected to be "{prefix}.{root_domain}"
 # "agent-sandbox-router" (length > 16) will not conflict with app_code
 AGENT_SANDBOX_ROUTER_SUBDOMAIN_PREFIX = "agent-sandbox-router"
+
+# The states of a sandbox pod in the warm pool, stored in the pod's labels.
+# "idle" pods are pre-started and waiting to be claimed, "claimed" pods have been bound to a sandbox record.
+POOL_STATE_IDLE = "idle"
+POOL_STATE_CLAIMED = "claimed"
@@ -80,6 +80,7 @@ class AgentSandbox(KresAppEntity):
     :param args: The arguments to pass to the command (/usr/local/bin/daemon).
     :param env: The environment variables set in the sandbox.
     :param status: The current status of the sandbox.
+    :param pool_state: The state in the warm pool, empty if the sandbox was not created by the pool.
     """
 
     sandbox_id: str
@@ -89,6 +90,7 @@ class AgentSandbox(KresAppEntity):
     command: list[str] = field(default_factory=list)
     args: list[str] = field(default_factory=list)
     status: str = "Pending"
+    pool_state: str = ""
 
     def __post_init__(self):
         # 此处强制覆盖
@@ -49,7 +49,7 @@ class AgentSandboxSerializer(KresAppEntitySerializer["AgentSandbox"]):
             "kind": "Pod",
             "metadata": {
                 "name": obj.name,
-                "labels": AgentSandboxLabels.generate(obj.sandbox_id),
+                "labels": AgentSandboxLabels.generate(obj.sandbox_id, pool_state=obj.pool_state),
             },
             "spec": self._construct_pod_spec(obj),
         }
@@ -120,6 +120,7 @@ class AgentSandboxDeserializer(KresAppEntityDeserializer["AgentSandbox", "AgentS
             env=env,
             args=getattr(main_container, "args", []),
             status=self._get_status(kube_data),
+            pool_state=labels.get(AgentSandboxLabels.key_pool_state, ""),
         )
 
     @staticmethod
@@ -186,6 +187,9 @@ class AgentSandboxLabels:
     """Generate and parse labels for an agent sandbox Pod."""
 
     key_sandbox_id = "bkapp.paas.bk.tencent.com/sandbox-id"
+    # Only the pods created by the warm pool have this label
+    key_pool_state = "bkapp.paas.bk.tencent.com/sandbox-pool-state"
+    managed_by = "bkpaas-agent-sandbox"
 
     @classmethod
     def parse(cls, labels: dict[str, str]) -> str:
@@ -197,9 +201,24 @@ class AgentSandboxLabels:
         return sandbox_id
 
     @classmethod
-    def generate(cls, sandbox_id: str) -> dict[str, str]:
-        """Generate labels for an agent sandbox Pod."""
-        return {
-            "app.kubernetes.io/managed-by": "bkpaas-agent-sandbox",
+    def generate(cls, sandbox_id: str, pool_state: str = "") -> dict[str, str]:
+        """Generate labels for an agent sandbox Pod.
+
+        :param pool_state: The state of the pod in the warm pool, leave it empty if the pod
+            does not belong to the pool.
+        """
+        labels = {
+            "app.kubernetes.io/managed-by": cls.managed_by,
             cls.key_sandbox_id: sandbox_id,
         }
+        if pool_state:
+            labels[cls.key_pool_state] = pool_state
+        return labels
+
+    @classmethod
+    def generate_pool_selector(cls, pool_state: str) -> dict[str, str]:
+        """Generate the label selector for querying the warm pool pods in given state."""
+        return {
+            "app.kubernetes.io/managed-by": cls.managed_by,
+            cls.key_pool_state: pool_state,
+        }
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0024_config_tenant_id_outputstream_tenant_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="outputstreamline",
+            options={"ordering": ["created", "id"]},
+        ),
+    ]
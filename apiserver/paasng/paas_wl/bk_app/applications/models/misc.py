@@ -15,6 +15,8 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+from typing import Iterable, Tuple
+
 from django.db import models
 
 from paas_wl.bk_app.applications.models import UuidAuditedModel
@@ -29,6 +31,17 @@ class OutputStream(UuidAuditedModel):
             line += "\n"
         OutputStreamLine.objects.create(output_stream=self, line=line, stream=stream)
 
+    def bulk_write(self, lines: Iterable[Tuple[str, str]]):
+        """Write multiple lines by batch insertion, the order of lines is kept.
+
+        :param lines: A collection of (line, stream) tuples.
+        """
+        objs = [
+            OutputStreamLine(output_stream=self, line=line if line.endswith("\n") else line + "\n", stream=stream)
+            for line, stream in lines
+        ]
+        OutputStreamLine.objects.bulk_create(objs, batch_size=500)
+
 
 class OutputStreamLine(models.Model):
     """日志数据量巨大且数据性质纯粹，和租户关联不大，因此设置为“租户无关”。
@@ -43,7 +56,8 @@ class OutputStreamLine(models.Model):
     updated = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ["created"]
+        # Lines written by `bulk_write` share the same "created" value, use "id" to keep their order
+        ordering = ["created", "id"]
 
     def __str__(self):
         return "%s-%s" % (self.id, self.line)
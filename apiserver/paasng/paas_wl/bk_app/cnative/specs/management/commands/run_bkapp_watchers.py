@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""Run the BkApp watchers of all clusters, the pollers of deployments read the BkApps watched by them.
+
+Only one replica of this command should be running.
+"""
+
+import logging
+import signal
+import threading
+from typing import Dict
+
+from django.core.management.base import BaseCommand
+
+from paas_wl.bk_app.cnative.specs.watcher import BkAppWatcher, make_bkapp_watcher
+from paas_wl.infras.resources.base.base import get_all_cluster_names
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run the BkApp watchers of all clusters"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--refresh-interval",
+            help="seconds between refreshing the clusters to watch",
+            type=int,
+            default=60,
+        )
+
+    def handle(self, refresh_interval, *args, **options):
+        stopped = threading.Event()
+
+        def shutdown_gracefully(sig, frame):
+            logger.info("shutting down BkApp watchers")
+            stopped.set()
+
+        signal.signal(signal.SIGINT, shutdown_gracefully)
+        signal.signal(signal.SIGTERM, shutdown_gracefully)
+
+        watchers: Dict[str, BkAppWatcher] = {}
+        while not stopped.is_set():
+            try:
+                cluster_names = set(get_all_cluster_names())
+            except Exception:
+                logger.exception("failed to list clusters")
+                cluster_names = set(watchers)
+
+            for name in set(watchers) - cluster_names:
+                logger.info("cluster %s is removed, stop watching it", name)
+                watchers.pop(name).stop()
+            for name in cluster_names - set(watchers):
+                logger.info("start watching BkApps of cluster %s", name)
+                watchers[name] = make_bkapp_watcher(name)
+                watchers[name].start()
+
+            stopped.wait(refresh_interval)
+
+        for watcher in watchers.values():
+            watcher.stop()
@@ -393,14 +393,14 @@ def check_storage_class_exists(application: Application, storage_class_name: str
     :return bool: 如果 StorageClass 存在,返回 True。否则返回 False。
     """
     cluster = get_app_prod_env_cluster(application)
-    with get_client_by_cluster_name(cluster_name=cluster.name) as client:
-        storage_class_client = KStorageClass(client)
-        try:
-            _ = storage_class_client.get(name=storage_class_name)
-        except ResourceMissing:
-            return False
-        else:
-            return True
+    client = get_client_by_cluster_name(cluster_name=cluster.name)
+    storage_class_client = KStorageClass(client)
+    try:
+        _ = storage_class_client.get(name=storage_class_name)
+    except ResourceMissing:
+        return False
+    else:
+        return True
 
 
 def check_persistent_storage_enabled(application: Application) -> bool:
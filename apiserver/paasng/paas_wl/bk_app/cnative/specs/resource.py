@@ -226,8 +226,8 @@ def list_mres_by_env(application: Application, environment: str) -> list[BkAppRe
 
     res_list: list[BkAppResource] = []
     for cluster_name, namespace in cluster_namespace_pairs.items():
-        with get_client_by_cluster_name(cluster_name) as client:
-            data = crd.BkApp(client, api_version=ApiVersion.V1ALPHA2).ops_batch.list(namespace=namespace)
+        client = get_client_by_cluster_name(cluster_name)
+        data = crd.BkApp(client, api_version=ApiVersion.V1ALPHA2).ops_batch.list(namespace=namespace)
         res_list.extend([BkAppResource(**res) for res in data.items])
 
     return res_list
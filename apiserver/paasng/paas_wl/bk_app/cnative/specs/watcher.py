@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""Watch the BkApp resources of clusters, so that the pollers of in-flight deployments can read the latest
+BkApps from redis, instead of fetching them from the clusters again and again.
+
+The watchers run in a dedicated process(see the `run_bkapp_watchers` command), one for each cluster. The
+pollers register their interested BkApps in redis, the watchers only write the interested ones to redis.
+Reading from the store never blocks, a poller fetches the BkApp from the cluster directly when the store
+has no valid data, e.g. the watcher process is not running or the watch is broken.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from django.db import close_old_connections, connection
+from kubernetes.client.exceptions import ApiException
+
+from paas_wl.bk_app.cnative.specs.constants import ApiVersion
+from paas_wl.infras.resources.base import crd
+from paas_wl.infras.resources.base.base import get_client_by_cluster_name
+from paasng.core.core.storages.redisdb import get_default_redis
+
+logger = logging.getLogger(__name__)
+
+# (namespace, name) of a BkApp
+BkAppKey = Tuple[str, str]
+
+# The timeout of every upstream watch request, the watcher re-watches after it finished
+_WATCH_TIMEOUT = 20
+# Seconds to wait before retrying when the upstream list-watch failed
+_RETRY_INTERVAL = 3
+# The synced state of a watcher expires after this long unless it's renewed, so that the pollers stop
+# trusting the store soon after the watcher process exits.
+_SYNCED_TTL = 3 * _WATCH_TIMEOUT
+# A BkApp is no longer written to the store when no poller is interested in it for this long
+_INTEREST_TTL = 5 * 60
+
+
+def _get_key(obj: Dict) -> BkAppKey:
+    return obj["metadata"].get("namespace", ""), obj["metadata"]["name"]
+
+
+def _get_resource_version(obj: Optional[Dict]) -> str:
+    if not obj:
+        return ""
+    return obj["metadata"].get("resourceVersion", "")
+
+
+class BkAppStore:
+    """Store the interested BkApps of a cluster in redis, shared by the watcher and the pollers.
+
+    Every fresh list of the watcher starts a new "epoch", the objects are only valid when they are written
+    in the current epoch, so the objects written before a broken watch are never used.
+    """
+
+    _key_prefix = "bk_paas:bkapp_watch"
+
+    def __init__(self, cluster_name: str):
+        self.cluster_name = cluster_name
+        self._redis = get_default_redis()
+        self._prefix = f"{self._key_prefix}:{cluster_name}"
+
+    def add_interest(self, namespace: str, name: str):
+        """Ask the watcher to keep the BkApp in the store"""
+        self._redis.hset(f"{self._prefix}:interests", f"{namespace}/{name}", time.time())
+
+    def list_interests(self) -> Set[BkAppKey]:
+        """List the interested BkApps, the expired interests are removed"""
+        now = time.time()
+        interests: Set[BkAppKey] = set()
+        expired = []
+        for raw_field, accessed_at in self._redis.hgetall(f"{self._prefix}:interests").items():
+            field = raw_field.decode()
+            if now - float(accessed_at) > _INTEREST_TTL:
+                expired.append(field)
+                continue
+            namespace, _, name = field.partition("/")
+            interests.add((namespace, name))
+        if expired:
+            self._redis.hdel(f"{self._prefix}:interests", *expired)
+        return interests
+
+    def is_interested(self, key: BkAppKey) -> bool:
+        return bool(self._redis.hexists(f"{self._prefix}:interests", f"{key[0]}/{key[1]}"))
+
+    def start_epoch(self, objects: Dict[BkAppKey, Optional[Dict]]) -> str:
+        """Start a new epoch with the objects of a fresh list, None means the BkApp does not exist"""
+        epoch = uuid.uuid4().hex
+        for key, obj in objects.items():
+            self.put(epoch, key, obj)
+        self.renew_epoch(epoch)
+        return epoch
+
+    def renew_epoch(self, epoch: str):
+        self._redis.set(f"{self._prefix}:epoch", epoch, ex=_SYNCED_TTL)
+
+    def end_epoch(self):
+        self._redis.delete(f"{self._prefix}:epoch")
+
+    def put(self, epoch: str, key: BkAppKey, obj: Optional[Dict]):
+        data = json.dumps({"epoch": epoch, "object": obj})
+        self._redis.set(f"{self._prefix}:objects:{key[0]}/{key[1]}", data, ex=_INTEREST_TTL)
+
+    def get(self, namespace: str, name: str) -> Tuple[bool, Optional[Dict]]:
+        """Get the BkApp from the store
+
+        :return: (found, obj), "found" is False if the store has no valid data of the BkApp, "obj" is None
+            if the BkApp does not exist in the cluster.
+        """
+        epoch, raw = self._redis.mget(f"{self._prefix}:epoch", f"{self._prefix}:objects:{namespace}/{name}")
+        if not (epoch and raw):
+            return False, None
+        data = json.loads(raw)
+        if data["epoch"] != epoch.decode():
+            return False, None
+        return True, data["object"]
+
+
+class BkAppWatcher:
+    """List-watch all the BkApps of a cluster, write the latest objects of the interested ones to the store.
+
+    :param cluster_name: The name of cluster
+    :param list_func: A function to list all the BkApps, returns (items, resource_version)
+    :param watch_func: A function to watch the BkApps, accepts (resource_version, timeout_seconds) and
+        yields the raw watch events
+    """
+
+    def __init__(
+        self,
+        cluster_name: str,
+        list_func: Callable[[], Tuple[List[Dict], str]],
+        watch_func: Callable[[str, int], Iterator[Dict]],
+    ):
+        self.cluster_name = cluster_name
+        self.list_func = list_func
+        self.watch_func = watch_func
+        self.store = BkAppStore(cluster_name)
+
+        self._epoch = ""
+        self._resource_version = ""
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def is_stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def is_synced(self) -> bool:
+        return bool(self._epoch)
+
+    def run(self):
+        """List-watch until the watcher is stopped"""
+        try:
+            while not self._stopped.is_set():
+                try:
+                    self._list_and_watch()
+                except Exception:
+                    logger.exception("BkApp watcher of cluster %s failed to list-watch, retrying", self.cluster_name)
+                    self._set_unsynced()
+                    self._stopped.wait(_RETRY_INTERVAL)
+                finally:
+                    close_old_connections()
+        finally:
+            self._set_unsynced()
+            # Always close connection in every thread to avoid leaking of database connections
+            connection.close()
+
+    def _set_unsynced(self):
+        self._epoch = ""
+        try:
+            self.store.end_epoch()
+        except Exception:
+            logger.exception("BkApp watcher of cluster %s failed to end the epoch", self.cluster_name)
+
+    def _list_and_watch(self):
+        if not self._epoch:
+            items, resource_version = self.list_func()
+            found = {_get_key(obj): obj for obj in items}
+            self._epoch = self.store.start_epoch({key: found.get(key) for key in self.store.list_interests()})
+            self._resource_version = resource_version
+        else:
+            self.store.renew_epoch(self._epoch)
+
+        for event in self.watch_func(self._resource_version, _WATCH_TIMEOUT):
+            if self._stopped.is_set():
+                return
+
+            obj = event["raw_object"]
+            if event["type"] == "ERROR":
+                logger.info(
+                    "BkApp watcher of cluster %s got error: %s", self.cluster_name, obj.get("message", "Unknown")
+                )
+                # List the resources again in next round
+                self._set_unsynced()
+                return
+
+            self._resource_version = _get_resource_version(obj) or self._resource_version
+            if event["type"] == "BOOKMARK" or not self.store.is_interested(key := _get_key(obj)):
+                continue
+            self.store.put(self._epoch, key, None if event["type"] == "DELETED" else obj)
+
+
+def make_bkapp_watcher(cluster_name: str) -> BkAppWatcher:
+    """Make a watcher to watch the BkApps of given cluster"""
+
+    def _kres() -> crd.BkApp:
+        return crd.BkApp(get_client_by_cluster_name(cluster_name), api_version=ApiVersion.V1ALPHA2)
+
+    def list_func() -> Tuple[List[Dict], str]:
+        ret = _kres().ops_batch.list()
+        return [item.to_dict() for item in ret.items], ret.metadata.resourceVersion
+
+    def watch_func(resource_version: str, timeout_seconds: int) -> Iterator[Dict]:
+        kwargs = {"resource_version": resource_version} if resource_version else {}
+        try:
+            yield from _kres().ops_batch.create_watch_stream(labels={}, timeout_seconds=timeout_seconds, **kwargs)
+        except ApiException as e:
+            # The resource version is too old
+            if e.status == 410:
+                yield {"type": "ERROR", "raw_object": {"message": e.reason}}
+                return
+            raise
+
+    return BkAppWatcher(cluster_name, list_func, watch_func)
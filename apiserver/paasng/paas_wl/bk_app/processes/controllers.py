@@ -15,9 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import copy
 import datetime
 import logging
-from typing import Dict, List, NamedTuple, Optional, Protocol, Type
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Protocol, Tuple, Type
 
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -25,9 +27,15 @@ from django.utils.translation import gettext_lazy as _
 from paas_wl.bk_app.applications.constants import WlAppType
 from paas_wl.bk_app.applications.models import Release, WlApp
 from paas_wl.bk_app.processes.exceptions import ProcessOperationTooOften
-from paas_wl.bk_app.processes.kres_entities import Process
+from paas_wl.bk_app.processes.kres_entities import Instance, Process
 from paas_wl.bk_app.processes.models import ProcessSpec
-from paas_wl.bk_app.processes.readers import instance_kmodel, ns_instance_kmodel, ns_process_kmodel, process_kmodel
+from paas_wl.bk_app.processes.readers import (
+    instance_kmodel,
+    ns_instance_kmodel,
+    ns_process_kmodel,
+    process_kmodel,
+    wl_app_resolver_scope,
+)
 from paas_wl.workloads.autoscaling.entities import AutoscalingConfig
 from paasng.platform.applications.constants import ApplicationType
 from paasng.platform.applications.models import ModuleEnvironment
@@ -60,23 +68,16 @@ class ProcessesInfo(NamedTuple):
 
 def list_ns_processes(cluster_name: str, namespace: str) -> ProcessesInfo:
     """list the real-time processes in given namespace"""
-    processes: List[Process] = []
-
-    procs_in_k8s = ns_process_kmodel.list_by_ns_with_mdata(cluster_name, namespace)
-    insts_in_k8s = ns_instance_kmodel.list_by_ns_with_mdata(cluster_name, namespace)
-    for process in procs_in_k8s.items:
-        process.instances = [
-            inst for inst in insts_in_k8s.items if inst.process_type == process.type and inst.app == process.app
-        ]
-        if len(process.instances) == 0:
-            logger.debug("Process %s have no instances", process.type)
-            continue
-        processes.append(process)
-
-    return ProcessesInfo(
-        processes=processes,
+    # The processes and instances share the same apps, resolve every app only once
+    with wl_app_resolver_scope():
+        procs_in_k8s = ns_process_kmodel.list_by_ns_with_mdata(cluster_name, namespace)
+        insts_in_k8s = ns_instance_kmodel.list_by_ns_with_mdata(cluster_name, namespace)
+    return make_processes_info(
+        procs_in_k8s.items,
+        insts_in_k8s.items,
         rv_proc=procs_in_k8s.get_resource_version(),
         rv_inst=insts_in_k8s.get_resource_version(),
+        ignore_idle=True,
     )
 
 
@@ -89,7 +90,6 @@ def list_processes(env: ModuleEnvironment) -> ProcessesInfo:
         1.2 for cnative apps, will get process structure from app model resource
     2. Get process status from `process_kmodel` & `instance_kmodel`
     """
-    processes: List[Process] = []
     procfile = {}
 
     wl_app = env.wl_app
@@ -109,18 +109,43 @@ def list_processes(env: ModuleEnvironment) -> ProcessesInfo:
 
     procs_in_k8s = process_kmodel.list_by_app_with_meta(wl_app)
     insts_in_k8s = instance_kmodel.list_by_app_with_meta(wl_app)
-    for process in procs_in_k8s.items:
-        process.instances = [inst for inst in insts_in_k8s.items if inst.process_type == process.type]
-        processes.append(process)
-
-    if missing := procfile.keys() - {process.type for process in processes}:
-        logger.warning("Process %s in procfile missing in k8s cluster", missing)
-    return ProcessesInfo(
-        processes=processes,
+    info = make_processes_info(
+        procs_in_k8s.items,
+        insts_in_k8s.items,
         rv_proc=procs_in_k8s.get_resource_version(),
         rv_inst=insts_in_k8s.get_resource_version(),
     )
 
+    if missing := procfile.keys() - {process.type for process in info.processes}:
+        logger.warning("Process %s in procfile missing in k8s cluster", missing)
+    return info
+
+
+def make_processes_info(
+    procs: List[Process], insts: List[Instance], rv_proc: str, rv_inst: str, ignore_idle: bool = False
+) -> ProcessesInfo:
+    """Make the processes info by attaching the instances to their processes. The given process objects
+    are copied rather than modified, because they may be shared(e.g. objects in informer's store).
+
+    :param ignore_idle: Whether to ignore the processes which have no instances
+    """
+    # Group the instances by (app, process type) to avoid scanning all instances for every process
+    insts_by_proc: Dict[Tuple[str, str], List[Instance]] = defaultdict(list)
+    for inst in insts:
+        insts_by_proc[(inst.app.name, inst.process_type)].append(inst)
+
+    processes: List[Process] = []
+    for process in procs:
+        instances = list(insts_by_proc.get((process.app.name, process.type), []))
+        if ignore_idle and len(instances) == 0:
+            logger.debug("Process %s have no instances", process.type)
+            continue
+
+        proc_copy = copy.copy(process)
+        proc_copy.instances = instances
+        processes.append(proc_copy)
+    return ProcessesInfo(processes=processes, rv_proc=rv_proc, rv_inst=rv_inst)
+
 
 class ProcController(Protocol):
     """Control app's processes"""
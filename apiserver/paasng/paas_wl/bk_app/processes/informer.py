@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+"""Shared informers for list-watching processes and instances.
+
+An informer holds one list-watch connection for each kind of resources and keeps the latest objects
+in an in-memory store. All the viewers of the same target(a namespace or an app) share one informer,
+events are fanned out to them from the informer, instead of every viewer starting its own watch
+connections.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    Hashable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from django.db import close_old_connections, connection
+
+from paas_wl.infras.resources.kube_res.base import KresAppEntity, ResourceList, WatchEvent
+
+logger = logging.getLogger(__name__)
+
+# The timeout of every upstream watch request, the informer re-watches after it finished
+_UPSTREAM_WATCH_TIMEOUT = 60
+# The informer stops when it has no subscribers for this long
+_IDLE_TIMEOUT = 60
+# Seconds to wait before retrying when the upstream list-watch failed
+_RETRY_INTERVAL = 3
+# Max number of recent events kept for each kind, used for replaying events to new subscribers
+_HISTORY_SIZE = 500
+# Max number of pending events for each subscriber, a slow subscriber will be dropped
+_SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+def parse_resource_version(rv: Union[int, str, None]) -> Optional[int]:
+    """Parse the resource version into an integer, return None if it's not a valid number.
+
+    Although kubernetes documents the resource version as an opaque string, it's always
+    a number in practice(the etcd revision), which makes it comparable.
+    """
+    try:
+        return int(rv) if rv else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class InformerSource:
+    """The upstream of one kind of resources
+
+    :param kind: The kind name, such as "process"
+    :param list_func: A function to list all the resources, returns a ResourceList
+    :param watch_func: A function to watch the resources, accepts (resource_version, timeout_seconds)
+    """
+
+    kind: str
+    list_func: Callable[[], ResourceList]
+    watch_func: Callable[[Optional[int], int], Iterator[WatchEvent]]
+
+
+class ResourceStore:
+    """An in-memory store for one kind of resources, indexed by the name of object and the name of app.
+
+    Besides the objects, the store also keeps the recent events, so that a subscriber who has already
+    listed the resources at a resource version can catch up with the events it missed.
+    """
+
+    def __init__(self, history_size: int = _HISTORY_SIZE):
+        self.synced = False
+        self.resource_version: Optional[int] = None
+
+        self._objects: Dict[str, KresAppEntity] = {}
+        self._app_index: Dict[str, Set[str]] = {}
+        self._history: Deque[Tuple[int, WatchEvent]] = deque(maxlen=history_size)
+        # All the events whose resource version is greater than the floor are kept in history
+        self._history_floor: Optional[int] = None
+
+    def replace(self, items: List[KresAppEntity], resource_version: Optional[int]) -> List[WatchEvent]:
+        """Replace all objects with the result of a fresh list.
+
+        :return: The events which describe the differences between the old and the new objects.
+        """
+        new_objects = {obj.name: obj for obj in items}
+        events: List[WatchEvent] = []
+        # Only compare with the old objects when the store has been listed before
+        if self.resource_version is not None:
+            for name, obj in new_objects.items():
+                old = self._objects.get(name)
+                if old is None:
+                    events.append(WatchEvent(type="ADDED", res_object=obj))
+                elif old.get_resource_version() != obj.get_resource_version():
+                    events.append(WatchEvent(type="MODIFIED", res_object=obj))
+            events.extend(
+                WatchEvent(type="DELETED", res_object=obj)
+                for name, obj in self._objects.items()
+                if name not in new_objects
+            )
+
+        self._objects = {}
+        self._app_index = {}
+        for obj in items:
+            self._put(obj)
+        self._history.clear()
+        self._history_floor = resource_version
+        self.resource_version = resource_version
+        self.synced = True
+        return events
+
+    def apply(self, event: WatchEvent) -> bool:
+        """Apply a watch event to the store
+
+        :return: Whether the event was applied, stale events are ignored.
+        """
+        obj = event.res_object
+        if obj is None:
+            return False
+
+        rv = parse_resource_version(obj.get_resource_version())
+        if rv is not None and self.resource_version is not None and rv <= self.resource_version:
+            return False
+
+        if event.type == "DELETED":
+            self._remove(obj.name)
+        else:
+            self._put(obj)
+
+        if rv is not None:
+            if len(self._history) == self._history.maxlen:
+                self._history_floor = self._history[0][0]
+            self._history.append((rv, event))
+            self.resource_version = rv
+        return True
+
+    def list(self) -> List[KresAppEntity]:
+        return list(self._objects.values())
+
+    def list_by_app(self, app_name: str) -> List[KresAppEntity]:
+        return [self._objects[name] for name in self._app_index.get(app_name, ())]
+
+    def events_since(self, resource_version: Optional[int]) -> Optional[List[WatchEvent]]:
+        """Get the events after the given resource version
+
+        :return: None if the events after the resource version is not fully kept.
+        """
+        if resource_version is None:
+            return []
+        if self._history_floor is None:
+            return None
+        if resource_version < self._history_floor:
+            # The events between the resource version and the floor are unknown(evicted, or happened
+            # before the informer's list), the subscriber must list again
+            return None
+        return [event for rv, event in self._history if rv > resource_version]
+
+    def _put(self, obj: KresAppEntity):
+        self._remove(obj.name)
+        self._objects[obj.name] = obj
+        self._app_index.setdefault(obj.app.name, set()).add(obj.name)
+
+    def _remove(self, name: str):
+        if obj := self._objects.pop(name, None):
+            self._app_index.get(obj.app.name, set()).discard(name)
+
+
+class _Subscriber:
+    """A subscriber of the informer, holds a bounded queue of pending events"""
+
+    def __init__(self, kinds: Set[str], max_size: int = _SUBSCRIBER_QUEUE_SIZE):
+        self.kinds = kinds
+        self.queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self.overflowed = False
+
+    def put(self, kind: str, event: WatchEvent):
+        if kind not in self.kinds or self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+
+class SharedInformer:
+    """Keep watching multiple kinds of resources, and fan out the events to all subscribers.
+
+    The informer starts lazily with the first subscriber and stops itself after it has no
+    subscribers for `idle_timeout` seconds.
+
+    :param key: The unique key of informer
+    :param sources: The upstream sources, one for each kind
+    """
+
+    def __init__(self, key: Hashable, sources: List[InformerSource], idle_timeout: float = _IDLE_TIMEOUT):
+        self.key = key
+        self.sources = sources
+        self.idle_timeout = idle_timeout
+
+        self.stores: Dict[str, ResourceStore] = {s.kind: ResourceStore() for s in sources}
+        self._lock = threading.RLock()
+        self._synced = threading.Condition(self._lock)
+        self._subscribers: List[_Subscriber] = []
+        self._idle_since: Optional[float] = time.monotonic()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        for source in self.sources:
+            thread = threading.Thread(target=self._run_reflector, args=(source,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopped.set()
+
+    def is_stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def is_synced(self) -> bool:
+        with self._lock:
+            return all(store.synced for store in self.stores.values())
+
+    def wait_for_synced(self, timeout: float) -> bool:
+        with self._synced:
+            return self._synced.wait_for(self.is_synced, timeout=timeout)
+
+    def snapshot(self, kind: str, app_name: Optional[str] = None) -> Tuple[List[Any], str]:
+        """Get the objects and the resource version of given kind from the store
+
+        :param app_name: If given, only objects which belongs to the app will be returned
+        """
+        with self._lock:
+            store = self.stores[kind]
+            objs = store.list_by_app(app_name) if app_name else store.list()
+            return objs, str(store.resource_version or "")
+
+    def watch(
+        self, timeout_seconds: int, resource_versions: Mapping[str, Union[int, str, None]]
+    ) -> Generator[WatchEvent, None, None]:
+        """Subscribe to the informer, yield the events after the given resource versions.
+
+        When the events after the given resource version are no longer available, an "ERROR" event is
+        yielded and the stream ends, the caller should list the resources again, this behaves the same as
+        the "410 Gone" response of kubernetes.
+
+        :param timeout_seconds: The stream ends after this long
+        :param resource_versions: The resource version of each kind, events before it will be skipped
+        """
+        deadline = time.monotonic() + timeout_seconds
+        if not self.wait_for_synced(timeout_seconds):
+            return
+
+        subscriber = _Subscriber(kinds=set(resource_versions))
+        # Collect the missed events and register the subscriber atomically, so that no events will be
+        # lost or duplicated.
+        pending: List[WatchEvent] = []
+        expired_kind = None
+        with self._lock:
+            for kind, rv in resource_versions.items():
+                events = self.stores[kind].events_since(parse_resource_version(rv))
+                if events is None:
+                    expired_kind = kind
+                    break
+                pending.extend(events)
+            else:
+                self._subscribers.append(subscriber)
+                self._idle_since = None
+
+        if expired_kind:
+            rv = resource_versions[expired_kind]
+            yield WatchEvent(type="ERROR", error_message=f"resource version {rv} of {expired_kind} is too old")
+            return
+
+        try:
+            yield from pending
+            while (remaining := deadline - time.monotonic()) > 0:
+                if subscriber.overflowed:
+                    yield WatchEvent(type="ERROR", error_message="too many pending events")
+                    return
+                if self._stopped.is_set():
+                    return
+                try:
+                    yield subscriber.queue.get(timeout=min(remaining, 1))
+                except queue.Empty:
+                    continue
+        finally:
+            with self._lock:
+                self._subscribers.remove(subscriber)
+                if not self._subscribers:
+                    self._idle_since = time.monotonic()
+
+    def _broadcast(self, kind: str, events: List[WatchEvent]):
+        for event in events:
+            for subscriber in self._subscribers:
+                subscriber.put(kind, event)
+
+    def _should_stop(self) -> bool:
+        with self._lock:
+            return self._idle_since is not None and time.monotonic() - self._idle_since > self.idle_timeout
+
+    def _run_reflector(self, source: InformerSource):
+        """List and watch one kind of resources until the informer is stopped"""
+        store = self.stores[source.kind]
+        try:
+            while not self._stopped.is_set():
+                if self._should_stop():
+                    logger.debug("Informer %s has been idle for too long, stop it", self.key)
+                    self.stop()
+                    break
+
+                try:
+                    self._list_and_watch(source, store)
+                except Exception:
+                    logger.exception("Informer %s failed to list-watch %s, retrying", self.key, source.kind)
+                    with self._lock:
+                        store.synced = False
+                    self._stopped.wait(_RETRY_INTERVAL)
+                finally:
+                    close_old_connections()
+        finally:
+            # Always close connection in every thread to avoid leaking of database connections
+            connection.close()
+
+    def _list_and_watch(self, source: InformerSource, store: ResourceStore):
+        if not store.synced:
+            res = source.list_func()
+            with self._synced:
+                events = store.replace(res.items, parse_resource_version(res.get_resource_version()))
+                self._broadcast(source.kind, events)
+                self._synced.notify_all()
+
+        for event in source.watch_func(store.resource_version, _UPSTREAM_WATCH_TIMEOUT):
+            if event.type == "ERROR":
+                logger.info("Informer %s got error when watching %s: %s", self.key, source.kind, event.error_message)
+                # List the resources again in next round
+                with self._lock:
+                    store.synced = False
+                return
+
+            with self._lock:
+                if store.apply(event):
+                    self._broadcast(source.kind, [event])
+            if self._stopped.is_set():
+                return
+
+
+class InformerRegistry:
+    """Manage the shared informers in current process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._informers: Dict[Hashable, SharedInformer] = {}
+
+    def get(self, key: Hashable) -> Optional[SharedInformer]:
+        """Get a running informer by key"""
+        with self._lock:
+            informer = self._informers.get(key)
+        if informer and not informer.is_stopped():
+            return informer
+        return None
+
+    def get_or_start(self, key: Hashable, sources_factory: Callable[[], List[InformerSource]]) -> SharedInformer:
+        """Get the running informer by key, start a new one if not exists
+
+        :param sources_factory: A function to make the sources for the new informer
+        """
+        with self._lock:
+            informer = self._informers.get(key)
+            if informer is None or informer.is_stopped():
+                informer = SharedInformer(key, sources_factory())
+                informer.start()
+                self._informers[key] = informer
+            return informer
+
+
+informer_registry = InformerRegistry()
@@ -15,9 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import TYPE_CHECKING, Dict, List, Optional, cast
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Tuple, cast
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
 from kubernetes.dynamic import ResourceInstance
 
 from paas_wl.bk_app.applications.constants import WlAppType
@@ -118,26 +120,132 @@ class InstanceReader(AppEntityReader[Instance, WlApp]):
 instance_kmodel = InstanceReader(Instance)
 
 
-def retrieve_associated_wl_app(labels: Dict[str, str]) -> WlApp:
-    if wl_app_name := labels.get(WLAPP_NAME_ANNO_KEY):
-        try:
-            return WlApp.objects.get(name=wl_app_name)
-        except ObjectDoesNotExist:
-            raise NotAppScopedResource
+# The key to find the environment of a WlApp: (app code, module name, environment)
+_EnvKey = Tuple[str, str, str]
+
+
+class WlAppResolver:
+    """Resolve the WlApps associated with the kubernetes resources by their labels.
+
+    The apps are queried in batches and kept in an identity map, so the same app is always resolved
+    to the same object by a resolver. Use `wl_app_resolver_scope` to share a resolver between multiple
+    list calls, e.g. listing both the processes and instances in a namespace.
+    """
 
-    # 兜底, 根据 app code, module name, environment 查询 wl_app
-    app_code = labels.get(BKAPP_CODE_ANNO_KEY)
-    module_name = labels.get(MODULE_NAME_ANNO_KEY)
-    environment = labels.get(ENVIRONMENT_ANNO_KEY)
+    def __init__(self):
+        self._apps_by_name: Dict[str, Optional[WlApp]] = {}
+        self._apps_by_env: Dict[_EnvKey, Optional[WlApp]] = {}
 
-    if not app_code or not module_name or not environment:
-        raise NotAppScopedResource
+    def resolve(self, labels: Dict[str, str]) -> WlApp:
+        """Resolve the WlApp by labels
+
+        :raise: NotAppScopedResource If no WlApp can be found.
+        """
+        wl_app = self.resolve_many([labels])[0]
+        if wl_app is None:
+            raise NotAppScopedResource
+        return wl_app
+
+    def resolve_many(self, labels_list: List[Dict[str, str]]) -> List[Optional[WlApp]]:
+        """Resolve the WlApps by a list of labels, at most 3 queries are made no matter how many
+        labels are given.
+
+        :return: The WlApp objects in the same order as `labels_list`, None if no WlApp can be found.
+        """
+        names = {name for labels in labels_list if (name := labels.get(WLAPP_NAME_ANNO_KEY))}
+        self._load_by_names(names)
+        # 兜底, 根据 app code, module name, environment 查询 wl_app
+        env_keys = {
+            key for labels in labels_list if not labels.get(WLAPP_NAME_ANNO_KEY) and (key := self._get_env_key(labels))
+        }
+        self._load_by_env_keys(env_keys)
+
+        results: List[Optional[WlApp]] = []
+        for labels in labels_list:
+            if name := labels.get(WLAPP_NAME_ANNO_KEY):
+                results.append(self._apps_by_name[name])
+            elif key := self._get_env_key(labels):
+                results.append(self._apps_by_env[key])
+            else:
+                results.append(None)
+        return results
+
+    def _load_by_names(self, names: Set[str]):
+        names = names - self._apps_by_name.keys()
+        if not names:
+            return
+
+        apps = {app.name: app for app in WlApp.objects.filter(name__in=names)}
+        for name in names:
+            self._apps_by_name[name] = apps.get(name)
+
+    def _load_by_env_keys(self, keys: Set[_EnvKey]):
+        keys = keys - self._apps_by_env.keys()
+        if not keys:
+            return
+
+        cond = Q()
+        for app_code, module_name, environment in keys:
+            cond |= Q(application__code=app_code, module__name=module_name, environment=environment)
+        # The name of the WlApp is the same as the engine app
+        app_names: Dict[_EnvKey, str] = {
+            (app_code, module_name, environment): name
+            for app_code, module_name, environment, name in ModuleEnvironment.objects.filter(cond).values_list(
+                "application__code", "module__name", "environment", "engine_app__name"
+            )
+        }
+        self._load_by_names(set(app_names.values()))
+        for key in keys:
+            name = app_names.get(key)
+            self._apps_by_env[key] = self._apps_by_name[name] if name else None
+
+    @staticmethod
+    def _get_env_key(labels: Dict[str, str]) -> Optional[_EnvKey]:
+        app_code = labels.get(BKAPP_CODE_ANNO_KEY)
+        module_name = labels.get(MODULE_NAME_ANNO_KEY)
+        environment = labels.get(ENVIRONMENT_ANNO_KEY)
+        if not app_code or not module_name or not environment:
+            return None
+        return app_code, module_name, environment
+
+
+_current_wl_app_resolver: ContextVar[Optional[WlAppResolver]] = ContextVar("current_wl_app_resolver", default=None)
+
+
+@contextmanager
+def wl_app_resolver_scope() -> Iterator[WlAppResolver]:
+    """Share a WlAppResolver within the scope, the apps resolved by the readers are reused until the scope
+    exits. Don't keep the scope for a long time, because the resolved apps may be outdated.
+    """
+    if resolver := _current_wl_app_resolver.get():
+        # Reuse the resolver of the outer scope
+        yield resolver
+        return
+
+    resolver = WlAppResolver()
+    token = _current_wl_app_resolver.set(resolver)
     try:
-        return ModuleEnvironment.objects.get(
-            application__code=app_code, module__name=module_name, environment=environment
-        ).wl_app
-    except ObjectDoesNotExist:
-        raise NotAppScopedResource
+        yield resolver
+    finally:
+        _current_wl_app_resolver.reset(token)
+
+
+def get_wl_app_resolver() -> WlAppResolver:
+    """Get the resolver of current scope, a new resolver is returned if not in any scope"""
+    return _current_wl_app_resolver.get() or WlAppResolver()
+
+
+def retrieve_associated_wl_app(labels: Dict[str, str]) -> WlApp:
+    """Retrieve the WlApp associated with the kubernetes resource by labels
+
+    :raise: NotAppScopedResource If no WlApp can be found.
+    """
+    return get_wl_app_resolver().resolve(labels)
+
+
+def retrieve_associated_wl_apps(kube_data_list: List[ResourceInstance]) -> List[Optional[WlApp]]:
+    """Retrieve the WlApps associated with a list of kubernetes resources in batches"""
+    return get_wl_app_resolver().resolve_many([kube_data.metadata.labels or {} for kube_data in kube_data_list])
 
 
 class ProcessNamespaceScopedReader(NamespaceScopedReader[Process, WlApp]):
@@ -155,6 +263,9 @@ class ProcessNamespaceScopedReader(NamespaceScopedReader[Process, WlApp]):
         labels: Dict[str, str] = kube_data.metadata.labels or {}
         return retrieve_associated_wl_app(labels)
 
+    def retrieve_associated_kres_apps(self, kube_data_list: List[ResourceInstance]) -> List[Optional[WlApp]]:
+        return retrieve_associated_wl_apps(kube_data_list)
+
 
 class InstanceNamespaceScopeReader(NamespaceScopedReader[Instance, WlApp]):
     entity_type = Instance
@@ -171,6 +282,9 @@ class InstanceNamespaceScopeReader(NamespaceScopedReader[Instance, WlApp]):
         labels: Dict[str, str] = kube_data.metadata.labels or {}
         return retrieve_associated_wl_app(labels)
 
+    def retrieve_associated_kres_apps(self, kube_data_list: List[ResourceInstance]) -> List[Optional[WlApp]]:
+        return retrieve_associated_wl_apps(kube_data_list)
+
 
 ns_process_kmodel = ProcessNamespaceScopedReader()
 ns_instance_kmodel = InstanceNamespaceScopeReader()
@@ -15,7 +15,8 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import List
+import time
+from typing import Any, Dict, List, Optional
 
 from paas_wl.infras.resources.base.kube_client import CoreDynamicClient
 
@@ -28,22 +29,41 @@ def find_deployment_condition(conditions: List, cond_type: str):
     return None
 
 
-def list_unavailable_deployment(client: CoreDynamicClient) -> List:
-    """查询整个命名空间下的deployments，并通过replica，获取不处于 Available 的 deployments"""
+def list_unavailable_deployment(
+    client: CoreDynamicClient, page_size: int = 500, timeout: Optional[float] = None
+) -> List:
+    """查询整个集群下的 deployments，并通过 replica，获取不处于 Available 的 deployments
+
+    :param page_size: 分页查询时每页的数量，避免一次性拉取集群中的全部 deployments
+    :param timeout: 查询的总超时时间（秒），超时后抛出 TimeoutError
+    """
     unavailable_deployments = []
     kind_deployment = client.get_preferred_resource(kind="Deployment")
-    deployment_list = client.get(kind_deployment)
+    deadline = time.monotonic() + timeout if timeout else None
 
-    for deployment in deployment_list.items:
-        # 判断 Deployment 是否由蓝鲸应用的工作负载
-        if not deployment.metadata.namespace.startswith("bkapp"):
-            continue
+    continue_token = None
+    while True:
+        kwargs: Dict[str, Any] = {"limit": page_size, "_continue": continue_token}
+        if deadline:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("listing deployments timed out")
+            kwargs["_request_timeout"] = remaining
+        deployment_list = client.get(kind_deployment, **kwargs)
 
-        # 只有当前就绪的副本数等于需要的副本数时, Deployment 才完成滚动更新
-        if deployment.status.get("updatedReplicas", None) == deployment.status.get("replicas", None):
-            available_cond = find_deployment_condition(deployment.status.get("conditions") or [], "Available")
-            if available_cond and available_cond.status == "True":
+        for deployment in deployment_list.items:
+            # 判断 Deployment 是否由蓝鲸应用的工作负载
+            if not deployment.metadata.namespace.startswith("bkapp"):
                 continue
-        # 其他情况的 Deployment 均认为 unavailable
-        unavailable_deployments.append(deployment)
-    return unavailable_deployments
+
+            # 只有当前就绪的副本数等于需要的副本数时, Deployment 才完成滚动更新
+            if deployment.status.get("updatedReplicas", None) == deployment.status.get("replicas", None):
+                available_cond = find_deployment_condition(deployment.status.get("conditions") or [], "Available")
+                if available_cond and available_cond.status == "True":
+                    continue
+            # 其他情况的 Deployment 均认为 unavailable
+            unavailable_deployments.append(deployment)
+
+        continue_token = deployment_list.metadata.get("continue")
+        if not continue_token:
+            return unavailable_deployments
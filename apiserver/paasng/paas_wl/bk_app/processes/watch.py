@@ -16,15 +16,18 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
-import queue
-import threading
-from typing import Any, Generator, List, Optional, Union
+from typing import Generator, List, Optional, Union
 
-from django.db import connection
 from django.utils.functional import cached_property
 
 from paas_wl.bk_app.applications.models import WlApp
-from paas_wl.bk_app.processes.controllers import ProcessesInfo, list_ns_processes, list_processes
+from paas_wl.bk_app.processes.controllers import (
+    ProcessesInfo,
+    list_ns_processes,
+    list_processes,
+    make_processes_info,
+)
+from paas_wl.bk_app.processes.informer import InformerSource, informer_registry
 from paas_wl.bk_app.processes.kres_entities import Instance, Process
 from paas_wl.bk_app.processes.readers import (
     ProcessAPIAdapter,
@@ -71,46 +74,55 @@ class ProcInstByEnvListWatcher:
             raise RuntimeError("当前应用不支持 list-watch 进程信息")
         return namespace
 
+    @property
+    def informer_key(self):
+        return ("namespace", self.cluster_name, self.namespace)
+
     def list(self) -> ProcessesInfo:
+        # Read from the shared informer's store if someone is watching the namespace
+        if (informer := informer_registry.get(self.informer_key)) and informer.is_synced():
+            procs, rv_proc = informer.snapshot("process")
+            insts, rv_inst = informer.snapshot("instance")
+            return make_processes_info(procs, insts, rv_proc=rv_proc, rv_inst=rv_inst, ignore_idle=True)
         return list_ns_processes(self.cluster_name, self.namespace)
 
     def watch(
         self, timeout_seconds: int, rv_proc: Optional[int] = None, rv_inst: Optional[int] = None
     ) -> Generator["WatchEvent", None, None]:
-        """Create a watch stream to track app's all process related changes
+        """Create a watch stream to track app's all process related changes, all the watchers of the same
+        namespace share one informer.
 
         :param timeout_seconds: timeout seconds for generated event stream, recommended value: less than 120 seconds
         :param rv_proc: if given, only events with greater resource_version will be returned
         :param rv_inst: same as rv_proc, but for ProcInst type
         """
-
-        event_gens: List = [
-            ns_process_kmodel.watch_by_ns(
-                cluster_name=self.cluster_name,
-                namespace=self.namespace,
-                resource_version=rv_proc,
-                timeout_seconds=timeout_seconds,
+        informer = informer_registry.get_or_start(self.informer_key, self._make_informer_sources)
+        yield from informer.watch(timeout_seconds, {"process": rv_proc, "instance": rv_inst})
+
+    def _make_informer_sources(self) -> List[InformerSource]:
+        cluster_name, namespace = self.cluster_name, self.namespace
+        return [
+            InformerSource(
+                kind="process",
+                list_func=lambda: ns_process_kmodel.list_by_ns_with_mdata(cluster_name, namespace),
+                watch_func=lambda rv, timeout: ns_process_kmodel.watch_by_ns(
+                    cluster_name=cluster_name, namespace=namespace, resource_version=rv, timeout_seconds=timeout
+                ),
             ),
-            ns_instance_kmodel.watch_by_ns(
-                cluster_name=self.cluster_name,
-                namespace=self.namespace,
-                resource_version=rv_inst,
-                timeout_seconds=timeout_seconds,
-                # 由于历史原因, 存量的 Pod 有可能未添加资源类型的 label, 所以不能通过 labels 过滤进程实例
-                # 这导致有可能会过滤到 slug-builder, 所以需要设置 ignore_unknown_objs=True
-                ignore_unknown_objs=True,
+            InformerSource(
+                kind="instance",
+                list_func=lambda: ns_instance_kmodel.list_by_ns_with_mdata(cluster_name, namespace),
+                watch_func=lambda rv, timeout: ns_instance_kmodel.watch_by_ns(
+                    cluster_name=cluster_name,
+                    namespace=namespace,
+                    resource_version=rv,
+                    timeout_seconds=timeout,
+                    # 由于历史原因, 存量的 Pod 有可能未添加资源类型的 label, 所以不能通过 labels 过滤进程实例
+                    # 这导致有可能会过滤到 slug-builder, 所以需要设置 ignore_unknown_objs=True
+                    ignore_unknown_objs=True,
+                ),
             ),
         ]
-        # NOTE: Using of ThreadPoolExecutor/Multi-Threading may cause apiserver connections leak because every
-        # `procinst_kmodel.watch_by_app` call will create a brand new kubernetes client object which holding a urllib3
-        # connection pool manager.
-        #
-        # Use with caution.
-        parallel_gen = ParallelChainedGenerator(event_gens)
-        parallel_gen.start()
-        for event in parallel_gen.iter_results():
-            yield event
-        parallel_gen.close()
 
 
 class ProcInstByModuleEnvListWatcher:
@@ -123,11 +135,22 @@ class ProcInstByModuleEnvListWatcher:
     def wl_app(self) -> WlApp:
         return self.env.wl_app
 
+    @property
+    def informer_key(self):
+        return ("app", self.wl_app.name)
+
     def list(self) -> ProcessesInfo:
         """Build a structured data including processes and instances
 
         :return: A dict with "processes" and "instances"
         """
+        # Read from the shared informer's store if someone is watching the app, so that the resource versions
+        # are consistent with the events of the informer
+        if (informer := informer_registry.get(self.informer_key)) and informer.is_synced():
+            procs, rv_proc = informer.snapshot("process")
+            insts, rv_inst = informer.snapshot("instance")
+            return make_processes_info(procs, insts, rv_proc=rv_proc, rv_inst=rv_inst)
+
         # namespace scoped reader 需要新增的 labels 才能使用, 否则会查询不到进程(需要重新部署才会有新的 labels)
         # 因此 ProcInstByModuleEnvListWatcher 仍然使用 wl_app scoped reader 查询进程信息
         return list_processes(self.env)
@@ -135,91 +158,38 @@ class ProcInstByModuleEnvListWatcher:
     def watch(
         self, timeout_seconds: int, rv_proc: Optional[int] = None, rv_inst: Optional[int] = None
     ) -> Generator["WatchEvent", None, None]:
-        """Create a watch stream to track app's all process related changes
+        """Create a watch stream to track app's all process related changes, all the watchers of the same
+        app share one informer.
 
         :param timeout_seconds: timeout seconds for generated event stream, recommended value: less than 120 seconds
         :param rv_proc: if given, only events with greater resource_version will be returned
         :param rv_inst: same as rv_proc, but for ProcInst type
         """
-        event_gens: List = [
-            process_kmodel.watch_by_app(
-                app=self.wl_app,
-                labels=ProcessAPIAdapter.app_selector(self.wl_app),
-                resource_version=rv_proc,
-                timeout_seconds=timeout_seconds,
+        informer = informer_registry.get_or_start(self.informer_key, self._make_informer_sources)
+        yield from informer.watch(timeout_seconds, {"process": rv_proc, "instance": rv_inst})
+
+    def _make_informer_sources(self) -> List[InformerSource]:
+        wl_app = self.wl_app
+        labels = ProcessAPIAdapter.app_selector(wl_app)
+        return [
+            InformerSource(
+                kind="process",
+                list_func=lambda: process_kmodel.list_by_app_with_meta(wl_app),
+                watch_func=lambda rv, timeout: process_kmodel.watch_by_app(
+                    app=wl_app, labels=labels, resource_version=rv, timeout_seconds=timeout
+                ),
             ),
-            instance_kmodel.watch_by_app(
-                app=self.wl_app,
-                labels=ProcessAPIAdapter.app_selector(self.wl_app),
-                resource_version=rv_inst,
-                timeout_seconds=timeout_seconds,
-                # 由于历史原因, 存量的 Pod 有可能未添加资源类型的 label, 所以不能通过 labels 过滤进程实例
-                # 这导致有可能会过滤到 slug-builder, 所以需要设置 ignore_unknown_objs=True
-                ignore_unknown_objs=True,
+            InformerSource(
+                kind="instance",
+                list_func=lambda: instance_kmodel.list_by_app_with_meta(wl_app),
+                watch_func=lambda rv, timeout: instance_kmodel.watch_by_app(
+                    app=wl_app,
+                    labels=labels,
+                    resource_version=rv,
+                    timeout_seconds=timeout,
+                    # 由于历史原因, 存量的 Pod 有可能未添加资源类型的 label, 所以不能通过 labels 过滤进程实例
+                    # 这导致有可能会过滤到 slug-builder, 所以需要设置 ignore_unknown_objs=True
+                    ignore_unknown_objs=True,
+                ),
             ),
         ]
-        # NOTE: Using of ThreadPoolExecutor/Multi-Threading may cause apiserver connections leak because every
-        # `procinst_kmodel.watch_by_app` call will create a brand new kubernetes client object which holding a urllib3
-        # connection pool manager.
-        #
-        # Use with caution.
-        parallel_gen = ParallelChainedGenerator(event_gens)
-        parallel_gen.start()
-        for event in parallel_gen.iter_results():
-            yield event
-        parallel_gen.close()
-
-
-class ParallelChainedGenerator:
-    """Consumes multiple generators in parallel"""
-
-    def __init__(self, generators: List):
-        self.queue: queue.Queue = queue.Queue()
-        self.generators = generators
-        self.tasks: List = []
-        self._started = False
-
-    def start(self):
-        """Start current generator"""
-        for gen in self.generators:
-            task = threading.Thread(target=self._consume_gen, args=(gen,))
-            task.setDaemon(True)
-            task.start()
-            self.tasks.append(task)
-
-        self._started = True
-
-    def _consume_gen(self, gen: Generator[WatchEvent[Any], None, None]):
-        """Consumes generator and put result to queue"""
-        try:
-            for value in gen:
-                if value.type == "ERROR":
-                    logger.warning("Watch resource error: %s", value.error_message)
-                self.queue.put(value)
-        except Exception:
-            logger.exception("Consuming generator error.")
-        finally:
-            # Always close connection in every thread to avoid leaking of database connections
-            logger.debug("generator stopped")
-            connection.close()
-
-    def iter_results(self) -> Generator[WatchEvent[Any], None, None]:
-        """yield results as a generator"""
-        if not self._started:
-            raise ValueError("current generator is not started yet")
-
-        while True:
-            try:
-                item = self.queue.get(timeout=0.5)
-            except queue.Empty:
-                pass
-            else:
-                yield item
-                self.queue.task_done()
-
-            all_task_finished = all(not task.is_alive() for task in self.tasks)
-            if all_task_finished and self.queue.empty():
-                break
-
-    def close(self):
-        pass
@@ -18,11 +18,10 @@
 from functools import partialmethod
 from typing import List
 
-from django.db.models import Case, QuerySet, When
-
 from paas_wl.infras.cluster.constants import ClusterAllocationPolicyType
 from paas_wl.infras.cluster.entities import AllocationContext, AllocationPolicy
 from paas_wl.infras.cluster.models import Cluster, ClusterAllocationPolicy
+from paas_wl.infras.cluster.registry import ClusterSnapshot, cluster_registry
 
 
 class ClusterAllocator:
@@ -31,7 +30,7 @@ class ClusterAllocator:
     def __init__(self, ctx: AllocationContext):
         self.ctx = ctx
 
-    def list(self) -> QuerySet[Cluster]:
+    def list(self) -> List[Cluster]:
         """获取所有可用的集群"""
         return self._list()
 
@@ -42,29 +41,30 @@ class ClusterAllocator:
         """
         clusters = self._list()
         if cluster_name:
-            clusters = clusters.filter(name=cluster_name)
+            clusters = [c for c in clusters if c.name == cluster_name]
 
-        if c := clusters.first():
-            return c
+        if clusters:
+            return clusters[0]
 
         raise ValueError(f"cluster allocator with ctx {self.ctx} and name {cluster_name} got no cluster")
 
     def check_available(self, cluster_name: str) -> bool:
         """检查指定集群是否可用"""
-        return self._list().filter(name=cluster_name).exists()
+        return any(c.name == cluster_name for c in self._list())
 
     # 快捷方法 -> 根据指定的参数，获取默认集群
     get_default = partialmethod(get, cluster_name=None)
 
-    def _list(self) -> QuerySet[Cluster]:
+    def _list(self) -> List[Cluster]:
         """获取集群列表"""
-        if policy := ClusterAllocationPolicy.objects.filter(tenant_id=self.ctx.tenant_id).first():
-            return self._policy_base_list(policy)
+        snapshot = cluster_registry.get_snapshot()
+        if policy := snapshot.get_allocation_policy(self.ctx.tenant_id):
+            return self._policy_base_list(snapshot, policy)
 
         # 未配置策略，返回空集合
-        return Cluster.objects.none()
+        return []
 
-    def _policy_base_list(self, policy: ClusterAllocationPolicy) -> QuerySet[Cluster]:
+    def _policy_base_list(self, snapshot: ClusterSnapshot, policy: ClusterAllocationPolicy) -> List[Cluster]:
         """根据策略获取集群列表"""
         cluster_names: List[str] | None = None
 
@@ -83,11 +83,9 @@ class ClusterAllocator:
         if not cluster_names:
             raise ValueError(f"no cluster found for policy: {policy}")
 
-        # 由于分配策略认定 cluster_names 中的第一个是默认集群，因此需要特殊排序
-        # ref: https://rednafi.com/python/sort_by_a_custom_sequence_in_django/
-        order = Case(*(When(name=name, then=pos) for pos, name in enumerate(cluster_names)))
-        # 查询并按自定义规则排序
-        return Cluster.objects.filter(name__in=cluster_names).order_by(order)
+        # 由于分配策略认定 cluster_names 中的第一个是默认集群，因此需要按 cluster_names 的顺序返回（忽略重复及不存在的集群）
+        clusters = (snapshot.find(name) for name in dict.fromkeys(cluster_names))
+        return [c for c in clusters if c]
 
     def _get_cluster_names_from_policy(self, policy: AllocationPolicy) -> List[str] | None:
         """根据策略获取集群名称列表"""
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from django.db.models.signals import post_delete, post_save
+
+from paas_wl.infras.cluster.models import APIServer, Cluster, ClusterAllocationPolicy, ClusterAppImageRegistry
+from paas_wl.infras.cluster.registry import cluster_registry
+
+
+def on_cluster_config_changed(sender, *args, **kwargs):
+    """集群及其关联配置变更后，令集群快照失效"""
+    cluster_registry.invalidate()
+
+
+for _model in (Cluster, APIServer, ClusterAllocationPolicy, ClusterAppImageRegistry):
+    post_save.connect(
+        on_cluster_config_changed, sender=_model, dispatch_uid=f"cluster_registry_{_model.__name__}_save"
+    )
+    post_delete.connect(
+        on_cluster_config_changed, sender=_model, dispatch_uid=f"cluster_registry_{_model.__name__}_delete"
+    )
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""进程内的集群配置快照
+
+部署、访问地址渲染等高频路径会反复按名称查询集群，每次查询都需要读取集群及其 APIServer、分配策略等关联数据。
+本模块在进程内维护一份包含全部集群配置的只读快照，查询时直接读取内存中的字典。
+
+快照通过 Redis 中的全局版本号失效：集群相关的数据发生变更时，版本号递增，各进程在下次检查版本时重新加载。
+"""
+
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+
+from paas_wl.infras.cluster.models import APIServer, Cluster, ClusterAllocationPolicy, ClusterAppImageRegistry
+from paasng.core.core.storages.redisdb import get_default_redis
+
+logger = logging.getLogger(__name__)
+
+
+class ClusterSnapshot:
+    """集群配置的只读快照
+
+    NOTE: 快照中的对象由进程内所有调用方共享，只能读取，不能修改或调用 save 方法。
+
+    :param version: 快照对应的全局版本号
+    """
+
+    def __init__(
+        self,
+        version: str,
+        clusters: Iterable[Cluster],
+        policies: Iterable[ClusterAllocationPolicy],
+        image_registries: Iterable[ClusterAppImageRegistry],
+    ):
+        self.version = version
+        self._clusters: Mapping[str, Cluster] = MappingProxyType({c.name: c for c in clusters})
+        self._policies: Mapping[str, ClusterAllocationPolicy] = MappingProxyType({p.tenant_id: p for p in policies})
+
+        names_by_pk = {c.pk: c.name for c in self._clusters.values()}
+        self._image_registries: Mapping[str, ClusterAppImageRegistry] = MappingProxyType(
+            {names_by_pk[r.cluster_id]: r for r in image_registries if r.cluster_id in names_by_pk}
+        )
+
+    @classmethod
+    def load(cls, version: str) -> "ClusterSnapshot":
+        """从数据库中加载快照"""
+        clusters = Cluster.objects.prefetch_related(
+            Prefetch("api_servers", queryset=APIServer.objects.order_by("created"))
+        )
+        return cls(
+            version,
+            clusters=list(clusters),
+            policies=list(ClusterAllocationPolicy.objects.all()),
+            image_registries=list(ClusterAppImageRegistry.objects.all()),
+        )
+
+    def get(self, name: str) -> Cluster:
+        """获取指定名称的集群
+
+        :raises: Cluster.DoesNotExist 集群不存在
+        """
+        if cluster := self._clusters.get(name):
+            return cluster
+        raise Cluster.DoesNotExist(f"cluster {name} does not exist")
+
+    def find(self, name: str) -> Optional[Cluster]:
+        """获取指定名称的集群，不存在时返回 None"""
+        return self._clusters.get(name)
+
+    def list_names(self) -> List[str]:
+        """获取所有集群的名称"""
+        return list(self._clusters.keys())
+
+    def get_allocation_policy(self, tenant_id: str) -> Optional[ClusterAllocationPolicy]:
+        """获取租户的集群分配策略，未配置时返回 None"""
+        return self._policies.get(tenant_id)
+
+    def get_app_image_registry(self, name: str) -> Optional[ClusterAppImageRegistry]:
+        """获取集群的应用镜像仓库配置，未配置时返回 None"""
+        return self._image_registries.get(name)
+
+
+class ClusterRegistry:
+    """线程安全的集群快照注册表，在全局版本号变化时重新加载快照
+
+    为了避免每次查询都访问 Redis，两次版本检查之间至少间隔 `CLUSTER_REGISTRY_VERSION_CHECK_INTERVAL` 秒；
+    当前进程内的变更会直接清理快照，不受该间隔影响。
+    """
+
+    _version_key = "bk_paas:cluster_registry:version"
+    # 无法读取全局版本号时加载的快照所使用的版本，Redis 恢复后会重新加载
+    _unknown_version = ""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ClusterSnapshot] = None
+        self._checked_at = 0.0
+
+    def get_snapshot(self, force_check: bool = False) -> ClusterSnapshot:
+        """获取当前的集群快照
+
+        :param force_check: 是否忽略检查间隔，立即检查全局版本号
+        """
+        snapshot, now = self._snapshot, time.monotonic()
+        if (
+            snapshot is not None
+            and not force_check
+            and now - self._checked_at < settings.CLUSTER_REGISTRY_VERSION_CHECK_INTERVAL
+        ):
+            return snapshot
+
+        version = self._get_version()
+        with self._lock:
+            snapshot = self._snapshot
+            if version is None:
+                # Redis 不可用时无法得知其他进程的变更：优先使用进程内的快照，没有快照或需要立即检查时从数据库加载
+                if snapshot is None or force_check:
+                    snapshot = ClusterSnapshot.load(self._unknown_version)
+                    self._snapshot = snapshot
+            elif snapshot is None or snapshot.version != version:
+                snapshot = ClusterSnapshot.load(version)
+                self._snapshot = snapshot
+            self._checked_at = now
+            return snapshot
+
+    def get(self, name: str) -> Cluster:
+        """获取指定名称的集群
+
+        :raises: Cluster.DoesNotExist 集群不存在
+        """
+        if cluster := self.find(name):
+            return cluster
+        raise Cluster.DoesNotExist(f"cluster {name} does not exist")
+
+    def find(self, name: str) -> Optional[Cluster]:
+        """获取指定名称的集群，不存在时返回 None"""
+        if cluster := self.get_snapshot().find(name):
+            return cluster
+        # 集群可能刚在其他进程中创建，立即检查版本号后再查找一次
+        return self.get_snapshot(force_check=True).find(name)
+
+    def invalidate(self):
+        """集群配置发生变更，递增全局版本号并清理当前进程内的快照
+
+        若当前处于事务中，事务提交后会再次递增版本号，避免其他进程在提交前加载到旧数据。
+        """
+        self._bump_version()
+        transaction.on_commit(self._bump_version, using="workloads")
+
+    def clear(self):
+        """清理当前进程内的快照"""
+        with self._lock:
+            self._snapshot = None
+
+    def _bump_version(self):
+        try:
+            get_default_redis().incr(self._version_key)
+        except Exception:
+            logger.exception("failed to bump the version of cluster registry")
+        self.clear()
+
+    def _get_version(self) -> Optional[str]:
+        """获取全局版本号，Redis 不可用时返回 None"""
+        try:
+            v = get_default_redis().get(self._version_key)
+        except Exception:
+            logger.exception("failed to get the version of cluster registry")
+            return None
+        return v.decode() if v else "0"
+
+
+cluster_registry = ClusterRegistry()
@@ -21,6 +21,7 @@ from paas_wl.infras.cluster.allocator import ClusterAllocator
 from paas_wl.infras.cluster.constants import ClusterFeatureFlag
 from paas_wl.infras.cluster.entities import AllocationContext
 from paas_wl.infras.cluster.models import Cluster
+from paas_wl.infras.cluster.registry import cluster_registry
 from paasng.platform.applications.constants import AppEnvironment
 from paasng.platform.modules.constants import ExposedURLType
 
@@ -36,7 +37,7 @@ def get_exposed_url_type(application: "Application", cluster_name: str | None =
     :param cluster_name: The name of cluster. If not given, use default cluster of the application
     """
     if cluster_name:
-        cluster = Cluster.objects.get(name=cluster_name)
+        cluster = cluster_registry.get(cluster_name)
     else:
         ctx = AllocationContext(
             tenant_id=application.tenant_id,
@@ -56,7 +57,7 @@ class EnvClusterService:
 
     def get_cluster(self) -> Cluster:
         """get the cluster bound to the env, if no specific cluster is bound, return default cluster"""
-        return Cluster.objects.get(name=self.get_cluster_name())
+        return cluster_registry.get(self.get_cluster_name())
 
     def get_cluster_name(self) -> str:
         """get the cluster bound to the env, if no specific cluster is bound, return default cluster name
@@ -78,7 +79,7 @@ class EnvClusterService:
         wl_app = self.env.wl_app
 
         if cluster_name:
-            cluster = Cluster.objects.get(name=cluster_name)
+            cluster = cluster_registry.get(cluster_name)
         else:
             ctx = AllocationContext.from_module_env(self.env)
             # 支持带操作人的集群分配
@@ -19,7 +19,8 @@ from django.conf import settings
 
 from paas_wl.bk_app.applications.models import WlApp
 from paas_wl.infras.cluster.entities import AllocationContext, AppImageRegistry
-from paas_wl.infras.cluster.models import Cluster, ClusterAppImageRegistry
+from paas_wl.infras.cluster.models import Cluster
+from paas_wl.infras.cluster.registry import cluster_registry
 from paas_wl.infras.cluster.shim import ClusterAllocator
 
 
@@ -37,7 +38,7 @@ def get_cluster_by_app(app: WlApp) -> Cluster:
         return ClusterAllocator(AllocationContext.from_wl_app(app)).get_default()
 
     try:
-        return Cluster.objects.get(name=cluster_name)
+        return cluster_registry.get(cluster_name)
     except Cluster.DoesNotExist:
         raise RuntimeError(f"Can not find a cluster called {cluster_name}")
 
@@ -46,7 +47,7 @@ def get_dev_sandbox_cluster(app: WlApp) -> Cluster:
     # 优先使用指定的开发沙箱集群
     if cluster_name := settings.DEV_SANDBOX_CLUSTER:
         try:
-            return Cluster.objects.get(name=cluster_name)
+            return cluster_registry.get(cluster_name)
         except Cluster.DoesNotExist:
             raise RuntimeError(f"dev sandbox cluster called {cluster_name} no found")
 
@@ -60,7 +61,7 @@ def get_image_registry_by_app(app: WlApp) -> AppImageRegistry:
     cluster = get_cluster_by_app(app)
 
     # 如果应用绑定的集群，有配置自定义镜像仓库，则应该使用
-    if reg := ClusterAppImageRegistry.objects.filter(cluster=cluster).first():
+    if reg := cluster_registry.get_snapshot().get_app_image_registry(cluster.name):
         return AppImageRegistry(
             host=reg.host,
             skip_tls_verify=reg.skip_tls_verify,
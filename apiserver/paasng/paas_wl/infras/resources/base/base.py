@@ -18,8 +18,9 @@
 """Base utils for kubernetes scheduler"""
 
 import logging
+import threading
 from functools import lru_cache
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from blue_krill.connections.ha_endpoint_pool import HAEndpointPool
 from django.utils import timezone
@@ -29,6 +30,7 @@ from kubernetes.client.rest import RESTClientObject
 from urllib3.exceptions import HTTPError
 
 from paas_wl.infras.cluster.pools import ContextConfigurationPoolMap
+from paas_wl.infras.resources.base.metrics import KUBE_CLIENT_POOL_COUNTER
 from paasng.core.core.storages.redisdb import get_default_redis
 
 logger = logging.getLogger(__name__)
@@ -114,19 +116,64 @@ def get_all_cluster_names() -> List[str]:
 
 
 def get_client_by_cluster_name(cluster_name: str) -> EnhancedApiClient:
-    """Initialize an kubernetes api client object by given context
+    """Get the kubernetes api client object of given cluster.
 
-    TODO/IMPORTANT: Add cache to reuse connection pools which were maintained by every individual client object
+    The client objects are long-lived and shared between callers, so that the connection pools
+    and the discovery results bound to them can be reused, see `_ClientRegistry` for details.
     """
     if not cluster_name:
         raise ValueError("cluster_name must not be empty")
 
-    if cluster_name not in get_all_cluster_names():
+    last_modified = _GlobalConfigLastModified().get()
+    pool_map = _get_global_configuration_pool(last_modified)
+    if cluster_name not in pool_map:
         # if the context which user want to use do not exist, raise a ValueError
-        raise ValueError(f'context "{cluster_name}" not found in settings, all context: {get_all_cluster_names()}')
+        raise ValueError(f'context "{cluster_name}" not found in settings, all context: {list(pool_map.keys())}')
+
+    return _client_registry.get(last_modified, cluster_name, pool_map[cluster_name])
+
+
+class _ClientRegistry:
+    """A thread-safe registry which holds one `EnhancedApiClient` object for each cluster.
+
+    The registry is bound to a version of the global config(the "last_modified" value), all
+    the client objects will be discarded once the version changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._clients: Dict[str, EnhancedApiClient] = {}
+
+    def get(self, version: str, cluster_name: str, ep_pool: HAEndpointPool) -> EnhancedApiClient:
+        """Get the client object of given cluster, create one if not exists.
+
+        :param version: The version of global config, usually the "last_modified" value.
+        :param cluster_name: The name of cluster.
+        :param ep_pool: The endpoints pool of cluster, used for creating new client.
+        """
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._clients = {}
+
+            if client := self._clients.get(cluster_name):
+                KUBE_CLIENT_POOL_COUNTER.labels(cluster_name=cluster_name, result="hit").inc()
+                return client
+
+            KUBE_CLIENT_POOL_COUNTER.labels(cluster_name=cluster_name, result="miss").inc()
+            client = EnhancedApiClient(ep_pool=ep_pool)
+            self._clients[cluster_name] = client
+            return client
+
+    def clear(self):
+        """Discard all client objects"""
+        with self._lock:
+            self._version = None
+            self._clients = {}
+
 
-    ep_pool = get_global_configuration_pool()[cluster_name]
-    return EnhancedApiClient(ep_pool=ep_pool)
+_client_registry = _ClientRegistry()
 
 
 class _GlobalConfigLastModified:
@@ -42,7 +42,7 @@ from paas_wl.infras.resources.base.exceptions import (
     ResourceDeleteTimeout,
     ResourceMissing,
 )
-from paas_wl.infras.resources.base.kube_client import CoreDynamicClient
+from paas_wl.infras.resources.base.kube_client import dynamic_client_cache
 from paas_wl.utils.kubestatus import parse_pod
 
 logger = logging.getLogger(__name__)
@@ -149,8 +149,7 @@ class BaseKresource:
 
         self.client = _api_client
 
-        # TODO: Add cache
-        self.dynamic_client = CoreDynamicClient(self.client)
+        self.dynamic_client = dynamic_client_cache.get(self.client)
         self.version = self.dynamic_client.version
 
         self.request_timeout = request_timeout or get_default_options().get("request_timeout")
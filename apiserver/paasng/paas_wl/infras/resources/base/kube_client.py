@@ -16,14 +16,19 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
+import time
 from collections import defaultdict
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
+from django.conf import settings
+from kubernetes.client import ApiClient
 from kubernetes.dynamic import DynamicClient, Resource
 from kubernetes.dynamic.discovery import LazyDiscoverer as _LazyDiscoverer
 from kubernetes.dynamic.discovery import ResourceGroup
 from kubernetes.dynamic.exceptions import DynamicApiError, NotFoundError, ResourceNotFoundError, ResourceNotUniqueError
 
+from paas_wl.infras.resources.base.metrics import KUBE_DISCOVERY_COUNTER
+
 logger = logging.getLogger(__name__)
 
 
@@ -148,6 +153,37 @@ class CoreDynamicClient(DynamicClient):
             raise type(e)(e, tb=None)
 
 
+class DynamicClientCache:
+    """Cache `CoreDynamicClient` objects for each api client.
+
+    Initializing a `CoreDynamicClient` triggers API discovery(the server version and the API
+    resources), which costs several round-trips. Because the api clients are long-lived(see
+    `get_client_by_cluster_name`), the dynamic clients built on them can be reused until the
+    TTL expires.
+
+    The dynamic client is stored as an attribute of the api client rather than in a mapping keyed
+    by the api client, because it holds a strong reference to the api client, such a mapping would
+    keep both alive forever. The cached dynamic client is discarded together with the api client.
+    """
+
+    _attr_name = "_cached_dynamic_client"
+
+    def get(self, client: ApiClient) -> CoreDynamicClient:
+        """Get the dynamic client of given api client, do the discovery if no valid cache was found"""
+        now = time.monotonic()
+        cached: Optional[Tuple[float, CoreDynamicClient]] = getattr(client, self._attr_name, None)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        KUBE_DISCOVERY_COUNTER.labels(host=client.configuration.host).inc()
+        dynamic_client = CoreDynamicClient(client)
+        setattr(client, self._attr_name, (now + settings.K8S_DISCOVERY_CACHE_TTL, dynamic_client))
+        return dynamic_client
+
+
+dynamic_client_cache = DynamicClientCache()
+
+
 def patch_resource_field_cls():
     """Path original ResourceField class, raise exception when access a non-existent attribute"""
 
@@ -15,19 +15,10 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-import pytest
+from prometheus_client import Counter
 
-from paas_wl.bk_app.processes.watch import ParallelChainedGenerator, WatchEvent
+# 集群 API Client 复用情况，result: hit/miss
+KUBE_CLIENT_POOL_COUNTER = Counter("kube_client_pool", "", ("cluster_name", "result"))
 
-pytestmark = pytest.mark.django_db
-
-
-class TestParallelChainedGenerators:
-    def test_normal(self):
-        def lazy_range():
-            yield from [WatchEvent(type="ERROR", error_message="") for _ in range(5)]
-
-        gen = ParallelChainedGenerator([lazy_range(), lazy_range()])
-        gen.start()
-        results = list(gen.iter_results())
-        assert len(results) == 10
+# 集群 API 发现（server version / API resources）的实际执行次数
+KUBE_DISCOVERY_COUNTER = Counter("kube_discovery", "", ("host",))
@@ -17,7 +17,9 @@
 
 import datetime
 import logging
+import threading
 import time
+import weakref
 from abc import ABCMeta, abstractmethod
 from collections import OrderedDict
 from contextlib import contextmanager
@@ -33,11 +35,13 @@ from typing import (
     NamedTuple,
     Optional,
     Protocol,
+    Tuple,
     Type,
     TypeAlias,
     TypeVar,
 )
 
+from django.conf import settings
 from kubernetes.client.exceptions import ApiException
 from kubernetes.dynamic import ResourceField, ResourceInstance
 
@@ -141,6 +145,48 @@ class GVKConfig(NamedTuple):
     preferred_apiversion: str
 
 
+def make_gvk_config(kres_client: kres.BaseKresource) -> GVKConfig:
+    """Make the GVK config by the discovery results of given kres object"""
+    return GVKConfig(
+        server_version=kres_client.version["kubernetes"]["gitVersion"],
+        kind=kres_client.kind,
+        preferred_apiversion=kres_client.get_preferred_version(),
+        available_apiversions=kres_client.get_available_versions(),
+    )
+
+
+class GVKConfigCache:
+    """Cache GVK configs for each (api client, kind) pair, because the api client objects are
+    shared per cluster, the cache is also per cluster. Entries expire after `K8S_DISCOVERY_CACHE_TTL`
+    seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: "weakref.WeakKeyDictionary[EnhancedApiClient, Dict[str, Tuple[float, GVKConfig]]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def get(self, client: EnhancedApiClient, kind: str) -> Optional[GVKConfig]:
+        with self._lock:
+            cached = self._data.get(client, {}).get(kind)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+
+    def set(self, client: EnhancedApiClient, kind: str, gvk_config: GVKConfig):
+        expires_at = time.monotonic() + settings.K8S_DISCOVERY_CACHE_TTL
+        with self._lock:
+            self._data.setdefault(client, {})[kind] = (expires_at, gvk_config)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+gvk_config_cache = GVKConfigCache()
+
+
 class BaseTransformer(Generic[KET]):
     """Base class for Serializer and Deserializer
 
@@ -300,6 +346,21 @@ class NamespaceScopedReader(Generic[KET, APP]):
         """
         raise NotImplementedError
 
+    def retrieve_associated_kres_apps(self, kube_data_list: List[ResourceInstance]) -> List[Optional[APP]]:
+        """Detect the corresponding KresApps for a list of kube_data, the default implementation
+        retrieves the apps one by one, override it to retrieve the apps in batches.
+
+        :return: The KresApp objects in the same order as `kube_data_list`, None means the kube_data
+            has no associated KresApp.
+        """
+        results: List[Optional[APP]] = []
+        for kube_data in kube_data_list:
+            try:
+                results.append(self.retrieve_associated_kres_app(kube_data))
+            except NotAppScopedResource:
+                results.append(None)
+        return results
+
     def list_by_ns(self, cluster_name: str, namespace: str, labels: Optional[Dict] = None) -> List[KET]:
         """List resources from a specified namespace while optionally filtering based on labels."""
         return self.list_by_ns_with_mdata(cluster_name, namespace, labels).items
@@ -313,11 +374,12 @@ class NamespaceScopedReader(Generic[KET, APP]):
         with self.kres(cluster_name, api_version=deserializer.get_apiversion()) as kres_client:
             ret = kres_client.ops_batch.list(namespace=namespace, labels=labels)
 
+        kube_data_list = list(ret.items)
+        kres_apps = self.retrieve_associated_kres_apps(kube_data_list)
+
         items = []
-        for kube_data in ret.items:
-            try:
-                kres_app = self.retrieve_associated_kres_app(kube_data)
-            except NotAppScopedResource:
+        for kube_data, kres_app in zip(kube_data_list, kres_apps, strict=True):
+            if kres_app is None:
                 continue
             item = deserializer.deserialize(kres_app, kube_data)
             # Set _kube_data
@@ -409,21 +471,25 @@ class NamespaceScopedReader(Generic[KET, APP]):
         return ret
 
     def _load_gvk_config(self, cluster_name: str) -> GVKConfig:
-        """Load GVK config of current Kind"""
+        """Load GVK config of current Kind, the result is cached per cluster"""
+        client = get_client_by_cluster_name(cluster_name)
+        kind = self.entity_type.Meta.kres_class.kind
+        if gvk_config := gvk_config_cache.get(client, kind):
+            return gvk_config
+
         with self.kres(cluster_name) as kres_client:
-            return GVKConfig(
-                server_version=kres_client.version["kubernetes"]["gitVersion"],
-                kind=kres_client.kind,
-                preferred_apiversion=kres_client.get_preferred_version(),
-                available_apiversions=kres_client.get_available_versions(),
-            )
+            gvk_config = make_gvk_config(kres_client)
+        gvk_config_cache.set(client, kind, gvk_config)
+        return gvk_config
 
     def _kres(self, cluster_name: str, api_version: str = "") -> Iterator[kres.BaseKresource]:
-        """Return kres object as a context manager which was initialized with kubernetes client, will close all
-        connection automatically when exit to avoid connections leaking.
+        """Return kres object as a context manager which was initialized with kubernetes client.
+
+        NOTE: The client is shared by all callers in the process(see `get_client_by_cluster_name`),
+        so it must not be closed when exit.
         """
-        with get_client_by_cluster_name(cluster_name) as client:
-            yield self.entity_type.Meta.kres_class(client, api_version=api_version)
+        client = get_client_by_cluster_name(cluster_name)
+        yield self.entity_type.Meta.kres_class(client, api_version=api_version)
 
     kres: Callable[..., ContextManager["kres.BaseKresource"]] = contextmanager(_kres)
 
@@ -551,15 +617,16 @@ class KresAppEntityReader(Generic[KET, APP]):
         return ret
 
     def _load_gvk_config(self, app: APP) -> GVKConfig:
-        """Load GVK config of current Kind"""
+        """Load GVK config of current Kind, the result is cached per cluster"""
+        client = app.get_kube_api_client()
+        kind = self.entity_type.Meta.kres_class.kind
+        if gvk_config := gvk_config_cache.get(client, kind):
+            return gvk_config
+
         with self.kres(app) as kres_client:
-            # TODO: Add cache to avoid too many api calls
-            return GVKConfig(
-                server_version=kres_client.version["kubernetes"]["gitVersion"],
-                kind=kres_client.kind,
-                preferred_apiversion=kres_client.get_preferred_version(),
-                available_apiversions=kres_client.get_available_versions(),
-            )
+            gvk_config = make_gvk_config(kres_client)
+        gvk_config_cache.set(client, kind, gvk_config)
+        return gvk_config
 
     def _kres(self, app: APP, api_version: str = "") -> Iterator[kres.BaseKresource]:
         """Return kres object as a context manager which was initialized with kubernetes client, will close all
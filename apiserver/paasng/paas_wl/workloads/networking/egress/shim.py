@@ -14,11 +14,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from paas_wl.infras.cluster.models import Cluster
+from paas_wl.infras.cluster.registry import cluster_registry
 from paas_wl.workloads.networking.egress.egress_ips import ClusterEgressIps, get_cluster_egress_ips
 
 
 def get_cluster_egress_info(cluster_name: str) -> ClusterEgressIps:
     """Get cluster's egress info"""
-    cluster = Cluster.objects.get(name=cluster_name)
+    cluster = cluster_registry.get(cluster_name)
     return get_cluster_egress_ips(cluster)
@@ -17,8 +17,12 @@
 
 import base64
 import logging
-from typing import Optional, Tuple
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Set, Tuple
 
+from django.db.models import Count, Max
 from django.utils.encoding import force_bytes, force_str
 
 from paas_wl.bk_app.applications.models import WlApp
@@ -95,7 +99,114 @@ def pick_shared_cert(tenant_id: str, host: str) -> Optional[AppDomainSharedCert]
     :param tenant_id: The tenant_id.
     :param host: Hostname for finding valid cert object.
     """
-    for cert in AppDomainSharedCert.objects.filter(tenant_id=tenant_id):
-        if cert.match_hostname(host):
-            return cert
-    return None
+    return shared_cert_indexes.get(tenant_id).match(host)
+
+
+# The label which a wildcard("*") in CN can match, see `AppDomainSharedCert.match_hostname`
+_WILDCARD_LABEL = re.compile(r"[a-zA-Z0-9-]+")
+
+
+class SharedCertIndex:
+    """An index for finding the shared cert which matches a hostname, the result is the same
+    as calling `match_hostname` on the certs one by one, but without iterating over them.
+
+    - exact CNs("foo.com") are indexed by themselves
+    - wildcard CNs("*.bar.com") are indexed by their suffix("bar.com"), a hostname is looked up
+      by its parent domain, because the wildcard matches exactly one label
+    - other CNs(e.g. "foo-*.bar.com"), which are rare, are matched by regex
+
+    :param certs: the certs, if multiple certs match a hostname, the first one wins.
+    """
+
+    def __init__(self, certs: Iterable[AppDomainSharedCert]):
+        self._exact: Dict[str, Tuple[int, AppDomainSharedCert]] = {}
+        self._wildcard: Dict[str, Tuple[int, AppDomainSharedCert]] = {}
+        self._patterns: List[Tuple[int, Pattern, AppDomainSharedCert]] = []
+        for pos, cert in enumerate(certs):
+            for cn in cert.auto_match_cns.split(";"):
+                if "*" not in cn:
+                    self._exact.setdefault(cn, (pos, cert))
+                elif cn.startswith("*.") and "*" not in cn[2:]:
+                    self._wildcard.setdefault(cn[2:], (pos, cert))
+                else:
+                    pattern = re.escape(cn).replace(r"\*", _WILDCARD_LABEL.pattern)
+                    self._patterns.append((pos, re.compile(f"^{pattern}$"), cert))
+
+    def match(self, host: str) -> Optional[AppDomainSharedCert]:
+        """Find the cert matches the given hostname, return None if no cert matches"""
+        candidates = []
+        if host in self._exact:
+            candidates.append(self._exact[host])
+
+        label, _, parent = host.partition(".")
+        if parent in self._wildcard and _WILDCARD_LABEL.fullmatch(label):
+            candidates.append(self._wildcard[parent])
+
+        # The patterns are in the order of certs, only the first matched one matters
+        for pos, pattern, cert in self._patterns:
+            if pattern.match(host):
+                candidates.append((pos, cert))
+                break
+
+        if not candidates:
+            return None
+        return min(candidates, key=lambda c: c[0])[1]
+
+
+class SharedCertIndexCache:
+    """Cache the shared cert index of each tenant in process.
+
+    Before using a cached index, its version(the count and last updated time of the certs) will be
+    checked by an aggregate query, which is much cheaper than loading all certs, so changes made
+    by other processes are also visible. Inside a `batch()` block, the check only happens once
+    per tenant.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, Tuple[Tuple, SharedCertIndex]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def get(self, tenant_id: str) -> SharedCertIndex:
+        checked: Optional[Set[str]] = getattr(self._local, "checked_tenants", None)
+        cached = self._indexes.get(tenant_id)
+        if cached and checked is not None and tenant_id in checked:
+            return cached[1]
+
+        version = self._get_version(tenant_id)
+        if not cached or cached[0] != version:
+            index = SharedCertIndex(AppDomainSharedCert.objects.filter(tenant_id=tenant_id).order_by("pk"))
+            cached = (version, index)
+            with self._lock:
+                self._indexes[tenant_id] = cached
+
+        if checked is not None:
+            checked.add(tenant_id)
+        return cached[1]
+
+    def invalidate(self, tenant_id: str):
+        with self._lock:
+            self._indexes.pop(tenant_id, None)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Share the indexes in the block without checking their versions again, use it when
+        picking certs for lots of domains, e.g. syncing ingresses."""
+        if getattr(self._local, "checked_tenants", None) is not None:
+            # Nested batch, reuse the outer one
+            yield
+            return
+
+        self._local.checked_tenants = set()
+        try:
+            yield
+        finally:
+            self._local.checked_tenants = None
+
+    @staticmethod
+    def _get_version(tenant_id: str) -> Tuple:
+        r = AppDomainSharedCert.objects.filter(tenant_id=tenant_id).aggregate(cnt=Count("pk"), updated=Max("updated"))
+        return r["cnt"], r["updated"]
+
+
+shared_cert_indexes = SharedCertIndexCache()
@@ -31,7 +31,11 @@ from django.core.management.base import BaseCommand
 from paas_wl.bk_app.applications.models import WlApp
 from paas_wl.infras.cluster.models import Cluster
 from paas_wl.infras.cluster.utils import get_cluster_by_app
-from paas_wl.workloads.networking.ingress.certs import pick_shared_cert, update_or_create_secret_by_cert
+from paas_wl.workloads.networking.ingress.certs import (
+    pick_shared_cert,
+    shared_cert_indexes,
+    update_or_create_secret_by_cert,
+)
 from paas_wl.workloads.networking.ingress.models import AppDomain, AppDomainSharedCert, AppSubpath
 
 
@@ -124,11 +128,12 @@ class Command(BaseCommand):
         # Find related applications, first filter all clusters which configured
         # "sub_path_domains" and it's host matches given certificate.
         cluster_names = []
-        for cluster in Cluster.objects.all():
-            for domain in cluster.ingress_config.sub_path_domains:
-                if pick_shared_cert(cluster.tenant_id, domain.name) == cert:
-                    cluster_names.append(cluster.name)
-                    break
+        with shared_cert_indexes.batch():
+            for cluster in Cluster.objects.all():
+                for domain in cluster.ingress_config.sub_path_domains:
+                    if pick_shared_cert(cluster.tenant_id, domain.name) == cert:
+                        cluster_names.append(cluster.name)
+                        break
 
         if not cluster_names:
             return []
@@ -15,6 +15,7 @@
 # to the current version of the project delivered to anyone in the future.
 
 from paas_wl.core.env import env_is_running
+from paas_wl.workloads.networking.ingress.certs import shared_cert_indexes
 from paas_wl.workloads.networking.ingress.exceptions import DefaultServiceNameRequired, EmptyAppIngressError
 from paas_wl.workloads.networking.ingress.managers import AppDefaultIngresses
 from paasng.platform.applications.models import ModuleEnvironment
@@ -25,8 +26,10 @@ def sync_proc_ingresses(env: ModuleEnvironment):
     if not env_is_running(env):
         return
 
-    for mgr in AppDefaultIngresses(env.wl_app).list():
-        try:
-            mgr.sync()
-        except (DefaultServiceNameRequired, EmptyAppIngressError):
-            continue
+    # All domains of the env share the same cert index
+    with shared_cert_indexes.batch():
+        for mgr in AppDefaultIngresses(env.wl_app).list():
+            try:
+                mgr.sync()
+            except (DefaultServiceNameRequired, EmptyAppIngressError):
+                continue
@@ -112,7 +112,7 @@ class Command(UuidAuditedModel):
 
     @property
     def lines(self):
-        return self.output_stream.lines.all().order_by("created")
+        return self.output_stream.lines.all().order_by("created", "id")
 
     @property
     def split_command(self) -> List[str]:
@@ -15,8 +15,10 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 import logging
+import threading
+import time
 from operator import attrgetter
-from typing import Dict, List, Optional, Protocol, Tuple, Union
+from typing import Any, Callable, Dict, Hashable, List, Optional, Protocol, Set, Tuple, TypeVar, Union
 
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
@@ -42,6 +44,8 @@ from paasng.utils.es_log.search import SmartSearch, SmartTimeRange
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class LogClientProtocol(Protocol):
     """LogClient protocol, all log search backend should abide this protocol"""
@@ -188,12 +192,91 @@ class BKLogClient:
         return resp
 
 
+class ESMetadataCache:
+    """A TTL cache for the metadata of ES, such as the index list and the mappings.
+
+    An expired entry is still served while it is being refreshed in background, it will only be
+    fetched synchronously when it's missing or older than twice the TTL.
+
+    :param max_size: The max number of entries, the oldest entry will be dropped when exceeded
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._refreshing: Set[Hashable] = set()
+
+    def get(self, key: Hashable, fetch: Callable[[], T], ttl: float) -> T:
+        """Get the value of key from cache, use `fetch` to get the latest value if needed
+
+        :param ttl: The seconds before the value expires, a value <= 0 disables the cache
+        """
+        if ttl <= 0:
+            return fetch()
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry:
+            fetched_at, value = entry
+            age = time.monotonic() - fetched_at
+            if age < ttl:
+                return value
+            if age < ttl * 2:
+                self._refresh_in_background(key, fetch)
+                return value
+
+        value = fetch()
+        self._set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), value)
+            while len(self._entries) > self.max_size:
+                # Dict keeps the insertion order, the first one is the oldest
+                self._entries.pop(next(iter(self._entries)))
+
+    def _refresh_in_background(self, key: Hashable, fetch: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _refresh():
+            try:
+                self._set(key, fetch())
+            except Exception:
+                logger.exception("Failed to refresh the es metadata, key: %s", key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_refresh, daemon=True).start()
+
+
+es_metadata_cache = ESMetadataCache()
+
+
 class ESLogClient:
-    """ESLogClient is an implement of LogClientProtocol, the log search backend is official elasticsearch"""
+    """ESLogClient is an implement of LogClientProtocol, the log search backend is official elasticsearch
+
+    :param skip_exact_count: Whether to skip the extra count request when the total hits in the search
+        response is only a lower bound, defaults to `settings.ES_LOG_SKIP_EXACT_COUNT`.
+    """
 
-    def __init__(self, host: ElasticSearchHost):
+    def __init__(self, host: ElasticSearchHost, skip_exact_count: Optional[bool] = None):
         self.host = host
+        self.skip_exact_count = settings.ES_LOG_SKIP_EXACT_COUNT if skip_exact_count is None else skip_exact_count
         self._client = Elasticsearch(hosts=[host.dict(exclude_none=True)])
+        # The identity of ES cluster, used as the prefix of cache keys. The credentials(http_auth) must not be
+        # included because the keys might be written to logs.
+        self._cache_key_prefix = (host.host, host.port, host.url_prefix, host.use_ssl)
 
     def execute_search(self, index: str, search: SmartSearch, timeout: int) -> Tuple[Response, int]:
         """search log from index with body and params, implement with es client"""
@@ -202,6 +285,9 @@ class ESLogClient:
             search.search,
             self._client.search(body=search.to_dict(), index=es_index, params={"request_timeout": timeout}),
         )
+        if self.skip_exact_count:
+            # The total is a lower bound when there are too many hits, which is enough for paging logs
+            return response, response.hits.total.value
         return (response, self._get_response_count(es_index, search, timeout, response))
 
     def execute_scroll_search(
@@ -275,6 +361,13 @@ class ESLogClient:
         # 当前假设同一批次的 index(类似 aa-2021.04.20,aa-2021.04.19) 拥有相同的 mapping, 因此直接获取最新的 mapping
         # 如果同一批次 index mapping 发生变化，可能会导致日志查询为空
         es_index = self._get_indexes(index, time_range, timeout)
+        return es_metadata_cache.get(
+            (self._cache_key_prefix, "mappings", tuple(sorted(es_index))),
+            lambda: self._fetch_mappings(es_index, timeout),
+            ttl=settings.ES_LOG_METADATA_CACHE_TTL,
+        )
+
+    def _fetch_mappings(self, es_index: List[str], timeout: int) -> dict:
         all_mappings = self._client.indices.get_mapping(index=es_index, params={"request_timeout": timeout})
         # 由于手动创建会没有 properties, 需要将无 properties 的 mappings 过滤掉
         all_not_empty_mappings = {
@@ -290,11 +383,11 @@ class ESLogClient:
         """Get indexes within the time_range range from ES"""
         # 为了避免 ES 会提前创建 index 导致无法查询到 mappings, 需要精准控制使用的 indexes
         # 为了避免 ES indexes 未即时清理, 导致查询的 indexes 范围过大, 需要精准控制使用的 indexes
-        # Note: 使用 stats 接口优化查询性能
-        all_indexes = list(
-            self._client.indices.stats(
-                index=index, metric="fielddata", params={"request_timeout": timeout, "level": "indices"}
-            )["indices"].keys()
+        # Note: 使用 stats 接口优化查询性能, 并缓存查询结果
+        all_indexes = es_metadata_cache.get(
+            (self._cache_key_prefix, "indexes", index),
+            lambda: self._fetch_indexes(index, timeout),
+            ttl=settings.ES_LOG_METADATA_CACHE_TTL,
         )
         if filtered_indexes := filter_indexes_by_time_range(all_indexes, time_range=time_range):
             return filtered_indexes
@@ -303,6 +396,14 @@ class ESLogClient:
             raise NoIndexError
         return sorted(all_indexes)[-10:]
 
+    def _fetch_indexes(self, index: str, timeout: int) -> List[str]:
+        """Get all indexes which match the index pattern from ES"""
+        return list(
+            self._client.indices.stats(
+                index=index, metric="fielddata", params={"request_timeout": timeout, "level": "indices"}
+            )["indices"].keys()
+        )
+
     def _get_response_count(
         self, index: Union[str, List[str]], search: SmartSearch, timeout: int, response: Response
     ) -> int:
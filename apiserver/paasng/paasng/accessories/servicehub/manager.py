@@ -39,7 +39,12 @@ from paasng.accessories.servicehub.models import (
     RemoteServiceDBProperties,
     ServiceDBProperties,
 )
-from paasng.accessories.servicehub.remote.manager import RemotePlanMgr, RemoteServiceMgr, RemoteServiceObj
+from paasng.accessories.servicehub.remote.manager import (
+    RemotePlanMgr,
+    RemoteServiceMgr,
+    RemoteServiceObj,
+    prefetch_remote_instances,
+)
 from paasng.accessories.servicehub.remote.store import get_remote_store
 from paasng.accessories.servicehub.services import (
     EngineAppInstanceRel,
@@ -263,11 +268,16 @@ class MixedServiceMgr:
         :param filter_enabled: Whether to filter enabled service instances
         :returns: List of env variable groups.
         """
-        results = []
-        for rel in self.list_provisioned_rels(engine_app, service=service):
-            if filter_enabled and not rel.db_obj.credentials_enabled:
-                continue
+        rels = [
+            rel
+            for rel in self.list_provisioned_rels(engine_app, service=service)
+            if not filter_enabled or rel.db_obj.credentials_enabled
+        ]
+        # Retrieve the remote instances concurrently instead of one by one
+        prefetch_remote_instances(rels)
 
+        results = []
+        for rel in rels:
             inst = rel.get_instance()
             results.append(
                 EnvVariableGroup(
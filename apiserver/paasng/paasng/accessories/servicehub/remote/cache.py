@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import json
+import logging
+from typing import Dict, Optional
+
+from blue_krill.encrypt.handler import EncryptHandler
+from django.conf import settings
+
+from paasng.core.core.storages.redisdb import get_default_redis
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteInstanceCache:
+    """Cache the details of remote service instances, use redis as backend.
+
+    The details include credentials, so they are always encrypted before being stored.
+    """
+
+    key_prefix = "bk_paas:servicehub:remote_instance"
+
+    def __init__(self):
+        self.redis_db = get_default_redis()
+        self.handler = EncryptHandler()
+
+    @property
+    def expires_in(self) -> int:
+        return settings.REMOTE_SERVICE_INSTANCE_CACHE_TTL
+
+    def get(self, instance_id: str) -> Optional[Dict]:
+        if self.expires_in <= 0:
+            return None
+        try:
+            value = self.redis_db.get(self._make_key(instance_id))
+            if value is None:
+                return None
+            return json.loads(self.handler.decrypt(value.decode()))
+        except Exception:
+            logger.exception("Failed to get remote instance %s from cache", instance_id)
+            return None
+
+    def set(self, instance_id: str, data: Dict):
+        if self.expires_in <= 0:
+            return
+        try:
+            value = self.handler.encrypt(json.dumps(data))
+            self.redis_db.setex(self._make_key(instance_id), self.expires_in, value)
+        except Exception:
+            logger.exception("Failed to set remote instance %s to cache", instance_id)
+
+    def invalidate(self, instance_id: str):
+        try:
+            self.redis_db.delete(self._make_key(instance_id))
+        except Exception:
+            logger.exception("Failed to invalidate remote instance %s in cache", instance_id)
+
+    def _make_key(self, instance_id: str) -> str:
+        return f"{self.key_prefix}:{instance_id}"
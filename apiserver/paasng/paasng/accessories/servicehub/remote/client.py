@@ -18,14 +18,16 @@
 """Client for remote services"""
 
 import logging
+import threading
 from contextlib import contextmanager
 from dataclasses import MISSING, dataclass
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from urllib.parse import urljoin
 
 import requests
 from blue_krill.auth.jwt import ClientJWTAuth, JWTAuthConf
 from blue_krill.text import desensitize_url
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
 from .exceptions import RClientResponseError, RemoteClientError
@@ -98,6 +100,32 @@ class RemoteSvcConfig:
         return f"{self.name} [{self.endpoint_url}]"
 
 
+class _SessionPool:
+    """Keep one session for each remote service config, so that connections can be reused"""
+
+    # The max number of connections to be kept for each remote service
+    pool_maxsize = 20
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, str], requests.Session] = {}
+
+    def get(self, config: RemoteSvcConfig) -> requests.Session:
+        key = (config.name, config.endpoint_url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[key] = session
+            return session
+
+
+_session_pool = _SessionPool()
+
+
 @contextmanager
 def wrap_request_exc(client: "RemoteServiceClient"):
     try:
@@ -121,6 +149,7 @@ class RemoteServiceClient:
     def __init__(self, config: RemoteSvcConfig):
         self.config = config
         self.auth = ClientJWTAuth(config.get_jwt_auth_conf())
+        self.session = _session_pool.get(config)
 
     @staticmethod
     def validate_resp(resp: requests.Response):
@@ -139,7 +168,7 @@ class RemoteServiceClient:
         :return: {"version": ...}
         """
         with wrap_request_exc(self):
-            resp = requests.get(self.config.meta_info_url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
+            resp = self.session.get(self.config.meta_info_url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
             self.validate_resp(resp)
             return resp.json()
 
@@ -150,7 +179,7 @@ class RemoteServiceClient:
         :return: [<service dict>, ...]
         """
         with wrap_request_exc(self):
-            resp = requests.get(self.config.index_url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
+            resp = self.session.get(self.config.index_url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
             self.validate_resp(resp)
             return resp.json()
 
@@ -161,7 +190,7 @@ class RemoteServiceClient:
         :return: None
         """
         with wrap_request_exc(self):
-            resp = requests.put(
+            resp = self.session.put(
                 self.config.create_service_url, json=data, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT
             )
             self.validate_resp(resp)
@@ -174,7 +203,7 @@ class RemoteServiceClient:
         """
         url = self.config.update_service_url.format(service_id=service_id)
         with wrap_request_exc(self):
-            resp = requests.put(url, json=data, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
+            resp = self.session.put(url, json=data, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
             self.validate_resp(resp)
 
     def create_plan(self, service_id: str, data: Dict):
@@ -186,7 +215,7 @@ class RemoteServiceClient:
         url = self.config.create_plan_url
         data["service"] = service_id
         with wrap_request_exc(self):
-            resp = requests.post(url, json=data, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
+            resp = self.session.post(url, json=data, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
             self.validate_resp(resp)
 
     def update_plan(self, service_id: str, plan_id: str, data: Dict):
@@ -198,7 +227,7 @@ class RemoteServiceClient:
         url = self.config.update_plan_url.format(plan_id=plan_id)
         data["service"] = service_id
         with wrap_request_exc(self):
-            resp = requests.put(url, json=data, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
+            resp = self.session.put(url, json=data, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
             self.validate_resp(resp)
 
     def provision_instance(self, service_id: str, plan_id: str, instance_id: str, params: Dict) -> Dict:
@@ -210,7 +239,7 @@ class RemoteServiceClient:
         url = self.config.create_instance_url.format(service_id=service_id, instance_id=instance_id)
         payload = {"plan_id": plan_id, "params": params}
         with wrap_request_exc(self):
-            resp = requests.post(url, json=payload, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
+            resp = self.session.post(url, json=payload, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
             self.validate_resp(resp)
             return resp.json()
 
@@ -222,7 +251,7 @@ class RemoteServiceClient:
         """
         url = self.config.retrieve_instance_url.format(instance_id=instance_id)
         with wrap_request_exc(self):
-            resp = requests.get(url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
+            resp = self.session.get(url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
             self.validate_resp(resp)
             return resp.json()
 
@@ -234,7 +263,7 @@ class RemoteServiceClient:
         """
         url = self.config.retrieve_instance_to_be_deleted_url.format(instance_id=instance_id, to_be_deleted=True)
         with wrap_request_exc(self):
-            resp = requests.get(url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
+            resp = self.session.get(url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
             self.validate_resp(resp)
             return resp.json()
 
@@ -246,7 +275,7 @@ class RemoteServiceClient:
         """
         url = self.config.retrieve_instance_by_name_url.format(service_id=service_id, name=instance_name)
         with wrap_request_exc(self):
-            resp = requests.get(url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
+            resp = self.session.get(url, auth=self.auth, timeout=self.REQUEST_LIST_TIMEOUT)
             self.validate_resp(resp)
             return resp.json()
 
@@ -261,7 +290,7 @@ class RemoteServiceClient:
             url = self.config.delete_instance_url.format(instance_id=instance_id)
 
         with wrap_request_exc(self):
-            resp = requests.delete(url, auth=self.auth, timeout=self.REQUEST_DELETE_TIMEOUT)
+            resp = self.session.delete(url, auth=self.auth, timeout=self.REQUEST_DELETE_TIMEOUT)
             self.validate_resp(resp)
             return
 
@@ -273,7 +302,7 @@ class RemoteServiceClient:
         url = self.config.delete_instance_url.format(instance_id=instance_id)
 
         with wrap_request_exc(self):
-            resp = requests.delete(url, auth=self.auth, timeout=self.REQUEST_DELETE_TIMEOUT)
+            resp = self.session.delete(url, auth=self.auth, timeout=self.REQUEST_DELETE_TIMEOUT)
             self.validate_resp(resp)
             return
 
@@ -284,20 +313,20 @@ class RemoteServiceClient:
         """
         url = self.config.update_inst_config_url.format(instance_id=instance_id)
         with wrap_request_exc(self):
-            resp = requests.put(url, json=config, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
+            resp = self.session.put(url, json=config, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
             self.validate_resp(resp)
             return resp.json()
 
     def create_client_side_instance(self, service_id: str, instance_id: str, params: Dict):
         url = self.config.create_client_side_instance_url.format(service_id=service_id, instance_id=instance_id)
         with wrap_request_exc(self):
-            resp = requests.post(url, json=params, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
+            resp = self.session.post(url, json=params, auth=self.auth, timeout=self.REQUEST_CREATE_TIMEOUT)
             self.validate_resp(resp)
             return resp.json()
 
     def destroy_client_side_instance(self, instance_id: str):
         url = self.config.destroy_client_side_instance_url.format(instance_id=instance_id)
         with wrap_request_exc(self):
-            resp = requests.delete(url, auth=self.auth, timeout=self.REQUEST_DELETE_TIMEOUT)
+            resp = self.session.delete(url, auth=self.auth, timeout=self.REQUEST_DELETE_TIMEOUT)
             self.validate_resp(resp)
             return
@@ -17,14 +17,17 @@
 
 """The universal services module, handles both services from database and remote REST API"""
 
+import copy
 import json
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass, field
 from typing import TYPE_CHECKING, Any, Dict, Generator, Iterable, Iterator, List, Optional, cast
 
 import arrow
 import cattrs
+from django.conf import settings
 from django.db.models import QuerySet
 from django.db.transaction import atomic
 from django.utils.functional import cached_property
@@ -43,6 +46,7 @@ from paasng.accessories.servicehub.models import (
     RemoteServiceModuleAttachment,
     UnboundRemoteServiceEngineAppAttachment,
 )
+from paasng.accessories.servicehub.remote.cache import RemoteInstanceCache
 from paasng.accessories.servicehub.remote.client import RemoteServiceClient
 from paasng.accessories.servicehub.remote.collector import refresh_remote_service
 from paasng.accessories.servicehub.remote.exceptions import (
@@ -218,6 +222,9 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
         self.remote_config = self.store.get_source_config(str(self.db_obj.service_id))
         self.remote_client = RemoteServiceClient(self.remote_config)
 
+        # The instance details retrieved from remote service
+        self._instance_data: Optional[Dict] = None
+
     def get_service(self) -> RemoteServiceObj:
         return self.mgr.get(str(self.db_obj.service_id))
 
@@ -285,6 +292,8 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
             self.remote_client.update_instance_config(instance_id, config={"paas_app_info": paas_app_info})
         except Exception:
             logger.exception(f"Error when updating instance config for {instance_id}")
+        finally:
+            self._invalidate_instance_data()
 
     def recycle_resource(self):
         """对于 remote service 我们默认其已经具备了回收的能力"""
@@ -294,6 +303,8 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
             except Exception as e:
                 logger.exception("Error occurs during recycling")
                 raise exceptions.SvcInstanceDeleteError("unable to delete instance") from e
+            finally:
+                self._invalidate_instance_data()
 
             if self.remote_client.config.prefer_async_delete:
                 UnboundRemoteServiceEngineAppAttachment.objects.create(
@@ -313,7 +324,8 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
             raise ValueError("relationship is not provisioned yet")
 
         # TODO: failure tolerance
-        instance_data = self.remote_client.retrieve_instance(str(self.db_obj.service_instance_id))
+        # Make a copy because the data will be modified when creating the instance object
+        instance_data = copy.deepcopy(self.retrieve_instance_data())
         # TODO: More data validations
         if not instance_data.get("uuid") == str(self.db_obj.service_instance_id):
             raise exceptions.SvcInstanceNotAvailableError("uuid in data does not match")
@@ -330,6 +342,23 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
             create_time=create_time.datetime,
         )
 
+    def retrieve_instance_data(self) -> Dict:
+        """Retrieve the instance details from remote service, the result is cached for a short time"""
+        if self._instance_data is None:
+            instance_id = str(self.db_obj.service_instance_id)
+            cache = RemoteInstanceCache()
+            data = cache.get(instance_id)
+            if data is None:
+                data = self.remote_client.retrieve_instance(instance_id)
+                cache.set(instance_id, data)
+            self._instance_data = data
+        return self._instance_data
+
+    def _invalidate_instance_data(self):
+        self._instance_data = None
+        if self.db_obj.service_instance_id:
+            RemoteInstanceCache().invalidate(str(self.db_obj.service_instance_id))
+
     def render_params(self, params_tmpl: Dict) -> Dict:
         """Render params dict by current rel's context, Available keys:
 
@@ -377,6 +406,43 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
         raise RuntimeError("Plan not found")
 
 
+def prefetch_remote_instances(rels: Iterable[EngineAppInstanceRel]):
+    """Retrieve the details of remote instances concurrently, so that the following `get_instance()`
+    calls on these rels will not request remote services one by one.
+
+    Failures are ignored here, the instance will be retrieved again when calling `get_instance()`.
+    """
+    cache = RemoteInstanceCache()
+    pending: List[RemoteEngineAppInstanceRel] = []
+    for rel in rels:
+        if not isinstance(rel, RemoteEngineAppInstanceRel) or not rel.is_provisioned() or rel._instance_data:
+            continue
+        if data := cache.get(str(rel.db_obj.service_instance_id)):
+            rel._instance_data = data
+        else:
+            pending.append(rel)
+
+    if not pending:
+        return
+
+    def _retrieve(rel: RemoteEngineAppInstanceRel) -> Optional[Dict]:
+        # Only request remote service in sub threads, do not touch the database
+        try:
+            return rel.remote_client.retrieve_instance(str(rel.db_obj.service_instance_id))
+        except Exception:
+            logger.warning("Failed to prefetch remote instance %s", rel.db_obj.service_instance_id, exc_info=True)
+            return None
+
+    max_workers = min(len(pending), settings.REMOTE_SERVICE_FETCH_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_retrieve, pending))
+
+    for rel, data in zip(pending, results, strict=True):
+        if data is not None:
+            rel._instance_data = data
+            cache.set(str(rel.db_obj.service_instance_id), data)
+
+
 class UnboundRemoteEngineAppInstanceRel(UnboundEngineAppInstanceRel):
     """Unbound relationship between EngineApp and remote provisioned instance"""
 
@@ -480,6 +546,8 @@ class RemotePlainInstanceMgr(PlainInstanceMgr):
             self.remote_client.update_instance_config(str(instance_id), config={"paas_app_info": paas_app_info})
         except Exception:
             logger.exception(f"Error when updating instance config for {instance_id}")
+        finally:
+            RemoteInstanceCache().invalidate(str(instance_id))
 
     def is_provisioned(self):
         return self.db_obj.service_instance_id is not None
@@ -15,12 +15,19 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from paasng.bk_plugins.pluginscenter.constants import PluginReleaseStatus, PluginStatus
 from paasng.bk_plugins.pluginscenter.features import PluginFeatureFlag, PluginFeatureFlagsManager
-from paasng.bk_plugins.pluginscenter.models import PluginReleaseStage
+from paasng.bk_plugins.pluginscenter.models import (
+    PluginBasicInfoDefinition,
+    PluginConfigInfoDefinition,
+    PluginDefinition,
+    PluginMarketInfoDefinition,
+    PluginReleaseStage,
+)
+from paasng.bk_plugins.pluginscenter.schemas import plugin_schema_cache
 from paasng.bk_plugins.pluginscenter.thirdparty import release as release_api
 
 
@@ -62,3 +69,17 @@ def update_release_status_when_stage_status_change(sender, instance: PluginRelea
         release_api.update_release(
             pd=release.plugin.pd, instance=release.plugin, version=release, operator=instance.operator
         )
+
+
+def on_plugin_definition_changed(sender, *args, **kwargs):
+    """插件类型定义变更后，令已缓存的表单范式失效"""
+    plugin_schema_cache.invalidate()
+
+
+for _model in (PluginDefinition, PluginBasicInfoDefinition, PluginMarketInfoDefinition, PluginConfigInfoDefinition):
+    post_save.connect(
+        on_plugin_definition_changed, sender=_model, dispatch_uid=f"plugin_schemas_{_model.__name__}_save"
+    )
+    post_delete.connect(
+        on_plugin_definition_changed, sender=_model, dispatch_uid=f"plugin_schemas_{_model.__name__}_delete"
+    )
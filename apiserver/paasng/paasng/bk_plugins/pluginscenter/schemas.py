@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""插件类型定义的表单范式
+
+创建插件、编辑插件信息等页面会反复读取插件类型定义的各类表单范式，生成范式需要查询多张定义表并执行序列化，
+而插件类型定义只在管理员修改时才会变化。本模块将生成好的范式文档按「范式类型 + 插件类型 + 语言」缓存在进程内及 Redis 中，
+并为每份文档计算 ETag，便于前端以条件请求重新验证。
+
+缓存通过 Redis 中的全局版本号失效：插件类型定义发生变更时，版本号递增，所有进程中已缓存的范式随之失效。
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cattr
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.translation import get_language
+
+from paasng.bk_plugins.pluginscenter import constants, serializers, shim
+from paasng.bk_plugins.pluginscenter.models import (
+    PluginBasicInfoDefinition,
+    PluginDefinition,
+    PluginMarketInfoDefinition,
+)
+from paasng.core.core.storages.redisdb import get_default_redis
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CompiledSchema:
+    """生成好的范式文档
+
+    :param data: 范式文档的内容
+    :param body: 范式文档序列化后的 JSON
+    :param etag: 由 JSON 内容计算的 ETag（带引号）
+    """
+
+    data: Any
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_data(cls, data: Any) -> "CompiledSchema":
+        return cls.from_body(json.dumps(data, cls=DjangoJSONEncoder).encode())
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "CompiledSchema":
+        etag = '"{}"'.format(hashlib.sha256(body).hexdigest()[:32])
+        return cls(data=json.loads(body), body=body, etag=etag)
+
+
+class PluginSchemaCache:
+    """线程安全的范式缓存，先读取进程内缓存，再读取 Redis，都未命中时生成范式并写入缓存
+
+    每次读取都会检查一次全局版本号，因此插件类型定义的变更会立即生效。
+    """
+
+    _version_key = "bk_paas:plugin_schemas:version"
+    _key_prefix = "bk_paas:plugin_schemas"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._items: Dict[Tuple[str, str, str], CompiledSchema] = {}
+
+    def get(self, kind: str, pd_id: str, compile_func: Callable[[], Any]) -> CompiledSchema:
+        """获取当前语言下的范式文档
+
+        :param kind: 范式类型
+        :param pd_id: 插件类型 ID，与具体插件类型无关的范式传入空字符串
+        :param compile_func: 用于生成范式文档的函数，抛出的异常（如 Http404）不会被缓存
+        """
+        language = get_language() or settings.LANGUAGE_CODE
+        key = (kind, pd_id, language)
+        version = self._get_version()
+        if version is None:
+            # Redis 不可用时无法得知其他进程的变更，直接生成范式，不使用缓存
+            return CompiledSchema.from_data(compile_func())
+
+        with self._lock:
+            if self._version != version:
+                self._version, self._items = version, {}
+            if item := self._items.get(key):
+                return item
+
+        redis_key = f"{self._key_prefix}:{version}:{kind}:{pd_id}:{language}"
+        if body := self._get_body(redis_key):
+            item = CompiledSchema.from_body(body)
+        else:
+            item = CompiledSchema.from_data(compile_func())
+            self._set_body(redis_key, item.body)
+
+        with self._lock:
+            # 生成期间版本号可能已变化，此时不再写入进程内缓存
+            if self._version == version:
+                self._items[key] = item
+        return item
+
+    def invalidate(self):
+        """插件类型定义发生变更，递增全局版本号
+
+        若当前处于事务中，事务提交后会再次递增版本号，避免其他进程在提交前缓存旧的范式。
+        """
+        self._bump_version()
+        transaction.on_commit(self._bump_version)
+
+    def clear(self):
+        """清理当前进程内的缓存"""
+        with self._lock:
+            self._version, self._items = None, {}
+
+    def _bump_version(self):
+        try:
+            get_default_redis().incr(self._version_key)
+        except Exception:
+            logger.exception("failed to bump the version of plugin schemas")
+        self.clear()
+
+    def _get_version(self) -> Optional[str]:
+        """获取全局版本号，Redis 不可用时返回 None"""
+        try:
+            v = get_default_redis().get(self._version_key)
+        except Exception:
+            logger.exception("failed to get the version of plugin schemas")
+            return None
+        return v.decode() if v else "0"
+
+    def _get_body(self, redis_key: str) -> Optional[bytes]:
+        try:
+            return get_default_redis().get(redis_key)
+        except Exception:
+            logger.exception("failed to get the plugin schema from cache")
+            return None
+
+    def _set_body(self, redis_key: str, body: bytes):
+        try:
+            get_default_redis().set(redis_key, body, ex=settings.PLUGIN_SCHEMA_CACHE_TIMEOUT)
+        except Exception:
+            logger.exception("failed to set the plugin schema to cache")
+
+
+plugin_schema_cache = PluginSchemaCache()
+
+
+def get_plugins_schema() -> CompiledSchema:
+    """获取所有插件类型的创建插件表单范式"""
+    return plugin_schema_cache.get("plugins", "", _compile_plugins_schema)
+
+
+def get_market_schema(pd_id: str) -> CompiledSchema:
+    """获取插件类型的市场信息表单范式，不包含需要实时查询的市场分类"""
+    return plugin_schema_cache.get("market", pd_id, lambda: _compile_market_schema(pd_id))
+
+
+def get_basic_info_schema(pd_id: str) -> CompiledSchema:
+    """获取插件类型的基本信息表单范式"""
+    return plugin_schema_cache.get("basic_info", pd_id, lambda: _compile_basic_info_schema(pd_id))
+
+
+def get_config_schema(pd_id: str) -> CompiledSchema:
+    """获取插件类型的配置管理表单范式，未定义配置管理时为空字典"""
+    return plugin_schema_cache.get("config", pd_id, lambda: _compile_config_schema(pd_id))
+
+
+def _compile_plugins_schema() -> List[Dict]:
+    schemas = []
+    for pd in PluginDefinition.objects.select_related("basic_info_definition").order_by("created"):
+        basic_info_definition = pd.basic_info_definition
+        pd_data = serializers.PluginDefinitionSLZ(pd).data
+        basic_info = serializers.PluginBasicInfoDefinitionSLZ(basic_info_definition).data
+
+        extra_fields = basic_info_definition.extra_fields
+        # 当前语言为英文，且定义了英文字段则返回英文字段的定义
+        if get_language() == "en" and basic_info_definition.extra_fields:
+            extra_fields = basic_info_definition.extra_fields_en
+        schemas.append(
+            {
+                "plugin_type": pd_data,
+                "basic_info": basic_info,
+                "schema": {
+                    "id": basic_info_definition.id_schema.dict(exclude_unset=True),
+                    "name": basic_info_definition.name_schema.dict(exclude_unset=True),
+                    "init_templates": cattr.unstructure(basic_info_definition.init_templates),
+                    "release_method": basic_info_definition.release_method,
+                    "repository_group": basic_info_definition.repository_group,
+                    "repository_template": shim.build_repository_template(pd, basic_info_definition.repository_group),
+                    "extra_fields": cattr.unstructure(extra_fields),
+                    "extra_fields_order": cattr.unstructure(basic_info_definition.extra_fields_order),
+                },
+            }
+        )
+    return schemas
+
+
+def _compile_market_schema(pd_id: str) -> Dict:
+    market_info_definition = get_object_or_404(PluginMarketInfoDefinition, pd__identifier=pd_id)
+    readonly = market_info_definition.storage == constants.MarketInfoStorageType.THIRD_PARTY
+    extra_fields = market_info_definition.extra_fields
+    # 当前语言为英文，且定义了英文字段则返回英文字段的定义
+    if get_language() == "en" and market_info_definition.extra_fields:
+        extra_fields = market_info_definition.extra_fields_en
+    return {
+        "schema": {
+            "extra_fields": cattr.unstructure(market_info_definition.extra_fields),
+            "extra_fields_order": cattr.unstructure(extra_fields),
+        },
+        "readonly": readonly,
+    }
+
+
+def _compile_basic_info_schema(pd_id: str) -> Dict:
+    basic_info_definition = get_object_or_404(PluginBasicInfoDefinition, pd__identifier=pd_id)
+    return {
+        "id": basic_info_definition.id_schema.dict(exclude_unset=True),
+        "name": basic_info_definition.name_schema.dict(exclude_unset=True),
+        "extra_fields": cattr.unstructure(basic_info_definition.extra_fields),
+        "extra_fields_order": cattr.unstructure(basic_info_definition.extra_fields_order),
+    }
+
+
+def _compile_config_schema(pd_id: str) -> Dict:
+    pd = get_object_or_404(PluginDefinition.objects.select_related("config_definition"), identifier=pd_id)
+    # 部分插件未定义配置管理
+    if not hasattr(pd, "config_definition"):
+        return {}
+    return serializers.PluginConfigSchemaSLZ(pd.config_definition).data
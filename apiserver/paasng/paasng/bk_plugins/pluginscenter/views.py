@@ -24,8 +24,9 @@ from bkpaas_auth.models import user_id_encoder
 from django.conf import settings
 from django.db.models import Case, IntegerField, Value, When
 from django.db.transaction import atomic
+from django.http.response import HttpResponseBase
 from django.shortcuts import get_object_or_404
-from django.utils.translation import get_language
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.translation import gettext_lazy as _
 from drf_yasg.utils import swagger_auto_schema
 from elasticsearch.exceptions import RequestError
@@ -37,7 +38,7 @@ from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ViewSet
 
 from paasng.bk_plugins.bk_plugins.constants import AI_AGENT_TEMPLATE_PREFIX
-from paasng.bk_plugins.pluginscenter import constants, openapi_docs, serializers, shim
+from paasng.bk_plugins.pluginscenter import constants, openapi_docs, schemas, serializers, shim
 from paasng.bk_plugins.pluginscenter import log as log_api
 from paasng.bk_plugins.pluginscenter.bk_devops.client import BkDevopsClient
 from paasng.bk_plugins.pluginscenter.bk_devops.exceptions import BkDevopsApiError, BkDevopsGatewayServiceError
@@ -91,86 +92,43 @@ logger = logging.getLogger(__name__)
 
 
 class SchemaViewSet(ViewSet):
+    """插件类型定义的各类表单范式，范式由 `schemas` 模块缓存，响应支持以 ETag 进行条件请求"""
+
     @swagger_auto_schema(responses={200: openapi_docs.create_plugin_instance_schemas})
     def get_plugins_schema(self, request):
         """get plugin basic info schema for given PluginType"""
-        schemas = []
-        for pd in PluginDefinition.objects.all().order_by("created"):
-            basic_info_definition = pd.basic_info_definition
-            pd_data = serializers.PluginDefinitionSLZ(pd).data
-            basic_info = serializers.PluginBasicInfoDefinitionSLZ(basic_info_definition).data
-
-            extra_fields = basic_info_definition.extra_fields
-            # 当前语言为英文，且定义了英文字段则返回英文字段的定义
-            if get_language() == "en" and basic_info_definition.extra_fields:
-                extra_fields = basic_info_definition.extra_fields_en
-            schemas.append(
-                {
-                    "plugin_type": pd_data,
-                    "basic_info": basic_info,
-                    "schema": {
-                        "id": basic_info_definition.id_schema.dict(exclude_unset=True),
-                        "name": basic_info_definition.name_schema.dict(exclude_unset=True),
-                        "init_templates": cattr.unstructure(basic_info_definition.init_templates),
-                        "release_method": basic_info_definition.release_method,
-                        "repository_group": basic_info_definition.repository_group,
-                        "repository_template": shim.build_repository_template(
-                            pd, basic_info_definition.repository_group
-                        ),
-                        "extra_fields": cattr.unstructure(extra_fields),
-                        "extra_fields_order": cattr.unstructure(basic_info_definition.extra_fields_order),
-                    },
-                }
-            )
-
-        return Response(schemas)
+        return self._make_response(request, schemas.get_plugins_schema())
 
     @swagger_auto_schema(responses={200: openapi_docs.market_schema})
     def get_market_schema(self, request, pd_id):
         """get market info schema for given PluginType"""
-        pd = get_object_or_404(PluginDefinition, identifier=pd_id)
-        market_info_definition = pd.market_info_definition
-        readonly = market_info_definition.storage == constants.MarketInfoStorageType.THIRD_PARTY
-        extra_fields = market_info_definition.extra_fields
-        # 当前语言为英文，且定义了英文字段则返回英文字段的定义
-        if get_language() == "en" and market_info_definition.extra_fields:
-            extra_fields = market_info_definition.extra_fields_en
+        compiled = schemas.get_market_schema(pd_id)
+        if compiled.data["readonly"]:
+            return self._make_response(request, schemas.CompiledSchema.from_data({"category": [], **compiled.data}))
 
-        return Response(
-            {
-                "category": market_api.list_category(pd) if not readonly else [],
-                "schema": {
-                    "extra_fields": cattr.unstructure(market_info_definition.extra_fields),
-                    "extra_fields_order": cattr.unstructure(extra_fields),
-                },
-                "readonly": readonly,
-            }
-        )
+        # 市场分类由第三方系统提供，需要实时查询
+        pd = get_object_or_404(PluginDefinition.objects.select_related("market_info_definition"), identifier=pd_id)
+        data = {"category": market_api.list_category(pd), **compiled.data}
+        return self._make_response(request, schemas.CompiledSchema.from_data(data))
 
     @swagger_auto_schema(responses={200: openapi_docs.plugin_basic_info_schema})
     def get_basic_info_schema(self, request, pd_id):
         """get basic info schema for given PluginType"""
-        pd = get_object_or_404(PluginDefinition, identifier=pd_id)
-        basic_info_definition = pd.basic_info_definition
-        return Response(
-            data={
-                "id": basic_info_definition.id_schema.dict(exclude_unset=True),
-                "name": basic_info_definition.name_schema.dict(exclude_unset=True),
-                "extra_fields": cattr.unstructure(basic_info_definition.extra_fields),
-                "extra_fields_order": cattr.unstructure(basic_info_definition.extra_fields_order),
-            }
-        )
+        return self._make_response(request, schemas.get_basic_info_schema(pd_id))
 
     @swagger_auto_schema(responses={200: serializers.PluginConfigSchemaSLZ()})
     def get_config_schema(self, request, pd_id):
         """get config schema for given PluginType"""
-        pd = get_object_or_404(PluginDefinition, identifier=pd_id)
-        # 部分插件未定义配置管理
-        if not hasattr(pd, "config_definition"):
-            return Response(data={})
-
-        config_definition = pd.config_definition
-        return Response(data=serializers.PluginConfigSchemaSLZ(config_definition).data)
+        return self._make_response(request, schemas.get_config_schema(pd_id))
+
+    @staticmethod
+    def _make_response(request, compiled: schemas.CompiledSchema) -> HttpResponseBase:
+        """返回范式文档，请求携带的 If-None-Match 与文档的 ETag 一致时返回 304"""
+        response = Response(compiled.data)
+        response["ETag"] = compiled.etag
+        # 范式可能随时被管理员修改，要求客户端每次都重新验证
+        patch_cache_control(response, private=True, no_cache=True)
+        return get_conditional_response(request, etag=compiled.etag, response=response)
 
 
 class PluginInstanceMixin:
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import json
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+
+from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.platform.applications.constants import ApplicationRole
+
+logger = logging.getLogger(__name__)
+
+AppRole = Tuple[str, ApplicationRole]
+
+
+class RoleMembersCache:
+    """Cache the members of application roles, use redis as backend.
+
+    The cache must be invalidated after the members of a role have been changed through the platform,
+    changes made in bk-iam directly will be visible after the cache expires.
+    """
+
+    key_prefix = "bk_paas:iam:role_members"
+
+    def __init__(self):
+        self.redis_db = get_default_redis()
+
+    @property
+    def expires_in(self) -> int:
+        return settings.IAM_ROLE_MEMBERS_CACHE_TTL
+
+    def get_many(self, app_roles: Iterable[AppRole]) -> Dict[AppRole, List[str]]:
+        """Get the cached members, roles which are not cached will be absent from the result"""
+        app_roles = list(app_roles)
+        if not app_roles or self.expires_in <= 0:
+            return {}
+
+        try:
+            values = self.redis_db.mget([self._make_key(*app_role) for app_role in app_roles])
+        except Exception:
+            logger.exception("Failed to get role members from cache")
+            return {}
+        return {app_role: json.loads(v) for app_role, v in zip(app_roles, values, strict=True) if v is not None}
+
+    def set_many(self, members: Dict[AppRole, List[str]]):
+        if not members or self.expires_in <= 0:
+            return
+
+        pipe = self.redis_db.pipeline(transaction=False)
+        for (app_code, role), usernames in members.items():
+            pipe.setex(self._make_key(app_code, role), self.expires_in, json.dumps(usernames))
+        try:
+            pipe.execute()
+        except Exception:
+            logger.exception("Failed to set role members to cache")
+
+    def invalidate(self, app_code: str, roles: Iterable[ApplicationRole]):
+        """Invalidate the cached members of the given roles in the application"""
+        keys = [self._make_key(app_code, role) for role in roles]
+        if not keys:
+            return
+        try:
+            self.redis_db.delete(*keys)
+        except Exception:
+            logger.exception("Failed to invalidate role members cache, app_code: %s", app_code)
+
+    def _make_key(self, app_code: str, role: ApplicationRole) -> str:
+        return f"{self.key_prefix}:{app_code}:{int(role)}"
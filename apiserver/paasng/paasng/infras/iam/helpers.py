@@ -15,7 +15,9 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import Dict, List, Union
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple, Union
 
 from bkpaas_auth.core.encoder import user_id_encoder
 from django.conf import settings
@@ -24,9 +26,12 @@ from paasng.infras.iam.members.models import ApplicationGradeManager, Applicatio
 from paasng.platform.applications.constants import ApplicationRole
 from paasng.platform.applications.tenant import get_tenant_id_for_app
 
+from .cache import AppRole, RoleMembersCache
 from .client import BKIAMClient
 from .constants import APP_DEFAULT_ROLES, NEVER_EXPIRE_DAYS
 
+logger = logging.getLogger(__name__)
+
 
 def fetch_role_members(app_code: str, role: ApplicationRole) -> List[str]:
     """
@@ -41,6 +46,51 @@ def fetch_role_members(app_code: str, role: ApplicationRole) -> List[str]:
     )
 
 
+def fetch_role_members_in_bulk(app_roles: Iterable[AppRole]) -> Dict[AppRole, List[str]]:
+    """
+    批量获取多个应用角色的成员，优先从缓存中获取，未命中的角色并发请求权限中心
+
+    注意：成员可能在权限中心被直接修改，因此结果可能会有延迟（至多 IAM_ROLE_MEMBERS_CACHE_TTL 秒），
+    需要准确结果的场景（如鉴权）请使用 fetch_role_members
+
+    :param app_roles: (蓝鲸应用 ID, 应用角色) 列表
+    :returns: {(蓝鲸应用 ID, 应用角色): 成员列表}，找不到对应用户组的角色不会出现在结果中
+    """
+    app_roles = list(dict.fromkeys(app_roles))
+    cache = RoleMembersCache()
+    results = cache.get_many(app_roles)
+
+    missing = [app_role for app_role in app_roles if app_role not in results]
+    if not missing:
+        return results
+
+    groups: Dict[AppRole, ApplicationUserGroup] = {
+        (group.app_code, ApplicationRole(group.role)): group
+        for group in ApplicationUserGroup.objects.filter(app_code__in={app_code for app_code, _ in missing})
+    }
+    tasks: List[Tuple[AppRole, ApplicationUserGroup]] = []
+    for app_role in missing:
+        if app_role not in groups:
+            logger.warning("user group of app role %s not found, skip fetching members", app_role)
+            continue
+        tasks.append((app_role, groups[app_role]))
+
+    def _fetch(task: Tuple[AppRole, ApplicationUserGroup]) -> List[str]:
+        _, group = task
+        return BKIAMClient(group.tenant_id).fetch_user_group_members(group.user_group_id)
+
+    # 子线程中只请求权限中心，不访问数据库
+    if len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=settings.IAM_FETCH_ROLE_MEMBERS_CONCURRENCY) as executor:
+            fetched = dict(zip((app_role for app_role, _ in tasks), executor.map(_fetch, tasks), strict=True))
+    else:
+        fetched = {app_role: _fetch((app_role, group)) for app_role, group in tasks}
+
+    cache.set_many(fetched)
+    results.update(fetched)
+    return results
+
+
 def add_role_members(
     app_code: str, role: ApplicationRole, usernames: Union[List[str], str], expired_after_days: int = NEVER_EXPIRE_DAYS
 ):
@@ -63,11 +113,14 @@ def add_role_members(
             usernames=usernames,
         )
 
-    return iam_client.add_user_group_members(
-        user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id,
-        usernames=usernames,
-        expired_after_days=expired_after_days,
-    )
+    try:
+        return iam_client.add_user_group_members(
+            user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id,
+            usernames=usernames,
+            expired_after_days=expired_after_days,
+        )
+    finally:
+        RoleMembersCache().invalidate(app_code, [role])
 
 
 def delete_role_members(app_code: str, role: ApplicationRole, usernames: Union[List[str], str]):
@@ -88,10 +141,13 @@ def delete_role_members(app_code: str, role: ApplicationRole, usernames: Union[L
             usernames=usernames,
         )
 
-    return iam_client.delete_user_group_members(
-        user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id,
-        usernames=usernames,
-    )
+    try:
+        return iam_client.delete_user_group_members(
+            user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id,
+            usernames=usernames,
+        )
+    finally:
+        RoleMembersCache().invalidate(app_code, [role])
 
 
 def fetch_user_roles(app_code: str, username: str) -> List[ApplicationRole]:
@@ -151,8 +207,11 @@ def remove_user_all_roles(app_code: str, usernames: Union[List[str], str]):
         group.role: group.user_group_id for group in ApplicationUserGroup.objects.filter(app_code=app_code)
     }
     # 再将所有的内建角色权限清理掉
-    for role in APP_DEFAULT_ROLES:
-        iam_client.delete_user_group_members(role_group_id_map[role], usernames)
+    try:
+        for role in APP_DEFAULT_ROLES:
+            iam_client.delete_user_group_members(role_group_id_map[role], usernames)
+    finally:
+        RoleMembersCache().invalidate(app_code, APP_DEFAULT_ROLES)
 
 
 def fetch_application_members(app_code: str) -> List[Dict]:
@@ -184,6 +243,7 @@ def delete_builtin_user_groups(app_code: str):
     tenant_id = get_tenant_id_for_app(app_code)
     BKIAMClient(tenant_id).delete_user_groups(user_groups.values_list("user_group_id", flat=True))
     user_groups.delete()
+    RoleMembersCache().invalidate(app_code, APP_DEFAULT_ROLES)
 
 
 def delete_grade_manager(app_code: str):
@@ -19,6 +19,7 @@
 
 import logging
 
+from celery.signals import worker_process_shutdown
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.shortcuts import get_object_or_404
@@ -28,7 +29,8 @@ from paas_wl.bk_app.cnative.specs.models import AppModelDeploy
 from paas_wl.bk_app.cnative.specs.signals import post_cnative_env_deploy
 from paasng.infras.iam.permissions.resources.application import AppAction
 from paasng.misc.audit.constants import DataType, OperationEnum, OperationTarget, ResultCode
-from paasng.misc.audit.models import AppLatestOperationRecord, AppOperationRecord
+from paasng.misc.audit.models import AppOperationRecord
+from paasng.misc.audit.pipeline import AppAuditRecordEvent, LatestOperationEvent, audit_pipeline
 from paasng.misc.audit.service import DataDetail, add_app_audit_record
 from paasng.platform.applications.constants import ApplicationType
 from paasng.platform.applications.models import Application, ModuleEnvironment
@@ -57,51 +59,58 @@ DEPLOY_STATUS_TO_RESULT_CODE = {
 @receiver(post_save)
 def on_app_operation_created(sender, instance, created, raw, using, update_fields, *args, **kwargs):
     """When an app operation object was created, we should also update the application's
-    corresponding AppLatestOperationRecord object.
+    corresponding AppLatestOperationRecord object. The update is done by the audit pipeline after
+    the transaction commits.
     """
     if not (isinstance(instance, AppOperationRecord) and created):
         return
 
-    if instance.application is None:
-        return
-
-    AppLatestOperationRecord.objects.update_or_create(
-        application=instance.application,
-        defaults={
-            "operation_id": instance.pk,
-            "latest_operated_at": instance.created,
-            "tenant_id": instance.application.tenant_id,
-        },
+    audit_pipeline.emit(
+        LatestOperationEvent(app_code=instance.app_code, operation_id=instance.pk, operated_at=instance.created)
     )
 
 
 @receiver(post_save)
 def on_model_post_save(sender, instance, created, raw, using, update_fields, *args, **kwargs):
-    """记录应用、模块创建操作记录"""
+    """记录应用、模块创建操作记录，记录由审计流水线在事务提交后批量写入"""
     # 创建应用
     if isinstance(instance, Application) and created:
-        add_app_audit_record(
-            app_code=instance.code,
-            tenant_id=instance.tenant_id,
-            # 创建应用未在权限中心注册，因此操作也不能上报到审计中心
-            action_id="",
-            user=instance.owner,
-            operation=OperationEnum.CREATE_APP,
-            target=OperationTarget.APP,
+        audit_pipeline.emit(
+            AppAuditRecordEvent(
+                kwargs=dict(
+                    app_code=instance.code,
+                    tenant_id=instance.tenant_id,
+                    # 创建应用未在权限中心注册，因此操作也不能上报到审计中心
+                    action_id="",
+                    user=instance.owner,
+                    operation=OperationEnum.CREATE_APP,
+                    target=OperationTarget.APP,
+                )
+            )
         )
     # 创建模块
     elif isinstance(instance, Module) and created:
-        add_app_audit_record(
-            app_code=instance.application.code,
-            tenant_id=instance.application.tenant_id,
-            user=instance.creator,
-            action_id=AppAction.MANAGE_MODULE,
-            operation=OperationEnum.CREATE,
-            target=OperationTarget.MODULE,
-            attribute=instance.name,
+        audit_pipeline.emit(
+            AppAuditRecordEvent(
+                kwargs=dict(
+                    app_code=instance.application.code,
+                    tenant_id=instance.application.tenant_id,
+                    user=instance.creator,
+                    action_id=AppAction.MANAGE_MODULE,
+                    operation=OperationEnum.CREATE,
+                    target=OperationTarget.MODULE,
+                    attribute=instance.name,
+                )
+            )
         )
 
 
+@worker_process_shutdown.connect
+def on_worker_process_shutdown(*args, **kwargs):
+    """Celery 的 worker 子进程退出时不会执行 atexit 注册的函数，需要在此写入剩余的审计记录"""
+    audit_pipeline.flush()
+
+
 @receiver(post_appenv_deploy)
 def on_deploy_finished(sender: ModuleEnvironment, deployment: Deployment, **kwargs):
     """当普通应用部署完成后，记录操作审计记录"""
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""Write audit records asynchronously and in batches, out of the transactions of the business writes."""
+
+import atexit
+import datetime as dt
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from attrs import define
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from paasng.misc.audit.models import AppLatestOperationRecord, AppOperationRecord
+from paasng.misc.audit.service import make_app_audit_record, report_event_to_bk_audit
+from paasng.platform.applications.models import Application
+
+logger = logging.getLogger(__name__)
+
+
+@define
+class AppAuditRecordEvent:
+    """An app operation record to be created, the kwargs are the same as `add_app_audit_record`"""
+
+    kwargs: Dict[str, Any]
+
+
+@define
+class LatestOperationEvent:
+    """An app operation record was created, the latest operation of the application should be updated"""
+
+    app_code: str
+    operation_id: uuid.UUID
+    operated_at: dt.datetime
+
+
+AuditEvent = Union[AppAuditRecordEvent, LatestOperationEvent]
+
+
+class AuditRecordPipeline:
+    """Write the audit events in a background thread, by batches.
+
+    The events are put into a bounded in-process queue when the current transaction commits, the events
+    of a rolled back transaction are discarded. The events are always written in FIFO order by one writer
+    at a time, so the order of the events of an application is preserved. When the queue is full, the
+    caller writes the queued events by itself rather than dropping them, and the remaining events are
+    written when the process exits.
+
+    :param max_queue_size: The max number of events in the queue
+    :param batch_size: The max number of events written in one batch
+    :param flush_interval: The interval(in seconds) of writing the queued events
+    """
+
+    def __init__(self, max_queue_size: int = 10000, batch_size: int = 200, flush_interval: float = 1.0):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: Deque[AuditEvent] = deque()
+        self._lock = threading.Lock()
+        # Held while popping and writing a batch, make sure the batches are written in order
+        self._write_lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        # The process which started the flusher thread, threads are not inherited by forked processes
+        self._pid: Optional[int] = None
+
+    def emit(self, event: AuditEvent):
+        """Emit the event when the current transaction commits, or immediately if not in a transaction"""
+        if not settings.ENABLE_ASYNC_AUDIT_RECORDS:
+            self._write([event])
+            return
+        transaction.on_commit(lambda: self._put(event))
+
+    def flush(self):
+        """Write all the queued events"""
+        with self._write_lock:
+            while batch := self._pop_batch():
+                self._write(batch)
+
+    def _put(self, event: AuditEvent):
+        with self._lock:
+            self._ensure_flusher()
+            is_full = len(self._queue) >= self.max_queue_size
+        if is_full:
+            # Write the queued events in the caller's thread to make room, the events are never dropped
+            self.flush()
+
+        with self._lock:
+            self._queue.append(event)
+            should_wakeup = len(self._queue) >= self.batch_size
+        if should_wakeup:
+            self._wakeup.set()
+
+    def _pop_batch(self) -> List[AuditEvent]:
+        with self._lock:
+            return [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+
+    def _write(self, events: List[AuditEvent]):
+        try:
+            self._write_batch(events)
+        except Exception:
+            logger.exception("Failed to write audit events in batch, write them one by one")
+            # Write the events separately, so that an invalid event does not make the others lost
+            for event in events:
+                try:
+                    self._write_batch([event])
+                except Exception:
+                    logger.exception("Failed to write audit event: %s", event)
+
+    def _write_batch(self, events: List[AuditEvent]):
+        records = [make_app_audit_record(**e.kwargs) for e in events if isinstance(e, AppAuditRecordEvent)]
+        if records:
+            AppOperationRecord.objects.bulk_create(records)
+
+        # The latest operation of every application, the later events override the earlier ones
+        latest_ops: Dict[str, Tuple[uuid.UUID, dt.datetime]] = {}
+        created_records = iter(records)
+        for event in events:
+            if isinstance(event, AppAuditRecordEvent):
+                record = next(created_records)
+                latest_ops[record.app_code] = (record.pk, record.created)
+            else:
+                latest_ops[event.app_code] = (event.operation_id, event.operated_at)
+
+        if latest_ops:
+            applications = Application.default_objects.filter(code__in=latest_ops.keys())
+            for app in applications:
+                operation_id, operated_at = latest_ops[app.code]
+                AppLatestOperationRecord.objects.update_or_create(
+                    application=app,
+                    defaults={
+                        "operation_id": operation_id,
+                        "latest_operated_at": operated_at,
+                        "tenant_id": app.tenant_id,
+                    },
+                )
+
+        for record in records:
+            report_event_to_bk_audit(record)
+
+    def _ensure_flusher(self):
+        """Start the flusher thread if it's not running in current process, must be called with the lock held"""
+        if self._flusher is not None and self._pid == os.getpid():
+            return
+
+        if self._pid is not None and self._pid != os.getpid():
+            # Forked from a process which has started the flusher, the events belong to the parent process
+            self._queue.clear()
+        self._pid = os.getpid()
+        self._flusher = threading.Thread(target=self._run_flusher, name="audit-record-pipeline", daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Unexpected error when writing audit events")
+            finally:
+                close_old_connections()
+
+
+audit_pipeline = AuditRecordPipeline(**settings.AUDIT_RECORD_PIPELINE_CONFIG)
+
+
+@atexit.register
+def _flush_on_exit():
+    audit_pipeline.flush()
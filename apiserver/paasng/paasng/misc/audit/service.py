@@ -133,7 +133,43 @@ def add_app_audit_record(
     :param data_before: 操作前的数据，包含数据类型的对应的数据
     :param data_after: 操作后的数据，包含数据类型的对应的数据
     """
-    record = AppOperationRecord.objects.create(
+    record = make_app_audit_record(
+        app_code=app_code,
+        tenant_id=tenant_id,
+        user=user,
+        action_id=action_id,
+        operation=operation,
+        target=target,
+        attribute=attribute,
+        module_name=module_name,
+        environment=environment,
+        access_type=access_type,
+        result_code=result_code,
+        data_before=data_before,
+        data_after=data_after,
+    )
+    record.save(force_insert=True)
+    report_event_to_bk_audit(record)
+    return record
+
+
+def make_app_audit_record(
+    app_code: str,
+    tenant_id: str,
+    user: str,
+    action_id: str,
+    operation: str,
+    target: str,
+    attribute: Optional[str] = None,
+    module_name: Optional[str] = None,
+    environment: Optional[str] = None,
+    access_type: int = AccessType.WEB,
+    result_code: int = ResultCode.SUCCESS,
+    data_before: Optional[DataDetail] = None,
+    data_after: Optional[DataDetail] = None,
+) -> AppOperationRecord:
+    """构造应用审计记录（未保存），可用于批量创建，参数说明同 add_app_audit_record"""
+    return AppOperationRecord(
         app_code=app_code,
         user=user,
         action_id=action_id,
@@ -148,8 +184,6 @@ def add_app_audit_record(
         data_after=asdict(data_after) if data_after else None,
         tenant_id=tenant_id,
     )
-    report_event_to_bk_audit(record)
-    return record
 
 
 def add_admin_audit_record(
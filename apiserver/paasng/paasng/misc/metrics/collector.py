@@ -23,7 +23,10 @@ from typing_extensions import Protocol
 from paasng.misc.metrics.basic_services.blob_store import BlobStoreAvailableMetric
 from paasng.misc.metrics.basic_services.mysql import MySQLAvailableMetric
 from paasng.misc.metrics.basic_services.redis import RedisAvailableMetric
-from paasng.misc.metrics.workloads.deployment import UnavailableDeploymentTotalMetric
+from paasng.misc.metrics.workloads.deployment import (
+    UnavailableDeploymentScanAgeMetric,
+    UnavailableDeploymentTotalMetric,
+)
 
 
 class CallbackMetric(Protocol):
@@ -73,3 +76,4 @@ cb_metric_collector.add(MySQLAvailableMetric)
 cb_metric_collector.add(RedisAvailableMetric)
 # 添加原 workloads metric 指标
 cb_metric_collector.add(UnavailableDeploymentTotalMetric)
+cb_metric_collector.add(UnavailableDeploymentScanAgeMetric)
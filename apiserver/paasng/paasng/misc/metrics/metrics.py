@@ -23,6 +23,8 @@ API_VISITED_COUNTER = Counter("api_visited_counter", "", ("method", "endpoint",
 API_VISITED_TIME_CONSUME_HISTOGRAM = Histogram(
     "api_visited_time_consumed", "", ("method", "endpoint", "status"), buckets=[50, 100, 200, 500, 1000, 2000, 5000]
 )
+# API 访问日志因队列已满或 Redis 写入失败而被丢弃的条数
+API_LOG_DROPPED_COUNTER = Counter("api_log_dropped", "", ("reason",))
 
 NEW_APP_COUNTER = Counter(
     "new_application",
@@ -57,3 +59,17 @@ SERVICE_PROVISION_COUNTER = Counter("service_provision", "", ("environment", "se
 
 # 进程
 PROCESS_OPERATE_COUNTER = Counter("process_operate", "", ("environment", "operate_type"))
+
+# 应用运营报告采集任务的总耗时，单位为秒
+APP_OPERATION_REPORT_COLLECTION_DURATION_HISTOGRAM = Histogram(
+    "app_operation_report_collection_duration",
+    "",
+    buckets=[60, 300, 600, 1800, 3600, 7200, 14400, 28800, 57600, 86400],
+)
+# 应用运营报告各采集器的耗时，单位为秒（资源使用数据按分片批量采集，记录的是整个分片的耗时）
+APP_OPERATION_REPORT_COLLECTOR_DURATION_HISTOGRAM = Histogram(
+    "app_operation_report_collector_duration",
+    "",
+    ("collector",),
+    buckets=[0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300],
+)
@@ -15,50 +15,160 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
-from django.core.cache import cache
-from django.utils.timezone import now
+from django.conf import settings
 from prometheus_client.core import GaugeMetricFamily
 
 from paas_wl.bk_app.processes.utils import list_unavailable_deployment
 from paas_wl.infras.cluster.models import Cluster
-from paas_wl.infras.resources.base.base import get_client_by_cluster_name
-from paas_wl.infras.resources.base.kube_client import CoreDynamicClient
+from paas_wl.infras.resources.base.base import EnhancedApiClient, get_client_by_cluster_name
+from paas_wl.infras.resources.base.kube_client import dynamic_client_cache
+from paasng.core.core.storages.redisdb import get_default_redis
 
 logger = logging.getLogger(__name__)
 
 
+class UnavailableDeploymentsStore:
+    """存储各集群中不可用 Deployment 的数量及扫描时间，由扫描器写入，供指标导出时读取"""
+
+    key = "bk_paas:metrics:unavailable_deployments"
+    lock_key = "bk_paas:metrics:unavailable_deployments:scan_lock"
+
+    def __init__(self):
+        self.redis_db = get_default_redis()
+
+    def get_all(self) -> Dict[str, Tuple[int, float]]:
+        """获取所有集群的扫描结果
+
+        :return: {集群名称: (不可用 Deployment 数量, 扫描时间戳)}
+        """
+        results = {}
+        for cluster_name, value in self.redis_db.hgetall(self.key).items():
+            try:
+                data = json.loads(value)
+                results[cluster_name.decode()] = (data["count"], data["scanned_at"])
+            except (ValueError, KeyError):
+                logger.warning("invalid unavailable deployments data of cluster<%s>", cluster_name)
+        return results
+
+    def save(self, results: Dict[str, int], cluster_names: List[str]):
+        """保存扫描结果，扫描失败的集群保留上一次的结果，已删除的集群会被清理
+
+        :param results: 扫描成功的集群的结果，{集群名称: 不可用 Deployment 数量}
+        :param cluster_names: 当前所有集群的名称
+        """
+        scanned_at = time.time()
+        pipe = self.redis_db.pipeline()
+        if results:
+            pipe.hset(
+                self.key,
+                mapping={
+                    name: json.dumps({"count": count, "scanned_at": scanned_at}) for name, count in results.items()
+                },
+            )
+        removed = [name for name in self.get_all() if name not in cluster_names]
+        if removed:
+            pipe.hdel(self.key, *removed)
+        pipe.execute()
+
+    def acquire_scan_lock(self, expires_in: int) -> bool:
+        """获取扫描锁，保证同一时间段内只有一个进程在扫描"""
+        return bool(self.redis_db.set(self.lock_key, os.getpid(), nx=True, ex=expires_in))
+
+
+class UnavailableDeploymentsScanner:
+    """并发扫描所有集群中不可用的 Deployment，单个集群超时或不可达不会影响其他集群"""
+
+    def __init__(self, store: Optional[UnavailableDeploymentsStore] = None):
+        self.store = store or UnavailableDeploymentsStore()
+        self.timeout = settings.UNAVAILABLE_DEPLOYMENTS_SCAN_TIMEOUT
+
+    def scan(self):
+        cluster_names = list(Cluster.objects.values_list("name", flat=True))
+        # 在当前线程中获取各集群的客户端，扫描线程中只请求集群，不访问数据库
+        clients = {}
+        for cluster_name in cluster_names:
+            try:
+                clients[cluster_name] = get_client_by_cluster_name(cluster_name=cluster_name)
+            except ValueError:
+                logger.warning(f"configuration of cluster<{cluster_name}> is not ready")
+
+        counts: Dict[str, Optional[int]] = {}
+        if clients:
+            max_workers = min(len(clients), settings.UNAVAILABLE_DEPLOYMENTS_SCAN_CONCURRENCY)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                counts = dict(zip(clients, executor.map(self._scan_cluster, clients.items()), strict=True))
+        self.store.save({name: count for name, count in counts.items() if count is not None}, cluster_names)
+
+    def _scan_cluster(self, item: Tuple[str, EnhancedApiClient]) -> Optional[int]:
+        """扫描单个集群，失败时返回 None"""
+        cluster_name, client = item
+        try:
+            unavailable_deployments = list_unavailable_deployment(
+                dynamic_client_cache.get(client),
+                page_size=settings.UNAVAILABLE_DEPLOYMENTS_SCAN_PAGE_SIZE,
+                timeout=self.timeout,
+            )
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"list unavailable deployments of cluster<{cluster_name}> failed: {e}")
+            return None
+        return len(unavailable_deployments)
+
+
+def scan_unavailable_deployments():
+    """扫描所有集群中不可用的 Deployment，由定时任务调用，通过 Redis 锁保证每个扫描周期内只有一个进程执行扫描"""
+    store = UnavailableDeploymentsStore()
+    if store.acquire_scan_lock(settings.UNAVAILABLE_DEPLOYMENTS_SCAN_INTERVAL):
+        UnavailableDeploymentsScanner(store).scan()
+
+
 class UnavailableDeploymentTotalMetric:
     name = "unavailable_deployments_total"
     description = "A gauge for counting unavailable deployments"
 
     @classmethod
     def calc_metric(cls) -> GaugeMetricFamily:
-        """获取 metric"""
-        cache_key = f"metrics:{cls.name}"
-        if v := cache.get(cache_key):
-            return v
-
-        dt = now()
+        """获取 metric，数据由后台线程扫描后写入 Redis"""
         gauge_family = GaugeMetricFamily(name=cls.name, documentation=cls.description, labels=["cluster_name"])
-        for cluster in Cluster.objects.all():
-            try:
-                client = get_client_by_cluster_name(cluster_name=cluster.name)
-            except ValueError:
-                logger.warning(f"configuration of cluster<{cluster.name}> is not ready")
-                continue
+        try:
+            results = UnavailableDeploymentsStore().get_all()
+        except Exception:
+            logger.exception("failed to get unavailable deployments from store")
+            return gauge_family
 
-            try:
-                unavailable_deployments = list_unavailable_deployment(CoreDynamicClient(client))
-            except Exception:  # noqa: BLE001
-                logger.warning(f"list unavailable deployments of cluster<{cluster.name}> ")
-                continue
+        for cluster_name, (count, scanned_at) in results.items():
+            gauge_family.add_metric(labels=[cluster_name], value=count, timestamp=scanned_at)
+        return gauge_family
 
-            gauge_family.add_metric(
-                labels=[cluster.name], value=len(unavailable_deployments), timestamp=dt.timestamp()
-            )
-        cache.set(cache_key, gauge_family, timeout=60 * 5)
+    @classmethod
+    def describe_metric(cls) -> GaugeMetricFamily:
+        """描述 metric"""
+        return GaugeMetricFamily(name=cls.name, documentation=cls.description, labels=["cluster_name"])
+
+
+class UnavailableDeploymentScanAgeMetric:
+    name = "unavailable_deployments_scan_age_seconds"
+    description = "Seconds since the unavailable deployments of the cluster were scanned successfully"
+
+    @classmethod
+    def calc_metric(cls) -> GaugeMetricFamily:
+        """获取 metric，值越大说明该集群的数据越陈旧（如集群不可达）"""
+        gauge_family = GaugeMetricFamily(name=cls.name, documentation=cls.description, labels=["cluster_name"])
+        try:
+            results = UnavailableDeploymentsStore().get_all()
+        except Exception:
+            logger.exception("failed to get unavailable deployments from store")
+            return gauge_family
+
+        now = time.time()
+        for cluster_name, (_, scanned_at) in results.items():
+            gauge_family.add_metric(labels=[cluster_name], value=max(now - scanned_at, 0))
         return gauge_family
 
     @classmethod
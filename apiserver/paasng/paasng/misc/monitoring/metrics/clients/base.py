@@ -15,14 +15,28 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Generator, List, Optional, Protocol, Union
+from typing import Callable, Dict, Generator, Iterable, List, Optional, Protocol, TypeVar, Union
+
+from django.conf import settings
+from django.core.cache import cache
 
 from paasng.misc.monitoring.metrics.constants import MetricsResourceType, MetricsSeriesType
 from paasng.misc.monitoring.metrics.utils import MetricSmartTimeRange
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 class MetricClient(Protocol):
+    query_cache: "MetricQueryCache"
+
     def general_query(
         self, queries: List["MetricQuery"], container_name: str
     ) -> Generator["MetricSeriesResult", None, None]:
@@ -34,6 +48,24 @@ class MetricClient(Protocol):
         """subclass may raise keyError if not given query_tmpl_config"""
         raise NotImplementedError
 
+    def query_by_instances(self, query: "MetricQuery", container_name: str) -> Dict[str, List]:
+        """Query the metrics of multiple instances by a grouped query, return the results by instance name.
+        The instances which have no data are absent in the result.
+        """
+        raise NotImplementedError
+
+    def get_grouped_query_promql(
+        self,
+        resource_type: MetricsResourceType,
+        series_type: MetricsSeriesType,
+        instance_names: List[str],
+        cluster_id: str,
+    ) -> str:
+        """Get the PromQL which queries the metrics of all the given instances,
+        subclass may raise keyError if not given grouped_query_tmpl_config
+        """
+        raise NotImplementedError
+
 
 @dataclass
 class MetricQuery:
@@ -60,3 +92,75 @@ class MetricSeriesResult:
 
     def __len__(self):
         return len(self.results)
+
+
+def make_instance_names_regex(instance_names: List[str]) -> str:
+    """Make a regex which matches any of the instance names, it can be used in a PromQL label matcher
+    such as `pod=~"{regex}"`. The matchers of PromQL are fully anchored, so no "^" or "$" is needed.
+    """
+    # The instance names only contain lower case letters, digits, "-" and ".", escape the "." and
+    # double the backslash because the regex is placed in a quoted string of PromQL
+    return "|".join(name.replace(".", "\\\\.") for name in instance_names)
+
+
+def run_concurrently(func: Callable[[T], R], items: Iterable[T]) -> List[R]:
+    """Call the function with every item in a bounded thread pool, return the results in order.
+
+    :param func: The function to call, it should handle the exceptions by itself.
+    :param items: The items to be passed to the function.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+
+    max_workers = min(len(items), settings.METRICS_QUERY_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(func, items))
+
+
+class MetricQueryCache:
+    """Cache the raw results of metric queries for a short time.
+
+    The key is made from the normalized query and the time range, the time range should be aligned to
+    the step(see `MetricSmartTimeRange.aligned_to_step`), so that the same query made in the same
+    step can hit the cache.
+
+    :param backend: The identity of the metric backend, such as the host of prometheus.
+    """
+
+    key_prefix = "bk_paas:metrics:query"
+
+    def __init__(self, backend: str):
+        self.backend = backend
+
+    @property
+    def expires_in(self) -> int:
+        return settings.METRICS_QUERY_CACHE_TTL
+
+    def get_or_fetch(self, promql: str, start: str, end: str, step: str, fetch: Callable[[], T]) -> T:
+        """Get the result from cache, call `fetch` to get the result if the cache misses. The
+        exceptions raised by `fetch` are not cached.
+        """
+        if self.expires_in <= 0:
+            return fetch()
+
+        key = self._make_key(promql, start, end, step)
+        try:
+            value = cache.get(key)
+        except Exception:
+            logger.exception("Failed to get metric query result from cache")
+            value = None
+        if value is not None:
+            return value
+
+        value = fetch()
+        try:
+            cache.set(key, value, timeout=self.expires_in)
+        except Exception:
+            logger.exception("Failed to set metric query result to cache")
+        return value
+
+    def _make_key(self, promql: str, start: str, end: str, step: str) -> str:
+        normalized = re.sub(r"\s+", " ", promql.strip())
+        digest = hashlib.sha256(f"{self.backend}|{normalized}|{start}|{end}|{step}".encode()).hexdigest()
+        return f"{self.key_prefix}:{digest}"
@@ -22,8 +22,19 @@ from attrs import Factory, define
 
 from paasng.infras.bkmonitorv3.client import make_bk_monitor_client
 from paasng.infras.bkmonitorv3.exceptions import BkMonitorGatewayServiceError
-from paasng.misc.monitoring.metrics.clients.base import MetricQuery, MetricSeriesResult
-from paasng.misc.monitoring.metrics.constants import BKMONITOR_PROMQL_TMPL, MetricsResourceType, MetricsSeriesType
+from paasng.misc.monitoring.metrics.clients.base import (
+    MetricQuery,
+    MetricQueryCache,
+    MetricSeriesResult,
+    make_instance_names_regex,
+    run_concurrently,
+)
+from paasng.misc.monitoring.metrics.constants import (
+    BKMONITOR_PROMQL_TMPL,
+    GROUPED_BKMONITOR_PROMQL_TMPL,
+    MetricsResourceType,
+    MetricsSeriesType,
+)
 from paasng.misc.monitoring.metrics.exceptions import RequestMetricBackendError
 
 logger = logging.getLogger(__name__)
@@ -31,34 +42,63 @@ logger = logging.getLogger(__name__)
 
 class BkMonitorMetricClient:
     query_tmpl_config = BKMONITOR_PROMQL_TMPL
+    grouped_query_tmpl_config = GROUPED_BKMONITOR_PROMQL_TMPL
 
     def __init__(self, bk_biz_id: str, tenant_id: str):
         self.bk_biz_id = bk_biz_id
         self.tenant_id = tenant_id
+        self.query_cache = MetricQueryCache(backend=f"bkmonitor:{tenant_id}:{bk_biz_id}")
 
     def general_query(
         self, queries: List[MetricQuery], container_name: str
     ) -> Generator[MetricSeriesResult, None, None]:
-        """查询指定的各个指标数据"""
-        for query in queries:
+        """查询指定的各个指标数据，各个指标并发查询"""
+
+        def _query(query: MetricQuery) -> List:
             try:
                 if not query.is_ranged or not query.time_range:
                     raise ValueError("query metric in bkmonitor without time range is unsupported!")
 
-                results = self._query_range(query.query, container_name=container_name, **query.time_range.to_dict())
+                return self._query_range(query.query, container_name=container_name, **query.time_range.to_dict())
             except Exception:
                 logger.exception("fetch metrics failed, query: %s.", query.query)
                 # 某些 metrics 如果失败，不影响其他数据
-                results = []
+                return []
 
+        for query, results in zip(queries, run_concurrently(_query, queries), strict=True):
             yield MetricSeriesResult(type_name=query.type_name, results=results)
 
+    def query_by_instances(self, query: MetricQuery, container_name: str) -> Dict[str, List]:
+        """查询多个实例的指标数据，按实例名称拆分结果"""
+        if not query.is_ranged or not query.time_range:
+            raise ValueError("query metric in bkmonitor without time range is unsupported!")
+
+        try:
+            series = self._request(query.query, **query.time_range.to_dict())
+            raws = BkPromResult.from_series(series).get_raws_by_pod_name(container_name)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("failed to get metric results, query: %s, error: %s", query.query, e)
+            return {}
+        return {pod_name: raw.get("values", []) for pod_name, raw in raws.items()}
+
     def get_query_promql(
         self, resource_type: MetricsResourceType, series_type: MetricsSeriesType, instance_name: str, cluster_id: str
     ) -> str:
         tmpl = self.query_tmpl_config[resource_type][series_type]
         return tmpl.format(instance_name=instance_name, cluster_id=cluster_id, bk_biz_id=self.bk_biz_id)
 
+    def get_grouped_query_promql(
+        self,
+        resource_type: MetricsResourceType,
+        series_type: MetricsSeriesType,
+        instance_names: List[str],
+        cluster_id: str,
+    ) -> str:
+        tmpl = self.grouped_query_tmpl_config[resource_type][series_type]
+        return tmpl.format(
+            instance_names=make_instance_names_regex(instance_names), cluster_id=cluster_id, bk_biz_id=self.bk_biz_id
+        )
+
     def _query_range(self, promql: str, start: str, end: str, step: str, container_name: str = "") -> List:
         """范围请求API
 
@@ -80,16 +120,19 @@ class BkMonitorMetricClient:
         return []
 
     def _request(self, promql: str, start: str, end: str, step: str) -> List:
-        """请求蓝鲸监控时序数据 API，若成功则返回 Series 数据(list)，否则抛出异常"""
+        """请求蓝鲸监控时序数据 API，若成功则返回 Series 数据(list)，否则抛出异常。结果会被缓存一小段时间"""
 
-        try:
-            client = make_bk_monitor_client(self.tenant_id)
-            series = client.promql_query(self.bk_biz_id, promql, start, end, step)
-        except BkMonitorGatewayServiceError as e:
-            logger.warning("fetch metrics failed, promql: %s, start: %s, end: %s, step: %s", promql, start, end, step)
-            raise RequestMetricBackendError(str(e))
+        def _fetch() -> List:
+            try:
+                client = make_bk_monitor_client(self.tenant_id)
+                return client.promql_query(self.bk_biz_id, promql, start, end, step)
+            except BkMonitorGatewayServiceError as e:
+                logger.warning(
+                    "fetch metrics failed, promql: %s, start: %s, end: %s, step: %s", promql, start, end, step
+                )
+                raise RequestMetricBackendError(str(e))
 
-        return series
+        return self.query_cache.get_or_fetch(promql, start, end, step, _fetch)
 
 
 @define
@@ -102,6 +145,7 @@ class BkPromRangeSingleMetric:
         def __init__(self, *args, **kwargs):
             _name = kwargs.get("container_name") or kwargs.get("container")
             self.container_name = str(_name)
+            self.pod_name = str(kwargs.get("pod_name") or kwargs.get("pod") or "")
 
         def to_raw(self):
             return dict(container_name=self.container_name)
@@ -164,3 +208,15 @@ class BkPromResult:
                 return i.to_raw()
 
         return None
+
+    def get_raws_by_pod_name(self, container_name: str = "") -> Dict[str, Dict]:
+        """按 pod name 拆分结果，每个 pod 中通过 container name 获取结果"""
+        raws: Dict[str, Dict] = {}
+        for i in self.results:
+            if i.metric.pod_name in raws:
+                continue
+            # 保持原有兼容逻辑，未指定 container name 时取第一个结果
+            if container_name and i.container_name != container_name:
+                continue
+            raws[i.metric.pod_name] = i.to_raw()
+        return raws
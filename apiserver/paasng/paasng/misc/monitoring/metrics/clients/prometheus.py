@@ -17,14 +17,25 @@
 
 import logging
 from dataclasses import dataclass, field
-from typing import Generator, List, Optional, Tuple
+from typing import Dict, Generator, List, Optional, Tuple
 
 import requests
 from requests.auth import HTTPBasicAuth
 from requests.status_codes import codes
 
-from paasng.misc.monitoring.metrics.clients.base import MetricQuery, MetricSeriesResult
-from paasng.misc.monitoring.metrics.constants import RAW_PROMQL_TMPL, MetricsResourceType, MetricsSeriesType
+from paasng.misc.monitoring.metrics.clients.base import (
+    MetricQuery,
+    MetricQueryCache,
+    MetricSeriesResult,
+    make_instance_names_regex,
+    run_concurrently,
+)
+from paasng.misc.monitoring.metrics.constants import (
+    GROUPED_RAW_PROMQL_TMPL,
+    RAW_PROMQL_TMPL,
+    MetricsResourceType,
+    MetricsSeriesType,
+)
 from paasng.misc.monitoring.metrics.exceptions import RequestMetricBackendError
 
 logger = logging.getLogger(__name__)
@@ -33,28 +44,58 @@ DEFAULT_TIMEOUT = 120
 
 class PrometheusMetricClient:
     query_tmpl_config = RAW_PROMQL_TMPL
+    grouped_query_tmpl_config = GROUPED_RAW_PROMQL_TMPL
 
     def __init__(self, basic_auth: Tuple[str, str], host: str):
         self.basic_auth = basic_auth
         self.host = host
+        self.query_cache = MetricQueryCache(backend=f"prometheus:{host}")
 
     def general_query(
         self, queries: List["MetricQuery"], container_name: str
     ) -> Generator["MetricSeriesResult", None, None]:
-        """查询指定的各个指标数据"""
-        for query in queries:
+        """查询指定的各个指标数据，各个指标并发查询"""
+
+        def _query(query: MetricQuery) -> List:
             try:
                 if not query.is_ranged or not query.time_range:
                     raise ValueError("for security reasons, query metric without time range isn't allowed!")
 
-                results = self._query_range(query.query, container_name=container_name, **query.time_range.to_dict())
+                return self._query_range(query.query, container_name=container_name, **query.time_range.to_dict())
             except Exception:
                 logger.exception("fetch metrics failed, query: %s", query.query)
                 # 某些 metrics 如果失败，不影响其他数据
-                results = []
+                return []
 
+        for query, results in zip(queries, run_concurrently(_query, queries), strict=True):
             yield MetricSeriesResult(type_name=query.type_name, results=results)
 
+    def query_by_instances(self, query: MetricQuery, container_name: str) -> Dict[str, List]:
+        """查询多个实例的指标数据，按实例名称拆分结果"""
+        if not query.is_ranged or not query.time_range:
+            raise ValueError("for security reasons, query metric without time range isn't allowed!")
+
+        try:
+            resp = self._query_range_raw(query.query, **query.time_range.to_dict())
+            raws = PromResult.from_resp(resp).get_raws_by_pod_name(container_name)
+        except ValueError as e:
+            logger.warning("failed to get metric results, for %s", e)
+            return {}
+        except Exception:
+            logger.exception("fetch metrics failed, query: %s", query.query)
+            return {}
+        return {pod_name: raw.get("values", []) for pod_name, raw in raws.items()}
+
+    def get_grouped_query_promql(
+        self,
+        resource_type: MetricsResourceType,
+        series_type: MetricsSeriesType,
+        instance_names: List[str],
+        cluster_id: str,
+    ) -> str:
+        tmpl = self.grouped_query_tmpl_config[resource_type][series_type]
+        return tmpl.format(instance_names=make_instance_names_regex(instance_names), cluster_id=cluster_id)
+
     def get_query_promql(
         self, resource_type: MetricsResourceType, series_type: MetricsSeriesType, instance_name: str, cluster_id: str
     ) -> str:
@@ -70,10 +111,7 @@ class PrometheusMetricClient:
         :param step: 步长
         :param container_name: 容器名称
         """
-        path = "api/v1/query_range"
-        params = {"query": query, "start": start, "end": end, "step": step}
-        logger.info("prometheus query_range: %s", params)
-        result = self._request(method="GET", path=path, params=params, timeout=30)
+        result = self._query_range_raw(query, start, end, step)
         try:
             ret = PromResult.from_resp(result).get_raw_by_container_name(container_name)
             if ret:
@@ -87,6 +125,17 @@ class PrometheusMetricClient:
             logger.exception("failed to get metrics results")
             return []
 
+    def _query_range_raw(self, query, start, end, step) -> dict:
+        """范围请求API，返回原始结果，结果会被缓存一小段时间"""
+
+        def _fetch():
+            path = "api/v1/query_range"
+            params = {"query": query, "start": start, "end": end, "step": step}
+            logger.info("prometheus query_range: %s", params)
+            return self._request(method="GET", path=path, params=params, timeout=30)
+
+        return self.query_cache.get_or_fetch(query, start, end, step, _fetch)
+
     def _request(self, method, path, desired_code=codes.ok, **kwargs):
         """Wrap request.request to provide a universal requests for prometheus
         return value has been formatted as json
@@ -121,6 +170,7 @@ class PromRangeSingleMetric:
         def __init__(self, *args, **kwargs):
             _name = kwargs.get("container_name") or kwargs.get("container")
             self.container_name = str(_name)
+            self.pod_name = str(kwargs.get("pod_name") or kwargs.get("pod") or "")
 
         def to_raw(self):
             return dict(container_name=self.container_name)
@@ -182,3 +232,15 @@ class PromResult:
                 return i.to_raw()
 
         return None
+
+    def get_raws_by_pod_name(self, container_name: str = "") -> Dict[str, dict]:
+        """按 pod name 拆分结果，每个 pod 中通过 container name 获取结果"""
+        raws: Dict[str, dict] = {}
+        for i in self.results:
+            if i.metric.pod_name in raws:
+                continue
+            # 保持原来的兼容逻辑，未指定 container name 时取第一个结果
+            if container_name and i.container_name != container_name:
+                continue
+            raws[i.metric.pod_name] = i.to_raw()
+        return raws
@@ -82,3 +82,53 @@ BKMONITOR_PROMQL_TMPL = {
         'pod="{instance_name}",bcs_cluster_id="{cluster_id}",bk_biz_id="{bk_biz_id}"}}',
     },
 }
+
+# 查询进程所有实例指标的 PromQL 模板，通过正则匹配多个 pod，并按 pod 维度拆分各实例的数据。
+# 其中 instance_names 为多个实例名称组成的正则表达式，如 "pod-a|pod-b"
+GROUPED_RAW_PROMQL_TMPL = {
+    "mem": {
+        # 内存实际使用值
+        "current": "sum by(container_name, pod_name)(container_memory_working_set_bytes{{"
+        'pod_name=~"{instance_names}", container_name!="POD", cluster_id="{cluster_id}"}})',
+        # 内存预留值
+        "request": "kube_pod_container_resource_requests_memory_bytes"
+        + '{{pod=~"{instance_names}", cluster_id="{cluster_id}"}}',
+        # 内存上限值
+        "limit": 'kube_pod_container_resource_limits_memory_bytes{{pod=~"{instance_names}", cluster_id="{cluster_id}"}}',
+    },
+    "cpu": {
+        # CPU 实际使用值
+        "current": "sum by (container_name, pod_name)(rate(container_cpu_usage_seconds_total{{"
+        'image!="",container_name!="POD",pod_name=~"{instance_names}", cluster_id="{cluster_id}"}}[1m]))',
+        # CPU 预留值
+        "request": 'kube_pod_container_resource_requests_cpu_cores{{pod=~"{instance_names}", cluster_id="{cluster_id}"}}',
+        # CPU 上限值
+        "limit": 'kube_pod_container_resource_limits_cpu_cores{{pod=~"{instance_names}", cluster_id="{cluster_id}"}}',
+    },
+}
+
+GROUPED_BKMONITOR_PROMQL_TMPL = {
+    "mem": {
+        # 内存实际使用值
+        "current": "sum by(container_name, pod_name)(container_memory_working_set_bytes{{"
+        'pod_name=~"{instance_names}",container_name!="POD",bcs_cluster_id="{cluster_id}",bk_biz_id="{bk_biz_id}"}})',
+        # 内存预留值
+        "request": "kube_pod_container_resource_requests_memory_bytes{{"
+        'pod=~"{instance_names}",bcs_cluster_id="{cluster_id}",bk_biz_id="{bk_biz_id}"}}',
+        # 内存上限值
+        "limit": "kube_pod_container_resource_limits_memory_bytes{{"
+        'pod=~"{instance_names}",bcs_cluster_id="{cluster_id}",bk_biz_id="{bk_biz_id}"}}',
+    },
+    "cpu": {
+        # CPU 实际使用值，由于蓝鲸监控默认采样率较低，rate 时间窗口设置为 2m
+        "current": "sum by(container_name, pod_name)(rate(container_cpu_usage_seconds_total{{"
+        'image!="",pod_name=~"{instance_names}",container_name!="POD",'
+        'bcs_cluster_id="{cluster_id}",bk_biz_id="{bk_biz_id}"}}[2m]))',
+        # CPU 预留值
+        "request": "kube_pod_container_resource_requests_cpu_cores{{"
+        'pod=~"{instance_names}",bcs_cluster_id="{cluster_id}",bk_biz_id="{bk_biz_id}"}}',
+        # CPU 上限值
+        "limit": "kube_pod_container_resource_limits_cpu_cores{{"
+        'pod=~"{instance_names}",bcs_cluster_id="{cluster_id}",bk_biz_id="{bk_biz_id}"}}',
+    },
+}
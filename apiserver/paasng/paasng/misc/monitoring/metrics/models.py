@@ -17,7 +17,7 @@
 
 import logging
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Generator, List, Optional
+from typing import TYPE_CHECKING, Dict, Generator, List, Optional, Sequence, Tuple
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
@@ -34,6 +34,7 @@ from paasng.misc.monitoring.metrics.clients import (
     MetricSeriesResult,
     PrometheusMetricClient,
 )
+from paasng.misc.monitoring.metrics.clients.base import run_concurrently
 from paasng.misc.monitoring.metrics.constants import MetricsResourceType, MetricsSeriesType
 from paasng.misc.monitoring.metrics.exceptions import AppInstancesNotFoundError, AppMetricNotSupportedError
 from paasng.misc.monitoring.metrics.utils import MetricSmartTimeRange
@@ -61,6 +62,9 @@ class MetricsInstanceResult:
 
 
 class ResourceMetricManager:
+    # The max number of instances in a grouped query
+    max_instances_per_query = 50
+
     def __init__(self, process: "Process", metric_client: MetricClient, bcs_cluster_id: str):
         self.process = process
         self.metric_client = metric_client
@@ -95,6 +99,19 @@ class ResourceMetricManager:
         promql = self.metric_client.get_query_promql(resource_type, series_type, instance_name, self.bcs_cluster_id)
         return MetricQuery(type_name=series_type, query=promql, time_range=time_range)
 
+    def gen_grouped_series_query(
+        self,
+        series_type: MetricsSeriesType,
+        resource_type: MetricsResourceType,
+        instance_names: List[str],
+        time_range: MetricSmartTimeRange,
+    ) -> MetricQuery:
+        """get the query of multiple instances, the results can be split by instance name"""
+        promql = self.metric_client.get_grouped_query_promql(
+            resource_type, series_type, instance_names, self.bcs_cluster_id
+        )
+        return MetricQuery(type_name=series_type, query=promql, time_range=time_range)
+
     def get_instance_metrics(
         self,
         instance_name: str,
@@ -103,8 +120,10 @@ class ResourceMetricManager:
         series_type: Optional[MetricsSeriesType] = None,
     ) -> List[MetricsResourceResult]:
         """query metrics at Engine Application level"""
+        time_range = time_range.aligned_to_step()
 
-        resource_results = []
+        # Query the series of all the resource types at once, the client runs the queries concurrently
+        queries_by_resource: List[Tuple[MetricsResourceType, List[MetricQuery]]] = []
         for resource_type in resource_types:
             if series_type:
                 queries = [
@@ -121,10 +140,15 @@ class ResourceMetricManager:
                         resource_type=resource_type, instance_name=instance_name, time_range=time_range
                     )
                 )
+            queries_by_resource.append((resource_type, queries))
 
-            results = list(self.metric_client.general_query(queries, self.process.main_container_name))
-            resource_results.append(MetricsResourceResult(type_name=resource_type, results=results))
+        all_queries = [query for _, queries in queries_by_resource for query in queries]
+        all_results = iter(self.metric_client.general_query(all_queries, self.process.main_container_name))
 
+        resource_results = []
+        for resource_type, queries in queries_by_resource:
+            results = [next(all_results) for _ in queries]
+            resource_results.append(MetricsResourceResult(type_name=resource_type, results=results))
         return resource_results
 
     def get_all_instances_metrics(
@@ -133,21 +157,90 @@ class ResourceMetricManager:
         time_range: MetricSmartTimeRange,
         series_type: Optional[MetricsSeriesType] = None,
     ) -> List[MetricsInstanceResult]:
-        all_instances_metrics = []
-        for instance in self.process.instances:
-            all_instances_metrics.append(
-                MetricsInstanceResult(
-                    instance_name=instance.name,
-                    results=self.get_instance_metrics(
-                        resource_types=resource_types,
-                        instance_name=instance.name,
-                        time_range=time_range,
-                        series_type=series_type,
-                    ),
-                )
-            )
+        """query metrics of all the instances, the metrics of all the instances are queried by grouped
+        queries and split by instance name, rather than querying every instance separately.
+        """
+        return query_processes_metrics([self], resource_types, time_range, series_type)[0]
+
+    @property
+    def batch_key(self) -> Tuple[str, str, str]:
+        """The instances of the managers with the same key can be queried by the same grouped queries"""
+        return (self.metric_client.query_cache.backend, self.bcs_cluster_id, self.process.main_container_name)
+
+    def _batch_instance_names(self, instance_names: List[str]) -> List[List[str]]:
+        """split the instance names into batches, avoid making a too long query"""
+        size = self.max_instances_per_query
+        return [instance_names[i : i + size] for i in range(0, len(instance_names), size)]
+
 
-        return all_instances_metrics
+def query_processes_metrics(
+    managers: Sequence[ResourceMetricManager],
+    resource_types: List[MetricsResourceType],
+    time_range: MetricSmartTimeRange,
+    series_type: Optional[MetricsSeriesType] = None,
+) -> List[List[MetricsInstanceResult]]:
+    """query metrics of all the instances of multiple processes, the instances of the processes which are in
+    the same cluster(see `ResourceMetricManager.batch_key`) are queried together by grouped queries.
+
+    :return: the metrics of the instances of every manager, in the same order as the managers
+    """
+    time_range = time_range.aligned_to_step()
+    # not expose request series
+    series_types = [series_type] if series_type else [MetricsSeriesType.CURRENT, MetricsSeriesType.LIMIT]
+
+    batches: Dict[Tuple[str, str, str], List[ResourceMetricManager]] = {}
+    for manager in managers:
+        batches.setdefault(manager.batch_key, []).append(manager)
+
+    # The queries of every (batch, resource type, series type), a query covers a batch of instances
+    keys: List[Tuple[Tuple[str, str, str], MetricsResourceType, MetricsSeriesType]] = []
+    queries: List[Tuple[ResourceMetricManager, MetricQuery]] = []
+    for batch_key, batch_managers in batches.items():
+        # The managers in a batch share the same metric backend, cluster and container name
+        manager = batch_managers[0]
+        instance_names = [instance.name for m in batch_managers for instance in m.process.instances]
+        for resource_type in resource_types:
+            for s_type in series_types:
+                try:
+                    batch_queries = [
+                        manager.gen_grouped_series_query(s_type, resource_type, names, time_range)
+                        for names in manager._batch_instance_names(instance_names)
+                    ]
+                except KeyError:
+                    if series_type:
+                        raise
+                    logger.info("%s type not exist in query tmpl", s_type)
+                    continue
+                keys.extend([(batch_key, resource_type, s_type)] * len(batch_queries))
+                queries.extend((manager, query) for query in batch_queries)
+
+    query_results = run_concurrently(
+        lambda item: item[0].metric_client.query_by_instances(item[1], item[0].process.main_container_name), queries
+    )
+
+    # Split the results by instance name
+    values: Dict[Tuple[Tuple[str, str, str], MetricsResourceType, MetricsSeriesType], Dict[str, List]] = {}
+    for key, result in zip(keys, query_results, strict=True):
+        values.setdefault(key, {}).update(result)
+
+    all_results = []
+    for manager in managers:
+        all_instances_metrics = []
+        for instance in manager.process.instances:
+            resource_results = []
+            for resource_type in resource_types:
+                series_results = [
+                    MetricSeriesResult(
+                        type_name=s_type,
+                        results=values[(manager.batch_key, resource_type, s_type)].get(instance.name, []),
+                    )
+                    for s_type in series_types
+                    if (manager.batch_key, resource_type, s_type) in values
+                ]
+                resource_results.append(MetricsResourceResult(type_name=resource_type, results=series_results))
+            all_instances_metrics.append(MetricsInstanceResult(instance_name=instance.name, results=resource_results))
+        all_results.append(all_instances_metrics)
+    return all_results
 
 
 def get_resource_metric_manager(app: WlApp, process_type: str):
@@ -15,6 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import copy
 import datetime
 from dataclasses import dataclass
 from typing import Union
@@ -92,3 +93,14 @@ class MetricSmartTimeRange:
 
     def to_dict(self):
         return {"start": self.start, "end": self.end, "step": self.step}
+
+    def aligned_to_step(self) -> "MetricSmartTimeRange":
+        """Return a copy whose start & end are aligned(floored) to the step, the time ranges within
+        the same step become identical, so the query results can be cached.
+        """
+        step_seconds = int(get_time_delta(self.step).total_seconds())
+        obj = copy.copy(self)
+        if step_seconds > 0:
+            obj.start = self._bake_timestamp(int(self.start) // step_seconds * step_seconds)
+            obj.end = self._bake_timestamp(int(self.end) // step_seconds * step_seconds)
+        return obj
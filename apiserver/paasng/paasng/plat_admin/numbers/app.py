@@ -55,10 +55,11 @@ from paasng.core.core.storages.sqlalchemy import legacy_db
 from paasng.core.region.models import get_region
 from paasng.core.tenant.user import get_init_tenant_id
 from paasng.infras.accounts.models import Oauth2TokenHolder, UserProfile
+from paasng.infras.iam.helpers import fetch_role_members_in_bulk
 from paasng.infras.iam.permissions.resources.application import ApplicationPermission
 from paasng.plat_admin.system.constants import SimpleAppSource
 from paasng.plat_admin.system.legacy import LegacyAppNormalizer, query_concrete_apps
-from paasng.platform.applications.constants import ApplicationType
+from paasng.platform.applications.constants import ApplicationRole, ApplicationType
 from paasng.platform.applications.models import Application
 from paasng.platform.modules.constants import SourceOrigin
 from paasng.platform.sourcectl.models import GitProject
@@ -170,6 +171,9 @@ class AppDataBuilder(metaclass=abc.ABCMeta):
 class DefaultAppDataBuilder(AppDataBuilder):
     """Build app data for default platform"""
 
+    # The number of apps whose developers are resolved in one batch
+    developers_batch_size = 100
+
     def __init__(self, include_pv_uv: bool = False, include_market_info: bool = False):
         self.include_pv_uv = include_pv_uv
         self.include_market_info = include_market_info
@@ -275,55 +279,70 @@ class DefaultAppDataBuilder(AppDataBuilder):
 
     def get_results(self) -> Generator[SimpleApp, None, None]:
         """Return simple apps as result"""
-        for app in self.exclude_unqualified(self.apps.order_by("created")):
-            engine_enabled = app.engine_enabled
-            if engine_enabled:
-                deploy_status = self.get_deploy_status(app)
-                source_obj = app.get_source_obj()
-                if not source_obj:
-                    logger.warning("No source object found for application %s", app.code)
-                    continue
-
-                source_repo_type: Optional[str] = source_obj.get_source_type()
-                source_location = source_obj.get_repo_url() or ""
-            else:
-                deploy_status = DeployStatus.DEVELOPING
-                source_repo_type = None
-                source_location = ""
-
-            creator = get_user_by_user_id(app.creator, username_only=True).username
-
-            pv, uv = self.get_pv_uv(app=app) if self.include_pv_uv else (0, 0)
-
-            market_address = market_tag = None
-            if self.include_market_info:
-                market_address = self.get_market_address(app)
-                market_tag = self.get_tag_display_name(app)
-
-            default_module = app.get_default_module()
-            item = SimpleApp(
-                _source=SimpleAppSource.DEFAULT,
-                name=app.name,
-                type=app.type,
-                region=app.region or "unknown",
-                code=app.code,
-                created=app.created,
-                deploy_status=deploy_status,
-                source_origin=default_module.source_origin,
-                source_repo_type=source_repo_type,
-                source_location=source_location,
-                engine_enabled=engine_enabled,
-                creator=creator,
-                developers=app.get_developers(),
-                # 市场信息
-                market_address=market_address,
-                market_tag=market_tag,
-                # 访问量统计
-                pv=pv,
-                uv=uv,
-                last_deployed_date=app.last_deployed_date,
+        apps = self.exclude_unqualified(self.apps.order_by("created"))
+        # Resolve developers of a batch of apps at once, instead of requesting bk-iam app by app
+        while batch := list(itertools.islice(apps, self.developers_batch_size)):
+            members = fetch_role_members_in_bulk(
+                (app.code, role)
+                for app in batch
+                for role in (ApplicationRole.DEVELOPER, ApplicationRole.ADMINISTRATOR)
             )
-            yield item
+            for app in batch:
+                developers = members.get((app.code, ApplicationRole.DEVELOPER), []) + members.get(
+                    (app.code, ApplicationRole.ADMINISTRATOR), []
+                )
+                if item := self.make_simple_app(app, list(set(developers))):
+                    yield item
+
+    def make_simple_app(self, app: Application, developers: List[str]) -> Optional[SimpleApp]:
+        """Make simple app from application, return None if the app is unqualified"""
+        engine_enabled = app.engine_enabled
+        if engine_enabled:
+            deploy_status = self.get_deploy_status(app)
+            source_obj = app.get_source_obj()
+            if not source_obj:
+                logger.warning("No source object found for application %s", app.code)
+                return None
+
+            source_repo_type: Optional[str] = source_obj.get_source_type()
+            source_location = source_obj.get_repo_url() or ""
+        else:
+            deploy_status = DeployStatus.DEVELOPING
+            source_repo_type = None
+            source_location = ""
+
+        creator = get_user_by_user_id(app.creator, username_only=True).username
+
+        pv, uv = self.get_pv_uv(app=app) if self.include_pv_uv else (0, 0)
+
+        market_address = market_tag = None
+        if self.include_market_info:
+            market_address = self.get_market_address(app)
+            market_tag = self.get_tag_display_name(app)
+
+        default_module = app.get_default_module()
+        return SimpleApp(
+            _source=SimpleAppSource.DEFAULT,
+            name=app.name,
+            type=app.type,
+            region=app.region or "unknown",
+            code=app.code,
+            created=app.created,
+            deploy_status=deploy_status,
+            source_origin=default_module.source_origin,
+            source_repo_type=source_repo_type,
+            source_location=source_location,
+            engine_enabled=engine_enabled,
+            creator=creator,
+            developers=developers,
+            # 市场信息
+            market_address=market_address,
+            market_tag=market_tag,
+            # 访问量统计
+            pv=pv,
+            uv=uv,
+            last_deployed_date=app.last_deployed_date,
+        )
 
 
 class LegacyAppDataBuilder(AppDataBuilder):
@@ -33,6 +33,7 @@ from paasng.plat_mgt.applications.serializers import (
     ProcessSpecInputSLZ,
 )
 from paasng.platform.applications.models import Application
+from paasng.platform.bkapp_model.manifest_cache import bump_manifest_revision
 from paasng.platform.bkapp_model.models import ModuleProcessSpec, ProcessSpecEnvOverlay, ResQuotaPlan
 from paasng.platform.engine.constants import AppEnvName
 from paasng.platform.modules.constants import SourceOrigin
@@ -154,6 +155,7 @@ class ApplicationProcessViewSet(viewsets.GenericViewSet):
                 overlays_to_update,
                 fields=["override_plan_name", "override_resources", "updated"],
             )
+        bump_manifest_revision(module_id=proc_spec.module_id)
 
         # 构建更新后的审计日志数据
         after_env_overlays = {
@@ -17,18 +17,47 @@
 
 """HTTP client for communicating with the sandbox daemon service."""
 
-from typing import Any, Self
+import hashlib
+import logging
+import threading
+from typing import Any, BinaryIO, Iterator, Self
 
 import requests
 from attrs import define
+from requests.adapters import HTTPAdapter
 
 from paas_wl.bk_app.agent_sandbox.constants import DAEMON_BIND_PORT
 
-from .exceptions import SandboxDaemonAPIError, SandboxServiceNotReady
+from .exceptions import SandboxDaemonAPIError, SandboxDaemonAPINotFound, SandboxServiceNotReady
+
+logger = logging.getLogger(__name__)
 
 # Default timeout for HTTP requests (in seconds)
 DEFAULT_REQUEST_TIMEOUT = 60
 
+# Default chunk size for streaming file transfers, at most one chunk is held in memory at a time
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+# Max retries for a failed chunk upload or an interrupted download
+MAX_TRANSFER_RETRIES = 3
+# The header carrying the hex encoded sha256 checksum of an uploaded chunk
+CHUNK_CHECKSUM_HEADER = "X-Chunk-Sha256"
+
+# Max connections kept in the pool for each router endpoint
+_POOL_MAXSIZE = 32
+_shared_adapters: dict[str, HTTPAdapter] = {}
+_shared_adapters_lock = threading.Lock()
+
+
+def _get_shared_adapter(base_url: str) -> HTTPAdapter:
+    """Get the HTTP adapter shared by all clients of the same router endpoint. The adapter holds the
+    connection pool, so that the connections are reused across requests and sandboxes.
+    """
+    with _shared_adapters_lock:
+        adapter = _shared_adapters.get(base_url)
+        if adapter is None:
+            adapter = _shared_adapters[base_url] = HTTPAdapter(pool_maxsize=_POOL_MAXSIZE)
+        return adapter
+
 
 @define
 class ExecuteResult:
@@ -61,7 +90,11 @@ class SandboxDaemonClient:
     ):
         self.base_url = f"http://{router_endpoint}"
         self.timeout = DEFAULT_REQUEST_TIMEOUT
+        # The headers are different for each sandbox, so every client has its own session, while the
+        # connections of the same router endpoint are shared by mounting the same adapter.
+        self._adapter_prefix = f"{self.base_url}/"
         self._session = requests.Session()
+        self._session.mount(self._adapter_prefix, _get_shared_adapter(self.base_url))
         self._session.headers["Authorization"] = f"Bearer {token}"
         self._session.headers["X-Sandbox-ID"] = sandbox_name
         self._session.headers["X-Sandbox-Namespace"] = sandbox_namespace
@@ -140,10 +173,129 @@ class SandboxDaemonClient:
 
         self._request("POST", "/files/folder", json=payload)
 
+    def upload_stream(
+        self,
+        fileobj: BinaryIO,
+        dest_path: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        resume: bool = False,
+        timeout: int | None = None,
+    ) -> int:
+        """Upload a file-like object to the sandbox in chunks, each chunk is verified by its checksum
+        and retried on failure. The file becomes visible at the destination path after all chunks
+        are uploaded.
+
+        :param fileobj: The file-like object to read content from.
+        :param dest_path: The destination path in the sandbox.
+        :param chunk_size: The size of each chunk in bytes.
+        :param resume: Continue from the bytes the daemon has received in a previous interrupted
+            upload to the same path, the file object must be seekable.
+        :param timeout: Timeout for each chunk request in seconds.
+        :returns: The total size of the uploaded file.
+        :raises SandboxDaemonAPINotFound: The daemon does not support chunked uploads.
+        """
+        offset = 0
+        if resume and fileobj.seekable():
+            offset = self.get_upload_offset(dest_path)
+            fileobj.seek(offset)
+
+        while chunk := fileobj.read(chunk_size):
+            offset = self._upload_chunk(dest_path, offset, chunk, timeout)
+
+        self._request("POST", "/files/upload/complete", json={"path": dest_path, "size": offset}, timeout=timeout)
+        return offset
+
+    def get_upload_offset(self, dest_path: str) -> int:
+        """Get the number of bytes the daemon has received for an unfinished chunked upload.
+
+        :param dest_path: The destination path in the sandbox.
+        """
+        resp = self._request("GET", "/files/upload/chunk", params={"path": dest_path})
+        return resp.json()["offset"]
+
+    def download_stream(
+        self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, timeout: int | None = None
+    ) -> Iterator[bytes]:
+        """Download a file from the sandbox as an iterator of chunks. The first request is sent
+        immediately, so errors like "file not found" are raised by this method instead of the
+        iteration. An interrupted transfer is resumed from the received position by range requests.
+
+        :param path: The path of the file to download.
+        :param chunk_size: The max size of each chunk in bytes.
+        :param timeout: Timeout for connecting and reading each chunk in seconds.
+        """
+        resp = self._request("GET", "/files/download", params={"path": path}, timeout=timeout, stream=True)
+        return self._iter_download(path, resp, chunk_size, timeout)
+
     def close(self) -> None:
-        """Close the HTTP session."""
+        """Close the HTTP session, the shared connection pool is kept for other clients."""
+        self._session.adapters.pop(self._adapter_prefix, None)
         self._session.close()
 
+    def _upload_chunk(self, dest_path: str, offset: int, chunk: bytes, timeout: int | None) -> int:
+        """Upload a chunk at the given offset, return the offset for the next chunk."""
+        headers = {CHUNK_CHECKSUM_HEADER: hashlib.sha256(chunk).hexdigest()}
+        retries = 0
+        while True:
+            try:
+                resp = self._request(
+                    "PUT",
+                    "/files/upload/chunk",
+                    params={"path": dest_path, "offset": offset},
+                    data=chunk,
+                    headers=headers,
+                    timeout=timeout,
+                )
+            except SandboxDaemonAPINotFound:
+                # The daemon does not support chunked uploads, retrying does not help
+                raise
+            except SandboxDaemonAPIError:
+                if retries >= MAX_TRANSFER_RETRIES:
+                    raise
+                retries += 1
+                # The daemon drops the data written by the failed attempt when the chunk is retried
+                logger.warning("failed to upload chunk at offset %s of %s, retrying", offset, dest_path)
+            else:
+                return resp.json()["offset"]
+
+    def _iter_download(
+        self, path: str, resp: requests.Response, chunk_size: int, timeout: int | None
+    ) -> Iterator[bytes]:
+        total = int(resp.headers["Content-Length"]) if "Content-Length" in resp.headers else None
+        received = 0
+        retries = 0
+        while True:
+            try:
+                for chunk in resp.iter_content(chunk_size=chunk_size):
+                    received += len(chunk)
+                    yield chunk
+            except requests.RequestException as exc:
+                error = str(exc)
+            else:
+                # A truncated body does not raise any error, so check the received size by ourselves
+                if total is None or received >= total:
+                    return
+                error = f"received {received} of {total} bytes"
+            finally:
+                resp.close()
+
+            if retries >= MAX_TRANSFER_RETRIES:
+                raise SandboxDaemonAPIError(f"Download {path} interrupted: {error}")
+            retries += 1
+            logger.warning("download %s interrupted at %s bytes, resuming", path, received)
+
+            resp = self._request(
+                "GET",
+                "/files/download",
+                params={"path": path},
+                headers={"Range": f"bytes={received}-"},
+                timeout=timeout,
+                stream=True,
+            )
+            if resp.status_code != 206:
+                resp.close()
+                raise SandboxDaemonAPIError(f"Download {path} can not be resumed, status: {resp.status_code}")
+
     def _request(
         self,
         method: str,
@@ -171,11 +323,16 @@ class SandboxDaemonClient:
         except requests.Timeout as exc:
             raise SandboxDaemonAPIError(f"Request {path} timed out: {exc}")
         except requests.HTTPError as exc:
-            if exc.response.status_code == 502:
+            status_code = exc.response.status_code
+            if status_code == 502:
                 raise SandboxServiceNotReady("sandbox daemon service is not ready")
-            raise SandboxDaemonAPIError(
-                f"HTTP error {exc.response.status_code} on {path}: {exc.response.json().get('message')}"
-            )
+            try:
+                message = exc.response.json().get("message")
+            except ValueError:
+                # The response of an unknown route is not JSON
+                message = exc.response.text
+            error_cls = SandboxDaemonAPINotFound if status_code == 404 else SandboxDaemonAPIError
+            raise error_cls(f"HTTP error {status_code} on {path}: {message}")
         except requests.RequestException as exc:
             raise SandboxDaemonAPIError(f"Request failed: {exc}")
         else:
@@ -51,5 +51,9 @@ class SandboxDaemonAPIError(Exception):
     """Raised when the sandbox daemon API returns an error."""
 
 
+class SandboxDaemonAPINotFound(SandboxDaemonAPIError):
+    """Raised when the sandbox daemon API returns 404, e.g. the API is not supported by an older daemon."""
+
+
 class ImageBuildSourceError(SandboxError):
     """Raised when preparing image build source fails (e.g. missing Dockerfile)."""
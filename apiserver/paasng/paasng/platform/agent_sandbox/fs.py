@@ -16,6 +16,7 @@
 """File system related operations in agent sandbox"""
 
 from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator
 
 
 class SandboxFS(ABC):
@@ -31,6 +32,11 @@ class SandboxFS(ABC):
         """Upload a file to the sandbox."""
         raise NotImplementedError
 
+    @abstractmethod
+    def upload_stream(self, fileobj: BinaryIO, remote_path: str) -> None:
+        """Upload a file-like object to the sandbox with bounded memory."""
+        raise NotImplementedError
+
     @abstractmethod
     def delete_file(self, path: str, recursive: bool = False) -> None:
         """Delete a file or folder from the sandbox."""
@@ -40,3 +46,8 @@ class SandboxFS(ABC):
     def download_file(self, remote_path: str, timeout: int = 30 * 60) -> bytes:
         """Download a file from the sandbox."""
         raise NotImplementedError
+
+    @abstractmethod
+    def download_stream(self, remote_path: str) -> Iterator[bytes]:
+        """Download a file from the sandbox as an iterator of chunks with bounded memory."""
+        raise NotImplementedError
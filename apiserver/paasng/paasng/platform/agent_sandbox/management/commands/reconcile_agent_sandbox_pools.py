@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+"""维护沙箱预热池：补充空闲沙箱，回收异常或过旧的空闲沙箱"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from paasng.platform.agent_sandbox.pool import SandboxWarmPool
+from paasng.platform.applications.models import Application
+
+
+class Command(BaseCommand):
+    """
+    Q: 已经有认领后触发的补充任务，为什么还需要该命令？
+    A: 补充任务只在沙箱被认领时触发，空闲沙箱的回收、预热池大小的调整以及补充任务失败后的恢复都依赖该命令定时执行
+    """
+
+    help = "维护沙箱预热池"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--app-code", dest="app_code", default=None, help="仅处理指定应用的预热池")
+
+    def handle(self, app_code, *args, **options):
+        app_codes = [app_code] if app_code else list(settings.AGENT_SANDBOX_WARM_POOL_SIZES)
+        for code in app_codes:
+            try:
+                application = Application.objects.get(code=code)
+            except Application.DoesNotExist:
+                self.stdout.write(self.style.WARNING(f"应用 {code} 不存在，跳过"))
+                continue
+
+            pool = SandboxWarmPool.from_app(application)
+            if not pool:
+                self.stdout.write(f"应用 {code} 未启用预热池，跳过")
+                continue
+
+            with pool.lock():
+                result = pool.reconcile()
+            self.stdout.write(
+                f"app_code={code} target={pool.target} idle={result.idle} "
+                f"created={result.created} recycled={result.recycled}"
+            )
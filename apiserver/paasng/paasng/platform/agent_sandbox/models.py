@@ -34,6 +34,14 @@ from .constants import SANDBOX_DEFAULT_TTL_SECONDS, SandboxStatus
 from .exceptions import SandboxAlreadyExists
 
 
+def allocate_sandbox_target(application: Application) -> str:
+    """分配沙箱可调度的集群，返回集群名称"""
+    cluster = ClusterAllocator(
+        AllocationContext.create_for_agent_sandbox(application.tenant_id, application.region)
+    ).get_default()
+    return cluster.name
+
+
 class SandboxManager(models.Manager):
     """沙箱 Manager 类"""
 
@@ -47,8 +55,17 @@ class SandboxManager(models.Manager):
         name: str | None = None,
         workspace: str | None = None,
         ttl_seconds: int = SANDBOX_DEFAULT_TTL_SECONDS,
+        sandbox_id: uuid.UUID | None = None,
+        daemon_token: str | None = None,
+        target: str | None = None,
     ):
-        sandbox_id = uuid.uuid4()
+        """创建沙箱记录
+
+        :param sandbox_id: 沙箱 ID，未提供时自动生成；认领预热池中的沙箱时使用 Pod 已有的 ID
+        :param daemon_token: daemon 服务的访问 token，未提供时自动生成
+        :param target: 沙箱所属集群，未提供时自动分配
+        """
+        sandbox_id = sandbox_id or uuid.uuid4()
         env_vars = env_vars or {}
         if not name:
             name = f"sbx-{sandbox_id.hex}"
@@ -62,11 +79,7 @@ class SandboxManager(models.Manager):
             raise SandboxAlreadyExists(f"sandbox name {name} in application {application.code} already exists")
 
         # 分配可调度集群
-        cluster = ClusterAllocator(
-            AllocationContext.create_for_agent_sandbox(application.tenant_id, application.region)
-        ).get_default()
-
-        target = cluster.name
+        target = target or allocate_sandbox_target(application)
 
         return self.create(
             uuid=sandbox_id,
@@ -80,7 +93,7 @@ class SandboxManager(models.Manager):
             status=SandboxStatus.PENDING.value,
             creator=creator,
             tenant_id=application.tenant_id,
-            daemon_token=get_random_string(32),
+            daemon_token=daemon_token or get_random_string(32),
             expired_at=timezone.now() + timedelta(seconds=ttl_seconds),
         )
 
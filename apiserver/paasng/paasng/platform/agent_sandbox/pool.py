@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+"""沙箱预热池
+
+为配置了预热池的应用预先启动若干空闲沙箱 Pod（daemon 已就绪），创建沙箱时直接认领其中一个，
+从而省去镜像拉取、调度以及 daemon 启动的耗时。
+
+- 认领：通过带 resourceVersion 的 patch 将 Pod 的 pool-state 标签由 idle 改为 claimed，
+  多个请求并发认领同一 Pod 时，只有一个能成功，其余请求会继续尝试下一个 Pod；
+- 补充：由后台任务或定时命令调用 `reconcile`，将空闲 Pod 数量维持在目标大小，并回收异常或过旧的空闲 Pod。
+"""
+
+import logging
+import random
+import uuid
+from datetime import datetime
+
+import arrow
+from attrs import define
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from kubernetes.client.exceptions import ApiException
+
+from paas_wl.bk_app.agent_sandbox.constants import DAEMON_BIND_PORT, POOL_STATE_CLAIMED, POOL_STATE_IDLE
+from paas_wl.bk_app.agent_sandbox.image_credential import ensure_image_credential
+from paas_wl.bk_app.agent_sandbox.kres_entities import (
+    AgentSandbox,
+    AgentSandboxKresApp,
+    AgentSandboxService,
+    agent_sandbox_kmodel,
+    agent_sandbox_svc_kmodel,
+)
+from paas_wl.bk_app.agent_sandbox.kres_slzs import AgentSandboxLabels
+from paas_wl.bk_app.deploy.app_res.controllers import NamespacesHandler
+from paas_wl.infras.resources.base import kres
+from paas_wl.infras.resources.base.exceptions import ResourceMissing
+from paas_wl.utils.constants import PodPhase
+from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.platform.agent_sandbox.models import allocate_sandbox_target
+from paasng.platform.applications.models import Application
+
+logger = logging.getLogger(__name__)
+
+
+class SandboxPoolPods:
+    """Kubernetes operations on the warm pool pods of an application.
+
+    :param kres_app: The kres app which the pool pods belong to.
+    """
+
+    def __init__(self, kres_app: AgentSandboxKresApp):
+        self.kres_app = kres_app
+
+    def list(self, pool_state: str) -> list[AgentSandbox]:
+        """List the pool pods in given state."""
+        return agent_sandbox_kmodel.list_by_app(
+            self.kres_app, labels=AgentSandboxLabels.generate_pool_selector(pool_state)
+        )
+
+    def prepare(self) -> None:
+        """Make sure the namespace and image credential are ready before creating pods."""
+        with self.kres_app.get_kube_api_client() as client:
+            NamespacesHandler(client).ensure_namespace(self.kres_app.namespace)
+            ensure_image_credential(client=client, namespace=self.kres_app.namespace)
+
+    def create(self, sandbox: AgentSandbox) -> None:
+        """Create the pod and its service, the service is created in advance so that claiming
+        a pod requires no further resources.
+        """
+        agent_sandbox_kmodel.create(sandbox)
+        try:
+            agent_sandbox_svc_kmodel.create(AgentSandboxService.create(sandbox))
+        except ApiException:
+            self.delete(sandbox.name)
+            raise
+
+    def mark_claimed(self, sandbox: AgentSandbox) -> None:
+        """Change the pool state of the pod to "claimed".
+
+        :raises: ApiException(409) when the pod has been modified(claimed by others) since it was listed,
+            ResourceMissing when the pod has been deleted.
+        """
+        body = {
+            "metadata": {
+                # Use the resourceVersion as a precondition for optimistic locking
+                "resourceVersion": sandbox.get_resource_version(),
+                "labels": {AgentSandboxLabels.key_pool_state: POOL_STATE_CLAIMED},
+            }
+        }
+        with self.kres_app.get_kube_api_client() as client:
+            kres.KPod(client).patch(
+                sandbox.name, body=body, namespace=self.kres_app.namespace, ptype=kres.PatchType.MERGE
+            )
+
+    def delete(self, name: str) -> None:
+        """Delete the pod and its service, the service has the same name with the pod."""
+        agent_sandbox_kmodel.delete_by_name(self.kres_app, name, non_grace_period=True)
+        agent_sandbox_svc_kmodel.delete_by_name(self.kres_app, name, non_grace_period=True)
+
+
+@define
+class ReconcileResult:
+    """The result of reconciling a warm pool.
+
+    :param idle: The number of idle pods kept in the pool, including the new created ones.
+    :param created: The number of pods created.
+    :param recycled: The number of pods deleted.
+    """
+
+    idle: int = 0
+    created: int = 0
+    recycled: int = 0
+
+
+class SandboxWarmPool:
+    """The warm pool of pre-started sandbox pods for an application.
+
+    The pods in pool are started with the default image and no customized options, so only the
+    sandboxes created with default options can be served by the pool, see `is_eligible`.
+
+    :param app: The application that the pool belongs to.
+    :param target: The target(cluster) that the pool pods run in.
+    :param size: The target number of idle pods in the pool.
+    :param pods: The kubernetes operations on pool pods, optional.
+    """
+
+    def __init__(self, app: Application, target: str, size: int, pods: SandboxPoolPods | None = None):
+        self.app = app
+        self.target = target
+        self.size = size
+        self.kres_app = AgentSandboxKresApp(paas_app_id=app.code, tenant_id=app.tenant_id, target=target)
+        self.pods = pods or SandboxPoolPods(self.kres_app)
+
+    @classmethod
+    def from_app(cls, app: Application) -> "SandboxWarmPool | None":
+        """Get the warm pool of given application, return None if the pool is not enabled."""
+        size = int(settings.AGENT_SANDBOX_WARM_POOL_SIZES.get(app.code, 0))
+        if size <= 0:
+            return None
+        return cls(app, allocate_sandbox_target(app), size)
+
+    @staticmethod
+    def is_eligible(
+        name: str | None = None,
+        env_vars: dict | None = None,
+        snapshot: str | None = None,
+        snapshot_entrypoint: list | None = None,
+        workspace: str | None = None,
+    ) -> bool:
+        """Check whether a sandbox with given options can be served by the pool. The name, env vars
+        and image of a pod are all fixed at creation, pool pods can only serve the default options.
+        """
+        if name or env_vars or snapshot_entrypoint or workspace:
+            return False
+        return not snapshot or snapshot == settings.AGENT_SANDBOX_DEFAULT_IMAGE
+
+    def claim(self) -> AgentSandbox | None:
+        """Claim an idle and ready pod from the pool.
+
+        :return: The claimed sandbox entity, None if no pod is available.
+        """
+        candidates = [pod for pod in self.pods.list(POOL_STATE_IDLE) if self._is_claimable(pod)]
+        # Shuffle the candidates to reduce the conflicts between concurrent claims
+        random.shuffle(candidates)
+        for pod in candidates:
+            try:
+                self.pods.mark_claimed(pod)
+            except ResourceMissing:
+                continue
+            except ApiException as exc:
+                if exc.status in (404, 409):
+                    logger.debug("pool pod %s has been claimed by others, try next one", pod.name)
+                    continue
+                raise
+
+            pod.pool_state = POOL_STATE_CLAIMED
+            return pod
+
+        logger.info("no idle pod in the warm pool of app %s, target: %s", self.app.code, self.target)
+        return None
+
+    def lock(self, blocking_timeout: int = 60):
+        """Get a distributed lock for reconciling the pool, concurrent reconciliations may create
+        more pods than the target size.
+        """
+        return get_default_redis().lock(
+            f"lock:agent_sandbox_pool:{self.app.code}", timeout=300, blocking_timeout=blocking_timeout
+        )
+
+    def request_refill(self) -> bool:
+        """Mark the pool as waiting to be refilled, the claims before the refill starts share one refill.
+
+        :return: Whether the caller should trigger the refill, False if a refill is already pending.
+        """
+        return bool(get_default_redis().set(self._refill_request_key, 1, nx=True, ex=300))
+
+    def clear_refill_request(self):
+        """Clear the pending refill request, call it before refilling so that the later claims can request again."""
+        get_default_redis().delete(self._refill_request_key)
+
+    @property
+    def _refill_request_key(self) -> str:
+        return f"bk_paas:agent_sandbox_pool:refill_requested:{self.app.code}"
+
+    def reconcile(self) -> ReconcileResult:
+        """Keep the number of idle pods at the target size, the failed pods, the pods using an
+        outdated image and the pods idle for too long will be recycled.
+        """
+        result = ReconcileResult()
+        now = timezone.now()
+        alive = []
+        for pod in self.pods.list(POOL_STATE_IDLE):
+            if self._should_recycle(pod, now):
+                result.recycled += self._recycle(pod.name)
+            else:
+                alive.append(pod)
+
+        # Remove the oldest pods when the pool size was reduced
+        alive.sort(key=_get_created_at)
+        while len(alive) > self.size:
+            result.recycled += self._recycle(alive.pop(0).name)
+
+        missing = self.size - len(alive)
+        if missing > 0:
+            self.pods.prepare()
+            for _ in range(missing):
+                self.pods.create(self._make_pod())
+                result.created += 1
+
+        result.idle = len(alive) + result.created
+        return result
+
+    def _make_pod(self) -> AgentSandbox:
+        sandbox_id = uuid.uuid4().hex
+        sandbox = AgentSandbox.create(
+            self.kres_app,
+            # Use the same naming rule with the sandbox records
+            name=f"sbx-{sandbox_id}",
+            sandbox_id=sandbox_id,
+            workdir="",
+            snapshot=settings.AGENT_SANDBOX_DEFAULT_IMAGE,
+            env={"TOKEN": get_random_string(32), "SERVER_PORT": str(DAEMON_BIND_PORT)},
+        )
+        sandbox.pool_state = POOL_STATE_IDLE
+        return sandbox
+
+    def _is_claimable(self, pod: AgentSandbox) -> bool:
+        return pod.status == PodPhase.RUNNING.value and _is_pod_ready(pod)
+
+    def _should_recycle(self, pod: AgentSandbox, now: datetime) -> bool:
+        if pod.status in (PodPhase.FAILED.value, PodPhase.SUCCEEDED.value):
+            return True
+        if pod.image != settings.AGENT_SANDBOX_DEFAULT_IMAGE:
+            return True
+        idle_seconds = (now - _get_created_at(pod)).total_seconds()
+        return idle_seconds > settings.AGENT_SANDBOX_WARM_POOL_MAX_IDLE_SECONDS
+
+    def _recycle(self, name: str) -> bool:
+        try:
+            self.pods.delete(name)
+        except ApiException:
+            logger.warning(
+                "failed to recycle pool pod %s, namespace: %s", name, self.kres_app.namespace, exc_info=True
+            )
+            return False
+        return True
+
+
+def _is_pod_ready(pod: AgentSandbox) -> bool:
+    """Check whether the pod's "Ready" condition is true, which means the daemon has passed the readiness probe."""
+    status = pod._kube_data and pod._kube_data.status
+    for cond in (status and status.conditions) or []:
+        if cond.type == "Ready":
+            return cond.status == "True"
+    return False
+
+
+def _get_created_at(pod: AgentSandbox) -> datetime:
+    metadata = pod._kube_data and pod._kube_data.metadata
+    if not (metadata and metadata.creationTimestamp):
+        # Treat the pod as just created when the timestamp is unknown
+        return timezone.now()
+    return arrow.get(metadata.creationTimestamp).datetime
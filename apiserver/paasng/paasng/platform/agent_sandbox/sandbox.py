@@ -19,6 +19,8 @@ import copy
 import logging
 import re
 import shlex
+import uuid
+from typing import BinaryIO, Iterator
 
 from django.conf import settings
 from django.utils import timezone
@@ -47,13 +49,16 @@ from paasng.platform.agent_sandbox.exceptions import (
     SandboxCreateError,
     SandboxCreateTimeout,
     SandboxDaemonAPIError,
+    SandboxDaemonAPINotFound,
     SandboxError,
     SandboxExecError,
     SandboxFileError,
 )
 from paasng.platform.agent_sandbox.fs import SandboxFS
 from paasng.platform.agent_sandbox.models import Sandbox
+from paasng.platform.agent_sandbox.pool import SandboxWarmPool
 from paasng.platform.agent_sandbox.process import SandboxProcess
+from paasng.platform.agent_sandbox.tasks import refill_agent_sandbox_pool
 from paasng.platform.applications.models import Application
 
 logger = logging.getLogger(__name__)
@@ -83,6 +88,17 @@ def create_sandbox(
     :param workspace: The workspace path, optional.
     :param ttl_seconds: The sandbox ttl in seconds, optional.
     """
+    # Claim a pre-started sandbox from the warm pool if possible, fallback to provisioning a new
+    # one when the pool is not enabled or has been exhausted.
+    pool = None
+    if SandboxWarmPool.is_eligible(name, env_vars, snapshot, snapshot_entrypoint, workspace):
+        pool = SandboxWarmPool.from_app(application)
+    if pool and (pooled_obj := _create_from_warm_pool(pool, creator, ttl_seconds)):
+        # Refill the pool in background, only one refill task is enqueued for concurrent claims
+        if pool.request_refill():
+            refill_agent_sandbox_pool.delay(application.code)
+        return pooled_obj
+
     sandbox_obj = Sandbox.objects.new(
         application=application,
         name=name,
@@ -109,6 +125,42 @@ def create_sandbox(
     return sandbox_obj
 
 
+def _create_from_warm_pool(pool: SandboxWarmPool, creator: str, ttl_seconds: int) -> Sandbox | None:
+    """Claim a sandbox from the warm pool and bind it to a new sandbox record.
+
+    :return: The sandbox record, None if no sandbox can be claimed.
+    """
+    try:
+        entity = pool.claim()
+    except ApiException:
+        logger.exception("failed to claim sandbox from the warm pool, app: %s", pool.app.code)
+        return None
+    if not entity:
+        return None
+
+    try:
+        sandbox_obj = Sandbox.objects.new(
+            application=pool.app,
+            creator=creator,
+            name=entity.name,
+            snapshot=entity.image,
+            ttl_seconds=ttl_seconds,
+            sandbox_id=uuid.UUID(entity.sandbox_id),
+            daemon_token=entity.env["TOKEN"],
+            target=pool.target,
+        )
+    except Exception:
+        # The claimed pod can not be bound to any record, delete it to avoid leaking
+        AgentSandboxResManager(pool.app, pool.target).destroy_by_name(entity.name)
+        raise
+
+    # The pod in the pool is already running and the daemon is ready.
+    sandbox_obj.status = SandboxStatus.RUNNING.value
+    sandbox_obj.started_at = timezone.now()
+    sandbox_obj.save(update_fields=["status", "started_at", "updated"])
+    return sandbox_obj
+
+
 def delete_sandbox(sandbox_obj: Sandbox) -> None:
     """Stop and delete a sandbox.
 
@@ -365,6 +417,27 @@ class KubernetesPodSandbox(SandboxProcess, SandboxFS):
         except SandboxDaemonAPIError as exc:
             raise SandboxFileError(f"failed to upload file: {exc}")
 
+    def upload_stream(self, fileobj: BinaryIO, remote_path: str) -> None:
+        """Upload a file-like object to the sandbox in chunks via daemon API, only one chunk is held
+        in memory at a time.
+
+        :param fileobj: The file-like object to upload, it must be seekable to fall back to uploading
+            the whole file when the daemon does not support chunked uploads.
+        :param remote_path: The destination path in the sandbox.
+        """
+        try:
+            with self.daemon_client() as client:
+                try:
+                    client.upload_stream(fileobj=fileobj, dest_path=remote_path)
+                except SandboxDaemonAPINotFound:
+                    # The daemons started before the chunked upload API was introduced only support
+                    # uploading the whole file at once
+                    logger.info("sandbox %s does not support chunked uploads, upload the whole file", self.entity.name)
+                    fileobj.seek(0)
+                    client.upload_file(file_content=fileobj.read(), dest_path=remote_path, timeout=30 * 60)
+        except SandboxDaemonAPIError as exc:
+            raise SandboxFileError(f"failed to upload file: {exc}")
+
     def delete_file(self, path: str, recursive: bool = False) -> None:
         """Delete a file from the sandbox via daemon API.
 
@@ -390,10 +463,30 @@ class KubernetesPodSandbox(SandboxProcess, SandboxFS):
         except SandboxDaemonAPIError as exc:
             raise SandboxFileError(f"failed to download file: {exc}")
 
-    def daemon_client(self) -> SandboxDaemonClient:
-        """Get the daemon client for this sandbox."""
+    def download_stream(self, remote_path: str) -> Iterator[bytes]:
+        """Download a file from the sandbox as an iterator of chunks via daemon API.
+
+        :param remote_path: The path of the file to download.
+        :returns: The iterator of file content chunks.
+        """
+        client = self.daemon_client()
+        try:
+            chunks = client.download_stream(path=remote_path)
+        except SandboxDaemonAPIError as exc:
+            client.close()
+            raise SandboxFileError(f"failed to download file: {exc}")
+        return self._iter_chunks(client, chunks)
+
+    @staticmethod
+    def _iter_chunks(client: SandboxDaemonClient, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        with client:
+            try:
+                yield from chunks
+            except SandboxDaemonAPIError as exc:
+                raise SandboxFileError(f"failed to download file: {exc}")
 
-        # TODO: 将 SandboxDaemonClient 缓存为实例属性（lazy init），或者至少在 KubernetesPodSandbox 级别共享同一个 session?
+    def daemon_client(self) -> SandboxDaemonClient:
+        """Get the daemon client for this sandbox, the connections to the router are shared by all clients."""
         return SandboxDaemonClient(
             router_endpoint=self.router_endpoint,
             token=self.daemon_token,
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import logging
+
+from celery import shared_task
+
+from paasng.platform.agent_sandbox.pool import SandboxWarmPool
+from paasng.platform.applications.models import Application
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task()
+def refill_agent_sandbox_pool(app_code: str):
+    """补充应用的沙箱预热池，在沙箱被认领后触发
+
+    :param app_code: 应用 code
+    """
+    try:
+        application = Application.objects.get(code=app_code)
+    except Application.DoesNotExist:
+        logger.warning("application %s not found, skip refilling sandbox pool", app_code)
+        return
+
+    pool = SandboxWarmPool.from_app(application)
+    if not pool:
+        return
+
+    pool.clear_refill_request()
+    # 同一个预热池的补充操作串行执行，避免并发补充时创建出超过目标数量的 Pod
+    with pool.lock():
+        result = pool.reconcile()
+    logger.info("sandbox pool of app %s reconciled, result: %s", app_code, result)
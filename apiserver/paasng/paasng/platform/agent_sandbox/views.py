@@ -19,7 +19,7 @@ import logging
 from pathlib import PurePosixPath
 
 from django.conf import settings
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status, viewsets
 from rest_framework.permissions import IsAuthenticated
@@ -145,7 +145,7 @@ class AgentSandboxFSViewSet(SandboxViewMixin, viewsets.GenericViewSet):
         data = slz.validated_data
 
         try:
-            get_sandbox_client(sandbox).upload_file(file=data["file"].read(), remote_path=data["path"])
+            get_sandbox_client(sandbox).upload_stream(fileobj=data["file"], remote_path=data["path"])
         except SandboxServiceNotReady:
             raise error_codes.AGENT_SANDBOX_SERVICE_NOT_READY
         except SandboxError:
@@ -179,7 +179,7 @@ class AgentSandboxFSViewSet(SandboxViewMixin, viewsets.GenericViewSet):
         data = slz.validated_data
 
         try:
-            content = get_sandbox_client(sandbox).download_file(remote_path=data["path"])
+            chunks = get_sandbox_client(sandbox).download_stream(remote_path=data["path"])
         except SandboxServiceNotReady:
             raise error_codes.AGENT_SANDBOX_SERVICE_NOT_READY
         except SandboxError:
@@ -187,7 +187,7 @@ class AgentSandboxFSViewSet(SandboxViewMixin, viewsets.GenericViewSet):
             raise error_codes.AGENT_SANDBOX_FILE_OPERATION_FAILED
 
         filename = PurePosixPath(data["path"]).name or "sandbox-file"
-        response = HttpResponse(content, content_type="application/octet-stream")
+        response = StreamingHttpResponse(chunks, content_type="application/octet-stream")
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
         response["Access-Control-Expose-Headers"] = "Content-Disposition"
         return response
@@ -20,3 +20,6 @@ from django.apps import AppConfig
 
 class CNativeConfig(AppConfig):
     name = "paasng.platform.bkapp_model"
+
+    def ready(self):
+        from . import handlers  # noqa: F401
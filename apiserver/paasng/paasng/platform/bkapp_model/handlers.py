@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+"""Bump the revision of the manifests when the models which the manifests are built from changed"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from paas_wl.bk_app.cnative.specs.models import Mount
+from paasng.accessories.servicehub.models import (
+    RemoteServiceModuleAttachment,
+    ServiceModuleAttachment,
+    SharedServiceAttachment,
+)
+from paasng.platform.applications.models import Application
+from paasng.platform.bkapp_model.manifest_cache import bump_manifest_revision
+from paasng.platform.bkapp_model.models import (
+    DomainResolution,
+    ModuleDeployHook,
+    ModuleProcessSpec,
+    ObservabilityConfig,
+    ProcessSpecEnvOverlay,
+    SvcDiscConfig,
+)
+from paasng.platform.engine.models.config_var import ConfigVar
+from paasng.platform.engine.models.preset_envvars import PresetEnvVariable
+from paasng.platform.modules.models import BuildConfig, Module
+
+_MODULE_SCOPED_MODELS = [
+    ModuleProcessSpec,
+    ModuleDeployHook,
+    ObservabilityConfig,
+    ConfigVar,
+    PresetEnvVariable,
+    BuildConfig,
+    Mount,
+    ServiceModuleAttachment,
+    RemoteServiceModuleAttachment,
+    SharedServiceAttachment,
+]
+
+_APP_SCOPED_MODELS = [SvcDiscConfig, DomainResolution]
+
+try:
+    from paasng.security.access_control.models import ApplicationAccessControlSwitch
+except ImportError:
+    # The module is not enabled in current edition
+    pass
+else:
+    _APP_SCOPED_MODELS.append(ApplicationAccessControlSwitch)
+
+
+def on_module_scoped_model_changed(sender, instance, **kwargs):
+    bump_manifest_revision(module_id=instance.module_id)
+
+
+def on_app_scoped_model_changed(sender, instance, **kwargs):
+    bump_manifest_revision(application_id=instance.application_id)
+
+
+for _model in _MODULE_SCOPED_MODELS:
+    post_save.connect(on_module_scoped_model_changed, sender=_model, dispatch_uid=f"bkapp_manifest_{_model.__name__}")
+    post_delete.connect(
+        on_module_scoped_model_changed, sender=_model, dispatch_uid=f"bkapp_manifest_{_model.__name__}"
+    )
+
+for _model in _APP_SCOPED_MODELS:
+    post_save.connect(on_app_scoped_model_changed, sender=_model, dispatch_uid=f"bkapp_manifest_{_model.__name__}")
+    post_delete.connect(on_app_scoped_model_changed, sender=_model, dispatch_uid=f"bkapp_manifest_{_model.__name__}")
+
+
+@receiver([post_save, post_delete], sender=ProcessSpecEnvOverlay)
+def on_proc_spec_env_overlay_changed(sender, instance: ProcessSpecEnvOverlay, **kwargs):
+    try:
+        module_id = instance.proc_spec.module_id
+    except ModuleProcessSpec.DoesNotExist:
+        # The process spec has been deleted, the revision is bumped by its own signal
+        return
+    bump_manifest_revision(module_id=module_id)
+
+
+@receiver([post_save, post_delete], sender=Module)
+def on_module_changed(sender, instance: Module, **kwargs):
+    bump_manifest_revision(module_id=instance.pk)
+
+
+@receiver(post_save, sender=Application)
+def on_application_changed(sender, instance: Application, **kwargs):
+    bump_manifest_revision(application_id=instance.pk)
@@ -65,6 +65,7 @@ from paasng.accessories.services.utils import gen_addons_cert_mount_dir, gen_add
 from paasng.platform.applications.models import ModuleEnvironment
 from paasng.platform.bkapp_model.constants import PORT_PLACEHOLDER
 from paasng.platform.bkapp_model.entities import Process
+from paasng.platform.bkapp_model.manifest_cache import ManifestCache, ManifestRevision
 from paasng.platform.bkapp_model.models import (
     DomainResolution,
     ModuleProcessSpec,
@@ -480,13 +481,39 @@ class ObservabilityManifestConstructor(ManifestConstructor):
             )
 
 
-def get_manifest(module: Module) -> List[Dict]:
-    """Get the manifest of current module, the result might contain multiple items."""
+def get_manifest(module: Module, use_cache: bool = False) -> List[Dict]:
+    """Get the manifest of current module, the result might contain multiple items.
+
+    :param use_cache: Whether to use the cached manifest, only for read-only usages such as viewing.
+    """
+    bkapp_res = get_cached_bkapp_resource(module) if use_cache else get_bkapp_resource(module)
     return [
-        get_bkapp_resource(module).to_deployable(),
+        bkapp_res.to_deployable(),
     ]
 
 
+def get_cached_bkapp_resource(module: Module) -> crd.BkAppResource:
+    """Get the manifest of current module, the manifest is cached until the related models are changed.
+
+    NOTE: Some data comes from outside the models, e.g. the TLS config of remote services, it may be
+    outdated until the cache expires, so don't use the result for deploying.
+
+    :param module: The module object.
+    :returns: The resource object.
+    """
+    revision = ManifestRevision().get(module)
+    if revision is None:
+        return get_bkapp_resource(module)
+
+    cache = ManifestCache()
+    if value := cache.get(str(module.pk), revision):
+        return crd.BkAppResource.parse_raw(value)
+
+    obj = get_bkapp_resource(module)
+    cache.set(str(module.pk), revision, obj.json())
+    return obj
+
+
 def get_bkapp_resource(module: Module) -> crd.BkAppResource:
     """Get the manifest of current module.
 
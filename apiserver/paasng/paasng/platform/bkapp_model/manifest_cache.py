@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+"""Cache and diff the BkApp manifests of modules.
+
+The manifest of a module is built from many models, every change of these models bumps the revision
+of the manifest(see `handlers`), so a cached manifest can be reused until its revision changes. The
+writes which bypass the model signals, such as `bulk_create()` or `update()`, must bump the revision
+explicitly by calling `bump_manifest_revision`.
+"""
+
+import hashlib
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+
+from paasng.core.core.storages.redisdb import get_default_redis
+
+if TYPE_CHECKING:
+    from paasng.platform.applications.models import ModuleEnvironment
+    from paasng.platform.modules.models import Module
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestRevision:
+    """The revision of the manifests, a module's revision consists of the revision of its application
+    and the revision of itself, because some parts of the manifest are defined at application level.
+
+    Every revision is a random token rather than a counter, so that a lost key won't make the revision
+    go back to a previous value.
+    """
+
+    key_prefix = "bk_paas:bkapp_manifest:revision"
+    expires_in = 3600 * 24 * 30
+
+    def __init__(self):
+        self.redis_db = get_default_redis()
+
+    def get(self, module: "Module") -> Optional[str]:
+        """Get the revision of the module, return None if it's unavailable"""
+        keys = [self._make_key("app", module.application_id), self._make_key("module", module.pk)]
+        try:
+            values = self.redis_db.mget(keys)
+            for key, value in zip(keys, values, strict=True):
+                if value is None:
+                    self.redis_db.set(key, uuid.uuid4().hex, ex=self.expires_in, nx=True)
+            if None in values:
+                values = self.redis_db.mget(keys)
+        except Exception:
+            logger.exception("Failed to get manifest revision, module: %s", module.pk)
+            return None
+
+        if None in values:
+            return None
+        return ".".join(v.decode() if isinstance(v, bytes) else v for v in values)
+
+    def bump_module(self, module_id: str):
+        self._bump(self._make_key("module", module_id))
+
+    def bump_application(self, application_id: str):
+        self._bump(self._make_key("app", application_id))
+
+    def _bump(self, key: str):
+        try:
+            self.redis_db.set(key, uuid.uuid4().hex, ex=self.expires_in)
+        except Exception:
+            logger.exception("Failed to bump manifest revision, key: %s", key)
+
+    def _make_key(self, scope: str, id_: str) -> str:
+        return f"{self.key_prefix}:{scope}:{id_}"
+
+
+def bump_manifest_revision(module_id: Optional[str] = None, application_id: Optional[str] = None):
+    """Bump the revision of the manifests, the cached manifests will be abandoned.
+
+    :param module_id: Bump the manifest of the module.
+    :param application_id: Bump the manifests of all the modules in the application.
+    """
+    revision = ManifestRevision()
+
+    def _bump():
+        if module_id:
+            revision.bump_module(str(module_id))
+        if application_id:
+            revision.bump_application(str(application_id))
+
+    _bump()
+    # Bump again after the transaction committed, in case the uncommitted data has been cached by
+    # another reader with the first bumped revision.
+    transaction.on_commit(_bump)
+
+
+class ManifestCache:
+    """Cache the manifests of modules by revision, use redis as backend."""
+
+    key_prefix = "bk_paas:bkapp_manifest:cache"
+
+    def __init__(self):
+        self.redis_db = get_default_redis()
+
+    @property
+    def expires_in(self) -> int:
+        return settings.BKAPP_MANIFEST_CACHE_TTL
+
+    def get(self, module_id: str, revision: str) -> Optional[str]:
+        if self.expires_in <= 0:
+            return None
+
+        try:
+            value = self.redis_db.get(self._make_key(module_id, revision))
+        except Exception:
+            logger.exception("Failed to get manifest from cache, module: %s", module_id)
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, module_id: str, revision: str, value: str):
+        if self.expires_in <= 0:
+            return
+
+        try:
+            self.redis_db.setex(self._make_key(module_id, revision), self.expires_in, value)
+        except Exception:
+            logger.exception("Failed to set manifest to cache, module: %s", module_id)
+
+    def _make_key(self, module_id: str, revision: str) -> str:
+        return f"{self.key_prefix}:{module_id}:{revision}"
+
+
+def get_section_digests(manifest: Dict) -> Dict[str, str]:
+    """Split the manifest into sections and get the digest of each section, the sections are
+    "metadata" and every field of "spec", such as "spec.processes".
+
+    :param manifest: The deployable manifest.
+    """
+    sections = {"metadata": manifest.get("metadata", {})}
+    for key, value in manifest.get("spec", {}).items():
+        sections[f"spec.{key}"] = value
+    return {
+        name: hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+        for name, value in sections.items()
+    }
+
+
+@dataclass
+class ManifestDiff:
+    """The difference between two manifests in sections
+
+    :param changed: The sections which have been added, removed or modified.
+    :param all_changed: Whether to consider all the sections changed, it's true when the previous
+        manifest is unknown.
+    """
+
+    changed: Set[str] = field(default_factory=set)
+    all_changed: bool = False
+
+    def is_changed(self, section: str) -> bool:
+        return self.all_changed or section in self.changed
+
+    @property
+    def changed_sections(self) -> List[str]:
+        return sorted(self.changed)
+
+
+def diff_manifests(old: Optional[Dict[str, str]], new: Dict[str, str]) -> ManifestDiff:
+    """Diff the manifests by the digests of sections
+
+    :param old: The section digests of the previous manifest, None if it's unknown.
+    :param new: The section digests of the current manifest.
+    """
+    if old is None:
+        return ManifestDiff(changed=set(new), all_changed=True)
+    return ManifestDiff(changed={name for name in old.keys() | new.keys() if old.get(name) != new.get(name)})
+
+
+class AppliedManifestRecord:
+    """Record the manifest which has been applied to the environment at last, only the digests of
+    sections are saved. When the record is lost, the next diff considers all the sections changed.
+
+    :param env: The environment object.
+    """
+
+    key_prefix = "bk_paas:bkapp_manifest:applied"
+    expires_in = 3600 * 24 * 30
+
+    def __init__(self, env: "ModuleEnvironment"):
+        self.key = f"{self.key_prefix}:{env.pk}"
+        self.redis_db = get_default_redis()
+
+    def diff(self, manifest: Dict) -> ManifestDiff:
+        """Diff the manifest with the last applied one
+
+        :param manifest: The deployable manifest.
+        """
+        return diff_manifests(self._load(), get_section_digests(manifest))
+
+    def save(self, manifest: Dict):
+        """Record the manifest as the last applied one"""
+        try:
+            self.redis_db.setex(self.key, self.expires_in, json.dumps(get_section_digests(manifest)))
+        except Exception:
+            logger.exception("Failed to save the applied manifest record, key: %s", self.key)
+
+    def _load(self) -> Optional[Dict[str, str]]:
+        try:
+            value = self.redis_db.get(self.key)
+        except Exception:
+            logger.exception("Failed to load the applied manifest record, key: %s", self.key)
+            return None
+        return json.loads(value) if value else None
@@ -20,6 +20,7 @@ from django.conf import settings
 from paas_wl.bk_app.cnative.specs.constants import DEFAULT_PROCESS_NAME
 from paasng.platform.bkapp_model import fieldmgr
 from paasng.platform.bkapp_model.entities.proc_service import ExposedType, ProcService
+from paasng.platform.bkapp_model.manifest_cache import bump_manifest_revision
 from paasng.platform.bkapp_model.models import ModuleProcessSpec
 from paasng.platform.declarative.constants import AppSpecVersion
 from paasng.platform.engine.constants import AppEnvName
@@ -67,3 +68,4 @@ def upsert_proc_svc_by_spec_version(m: Module, spec_version: AppSpecVersion | No
 
         if proc_specs:
             ModuleProcessSpec.objects.bulk_update(proc_specs, ["services"])
+            bump_manifest_revision(module_id=m.pk)
@@ -81,13 +81,13 @@ class BkAppModelManifestsViewset(viewsets.ViewSet, ApplicationCodeInPathMixin):
         module = self.get_module_via_path()
 
         output_format = slz.validated_data["output_format"]
+        manifests = get_manifest(module, use_cache=True)
         if output_format == "yaml":
-            manifests = get_manifest(module)
             response = yaml.safe_dump_all(manifests)
             # Use django's response to ignore DRF's renders
             return HttpResponse(response, content_type="application/yaml")
         else:
-            return Response(get_manifest(module))
+            return Response(manifests)
 
     @swagger_auto_schema(request_body=BkAppModelSLZ)
     def replace(self, request, code, module_name):
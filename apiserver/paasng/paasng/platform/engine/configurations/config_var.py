@@ -17,12 +17,14 @@
 """Config variables related functions"""
 
 import logging
+import time
 from enum import StrEnum
-from typing import TYPE_CHECKING, Dict, Iterator, List
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
 
 from attrs import define
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
+from opentelemetry import trace
 
 from paasng.accessories.publish.entrance.preallocated import get_bk_doc_url_prefix
 from paasng.core.region.app import BuiltInEnvsRegionHelper
@@ -32,6 +34,11 @@ from paasng.infras.oauth2.utils import get_oauth2_client_secret
 from paasng.platform.applications.constants import ApplicationType
 from paasng.platform.applications.models import ModuleEnvironment
 from paasng.platform.engine.configurations.env_var import listers as vars_listers
+from paasng.platform.engine.configurations.env_var.cache import (
+    VERSIONED_SOURCES,
+    EnvVarsSourceVersions,
+    resolved_env_vars_cache,
+)
 from paasng.platform.engine.configurations.env_var.entities import EnvVariableList, EnvVariableObj
 from paasng.platform.engine.constants import ConfigVarEnvName
 from paasng.platform.engine.models.config_var import BuiltinConfigVar
@@ -45,6 +52,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+tracer = trace.get_tracer(__name__)
+
 
 def get_env_variables(env: ModuleEnvironment) -> Dict[str, str]:
     """Get env vars for current environment, the result includes user defined and builtin env vars.
@@ -99,6 +108,10 @@ class UnifiedEnvVarsReader:
             EnvVarSource.BUILTIN_DEFAULT_ENTRANCE,
         ]
 
+        # The env variables of every listed source, a source is listed at most once by the reader
+        self._listed_vars: Dict[EnvVarSource, EnvVariableList] = {}
+        self._source_versions: Dict[str, str] | None = None
+
     def get_kv_map(self, exclude_sources: list[EnvVarSource] | None = None) -> Dict[str, str]:
         """Get env variables in the format of {key: value} dictionary.
 
@@ -106,10 +119,21 @@ class UnifiedEnvVarsReader:
         :return: A dict of env variables.
         """
         env_list = EnvVariableList()
-        for source in self._default_order:
-            if exclude_sources and source in exclude_sources:
-                continue
-            env_list.extend(self._source_lister_func_map[source](self.env))
+        durations: Dict[EnvVarSource, float] = {}
+        with tracer.start_as_current_span("env_vars.resolve") as span:
+            span.set_attribute("env_vars.env_id", self.env.pk)
+            for source in self._default_order:
+                if exclude_sources and source in exclude_sources:
+                    continue
+                started_at = time.perf_counter()
+                env_list.extend(self._list_vars(source))
+                durations[source] = time.perf_counter() - started_at
+
+            # Record the source which dominated the resolution time
+            if durations:
+                slowest = max(durations, key=durations.__getitem__)
+                span.set_attribute("env_vars.slowest_source", str(slowest))
+                span.set_attribute("env_vars.slowest_source_duration_ms", durations[slowest] * 1000)
         return env_list.kv_map
 
     def list_conflicted_info(self, exclude_sources: list[EnvVarSource] | None = None) -> "List[ConflictedEnvVarInfo]":
@@ -138,7 +162,7 @@ class UnifiedEnvVarsReader:
             if exclude_sources and current_source in exclude_sources:
                 continue
 
-            data = self._source_lister_func_map[current_source](self.env).map
+            data = self._list_vars(current_source).map
             for key in data:
                 # Use key as dict key to deduplicate
                 result_dict[key] = ConflictedEnvVarInfo(
@@ -151,6 +175,42 @@ class UnifiedEnvVarsReader:
         # Sort and return the result
         return sorted(result_dict.values(), key=lambda x: x.key)
 
+    def _list_vars(self, source: EnvVarSource) -> EnvVariableList:
+        """List the env variables of the source, the result of a versioned source is cached."""
+        if source in self._listed_vars:
+            return self._listed_vars[source]
+
+        with tracer.start_as_current_span(f"env_vars.list.{source}") as span:
+            env_list, cached = self._list_vars_with_cache(source)
+            span.set_attribute("env_vars.cached", cached)
+            span.set_attribute("env_vars.count", len(env_list))
+        self._listed_vars[source] = env_list
+        return env_list
+
+    def _list_vars_with_cache(self, source: EnvVarSource) -> Tuple[EnvVariableList, bool]:
+        """List the env variables of the source, also return whether the result comes from cache."""
+        lister = self._source_lister_func_map[source]
+        version = self._get_source_versions().get(source)
+        if version is None:
+            return lister(self.env), False
+
+        if (env_list := resolved_env_vars_cache.get(self.env.pk, source, version)) is not None:
+            return env_list, True
+
+        env_list = lister(self.env)
+        resolved_env_vars_cache.set(self.env.pk, source, version, env_list)
+        return env_list, False
+
+    def _get_source_versions(self) -> Dict[str, str]:
+        if self._source_versions is None:
+            if resolved_env_vars_cache.expires_in <= 0:
+                self._source_versions = {}
+            else:
+                self._source_versions = EnvVarsSourceVersions().get_many(
+                    str(self.env.module_id), list(VERSIONED_SOURCES)
+                )
+        return self._source_versions
+
 
 def list_conflicted_env_vars_for_view(module: Module) -> "List[ConflictedEnvVarInfo]":
     """Get env vars conflict information for front-end display.
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+"""Cache the env variables of the sources which are fully defined by local models.
+
+Every such source of a module has a version stamp stored in redis, the stamp is bumped when the related
+models changed(see `paasng.platform.engine.handlers`). The resolved env variables are cached in the
+current process by (environment, source, version), so changing the config vars of a module only
+makes the "user_configured" source be listed again.
+
+The values are never stored in redis because they may contain sensitive data.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.platform.engine.configurations.env_var.entities import EnvVariableList
+
+logger = logging.getLogger(__name__)
+
+# The name of the sources which can be cached, must be the values of `EnvVarSource`
+SOURCE_USER_PRESET = "user_preset"
+SOURCE_USER_CONFIGURED = "user_configured"
+VERSIONED_SOURCES = (SOURCE_USER_PRESET, SOURCE_USER_CONFIGURED)
+
+
+class EnvVarsSourceVersions:
+    """The version stamps of the env variable sources of modules, every stamp is a random token."""
+
+    key_prefix = "bk_paas:env_vars:source_version"
+    expires_in = 3600 * 24 * 30
+
+    def __init__(self):
+        self.redis_db = get_default_redis()
+
+    def get_many(self, module_id: str, sources: List[str]) -> Dict[str, str]:
+        """Get the versions of the sources, the sources whose version is unavailable are omitted."""
+        keys = [self._make_key(module_id, source) for source in sources]
+        try:
+            values = self.redis_db.mget(keys)
+            if None in values:
+                for key, value in zip(keys, values, strict=True):
+                    if value is None:
+                        self.redis_db.set(key, uuid.uuid4().hex, ex=self.expires_in, nx=True)
+                values = self.redis_db.mget(keys)
+        except Exception:
+            logger.exception("Failed to get env vars source versions, module: %s", module_id)
+            return {}
+
+        return {
+            source: value.decode() if isinstance(value, bytes) else value
+            for source, value in zip(sources, values, strict=True)
+            if value is not None
+        }
+
+    def bump(self, module_id: str, source: str):
+        key = self._make_key(module_id, source)
+        try:
+            self.redis_db.set(key, uuid.uuid4().hex, ex=self.expires_in)
+        except Exception:
+            logger.exception("Failed to bump env vars source version, key: %s", key)
+
+    def _make_key(self, module_id: str, source: str) -> str:
+        return f"{self.key_prefix}:{module_id}:{source}"
+
+
+def bump_env_vars_source_version(module_id: str, source: str):
+    """Bump the version of the source, the cached env variables of the source will be abandoned.
+
+    :param module_id: The ID of the module.
+    :param source: The name of the source, such as "user_configured".
+    """
+    versions = EnvVarsSourceVersions()
+    versions.bump(str(module_id), source)
+    # Bump again after the transaction committed, in case the uncommitted data has been cached by
+    # another reader with the first bumped version.
+    transaction.on_commit(lambda: versions.bump(str(module_id), source))
+
+
+class ResolvedEnvVarsCache:
+    """An in-process LRU cache for the env variables of the versioned sources.
+
+    :param max_size: The max number of the cached items.
+    """
+
+    def __init__(self, max_size: int = 2048):
+        self.max_size = max_size
+        self._data: OrderedDict[Tuple[int, str, str], Tuple[float, EnvVariableList]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def expires_in(self) -> int:
+        return settings.ENV_VARS_SOURCE_CACHE_TTL
+
+    def get(self, env_id: int, source: str, version: str) -> Optional[EnvVariableList]:
+        if self.expires_in <= 0:
+            return None
+
+        key = (env_id, source, version)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        return EnvVariableList(value)
+
+    def set(self, env_id: int, source: str, version: str, value: EnvVariableList):
+        if self.expires_in <= 0:
+            return
+
+        with self._lock:
+            self._data[(env_id, source, version)] = (time.monotonic() + self.expires_in, EnvVariableList(value))
+            self._data.move_to_end((env_id, source, version))
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+resolved_env_vars_cache = ResolvedEnvVarsCache()
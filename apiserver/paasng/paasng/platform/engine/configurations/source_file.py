@@ -26,7 +26,8 @@ from typing_extensions import Protocol
 from paasng.platform.modules.constants import SourceOrigin
 from paasng.platform.sourcectl import exceptions
 from paasng.platform.sourcectl.models import VersionInfo
-from paasng.platform.sourcectl.package.client import BasePackageClient, get_client
+from paasng.platform.sourcectl.package.client import BasePackageClient
+from paasng.platform.sourcectl.package.indexed import get_indexed_client
 from paasng.platform.sourcectl.repo_controller import RepoController, get_repo_controller
 
 if TYPE_CHECKING:
@@ -187,8 +188,11 @@ class PackageMetaDataReader(MetaDataFileReader):
         self.source_dir = source_dir
 
     def get_client(self, **kwargs) -> BasePackageClient:
-        """[private] 根据源码包存储信息, 获取对应的源码包操作客户端"""
-        return get_client(package=kwargs["package"])
+        """[private] 根据源码包存储信息, 获取对应的源码包操作客户端
+
+        只读取少量元数据文件, 因此使用按范围读取的客户端, 避免下载整个源码包
+        """
+        return get_indexed_client(package=kwargs["package"])
 
     def extract_version_info(self, version_info: VersionInfo) -> Tuple[str, str]:
         """[private] 将 version_info 转换成 version_name 和 revision"""
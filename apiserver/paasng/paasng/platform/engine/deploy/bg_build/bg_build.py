@@ -35,7 +35,7 @@ from paasng.platform.engine.deploy.bg_build.executors import (
 from paasng.platform.engine.deploy.bg_build.utils import generate_builder_name
 from paasng.platform.engine.exceptions import DeployInterruptionFailed
 from paasng.platform.engine.models.deployment import Deployment
-from paasng.platform.engine.utils.output import ConsoleStream, DeployStream, RedisWithModelStream
+from paasng.platform.engine.utils.output import BufferedRedisWithModelStream, ConsoleStream, DeployStream
 from paasng.platform.modules.models import BuildConfig
 
 logger = logging.getLogger(__name__)
@@ -69,18 +69,21 @@ def start_bg_build_process(
     if stream_channel_id:
         stream_channel = StreamChannel(stream_channel_id, redis_db=get_default_redis())
         stream_channel.initialize()
-        stream = RedisWithModelStream(build_process.output_stream, stream_channel)
+        stream = BufferedRedisWithModelStream(build_process.output_stream, stream_channel)
     else:
         stream = ConsoleStream()
 
     build_metadata = cattr.structure(metadata, BuildMetadata)
-    if use_bk_ci_pipeline:
-        logger.info("deployment %s, build process %s use bk_ci pipeline to build image", deploy_id, bp_id)
-        pipeline_bp_executor = PipelineBuildProcessExecutor(deployment, build_process, stream)
-        pipeline_bp_executor.execute(metadata=build_metadata)
-    else:
-        bp_executor = DefaultBuildProcessExecutor(deployment, build_process, stream)
-        bp_executor.execute(metadata=build_metadata)
+    try:
+        if use_bk_ci_pipeline:
+            logger.info("deployment %s, build process %s use bk_ci pipeline to build image", deploy_id, bp_id)
+            pipeline_bp_executor = PipelineBuildProcessExecutor(deployment, build_process, stream)
+            pipeline_bp_executor.execute(metadata=build_metadata)
+        else:
+            bp_executor = DefaultBuildProcessExecutor(deployment, build_process, stream)
+            bp_executor.execute(metadata=build_metadata)
+    finally:
+        stream.flush()
 
 
 def interrupt_build_proc(bp_id: UUID) -> bool:
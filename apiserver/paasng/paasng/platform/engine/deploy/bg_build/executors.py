@@ -169,6 +169,8 @@ class DefaultBuildProcessExecutor(DeployStep):
         else:
             self.wait_for_succeeded()
         finally:
+            # 确保构建日志全部写入, 后续根据日志内容更新部署步骤
+            self.stream.flush()
             # 不管构建成功与否, 均需要清理 slugbuilder 容器
             self.clean_slugbuilder()
 
@@ -29,7 +29,7 @@ from paasng.platform.applications.models import ModuleEnvironment
 from paasng.platform.engine.deploy.bg_command.bkapp_hook import PreReleaseDummyExecutor, generate_pre_release_hook_name
 from paasng.platform.engine.logs import make_channel_stream
 from paasng.platform.engine.models import Deployment
-from paasng.platform.engine.utils.output import ConsoleStream, DeployStream, RedisWithModelStream
+from paasng.platform.engine.utils.output import BufferedRedisWithModelStream, ConsoleStream, DeployStream
 
 logger = logging.getLogger(__name__)
 
@@ -70,12 +70,15 @@ def execute_bg_command(uuid: str, stream_channel_id: Optional[str] = None, extra
     if stream_channel_id:
         stream_channel = StreamChannel(stream_channel_id, redis_db=get_default_redis())
         stream_channel.initialize()
-        stream = RedisWithModelStream(command.output_stream, stream_channel)
+        stream = BufferedRedisWithModelStream(command.output_stream, stream_channel)
     else:
         stream = ConsoleStream()
 
     executor = AppCommandExecutor(command=command, stream=stream, extra_envs=extra_envs or {})
-    executor.perform()
+    try:
+        executor.perform()
+    finally:
+        stream.flush()
 
 
 @shared_task
@@ -31,6 +31,7 @@ from blue_krill.async_utils.poll_task import (
     PollingStatus,
     TaskPoller,
 )
+from django.conf import settings
 from django.utils import timezone
 from pydantic import ValidationError as PyDanticValidationError
 
@@ -39,10 +40,14 @@ from paas_wl.bk_app.cnative.specs.constants import (
     CNATIVE_DEPLOY_STATUS_POLLING_FAILURE_LIMITS,
     DeployStatus,
 )
+from paas_wl.bk_app.cnative.specs.crd.bk_app import BkAppResource
 from paas_wl.bk_app.cnative.specs.models import AppModelDeploy
 from paas_wl.bk_app.cnative.specs.mounts import cleanup_volume_source_by_snapshot
 from paas_wl.bk_app.cnative.specs.resource import ModelResState, MresConditionParser, get_mres_from_cluster
 from paas_wl.bk_app.cnative.specs.signals import post_cnative_env_deploy
+from paas_wl.bk_app.cnative.specs.watcher import BkAppStore
+from paas_wl.core.resource import generate_bkapp_name
+from paas_wl.infras.cluster.utils import get_cluster_by_app
 from paasng.platform.applications.models import ModuleEnvironment
 from paasng.platform.engine.constants import JobStatus
 from paasng.platform.engine.deploy.bg_wait.base import AbortedDetails, AbortedDetailsPolicy
@@ -150,6 +155,10 @@ class WaitBkAppProcedurePoller(TaskPoller):
 class WaitAppModelReady(WaitBkAppProcedurePoller):
     """A task poller to query status for fresh AppModelDeploy objects
 
+    When `ENABLE_BKAPP_STATUS_WATCH` is on, the BkApp is read from the store of the watchers(see the
+    `run_bkapp_watchers` command) instead of being fetched from the cluster every time. The BkApp is
+    fetched from the cluster directly when the store has no valid data of it.
+
     It takes below params:
 
     `params` schema:
@@ -163,18 +172,30 @@ class WaitAppModelReady(WaitBkAppProcedurePoller):
     # Abort policies were extra rules which were used to break current polling procedure
     abort_policies: List[AbortPolicy] = [UserInterruptedPolicy()]
 
-    def get_status(self) -> PollingResult:  # noqa: PLR0911
-        deploy_id = self.params["deploy_id"]
-        dp = AppModelDeploy.objects.get(id=deploy_id)
-        mres = get_mres_from_cluster(
-            ModuleEnvironment.objects.get(
-                application_id=dp.application_id, module_id=dp.module_id, environment=dp.environment_name
-            )
-        )
+    def get_status(self) -> PollingResult:
+        return self._check_mres(self._get_mres())
 
+    def _get_mres(self) -> Optional[BkAppResource]:
+        """Get the BkApp from the store of the watchers, fetch it from the cluster if the store has no
+        valid data of it.
+        """
+        if not settings.ENABLE_BKAPP_STATUS_WATCH:
+            return get_mres_from_cluster(self.env)
+
+        wl_app = self.env.wl_app
+        store = BkAppStore(get_cluster_by_app(wl_app).name)
+        name = generate_bkapp_name(self.env)
+        store.add_interest(wl_app.namespace, name)
+        found, data = store.get(wl_app.namespace, name)
+        if not found:
+            return get_mres_from_cluster(self.env)
+        return BkAppResource(**data) if data else None
+
+    def _check_mres(self, mres: Optional[BkAppResource]) -> PollingResult:  # noqa: PLR0911
         if not mres:
             return PollingResult.doing()
 
+        deploy_id = self.params["deploy_id"]
         # 注解中的 deploy-id 与期望的 deploy_id 不一致, 说明 bkapp 已经不是该次部署下发的, 结束状态轮询.
         if mres.metadata.annotations.get(BKPAAS_DEPLOY_ID_ANNO_KEY) != str(deploy_id):
             return PollingResult.done(
@@ -209,6 +230,7 @@ class WaitAppModelReady(WaitBkAppProcedurePoller):
 
         elif state.status == DeployStatus.PROGRESSING:
             # Also update status when it's progressing
+            dp = AppModelDeploy.objects.get(id=deploy_id)
             update_status(dp, state, last_transition_time=mres.status.lastUpdate)
 
         # Still pending, do another query later
@@ -55,7 +55,7 @@ from paasng.platform.engine.deploy.release import start_release_step
 from paasng.platform.engine.exceptions import HandleAppDescriptionError, InitDeployDescHandlerError
 from paasng.platform.engine.models import Deployment
 from paasng.platform.engine.models.phases import DeployPhaseTypes
-from paasng.platform.engine.phases_steps.steps import update_step_by_line
+from paasng.platform.engine.phases_steps.steps import LogScanCursor, PhaseStepsUpdater
 from paasng.platform.engine.signals import post_phase_end, pre_appenv_build, pre_phase_start
 from paasng.platform.engine.utils.output import Style
 from paasng.platform.engine.utils.source import (
@@ -469,7 +469,7 @@ class BuildProcessPoller(DeployPoller):
         return PollingResult(status=status, data=result)
 
     def update_steps(self, deployment: Deployment, build_proc: BuildProcess):
-        """Update deploy steps by processing all log lines of build process."""
+        """Update deploy steps by processing the new log lines of build process since last time."""
         # Update deploy steps by log line
         phase = deployment.deployphase_set.get(type=DeployPhaseTypes.BUILD)
         pattern_maps = {
@@ -479,10 +479,15 @@ class BuildProcessPoller(DeployPoller):
         started_at = time.time()
         logger.info("Update deployment steps by log lines, deployment: %s", self.params["deployment_id"])
 
-        # TODO: Use a flag value to indicate the progress of the scanning of the log,
-        # so that we won't need to scan the log from the beginning every time.
-        for line in build_proc.output_stream.lines.all().values_list("line", flat=True):
-            update_step_by_line(line, pattern_maps, phase)
+        updater = PhaseStepsUpdater(phase, pattern_maps)
+        # The id of the lines is increasing, use it to record the progress of the scanning
+        cursor = LogScanCursor(str(deployment.id), name=f"build_process:{build_proc.pk}")
+        last_line_id = cursor.get()
+        lines = build_proc.output_stream.lines.filter(id__gt=last_line_id).order_by("id").values_list("id", "line")
+        for line_id, line in lines.iterator():
+            updater.update_by_line(line)
+            last_line_id = line_id
+        cursor.set(last_line_id)
 
         logger.info(
             "Finished updating deployment steps, deployment: %s, cost: %s",
@@ -39,6 +39,7 @@ from paas_wl.infras.resources.utils.basic import get_client_by_app
 from paasng.misc.monitoring.monitor.service_monitor.controller import make_svc_monitor_controller
 from paasng.platform.applications.models import ModuleEnvironment
 from paasng.platform.bkapp_model.manifest import get_bkapp_resource_for_deploy
+from paasng.platform.bkapp_model.manifest_cache import AppliedManifestRecord
 from paasng.platform.engine.constants import JobStatus
 from paasng.platform.engine.deploy.bg_command.tasks import exec_bkapp_hook
 from paasng.platform.engine.deploy.bg_wait.wait_bkapp import DeployStatusHandler, WaitAppModelReady
@@ -153,6 +154,11 @@ def release_by_k8s_operator(
         # 下发 k8s 资源前需要确保命名空间存在
         ensure_namespace(env)
 
+        manifest = bkapp_res.to_deployable()
+        applied_record = AppliedManifestRecord(env)
+        manifest_diff = applied_record.diff(manifest)
+        logger.debug("Changed sections of the manifest: %s, env: %s", manifest_diff.changed_sections, env)
+
         # Apply the ConfigMap resource related with service discovery
         #
         # NOTE: This action might break running pods that get svc-discovery data by
@@ -160,14 +166,19 @@ def release_by_k8s_operator(
         # latest version. We should ask the application developer to handle this properly.
         #
         # TODO: There is no way to set svc-disc related spec currently.
-        svc_disc.apply_configmap(env, bkapp_res)
+        #
+        # When there is no svc-disc config, the ConfigMap only needs to be removed if the config
+        # was present in the last applied manifest.
+        if bkapp_res.spec.svcDiscovery or manifest_diff.is_changed("spec.svcDiscovery"):
+            svc_disc.apply_configmap(env, bkapp_res)
 
         # 下发 TLS 证书（Secrets）
         deploy_addons_tls_certs(env)
         # 下发待挂载的 volume source
         deploy_volume_source(env)
 
-        deployed_manifest = apply_bkapp_to_k8s(env, bkapp_res.to_deployable())
+        deployed_manifest = apply_bkapp_to_k8s(env, manifest)
+        applied_record.save(manifest)
 
         # 下发日志采集配置
         ensure_bk_log_if_need(env)
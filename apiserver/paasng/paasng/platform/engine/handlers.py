@@ -18,11 +18,19 @@
 import logging
 from typing import TYPE_CHECKING
 
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from paasng.platform.engine.configurations.env_var.cache import (
+    SOURCE_USER_CONFIGURED,
+    SOURCE_USER_PRESET,
+    bump_env_vars_source_version,
+)
 from paasng.platform.engine.constants import JobStatus
+from paasng.platform.engine.models.config_var import ConfigVar
 from paasng.platform.engine.models.phases import DeployPhaseTypes
+from paasng.platform.engine.models.preset_envvars import PresetEnvVariable
 from paasng.platform.engine.phases_steps.phases import DeployPhaseManager
 
 from .signals import post_appenv_deploy, post_phase_end, pre_appenv_deploy, pre_phase_start
@@ -85,3 +93,13 @@ def update_last_deployed_date(sender, deployment: "Deployment", **kwargs):
 
     env.application.last_deployed_date = now
     env.application.save(update_fields=["last_deployed_date"])
+
+
+@receiver([post_save, post_delete], sender=ConfigVar)
+def on_config_var_changed(sender, instance: ConfigVar, **kwargs):
+    bump_env_vars_source_version(instance.module_id, SOURCE_USER_CONFIGURED)
+
+
+@receiver([post_save, post_delete], sender=PresetEnvVariable)
+def on_preset_env_var_changed(sender, instance: PresetEnvVariable, **kwargs):
+    bump_env_vars_source_version(instance.module_id, SOURCE_USER_PRESET)
@@ -147,4 +147,4 @@ def get_all_logs(d: Deployment) -> str:
 
 def serialize_stream_logs(output_stream: OutputStream) -> List[str]:
     """Serialize all logs of the given output_stream object."""
-    return [line.line for line in output_stream.lines.all().order_by("created")]
+    return [line.line for line in output_stream.lines.all().order_by("created", "id")]
@@ -24,6 +24,8 @@ from django.db import transaction
 from django.forms.models import model_to_dict
 from pydantic import BaseModel
 
+from paasng.platform.bkapp_model.manifest_cache import bump_manifest_revision
+from paasng.platform.engine.configurations.env_var.cache import SOURCE_USER_CONFIGURED, bump_env_vars_source_version
 from paasng.platform.engine.constants import JobStatus
 from paasng.platform.engine.models import ConfigVar
 from paasng.platform.engine.models.config_var import CONFIG_VAR_INPUT_FIELDS, ENVIRONMENT_ID_FOR_GLOBAL
@@ -156,6 +158,9 @@ class ConfigVarManager:
         ConfigVar.objects.bulk_create(create_list)
         for overwrite in overwrited_list:
             overwrite.save()
+        # `bulk_create` does not send signals
+        bump_manifest_revision(module_id=module.pk)
+        bump_env_vars_source_version(module.pk, SOURCE_USER_CONFIGURED)
 
         return ApplyResult(
             create_num=len(create_list),
@@ -224,6 +229,9 @@ class ConfigVarManager:
             obj.delete()
 
         ConfigVar.objects.bulk_create(create_list)
+        # `update` and `bulk_create` do not send signals
+        bump_manifest_revision(module_id=module.pk)
+        bump_env_vars_source_version(module.pk, SOURCE_USER_CONFIGURED)
 
         return ApplyResult(
             create_num=len(create_list),
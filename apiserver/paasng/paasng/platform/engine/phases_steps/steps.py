@@ -18,10 +18,19 @@
 import logging
 import re
 from contextlib import suppress
-from typing import TYPE_CHECKING, Dict, List
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Pattern, Tuple, Union
 
+from django.conf import settings
+
+from paasng.core.core.storages.redisdb import get_default_redis
 from paasng.platform.applications.constants import ApplicationType
-from paasng.platform.engine.constants import DOCKER_BUILD_STEPSET_NAME, IMAGE_RELEASE_STEPSET_NAME, RuntimeType
+from paasng.platform.engine.constants import (
+    DOCKER_BUILD_STEPSET_NAME,
+    IMAGE_RELEASE_STEPSET_NAME,
+    JobStatus,
+    RuntimeType,
+)
 from paasng.platform.engine.exceptions import DuplicateNameInSamePhaseError, StepNotInPresetListError
 from paasng.platform.engine.models.phases import DeployPhaseTypes
 from paasng.platform.engine.models.steps import StepMetaSet
@@ -83,29 +92,86 @@ class DeployStepPicker:
             return StepMetaSet.objects.filter(is_default=True, name="default").order_by("-created").first()
 
 
-def update_step_by_line(line: str, pattern_maps: Dict, phase: "DeployPhase"):
-    """Try to find a match for the given log line in the given pattern maps. If a
-    match is found, update the step status and write to stream.
+# When the line is too long(>10k), the pattern matching will take too long complete. To improve
+# the performance, we only try to find the pattern in the first 1k characters.
+#
+# This won't affect the matching result because most patterns only occur at the beginning of the line.
+MAX_MATCHING_LINE_LENGTH = 1024
 
-    :param line: The log line to match.
-    :param patterns_maps: The pattern maps to match against.
-    :param phase: The deployment phase.
+_BACKREF_PATTERN = re.compile(r"\\[1-9]|\(\?P=")
+
+# {JobStatus: {pattern: step_name}}
+PatternMaps = Dict[JobStatus, Dict[str, str]]
+
+
+class StepPatternMatcher:
+    """Match log lines against the patterns of steps, the patterns are compiled only once.
+
+    All patterns are also combined into a single regex, which is used to quickly skip the lines
+    matching none of the patterns (the most of the lines).
+
+    :param pattern_maps: {job_status: {pattern: step_name}}
     """
-    for job_status, pattern_map in pattern_maps.items():
-        for pattern, step_name in pattern_map.items():
-            # When the line is too long(>10k), the pattern matching will take too long
-            # complete. To improve the performance, we only try to find the pattern in
-            # the first 1k characters.
-            #
-            # This won't affect the matching result because most patterns only occur
-            # at the beginning of the line.
-            p = re.compile(pattern, flags=re.IGNORECASE)
-            if not p.search(line[:1024]):
-                continue
 
+    def __init__(self, pattern_maps: PatternMaps):
+        self._patterns: List[Tuple[Pattern, JobStatus, str]] = []
+        for job_status, pattern_map in pattern_maps.items():
+            for pattern, step_name in pattern_map.items():
+                try:
+                    self._patterns.append((re.compile(pattern, flags=re.IGNORECASE), job_status, step_name))
+                except re.error:
+                    logger.warning("Invalid step pattern: %s, step: %s", pattern, step_name)
+
+        self._combined: Optional[Pattern] = None
+        # The group numbers are changed after combining, so the patterns with backreferences can't be combined
+        if not any(_BACKREF_PATTERN.search(p.pattern) for p, _, _ in self._patterns):
             try:
-                step_obj = phase.get_step_by_name(step_name)
-            except (StepNotInPresetListError, DuplicateNameInSamePhaseError):
+                self._combined = re.compile("|".join(f"(?:{p.pattern})" for p, _, _ in self._patterns), re.IGNORECASE)
+            except re.error:
+                # e.g. the same group name is used in different patterns
+                logger.info("Unable to combine the step patterns, match them one by one")
+
+    def match(self, line: str) -> List[Tuple[JobStatus, str]]:
+        """Find all matched (job_status, step_name) of the given line"""
+        if not self._patterns:
+            return []
+
+        line = line[:MAX_MATCHING_LINE_LENGTH]
+        if self._combined is not None and not self._combined.search(line):
+            return []
+        return [(job_status, step_name) for p, job_status, step_name in self._patterns if p.search(line)]
+
+
+def get_step_pattern_matcher(pattern_maps: PatternMaps) -> StepPatternMatcher:
+    """Get the matcher of the pattern maps, the matchers are cached, so phases using the same
+    `StepMetaSet` share one matcher."""
+    key = tuple((job_status, tuple(pattern_map.items())) for job_status, pattern_map in pattern_maps.items())
+    return _get_step_pattern_matcher(key)
+
+
+@lru_cache(maxsize=128)
+def _get_step_pattern_matcher(key: Tuple[Tuple[JobStatus, Tuple[Tuple[str, str], ...]], ...]) -> StepPatternMatcher:
+    return StepPatternMatcher({job_status: dict(items) for job_status, items in key})
+
+
+class PhaseStepsUpdater:
+    """Update the steps of a phase by log lines, the steps are loaded only once by a single query.
+
+    :param phase: The deployment phase.
+    :param pattern_maps: The pattern maps to match against.
+    """
+
+    def __init__(self, phase: "DeployPhase", pattern_maps: PatternMaps):
+        self.phase = phase
+        self.matcher = get_step_pattern_matcher(pattern_maps)
+        self._steps: Optional[Dict[str, Union["DeployStep", Exception]]] = None
+
+    def update_by_line(self, line: str):
+        """Try to find a match for the given log line. If a match is found, update the step
+        status and write to stream."""
+        for job_status, step_name in self.matcher.match(line):
+            step_obj = self._get_step(step_name)
+            if isinstance(step_obj, Exception):
                 logger.debug("Step not found or duplicated, name: %s", step_name)
                 continue
 
@@ -113,6 +179,63 @@ def update_step_by_line(line: str, pattern_maps: Dict, phase: "DeployPhase"):
             if step_obj.status == job_status.value or step_obj.is_completed:
                 continue
 
-            logger.info("[%s] going to mark & write to stream", phase.deployment.id)
+            logger.info("[%s] going to mark & write to stream", self.phase.deployment.id)
             # 更新 step 状态，并写到输出流
-            step_obj.mark_and_write_to_stream(RedisChannelStream.from_deployment_id(phase.deployment.id), job_status)
+            step_obj.mark_and_write_to_stream(
+                RedisChannelStream.from_deployment_id(self.phase.deployment.id), job_status
+            )
+
+    def _get_step(self, name: str) -> Union["DeployStep", Exception]:
+        """Get the step by name, same as `phase.get_step_by_name` but without querying every time"""
+        if self._steps is None:
+            self._steps = {}
+            for step in self.phase.steps.all():
+                if step.name in self._steps:
+                    self._steps[step.name] = DuplicateNameInSamePhaseError(step.name)
+                else:
+                    self._steps[step.name] = step
+        return self._steps.get(name) or StepNotInPresetListError(name)
+
+
+def update_step_by_line(line: str, pattern_maps: Dict, phase: "DeployPhase"):
+    """Try to find a match for the given log line in the given pattern maps. If a
+    match is found, update the step status and write to stream.
+
+    NOTE: Use `PhaseStepsUpdater` when processing multiple lines.
+
+    :param line: The log line to match.
+    :param patterns_maps: The pattern maps to match against.
+    :param phase: The deployment phase.
+    """
+    PhaseStepsUpdater(phase, pattern_maps).update_by_line(line)
+
+
+class LogScanCursor:
+    """The cursor records the id of the last scanned log line of a deployment, so that
+    the log won't be scanned from the beginning every time.
+
+    The cursor is saved in redis, if it gets lost, the log will be scanned from the beginning
+    again, which is fine because updating steps by log lines is idempotent.
+    """
+
+    key_tmpl = "bk_paas:deployment:{deployment_id}:log_scan_cursor:{name}"
+
+    def __init__(self, deployment_id: str, name: str):
+        self.key = self.key_tmpl.format(deployment_id=deployment_id, name=name)
+        self.redis_db = get_default_redis()
+
+    def get(self) -> int:
+        """Get the id of the last scanned line, 0 if nothing has been scanned"""
+        try:
+            value = self.redis_db.get(self.key)
+        except Exception:
+            logger.exception("Failed to get log scan cursor, key: %s", self.key)
+            return 0
+        return int(value) if value else 0
+
+    def set(self, line_id: int):
+        try:
+            # The cursor is useless after the deployment is finished
+            self.redis_db.setex(self.key, settings.BUILD_PROCESS_TIMEOUT * 2, line_id)
+        except Exception:
+            logger.exception("Failed to set log scan cursor, key: %s", self.key)
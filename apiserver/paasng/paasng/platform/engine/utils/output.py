@@ -16,17 +16,23 @@
 
 import abc
 import json
+import logging
 import sys
-from typing import Optional, Protocol
+import threading
+import time
+from typing import Iterable, List, Optional, Protocol, Tuple
 
 from blue_krill.data_types.enum import StrStructuredEnum
 from blue_krill.redis_tools.messaging import StreamChannel
 from django.conf import settings
+from django.db import connections
 
 from paasng.core.core.storages.redisdb import get_default_redis
 from paasng.platform.engine.models import Deployment
 from paasng.utils import termcolors
 
+logger = logging.getLogger(__name__)
+
 
 def make_style(*args, **kwargs):
     colorful = termcolors.make_style(*args, **kwargs)
@@ -91,6 +97,10 @@ class DeployStream(metaclass=abc.ABCMeta):
     def close(self):
         raise NotImplementedError
 
+    def flush(self):
+        """Flush the buffered messages, only required by buffered streams"""
+        return
+
     @classmethod
     @abc.abstractmethod
     def from_deployment_id(cls, deployment_id: str):
@@ -168,6 +178,12 @@ class MessageWriter(Protocol):
     def write(self, line: str, stream: Optional[str]): ...
 
 
+class BulkMessageWriter(MessageWriter, Protocol):
+    """A protocol for types which supports writing lines by batch"""
+
+    def bulk_write(self, lines: Iterable[Tuple[str, str]]): ...
+
+
 class ModelStream:
     """Stream using model's output_stream field"""
 
@@ -197,6 +213,124 @@ class RedisWithModelStream(RedisChannelStream):
         super().write_message(message, stream)
 
 
+class BufferedRedisWithModelStream(RedisWithModelStream):
+    """A buffered version of `RedisWithModelStream`, messages are saved to the database with
+    `bulk_create` and published to the redis channel with a pipeline, by batches.
+
+    The buffer is flushed when any of the following conditions is met:
+
+    - the size of the buffer reaches `max_batch_size`
+    - the buffer has been waiting for more than `flush_interval` seconds
+    - a title or an event is written, to keep the order of all events in channel
+    - the stream is flushed or closed explicitly
+
+    NOTE: Always call `flush()` or `close()` after writing, otherwise the buffered messages will be lost.
+
+    :param model: A model which supports writing lines by batch
+    :param stream_channel: A redis channel stream
+    :param max_batch_size: The max size of buffered messages
+    :param flush_interval: The max waiting seconds for buffered messages, set to None to disable
+        the timed flushing, which starts a background thread.
+    """
+
+    def __init__(
+        self,
+        model: BulkMessageWriter,
+        stream_channel: StreamChannel,
+        max_batch_size: int = 200,
+        flush_interval: Optional[float] = 1.0,
+    ):
+        super().__init__(model, stream_channel)
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+
+        self._buffer: List[Tuple[str, str]] = []
+        self._buffered_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def write_title(self, title):
+        with self._lock:
+            self.flush()
+            return super().write_title(title)
+
+    def write_message(self, message, stream=StreamType.STDOUT.value):
+        message = sanitize_message(message)
+        with self._lock:
+            if not self._buffer:
+                self._buffered_at = time.monotonic()
+            self._buffer.append((message, str(stream)))
+            if len(self._buffer) >= self.max_batch_size:
+                self.flush()
+            elif self.flush_interval is not None and self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, daemon=True)
+                self._flusher.start()
+
+    def write_event(self, event_name: str, data: dict):
+        with self._lock:
+            self.flush()
+            return super().write_event(event_name, data)
+
+    def flush(self):
+        """Write all buffered messages to the database and the redis channel"""
+        with self._lock:
+            if not self._buffer:
+                return
+            lines, self._buffer, self._buffered_at = self._buffer, [], None
+
+            self.model.bulk_write(lines)
+            publish_messages(self.channel, [json.dumps({"line": line, "stream": stream}) for line, stream in lines])
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            return super().close()
+
+    def _run_flusher(self):
+        """Flush the buffer periodically, the thread exits when the buffer becomes empty and will be
+        started again by the next message.
+        """
+        assert self.flush_interval is not None
+        try:
+            while True:
+                time.sleep(self.flush_interval)
+                with self._lock:
+                    if self._buffered_at is None:
+                        self._flusher = None
+                        return
+                    if time.monotonic() - self._buffered_at < self.flush_interval:
+                        continue
+                    try:
+                        self.flush()
+                    except Exception:
+                        logger.exception("Failed to flush buffered messages, channel: %s", self.channel)
+        finally:
+            # The database connections are thread-local, close them before the thread exits
+            connections.close_all()
+
+
+def publish_messages(channel: StreamChannel, messages: List[str]):
+    """Publish multiple "msg" events to the channel with a single pipeline.
+
+    The ids are allocated in one `INCRBY` call, so they are continuous and match the positions in
+    the history list, which is required by `StreamChannelSubscriber.get_history_events`.
+    """
+    if not messages:
+        return
+
+    redis_db = channel.redis_db
+    last_id = redis_db.incrby(channel.keys.counter, len(messages))
+    first_id = last_id - len(messages) + 1
+    payloads = [json.dumps({"id": first_id + i, "event": "msg", "data": msg}) for i, msg in enumerate(messages)]
+
+    pipe = redis_db.pipeline()
+    pipe.rpush(channel.keys.history, *payloads)
+    for payload in payloads:
+        pipe.publish(channel.keys.channel, payload)
+    pipe.execute()
+
+
 def get_default_stream(deployment: Deployment) -> RedisChannelStream:
     stream_channel = StreamChannel(deployment.id, redis_db=get_default_redis())
     stream_channel.initialize()
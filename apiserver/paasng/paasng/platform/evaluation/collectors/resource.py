@@ -17,13 +17,18 @@
 
 import logging
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 from kubernetes.utils import parse_quantity
 
 from paas_wl.bk_app.processes.processes import ProcessManager
-from paasng.misc.monitoring.metrics.constants import MetricsSeriesType
-from paasng.misc.monitoring.metrics.models import MetricsInstanceResult, get_resource_metric_manager
+from paasng.misc.monitoring.metrics.constants import MetricsResourceType, MetricsSeriesType
+from paasng.misc.monitoring.metrics.models import (
+    MetricsInstanceResult,
+    ResourceMetricManager,
+    get_resource_metric_manager,
+    query_processes_metrics,
+)
 from paasng.misc.monitoring.metrics.utils import MetricSmartTimeRange
 from paasng.platform.applications.models import Application, ModuleEnvironment
 from paasng.platform.engine.constants import AppEnvName, MetricsType
@@ -127,14 +132,64 @@ class AppResQuotaCollector:
 
     def __init__(self, app: Application, step: str = "15m", time_range_str: str = "7d"):
         self.app = app
-        self.query_metrics = [MetricsType.CPU.value, MetricsType.MEM.value]
+        self.query_metrics: List[MetricsResourceType] = [MetricsResourceType.CPU, MetricsResourceType.MEM]
         self.time_step = step
         self.time_range_str = time_range_str
         # 查询历史 7 天的数据，数据采样间隔为 15m，需要注意的是：如果中间发布过，则数据长度可能不足
         self.time_range = MetricSmartTimeRange(step=step, time_range_str=time_range_str)
 
     def collect(self) -> AppSummary:
-        module_summaries = {module.name: self._calc_module_summary(module) for module in self.app.modules.all()}
+        return self._collect_all([self])[0]
+
+    @classmethod
+    def collect_in_batch(
+        cls, apps: List[Application], step: str = "15m", time_range_str: str = "7d"
+    ) -> List[AppSummary]:
+        """批量采集多个应用的资源使用数据，部署在同一集群中的进程的实例指标会合并查询，减少对监控后端的请求次数"""
+        return cls._collect_all([cls(app, step, time_range_str) for app in apps])
+
+    @staticmethod
+    def _collect_all(collectors: List["AppResQuotaCollector"]) -> List[AppSummary]:
+        """采集多个应用的资源使用数据，注意：各采集器的采样间隔及时间范围需要保持一致"""
+        if not collectors:
+            return []
+
+        # 先获取所有环境的进程，再统一查询所有进程的实例指标
+        env_procs: Dict[int, List[Tuple[Dict, ResourceMetricManager]]] = {}
+        app_managers: List[List[ResourceMetricManager]] = []
+        for collector in collectors:
+            managers: List[ResourceMetricManager] = []
+            for module in collector.app.modules.all():
+                for env in collector._list_envs(module):
+                    env_procs[env.id] = collector._list_proc_managers(env)
+                    managers.extend(mgr for _, mgr in env_procs[env.id])
+            app_managers.append(managers)
+
+        metrics: Dict[int, List[MetricsInstanceResult]] = {}
+        try:
+            metrics = collectors[0]._query_metrics([mgr for managers in app_managers for mgr in managers])
+        except Exception as e:  # noqa: BLE001
+            # 批量查询失败时再逐个应用采集，避免单个应用的异常导致整批应用都没有资源使用数据
+            logger.warning(f"failed to query process metrics in batch, query by app: {e}")
+            for collector, managers in zip(collectors, app_managers, strict=True):
+                try:
+                    metrics.update(collector._query_metrics(managers))
+                except Exception as app_err:  # noqa: BLE001
+                    logger.warning(f"failed to query app {collector.app.code} process metrics: {app_err}")
+
+        return [collector._make_app_summary(env_procs, metrics) for collector in collectors]
+
+    def _make_app_summary(
+        self, env_procs: Dict[int, List[Tuple[Dict, ResourceMetricManager]]], metrics: Dict[int, List]
+    ) -> AppSummary:
+        module_summaries = {}
+        for module in self.app.modules.all():
+            env_summaries = {}
+            for env in self._list_envs(module):
+                procs = [(proc, metrics.get(id(mgr), [])) for proc, mgr in env_procs.get(env.id, [])]
+                env_summaries[env.environment] = self._calc_env_summary(env, procs)
+            module_summaries[module.name] = ModuleSummary(envs=env_summaries)
+
         return AppSummary(
             app_code=self.app.code,
             app_type=self.app.type,
@@ -143,23 +198,38 @@ class AppResQuotaCollector:
             modules=module_summaries,
         )
 
-    def _calc_module_summary(self, module: Module) -> ModuleSummary:
-        stag_env = module.get_envs(AppEnvName.STAG)
-        prod_env = module.get_envs(AppEnvName.PROD)
-        return ModuleSummary(envs={env.environment: self._calc_env_summary(env) for env in [stag_env, prod_env]})
+    def _query_metrics(self, managers: List[ResourceMetricManager]) -> Dict[int, List[MetricsInstanceResult]]:
+        """查询各进程的实例指标，返回以指标管理器的 id 为键的结果"""
+        results = query_processes_metrics(
+            managers,
+            resource_types=self.query_metrics,
+            time_range=self.time_range,
+            series_type=MetricsSeriesType.CURRENT,
+        )
+        return {id(mgr): result for mgr, result in zip(managers, results, strict=True)}
 
-    def _calc_env_summary(self, env: ModuleEnvironment) -> EnvSummary:
+    @staticmethod
+    def _list_envs(module: Module) -> List[ModuleEnvironment]:
+        return [module.get_envs(AppEnvName.STAG), module.get_envs(AppEnvName.PROD)]
+
+    def _list_proc_managers(self, env: ModuleEnvironment) -> List[Tuple[Dict, ResourceMetricManager]]:
+        """获取环境中的各进程及其指标管理器，某个进程获取失败时，不再统计后续的进程"""
+        procs = []
+        try:
+            for proc in ProcessManager(env).list_processes_specs():
+                procs.append((proc, get_resource_metric_manager(env.engine_app.to_wl_obj(), proc["name"])))
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"failed to get env {env} process metrics: {e}")
+        return procs
+
+    def _calc_env_summary(
+        self, env: ModuleEnvironment, procs: List[Tuple[Dict, List[MetricsInstanceResult]]]
+    ) -> EnvSummary:
         proc_summaries = []
         cpu_requests, mem_requests, cpu_limits, mem_limits = 0, 0, 0, 0
         cpu_usage_avg_val, mem_usage_avg_val = 0.0, 0.0
         try:
-            for proc in ProcessManager(env).list_processes_specs():
-                mgr = get_resource_metric_manager(env.engine_app.to_wl_obj(), proc["name"])
-                result = mgr.get_all_instances_metrics(
-                    resource_types=self.query_metrics,
-                    time_range=self.time_range,
-                    series_type=MetricsSeriesType.CURRENT,
-                )
+            for proc, result in procs:
                 ps = self._calc_proc_summary(proc, result)
                 proc_summaries.append(ps)
 
@@ -49,4 +49,4 @@ class Command(BaseCommand):
         if async_run:
             collect_and_update_app_operation_reports.delay(app_codes)
         else:
-            collect_and_update_app_operation_reports(app_codes)
+            collect_and_update_app_operation_reports(app_codes, async_shards=False)
@@ -16,21 +16,30 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
+import time
+from contextlib import contextmanager
 from dataclasses import asdict
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 from celery import shared_task
 from django.conf import settings
 from django.utils import timezone
 
-from paasng.infras.iam.helpers import fetch_role_members
+from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.infras.iam.cache import AppRole
+from paasng.infras.iam.helpers import fetch_role_members, fetch_role_members_in_bulk
 from paasng.infras.iam.permissions.resources.application import ApplicationPermission
 from paasng.misc.audit.models import AppOperationRecord
+from paasng.misc.metrics import (
+    APP_OPERATION_REPORT_COLLECTION_DURATION_HISTOGRAM,
+    APP_OPERATION_REPORT_COLLECTOR_DURATION_HISTOGRAM,
+)
 from paasng.platform.applications.constants import ApplicationRole, ApplicationType
 from paasng.platform.applications.models import Application, JustLeaveAppManager
 from paasng.platform.engine.constants import AppEnvName
 from paasng.platform.engine.models import Deployment
 from paasng.platform.evaluation.collectors import AppDeploymentCollector, AppResQuotaCollector, AppUserVisitCollector
+from paasng.platform.evaluation.collectors.resource import AppSummary
 from paasng.platform.evaluation.constants import (
     BatchTaskStatus,
     EmailNotificationType,
@@ -49,8 +58,118 @@ from paasng.utils.basic import get_username_by_bkpaas_user_id
 logger = logging.getLogger(__name__)
 
 
-def _update_or_create_operation_report(app: Application):
-    res_summary = AppResQuotaCollector(app).collect()
+class CollectionCheckpoint:
+    """应用运营报告采集任务的检查点，记录采集范围及已完成采集的应用，任务中断后可从检查点继续采集
+
+    :param task_id: 采集任务 ID
+    """
+
+    key_prefix = "bk_paas:evaluation:collection"
+    # 检查点的保留时间，超过该时间没有进展的任务将不再继续
+    expires_in = 3600 * 24 * 2
+    # 超过该时间没有进展的任务，被视为已中断
+    inactive_threshold = 60 * 30
+
+    def __init__(self, task_id: int):
+        self.redis_db = get_default_redis()
+        self.task_id = task_id
+
+    def init(self, app_codes: List[str], resumable: bool):
+        """初始化检查点
+
+        :param app_codes: 需要采集的应用 Code 列表
+        :param resumable: 任务中断后是否可以继续采集
+        """
+        pipe = self.redis_db.pipeline()
+        pipe.delete(self._key("scope"), self._key("collected"), self._key("failed"))
+        if app_codes:
+            pipe.sadd(self._key("scope"), *app_codes)
+        pipe.hset(self._key("meta"), mapping={"last_active_at": int(time.time()), "resumable": int(resumable)})
+        self._expire_all(pipe)
+        pipe.execute()
+
+    def exists(self) -> bool:
+        return bool(self.redis_db.exists(self._key("meta")))
+
+    def is_resumable(self) -> bool:
+        return self.redis_db.hget(self._key("meta"), "resumable") == b"1"
+
+    def is_active(self) -> bool:
+        """任务最近是否有进展"""
+        last_active_at = self.redis_db.hget(self._key("meta"), "last_active_at")
+        return bool(last_active_at) and time.time() - int(last_active_at) < self.inactive_threshold
+
+    def list_pending(self) -> List[str]:
+        """获取尚未完成采集的应用 Code 列表"""
+        codes = self.redis_db.sdiff(self._key("scope"), self._key("collected"))
+        return sorted(code.decode() for code in codes)
+
+    def mark_collected(self, app_code: str, succeed: bool):
+        """记录已完成采集的应用，采集失败的应用同样视为已完成"""
+        pipe = self.redis_db.pipeline()
+        pipe.sadd(self._key("collected"), app_code)
+        if not succeed:
+            pipe.sadd(self._key("failed"), app_code)
+        pipe.hset(self._key("meta"), "last_active_at", int(time.time()))
+        self._expire_all(pipe)
+        pipe.execute()
+
+    def get_progress(self) -> Tuple[int, List[str]]:
+        """获取采集进度
+
+        :return: (已完成采集的应用数量, 采集失败的应用 Code 列表)
+        """
+        pipe = self.redis_db.pipeline()
+        pipe.scard(self._key("collected"))
+        pipe.smembers(self._key("failed"))
+        collected_count, failed_codes = pipe.execute()
+        return collected_count, sorted(code.decode() for code in failed_codes)
+
+    def clear(self):
+        self.redis_db.delete(self._key("meta"), self._key("scope"), self._key("collected"), self._key("failed"))
+
+    def _expire_all(self, pipe):
+        for name in ["meta", "scope", "collected", "failed"]:
+            pipe.expire(self._key(name), self.expires_in)
+
+    def _key(self, name: str) -> str:
+        return f"{self.key_prefix}:{self.task_id}:{name}"
+
+
+@contextmanager
+def _observe_collector(collector: str):
+    """记录采集器的耗时"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        APP_OPERATION_REPORT_COLLECTOR_DURATION_HISTOGRAM.labels(collector=collector).observe(
+            time.perf_counter() - start
+        )
+
+
+def _get_role_members(
+    app_code: str, role: ApplicationRole, role_members: Optional[Dict[AppRole, List[str]]]
+) -> List[str]:
+    """优先从预先批量获取的结果中获取应用角色成员"""
+    if role_members and (app_code, role) in role_members:
+        return role_members[(app_code, role)]
+    return fetch_role_members(app_code, role)
+
+
+def _update_or_create_operation_report(
+    app: Application,
+    res_summary: Optional[AppSummary] = None,
+    role_members: Optional[Dict[AppRole, List[str]]] = None,
+):
+    """采集并更新应用的运营报告
+
+    :param res_summary: 预先批量采集的资源使用数据，为空时单独采集
+    :param role_members: 预先批量获取的应用角色成员，未包含的角色单独获取
+    """
+    if res_summary is None:
+        with _observe_collector("resource"):
+            res_summary = AppResQuotaCollector(app).collect()
     # 统计资源配额 & 实际使用情况
     cpu_requests, mem_requests, cpu_limits, mem_limits = 0, 0, 0, 0
     cpu_usage_avg_val, mem_usage_avg_val = 0.0, 0.0
@@ -76,14 +195,16 @@ def _update_or_create_operation_report(app: Application):
 
     # 统计近 30 天总访问量 & 用户数
     total_pv, total_uv = 0, 0
-    visit_summary = AppUserVisitCollector(app).collect()
+    with _observe_collector("user_visit"):
+        visit_summary = AppUserVisitCollector(app).collect()
     for mod in visit_summary.modules.values():
         for env in [mod.envs[AppEnvName.STAG], mod.envs[AppEnvName.PROD]]:
             total_pv += env.pv
             total_uv += env.uv
 
     # 统计部署情况
-    deploy_summary = AppDeploymentCollector(app).collect()
+    with _observe_collector("deployment"):
+        deploy_summary = AppDeploymentCollector(app).collect()
 
     # 最近部署记录
     latest_deployment = Deployment.objects.filter(app_environment__application=app).order_by("-created").first()
@@ -111,8 +232,8 @@ def _update_or_create_operation_report(app: Application):
         "latest_operation": latest_operation.get_display_text() if latest_operation else None,
         "deploy_summary": asdict(deploy_summary),
         # 应用开发者 / 管理员
-        "administrators": fetch_role_members(app.code, ApplicationRole.ADMINISTRATOR),
-        "developers": fetch_role_members(app.code, ApplicationRole.DEVELOPER),
+        "administrators": _get_role_members(app.code, ApplicationRole.ADMINISTRATOR, role_members),
+        "developers": _get_role_members(app.code, ApplicationRole.DEVELOPER, role_members),
         "collected_at": timezone.now(),
     }
     report, _ = AppOperationReport.objects.update_or_create(app=app, defaults=defaults)
@@ -125,8 +246,15 @@ def _update_or_create_operation_report(app: Application):
 
 
 @shared_task
-def collect_and_update_app_operation_reports(app_codes: List[str]):
-    """采集并更新指定应用的资源使用情况报告"""
+def collect_and_update_app_operation_reports(app_codes: List[str], async_shards: bool = True):
+    """采集并更新指定应用的资源使用情况报告
+
+    应用会被拆分为多个分片，由子任务分别采集；采集全量应用时，如果上一次的采集任务已中断，
+    则从检查点继续采集尚未完成的应用，如果上一次的采集任务仍在进行中，则跳过本次采集。
+
+    :param app_codes: 需要采集的应用 Code 列表，为空时采集全量应用
+    :param async_shards: 是否通过异步子任务采集各分片，否则在当前进程中依次采集
+    """
     applications = Application.objects.exclude(type=ApplicationType.ENGINELESS_APP)
     # 应用已经被删除的，还保留报告是没有意义的
     AppOperationReport.objects.exclude(app__in=applications).delete()
@@ -134,30 +262,140 @@ def collect_and_update_app_operation_reports(app_codes: List[str]):
     if app_codes:
         applications = applications.filter(code__in=app_codes)
 
-    total_cnt, succeed_cnt = applications.count(), 0
-    failed_app_codes = []
-    task = AppOperationReportCollectionTask.objects.create(total_count=total_cnt)
+    task = None if app_codes else _get_resumable_collection_task()
+    if task is not None:
+        checkpoint = CollectionCheckpoint(task.id)
+        if checkpoint.is_active():
+            logger.info("app operation report collection task %s is still running, skip", task.id)
+            return
+
+        pending_app_codes = checkpoint.list_pending()
+        logger.info("resume app operation report collection task %s, %d apps pending", task.id, len(pending_app_codes))
+    else:
+        pending_app_codes = sorted(applications.values_list("code", flat=True))
+        task = AppOperationReportCollectionTask.objects.create(total_count=len(pending_app_codes))
+        CollectionCheckpoint(task.id).init(pending_app_codes, resumable=not app_codes)
+
+    if not pending_app_codes:
+        _finish_collection_task(task.id)
+        return
 
-    for idx, app in enumerate(applications, start=1):
+    shard_size = settings.APP_OPERATION_REPORT_COLLECT_SHARD_SIZE
+    for idx in range(0, len(pending_app_codes), shard_size):
+        shard = pending_app_codes[idx : idx + shard_size]
+        if async_shards:
+            collect_app_operation_reports_shard.delay(task.id, shard)
+        else:
+            collect_app_operation_reports_shard(task.id, shard)
+
+
+@shared_task
+def collect_app_operation_reports_shard(task_id: int, app_codes: List[str]):
+    """采集单个分片中各应用的运营报告，采集进度记录在检查点中，最后一个完成的分片负责结束任务
+
+    :param task_id: 采集任务 ID
+    :param app_codes: 分片中的应用 Code 列表
+    """
+    checkpoint = CollectionCheckpoint(task_id)
+    applications = list(Application.objects.filter(code__in=app_codes).order_by("code"))
+
+    # 批量采集资源使用数据，部署在同一集群中的进程指标会合并查询，失败时再逐个应用采集
+    res_summaries: Dict[str, AppSummary] = {}
+    try:
+        with _observe_collector("resource"):
+            res_summaries = {s.app_code: s for s in AppResQuotaCollector.collect_in_batch(applications)}
+    except Exception:
+        logger.exception("failed to collect resource summaries of apps in batch, task: %s", task_id)
+
+    # 批量获取应用的管理员及开发者，失败时再逐个应用获取
+    role_members: Dict[AppRole, List[str]] = {}
+    try:
+        with _observe_collector("role_members"):
+            role_members = fetch_role_members_in_bulk(
+                (app.code, role)
+                for app in applications
+                for role in [ApplicationRole.ADMINISTRATOR, ApplicationRole.DEVELOPER]
+            )
+    except Exception:
+        logger.exception("failed to fetch role members of apps in batch, task: %s", task_id)
+
+    for app in applications:
         try:
-            _update_or_create_operation_report(app)
+            _update_or_create_operation_report(app, res_summaries.get(app.code), role_members)
         except Exception:
-            failed_app_codes.append(app.code)
+            checkpoint.mark_collected(app.code, succeed=False)
             logger.exception("failed to collect app: %s operation report", app.code)
+        else:
+            checkpoint.mark_collected(app.code, succeed=True)
+
+    # 采集期间被删除的应用，无需再采集
+    for code in set(app_codes) - {app.code for app in applications}:
+        checkpoint.mark_collected(code, succeed=True)
+
+    if checkpoint.list_pending():
+        # 完整采集完需要较长时间，因此每完成一个分片更新下进度
+        collected_count, failed_app_codes = checkpoint.get_progress()
+        AppOperationReportCollectionTask.objects.filter(id=task_id, status=BatchTaskStatus.RUNNING).update(
+            succeed_count=collected_count - len(failed_app_codes), failed_count=len(failed_app_codes)
+        )
+    else:
+        _finish_collection_task(task_id)
+
+
+def _get_resumable_collection_task() -> Optional[AppOperationReportCollectionTask]:
+    """获取最近一次未完成，且可以从检查点继续采集的全量采集任务，无法继续采集的任务会被结束"""
+    resumable_task = None
+    for task in AppOperationReportCollectionTask.objects.filter(status=BatchTaskStatus.RUNNING).order_by("-start_at"):
+        checkpoint = CollectionCheckpoint(task.id)
+        if not checkpoint.exists():
+            # 检查点已过期
+            _abandon_collection_task(task.id)
+        elif checkpoint.is_resumable():
+            if resumable_task is None:
+                resumable_task = task
+            else:
+                _abandon_collection_task(task.id)
+        elif not checkpoint.is_active():
+            # 采集指定应用的任务不可继续，中断后直接结束
+            _abandon_collection_task(task.id)
+    return resumable_task
+
+
+def _abandon_collection_task(task_id: int):
+    """结束无法继续采集的任务，保留当前的采集进度"""
+    checkpoint = CollectionCheckpoint(task_id)
+    fields: Dict[str, Any] = {"status": BatchTaskStatus.FINISHED, "end_at": timezone.now()}
+    # 检查点过期时，使用各分片最后一次更新的进度
+    if checkpoint.exists():
+        collected_count, failed_app_codes = checkpoint.get_progress()
+        fields.update(
+            succeed_count=collected_count - len(failed_app_codes),
+            failed_count=len(failed_app_codes),
+            failed_app_codes=failed_app_codes,
+        )
+    AppOperationReportCollectionTask.objects.filter(id=task_id, status=BatchTaskStatus.RUNNING).update(**fields)
+    checkpoint.clear()
+    logger.warning("app operation report collection task %s can not be resumed, finish it", task_id)
+
+
+def _finish_collection_task(task_id: int):
+    """结束采集任务，多个分片同时完成时，仅有一个分片能够结束任务"""
+    checkpoint = CollectionCheckpoint(task_id)
+    collected_count, failed_app_codes = checkpoint.get_progress()
+    end_at = timezone.now()
+    updated = AppOperationReportCollectionTask.objects.filter(id=task_id, status=BatchTaskStatus.RUNNING).update(
+        succeed_count=collected_count - len(failed_app_codes),
+        failed_count=len(failed_app_codes),
+        failed_app_codes=failed_app_codes,
+        status=BatchTaskStatus.FINISHED,
+        end_at=end_at,
+    )
+    if not updated:
+        return
 
-        succeed_cnt += 1
-        # 完整采集完需要较长时间，因此每隔一段时间更新下进度
-        if idx % 20 == 0:
-            task.succeed_count = succeed_cnt
-            task.failed_count = len(failed_app_codes)
-            task.save(update_fields=["succeed_count", "failed_count"])
-
-    task.succeed_count = succeed_cnt
-    task.failed_count = len(failed_app_codes)
-    task.failed_app_codes = failed_app_codes
-    task.status = BatchTaskStatus.FINISHED
-    task.end_at = timezone.now()
-    task.save(update_fields=["succeed_count", "failed_count", "failed_app_codes", "status", "end_at"])
+    checkpoint.clear()
+    task = AppOperationReportCollectionTask.objects.get(id=task_id)
+    APP_OPERATION_REPORT_COLLECTION_DURATION_HISTOGRAM.observe((end_at - task.start_at).total_seconds())
 
     # 根据配置判断是否发送报告邮件给到平台管理员
     if settings.ENABLE_SEND_OPERATION_REPORT_EMAIL_TO_PLAT_MANAGE:
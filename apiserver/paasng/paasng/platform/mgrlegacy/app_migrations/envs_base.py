@@ -26,6 +26,7 @@ from django.utils.translation import gettext_lazy as _
 from paasng.accessories.publish.sync_market.managers import AppEnvVarManger
 from paasng.core.core.storages.sqlalchemy import console_db
 from paasng.infras.legacydb.entities import EnvItem
+from paasng.platform.engine.configurations.env_var.cache import SOURCE_USER_CONFIGURED, bump_env_vars_source_version
 from paasng.platform.engine.constants import ConfigVarEnvName
 from paasng.platform.engine.models.config_var import ENVIRONMENT_ID_FOR_GLOBAL, ConfigVar
 from paasng.platform.mgrlegacy.app_migrations.base import BaseMigration
@@ -65,6 +66,9 @@ class BaseEnvironmentVariableMigration(BaseMigration):
 
                 data.append(ConfigVar(**kwargs))
         ConfigVar.objects.bulk_create(data)
+        # `bulk_create` does not send signals
+        for module in self.context.app.modules.all():
+            bump_env_vars_source_version(module.pk, SOURCE_USER_CONFIGURED)
 
     def get_global_envs(self):
         raise NotImplementedError
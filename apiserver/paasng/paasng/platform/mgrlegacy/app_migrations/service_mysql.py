@@ -20,6 +20,7 @@ import logging
 from django.utils.translation import gettext_lazy as _
 
 from paasng.accessories.publish.sync_market.managers import AppSecureInfoManger
+from paasng.platform.engine.configurations.env_var.cache import SOURCE_USER_CONFIGURED, bump_env_vars_source_version
 from paasng.platform.engine.constants import ConfigVarEnvName
 from paasng.platform.engine.models.config_var import ConfigVar
 from paasng.platform.mgrlegacy.app_migrations.service import BaseRemoteServiceMigration
@@ -66,6 +67,8 @@ class MysqlServiceMigration(BaseRemoteServiceMigration):
             }
             data.append(ConfigVar(**kwargs))
         ConfigVar.objects.bulk_create(data)
+        # `bulk_create` does not send signals
+        bump_env_vars_source_version(module.pk, SOURCE_USER_CONFIGURED)
 
     def get_stag_service_instance_info(self):
         """"""
@@ -34,6 +34,7 @@ from paasng.accessories.servicehub.remote.collector import fetch_all_remote_serv
 from paasng.accessories.servicehub.remote.store import get_remote_store
 from paasng.core.core.storages.redisdb import get_default_redis
 from paasng.core.tenant.user import get_init_tenant_id
+from paasng.misc.metrics.workloads.deployment import scan_unavailable_deployments
 
 logger = logging.getLogger(__name__)
 scheduler = Scheduler()
@@ -156,3 +157,11 @@ def init_service_default_policy_job():
             _handel_single_service_default_policy(service, default_tenant_id)
 
         logger.info("Service policy initialization completed.")
+
+
+@scheduler.scheduled_job("interval", seconds=settings.UNAVAILABLE_DEPLOYMENTS_SCAN_INTERVAL)
+def scan_unavailable_deployments_job():
+    """定时扫描各集群中不可用的 Deployment，扫描结果由 metrics 接口导出"""
+    if not settings.ENABLE_UNAVAILABLE_DEPLOYMENTS_SCAN:
+        return
+    scan_unavailable_deployments()
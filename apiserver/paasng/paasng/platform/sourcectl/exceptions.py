@@ -45,6 +45,10 @@ class PackageInvalidFileFormatError(BasePackageError):
     """The package file is not in a valid format, it might be corrupt."""
 
 
+class PackageIndexUnavailableError(BasePackageError):
+    """The package can not be read by ranges, e.g. unsupported format or the storage rejects range requests."""
+
+
 class GitLabCommonError(Exception):
     pass
 
@@ -0,0 +1,657 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+"""Read files from a source package without downloading the whole package.
+
+The package is accessed by ranged reads. A member index (name -> offset, size) is built on the first
+access and cached by the digest of the package, so later reads only fetch the bytes of the target member:
+
+- zip: the central directory, members are read from their local headers directly
+- tar: the offsets of member data
+- tar.gz: the offsets of member data in the uncompressed stream, access points of the gzip stream are
+  saved while decompressing, so reading a member only decompresses the stream from the nearest access
+  point before it
+"""
+
+import bisect
+import io
+import json
+import logging
+import os
+import posixpath
+import struct
+import tarfile
+import zipfile
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Protocol, Union
+
+import requests
+from blue_krill.storages.blobstore.base import SignatureType
+from django.conf import settings
+
+from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.platform.sourcectl.exceptions import (
+    PackageIndexUnavailableError,
+    ReadFileNotFoundError,
+    ReadLinkFileOutsideDirectoryError,
+)
+from paasng.platform.sourcectl.models import SourcePackage
+from paasng.platform.sourcectl.package.client import BasePackageClient, GenericRemoteClient
+from paasng.platform.sourcectl.package.utils import parse_url
+from paasng.utils.blobstore import StoreType, make_blob_store
+
+logger = logging.getLogger(__name__)
+
+# Block size used for random reads, e.g. reading the headers of tar members
+RANDOM_READ_BLOCK_SIZE = 256 * 1024
+# Block size used for sequential scans, e.g. decompressing a gzip stream
+SEQUENTIAL_READ_BLOCK_SIZE = 4 * 1024 * 1024
+# Only files no larger than this size will be cached together with the index
+MAX_CACHED_FILE_SIZE = 64 * 1024
+# Max levels of symbolic links to follow when reading a file
+MAX_LINK_DEPTH = 8
+# The distance(in uncompressed bytes) between two access points of a gzip stream
+GZIP_ACCESS_POINT_SPAN = 4 * 1024 * 1024
+
+_HTTP_TIMEOUT = 30
+_PRESIGNED_URL_EXPIRES_IN = 600
+
+# The zip file format constants, see "APPNOTE.TXT" of the zip specification
+_ZIP_LOCAL_FILE_HEADER_SIGNATURE = b"PK\x03\x04"
+_ZIP_END_OF_CENTRAL_DIR_SIGNATURE = b"PK\x05\x06"
+_ZIP_LOCAL_FILE_HEADER_STRUCT = "<4s2B4HL2L2H"
+_ZIP_LOCAL_FILE_HEADER_SIZE = 30
+
+
+class RangeReader(Protocol):
+    """Read bytes from a file by ranges"""
+
+    size: int
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """Read at most `length` bytes starting from `offset`"""
+
+    def close(self):
+        """Release the underlying resources"""
+
+
+class LocalFileRangeReader:
+    """Read a local file by ranges"""
+
+    def __init__(self, file_path: Union[str, os.PathLike]):
+        self._fp = open(file_path, mode="rb")  # noqa: SIM115
+        self.size = os.fstat(self._fp.fileno()).st_size
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        self._fp.seek(offset)
+        return self._fp.read(length)
+
+    def close(self):
+        self._fp.close()
+
+
+class HTTPRangeReader:
+    """Read a remote file by HTTP range requests
+
+    :raises PackageIndexUnavailableError: when the server does not support range requests
+    """
+
+    def __init__(self, url: str, session: Optional[requests.Session] = None):
+        self.url = url
+        self._session = session or requests.Session()
+        self.size = self._probe_size()
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        end = min(offset + length, self.size) - 1
+        if end < offset:
+            return b""
+        resp = self._session.get(self.url, headers={"Range": f"bytes={offset}-{end}"}, timeout=_HTTP_TIMEOUT)
+        if resp.status_code != 206:
+            raise PackageIndexUnavailableError(f"range request is not supported, status: {resp.status_code}")
+        return resp.content
+
+    def close(self):
+        self._session.close()
+
+    def _probe_size(self) -> int:
+        """Get the total size of the file by requesting the first byte, which also checks
+        whether range requests are supported."""
+        resp = self._session.get(self.url, headers={"Range": "bytes=0-0"}, timeout=_HTTP_TIMEOUT, stream=True)
+        try:
+            if resp.status_code != 206:
+                raise PackageIndexUnavailableError(f"range request is not supported, status: {resp.status_code}")
+            # Content-Range: bytes 0-0/1234
+            total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+            if not total.isdigit():
+                raise PackageIndexUnavailableError("unknown size of the file")
+            return int(total)
+        finally:
+            resp.close()
+
+
+def make_range_reader(url: str) -> HTTPRangeReader:
+    """Make a range reader for the package url, objects in blob store are read through presigned urls"""
+    o = parse_url(url)
+    if o.store_type in [StoreType.HTTP, StoreType.HTTPS]:
+        return HTTPRangeReader(o.url)
+
+    store = make_blob_store(o.bucket, store_type=o.store_type)
+    presigned_url = store.generate_presigned_url(
+        key=o.key, expires_in=_PRESIGNED_URL_EXPIRES_IN, signature_type=SignatureType.DOWNLOAD
+    )
+    return HTTPRangeReader(presigned_url)
+
+
+class RangeFile(io.RawIOBase):
+    """A seekable, read-only file object backed by a RangeReader
+
+    Recently read blocks are kept in memory, so that the small reads issued by tarfile/zipfile
+    won't turn into one range request each. Wrap it with `io.BufferedReader` before use.
+    """
+
+    def __init__(self, reader: RangeReader, block_size: int = RANDOM_READ_BLOCK_SIZE, max_blocks: int = 16):
+        super().__init__()
+        self._reader = reader
+        self._block_size = block_size
+        self._max_blocks = max_blocks
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._reader.size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, b) -> int:
+        if self._pos >= self._reader.size or len(b) == 0:
+            return 0
+        idx, start = divmod(self._pos, self._block_size)
+        chunk = self._get_block(idx)[start : start + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+    def _get_block(self, idx: int) -> bytes:
+        if idx in self._blocks:
+            self._blocks.move_to_end(idx)
+            return self._blocks[idx]
+
+        data = self._reader.read_range(idx * self._block_size, self._block_size)
+        self._blocks[idx] = data
+        if len(self._blocks) > self._max_blocks:
+            self._blocks.popitem(last=False)
+        return data
+
+
+@dataclass
+class _AccessPoint:
+    # The offset in the uncompressed stream
+    out_offset: int
+    # The offset of the next compressed byte to feed the decompressor
+    in_offset: int
+    decompressor: "zlib._Decompress"
+
+
+class GzipRangeFile(io.RawIOBase):
+    """A seekable, read-only file object of the uncompressed contents of a gzip file backed by a RangeReader
+
+    Seeking backward in a gzip stream usually means decompressing it again from the beginning. The states
+    of the decompressor(access points) are saved every `span` uncompressed bytes while decompressing, so
+    seeking to any position only decompresses the stream from the nearest access point before it.
+    Wrap it with `io.BufferedReader` before use.
+    """
+
+    # The max size of the compressed data to feed the decompressor at a time
+    _feed_size = 64 * 1024
+    # The max size of the uncompressed data to produce at a time
+    _max_output_size = 1024 * 1024
+
+    def __init__(self, reader: RangeReader, span: int = GZIP_ACCESS_POINT_SPAN):
+        super().__init__()
+        self._raw = RangeFile(reader, block_size=SEQUENTIAL_READ_BLOCK_SIZE, max_blocks=2)
+        self._span = span
+        self._points = [_AccessPoint(out_offset=0, in_offset=0, decompressor=self._new_decompressor())]
+        self._point_offsets = [0]
+        self._pos = 0
+
+        self._decompressor = self._points[0].decompressor.copy()
+        self._in_offset = 0
+        self._out_offset = 0
+        # The compressed data which was read but not consumed by the decompressor
+        self._tail = b""
+        # The uncompressed data starts from `self._out_offset`
+        self._pending = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        else:
+            raise ValueError(f"unsupported whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, b) -> int:
+        if len(b) == 0:
+            return 0
+
+        # Restore from the nearest access point if the position was decompressed already, or if there is an
+        # access point between the decompressed data and the position.
+        point = self._find_point(self._pos)
+        if self._pos < self._out_offset or point.out_offset > self._out_offset + len(self._pending):
+            self._restore(point)
+
+        while self._pos >= self._out_offset + len(self._pending):
+            self._out_offset += len(self._pending)
+            self._pending = b""
+            self._pending = self._decompress_more()
+            if not self._pending:
+                return 0
+
+        start = self._pos - self._out_offset
+        chunk = self._pending[start : start + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+    def _find_point(self, pos: int) -> _AccessPoint:
+        return self._points[bisect.bisect_right(self._point_offsets, pos) - 1]
+
+    def _restore(self, point: _AccessPoint):
+        self._decompressor = point.decompressor.copy()
+        self._in_offset = point.in_offset
+        self._out_offset = point.out_offset
+        self._tail = b""
+        self._pending = b""
+        self._eof = False
+
+    def _decompress_more(self) -> bytes:
+        """Decompress the next piece of data, return empty bytes at the end of the stream"""
+        while not self._eof:
+            # At least 2 bytes are required to check the magic number of the next member
+            if not self._tail or (self._decompressor.eof and len(self._tail) < 2):
+                self._raw.seek(self._in_offset)
+                data = self._raw.read(self._feed_size)
+                self._in_offset += len(data)
+                if not data:
+                    self._eof = True
+                    break
+                self._tail += data
+
+            if self._decompressor.eof:
+                # The rest data belongs to the next member of a multi-member gzip file, the trailing garbage
+                # (e.g. zero paddings) is ignored like the gzip module
+                if not self._tail.startswith(b"\x1f\x8b"):
+                    self._eof = True
+                    break
+                self._decompressor = self._new_decompressor()
+
+            try:
+                data = self._decompressor.decompress(self._tail, self._max_output_size)
+            except zlib.error as e:
+                raise OSError(f"invalid gzip data: {e}") from e
+            self._tail = self._decompressor.unconsumed_tail or self._decompressor.unused_data
+            if data:
+                self._save_point(self._out_offset + len(data))
+                return data
+        return b""
+
+    def _save_point(self, out_offset: int):
+        """Save an access point at `out_offset` if it's far enough from the last one"""
+        if out_offset - self._point_offsets[-1] < self._span:
+            return
+        self._points.append(
+            _AccessPoint(
+                out_offset=out_offset,
+                in_offset=self._in_offset - len(self._tail),
+                decompressor=self._decompressor.copy(),
+            )
+        )
+        self._point_offsets.append(out_offset)
+
+    @staticmethod
+    def _new_decompressor() -> "zlib._Decompress":
+        # Decompress data with the gzip header and trailer
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+@dataclass
+class PackageMember:
+    name: str
+    # "file", "dir", "symlink" or "hardlink"
+    kind: str
+    # zip: offset of the local file header, tar: offset of the data, tar.gz: offset in the uncompressed stream
+    offset: int = 0
+    size: int = 0
+    linkname: str = ""
+    # Fields below are only used by zip
+    compress_type: int = zipfile.ZIP_STORED
+    compress_size: int = 0
+
+
+@dataclass
+class PackageIndex:
+    # "zip", "tar" or "tar.gz"
+    format: str
+    members: Dict[str, PackageMember]
+
+    def dumps(self) -> str:
+        return json.dumps({"format": self.format, "members": [asdict(m) for m in self.members.values()]})
+
+    @classmethod
+    def loads(cls, data: Union[str, bytes]) -> "PackageIndex":
+        obj = json.loads(data)
+        members = [PackageMember(**m) for m in obj["members"]]
+        return cls(format=obj["format"], members={m.name: m for m in members})
+
+
+def build_package_index(reader: RangeReader, gzip_file: Optional[io.BufferedReader] = None) -> PackageIndex:
+    """Build the member index of the package
+
+    :param gzip_file: the buffered `GzipRangeFile` of the package, pass it to reuse the access points
+        saved while building the index of a tar.gz package
+    :raises PackageIndexUnavailableError: when the format of the package is not supported
+    """
+    head = reader.read_range(0, tarfile.BLOCKSIZE)
+    if head[:4] in (_ZIP_LOCAL_FILE_HEADER_SIGNATURE, _ZIP_END_OF_CENTRAL_DIR_SIGNATURE):
+        return _build_zip_index(reader)
+    if head[:2] == b"\x1f\x8b":
+        return _build_tar_index(gzip_file or io.BufferedReader(GzipRangeFile(reader)), "tar.gz")
+    if head[257:262] == b"ustar":
+        return _build_tar_index(io.BufferedReader(RangeFile(reader)), "tar")
+    raise PackageIndexUnavailableError("unsupported package format")
+
+
+def _build_zip_index(reader: RangeReader) -> PackageIndex:
+    members = {}
+    with zipfile.ZipFile(io.BufferedReader(RangeFile(reader))) as zip_:
+        for info in zip_.infolist():
+            name = _normalize_name(info.filename)
+            # The zipfile module does not support symbolic links, treat them as regular files like `ZipClient`
+            members[name] = PackageMember(
+                name=name,
+                kind="dir" if info.is_dir() else "file",
+                offset=info.header_offset,
+                size=info.file_size,
+                compress_type=info.compress_type,
+                compress_size=info.compress_size,
+            )
+    return PackageIndex(format="zip", members=members)
+
+
+def _build_tar_index(fileobj: io.BufferedReader, format_: str) -> PackageIndex:
+    """Build the index of a tar package, `fileobj` is the uncompressed tar file"""
+    members = {}
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r:") as tar:
+            for info in tar:
+                if info.isdir():
+                    kind = "dir"
+                elif info.issym():
+                    kind = "symlink"
+                elif info.islnk():
+                    kind = "hardlink"
+                elif info.isfile():
+                    kind = "file"
+                else:
+                    continue
+                name = _normalize_name(info.name)
+                members[name] = PackageMember(
+                    name=name, kind=kind, offset=info.offset_data, size=info.size, linkname=info.linkname
+                )
+    except (tarfile.TarError, OSError) as e:
+        raise PackageIndexUnavailableError(f"invalid tar file: {e}") from e
+    return PackageIndex(format=format_, members=members)
+
+
+def _normalize_name(name: str) -> str:
+    """Normalize the name of a member, e.g. "./foo//bar" -> "foo/bar" """
+    return posixpath.normpath(name).lstrip("/")
+
+
+class PackageIndexCache:
+    """Cache the member index and small files of packages, use redis as backend.
+
+    Entries are keyed by the sha256 digest of the package, so they never need to be invalidated.
+    """
+
+    key_prefix = "bk_paas:source_package"
+
+    def __init__(self):
+        self.redis_db = get_default_redis()
+
+    @property
+    def expires_in(self) -> int:
+        return settings.SOURCE_PACKAGE_INDEX_CACHE_TTL
+
+    def get_index(self, digest: str) -> Optional[PackageIndex]:
+        value = self._get(f"{self.key_prefix}:index:{digest}")
+        if value is None:
+            return None
+        try:
+            return PackageIndex.loads(value)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Invalid package index in cache, digest: %s", digest)
+            return None
+
+    def set_index(self, digest: str, index: PackageIndex):
+        self._set(f"{self.key_prefix}:index:{digest}", index.dumps())
+
+    def get_file(self, digest: str, name: str) -> Optional[bytes]:
+        return self._get(f"{self.key_prefix}:file:{digest}:{name}")
+
+    def set_file(self, digest: str, name: str, content: bytes):
+        self._set(f"{self.key_prefix}:file:{digest}:{name}", content)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        if self.expires_in <= 0:
+            return None
+        try:
+            return self.redis_db.get(key)
+        except Exception:
+            logger.exception("Failed to get source package data from cache")
+            return None
+
+    def _set(self, key: str, value: Union[str, bytes]):
+        if self.expires_in <= 0:
+            return
+        try:
+            self.redis_db.setex(key, self.expires_in, value)
+        except Exception:
+            logger.exception("Failed to set source package data to cache")
+
+
+class IndexedPackageClient(BasePackageClient):
+    """A package client which reads files by ranges through the member index of the package
+
+    :param reader: the range reader of the package file
+    :param relative_path: the relative path of the package contents, see `SourcePackage.relative_path`
+    :param digest: the sha256 digest of the package, the index and small files will be cached if given
+    """
+
+    def __init__(self, reader: RangeReader, relative_path: str = "./", digest: Optional[str] = None):
+        self._reader = reader
+        self.relative_path = relative_path
+        self.digest = digest
+        self._cache = PackageIndexCache()
+        self._index: Optional[PackageIndex] = None
+        self._gzip_file: Optional[io.BufferedReader] = None
+
+    @property
+    def index(self) -> PackageIndex:
+        if self._index is not None:
+            return self._index
+
+        index = self._cache.get_index(self.digest) if self.digest else None
+        if index is None:
+            index = build_package_index(self._reader, gzip_file=self._get_gzip_file())
+            if self.digest:
+                self._cache.set_index(self.digest, index)
+        self._index = index
+        return index
+
+    def read_file(self, file_path: str) -> bytes:
+        member = self._resolve(file_path)
+        if self.digest and member.size <= MAX_CACHED_FILE_SIZE:
+            content = self._cache.get_file(self.digest, member.name)
+            if content is not None:
+                return content
+
+        content = self._read_member(member)
+        if self.digest and member.size <= MAX_CACHED_FILE_SIZE:
+            self._cache.set_file(self.digest, member.name, content)
+        return content
+
+    def export(self, local_path: str):
+        """Export all files to local_path, the whole package has to be read anyway"""
+        fileobj = io.BufferedReader(RangeFile(self._reader, block_size=SEQUENTIAL_READ_BLOCK_SIZE, max_blocks=2))
+        if self.index.format == "zip":
+            with zipfile.ZipFile(fileobj) as zip_:
+                zip_.extractall(local_path)  # noqa: S202
+            return
+
+        try:
+            with tarfile.open(fileobj=fileobj, mode="r:*") as tar:
+                # set filter="data" explicitly to fix CVE-2007-4559
+                tar.extractall(local_path, filter="data")  # type: ignore
+        except (
+            tarfile.AbsoluteLinkError,  # type: ignore
+            tarfile.OutsideDestinationError,  # type: ignore
+            tarfile.LinkOutsideDestinationError,  # type: ignore
+        ) as e:
+            raise ReadLinkFileOutsideDirectoryError(str(e))
+
+    def close(self):
+        self._reader.close()
+
+    def list(self) -> List[str]:
+        return list(self.index.members.keys())
+
+    def _resolve(self, file_path: str) -> PackageMember:
+        """Find the member of the file, symbolic links will be followed
+
+        :raises ReadFileNotFoundError: the file does not exist in the package
+        :raises ReadLinkFileOutsideDirectoryError: the file links to a path outside the package
+        """
+        name = _normalize_name(posixpath.join(self.relative_path, posixpath.normpath(file_path).lstrip("/")))
+        for _ in range(MAX_LINK_DEPTH):
+            member = self.index.members.get(name)
+            if member is None or member.kind == "dir":
+                raise ReadFileNotFoundError(f"file {file_path} not found")
+            if member.kind == "file":
+                return member
+
+            if member.kind == "hardlink":
+                name = _normalize_name(member.linkname)
+                continue
+            if posixpath.isabs(member.linkname):
+                raise ReadLinkFileOutsideDirectoryError(f"{file_path} is invalid")
+            name = posixpath.normpath(posixpath.join(posixpath.dirname(name), member.linkname))
+            if name == ".." or name.startswith("../"):
+                raise ReadLinkFileOutsideDirectoryError(f"{file_path} is invalid")
+        raise ReadLinkFileOutsideDirectoryError(f"{file_path} has too many levels of symbolic links")
+
+    def _read_member(self, member: PackageMember) -> bytes:
+        if self.index.format == "tar":
+            return self._reader.read_range(member.offset, member.size)
+        if self.index.format == "tar.gz":
+            fileobj = self._get_gzip_file()
+            fileobj.seek(member.offset)
+            return fileobj.read(member.size)
+        return self._read_zip_member(member)
+
+    def _get_gzip_file(self) -> io.BufferedReader:
+        """Get the uncompressed file of the package, it's shared by all reads so that the access points
+        saved by earlier reads can be reused."""
+        if self._gzip_file is None:
+            self._gzip_file = io.BufferedReader(GzipRangeFile(self._reader))
+        return self._gzip_file
+
+    def _read_zip_member(self, member: PackageMember) -> bytes:
+        header = self._reader.read_range(member.offset, _ZIP_LOCAL_FILE_HEADER_SIZE)
+        fields = struct.unpack(_ZIP_LOCAL_FILE_HEADER_STRUCT, header)
+        # fields: signature, ..., flag_bits(3), ..., filename_length(10), extra_length(11)
+        is_encrypted = fields[3] & 0x1
+        supported = member.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+        if fields[0] != _ZIP_LOCAL_FILE_HEADER_SIGNATURE or is_encrypted or not supported:
+            # Let the zipfile module handle the other cases
+            with zipfile.ZipFile(io.BufferedReader(RangeFile(self._reader))) as zip_:
+                return zip_.read(member.name)
+
+        data_offset = member.offset + _ZIP_LOCAL_FILE_HEADER_SIZE + fields[10] + fields[11]
+        data = self._reader.read_range(data_offset, member.compress_size)
+        if member.compress_type == zipfile.ZIP_STORED:
+            return data
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+def get_indexed_client(package: SourcePackage) -> BasePackageClient:
+    """Get a client for reading files from the package, fall back to downloading the whole package
+    when it can not be read by ranges."""
+    digest = package.pkg_sha256_signature or package.sha256_signature
+    try:
+        reader = make_range_reader(package.storage_path)
+    except Exception as e:  # noqa: BLE001
+        logger.info(
+            "Unable to read package by ranges, download it instead, path: %s, reason: %s", package.storage_path, e
+        )
+        return GenericRemoteClient(package.storage_path, relative_path=package.relative_path)
+
+    client = IndexedPackageClient(reader, relative_path=package.relative_path, digest=digest)
+    try:
+        _ = client.index
+    except Exception as e:  # noqa: BLE001
+        logger.info("Unable to index package, download it instead, path: %s, reason: %s", package.storage_path, e)
+        client.close()
+        return GenericRemoteClient(package.storage_path, relative_path=package.relative_path)
+    return client
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""模板代码的本地缓存
+
+创建应用或模块时，需要先从对象存储或代码仓库中下载模板代码，批量创建应用时同一份模板会被反复下载。
+本模块将下载后的模板代码以「模板名称 + 版本」为键缓存在本地目录中，版本通常为对象存储的 ETag 或代码仓库的
+commit id，查询版本的开销远小于下载模板。
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateArtifactCache:
+    """以模板名称及版本为键的模板代码本地缓存
+
+    - 同一个键的模板只会被下载一次：通过文件锁保证（包括同一主机上的其他进程）只有一个调用方在下载，其他调用方等待后复用
+    - 缓存的模板代码为所有调用方共享，只能读取，不能修改
+    - 缓存数量超出上限时，按最近使用时间清理旧的版本
+
+    :param root: 缓存的根目录
+    :param max_entries: 最多缓存的版本数量
+    """
+
+    _staging_prefix = ".staging-"
+
+    def __init__(self, root: Path, max_entries: int):
+        self.root = root
+        self.max_entries = max_entries
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def get_or_fetch(self, template_name: str, revision: str, fetch: Callable[[], Path]) -> Path:
+        """获取模板代码所在的目录，未缓存时调用 fetch 下载
+
+        :param template_name: 模板名称
+        :param revision: 模板代码的版本
+        :param fetch: 下载模板代码的函数，返回存放模板代码的临时目录，该目录将被移动到缓存中
+        :return: 缓存中模板代码所在的目录
+        """
+        entry = self.root / self._make_key(template_name, revision)
+        if entry.is_dir():
+            self._touch(entry)
+            return entry
+
+        with self._lock(entry.name):
+            # 等待锁期间，其他调用方可能已经完成下载
+            if entry.is_dir():
+                self._touch(entry)
+                return entry
+
+            logger.info("template artifact cache missed, fetching template %s(%s)", template_name, revision)
+            source_path = fetch()
+            staging_path = self.root / f"{self._staging_prefix}{uuid.uuid4().hex}"
+            try:
+                # 先移动到缓存根目录下，再通过 rename 原子性地放到最终位置，避免其他调用方读取到不完整的目录
+                shutil.move(str(source_path), str(staging_path))
+                os.replace(staging_path, entry)
+            finally:
+                shutil.rmtree(source_path, ignore_errors=True)
+                shutil.rmtree(staging_path, ignore_errors=True)
+
+        self._prune()
+        return entry
+
+    def _prune(self):
+        """清理超出数量上限的旧版本"""
+        entries = [p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith(".")]
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for entry in entries[: len(entries) - self.max_entries]:
+            logger.info("removing stale template artifact: %s", entry.name)
+            shutil.rmtree(entry, ignore_errors=True)
+            (self.root / f".{entry.name}.lock").unlink(missing_ok=True)
+
+    @contextmanager
+    def _lock(self, key: str) -> Iterator[None]:
+        # flock 的锁属于打开的文件，同一进程中的不同线程分别打开文件时，同样会互斥
+        with open(self.root / f".{key}.lock", "w") as fp:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _touch(entry: Path):
+        """更新目录的修改时间，用于记录最近使用时间"""
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _make_key(template_name: str, revision: str) -> str:
+        return hashlib.sha256(f"{template_name}\n{revision}".encode()).hexdigest()
+
+
+def get_template_artifact_cache() -> Optional[TemplateArtifactCache]:
+    """获取模板代码的本地缓存，未开启缓存时返回 None"""
+    if not settings.TEMPLATE_ARTIFACT_CACHE_DIR:
+        return None
+    return TemplateArtifactCache(
+        Path(settings.TEMPLATE_ARTIFACT_CACHE_DIR), max_entries=settings.TEMPLATE_ARTIFACT_CACHE_MAX_ENTRIES
+    )
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""Benchmark the time cost of initializing a module's source code from its template
+
+The download, render and upload steps are timed separately, which helps to find out whether the
+local template artifact cache works.
+
+Examples:
+
+    # 使用模块的初始化模板，重复渲染 20 次
+    python manage.py benchmark_template_creation --app-code foo --module default --times 20
+
+    # 同时上传初始化代码到对象存储（上传到单独的 key，不会覆盖模块的初始化代码）
+    python manage.py benchmark_template_creation --app-code foo --module default --times 20 --upload
+"""
+
+import statistics
+import time
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from paasng.platform.modules.models import Module
+from paasng.platform.modules.utils import get_module_init_repo_context
+from paasng.platform.sourcectl.utils import generate_temp_dir
+from paasng.platform.templates.models import Template
+from paasng.platform.templates.templater import BlobStoreSyncProcedure, TemplateRenderer
+from paasng.utils.blobstore import make_blob_store
+
+
+class Command(BaseCommand):
+    help = "Benchmark the download, render and upload time of module template initialization"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--app-code", dest="app_code", required=True, help="应用 Code")
+        parser.add_argument("--module", dest="module_name", default="default", help="模块名称")
+        parser.add_argument("--template", dest="template_name", default=None, help="模板名称，默认为模块的初始化模板")
+        parser.add_argument("--times", dest="times", type=int, default=10, help="重复次数")
+        parser.add_argument("--upload", dest="upload", default=False, action="store_true", help="上传到对象存储")
+
+    def handle(self, app_code, module_name, template_name, times, upload, *args, **options):
+        module = Module.objects.get(application__code=app_code, name=module_name)
+        template = Template.objects.get(name=template_name or module.source_init_template)
+        context = get_module_init_repo_context(module, template.type)
+
+        sync_procedure = BlobStoreSyncProcedure(
+            blob_store=make_blob_store(bucket=settings.BLOBSTORE_BUCKET_APP_SOURCE),
+            key=f"app-template-benchmark/{module.application.tenant_id}/{app_code}-{module_name}.tar.gz",
+        )
+
+        timings: Dict[str, List[float]] = {"download": [], "render": [], "upload": []}
+        for i in range(times):
+            renderer = TemplateRenderer(template.name, context=context)
+            with generate_temp_dir() as target_path:
+                renderer.write_to_dir(target_path)
+                if upload:
+                    started_at = time.perf_counter()
+                    sync_procedure.run(str(target_path))
+                    renderer.timings["upload"] = time.perf_counter() - started_at
+
+            for step, seconds in renderer.timings.items():
+                timings[step].append(seconds)
+            self.stdout.write(
+                f"[{i + 1}/{times}] "
+                + ", ".join(f"{step}={seconds * 1000:.1f}ms" for step, seconds in renderer.timings.items())
+            )
+
+        self.stdout.write(f"\ntemplate: {template.name}, times: {times}")
+        for step, values in timings.items():
+            if not values:
+                continue
+            self.stdout.write(
+                f"{step:>8}: avg={statistics.mean(values) * 1000:.1f}ms, "
+                + f"min={min(values) * 1000:.1f}ms, max={max(values) * 1000:.1f}ms, "
+                + f"first={values[0] * 1000:.1f}ms"
+            )
@@ -18,17 +18,21 @@
 import logging
 import shutil
 import tempfile
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
 from urllib.parse import urlparse
 
 from cookiecutter.main import cookiecutter
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
+from paasng.platform.sourcectl.client import DEFAULT_REPO_REF
 from paasng.platform.sourcectl.source_types import get_sourcectl_type
 from paasng.platform.sourcectl.utils import compress_directory, generate_temp_dir, generate_temp_file
+from paasng.platform.templates.cache import get_template_artifact_cache
 from paasng.platform.templates.command import EnhancedTemplateCommand
 from paasng.platform.templates.constants import RenderMethod, TemplateType
 from paasng.platform.templates.exceptions import TmplNotExists
@@ -76,33 +80,20 @@ class TemplateRenderer:
             raise TmplNotExists(f"Template <{template_name}> does not exists")
         self.template = template
         self.context = context
+        # 最近一次 write_to_dir 中各步骤的耗时（秒），包括 download 和 render
+        self.timings: Dict[str, float] = {}
 
     def download_from_blob_storage(self) -> Path:
         """从对象存储中下载模板代码"""
-        location = self.template.blob_url
-        o = urlparse(location)
-        scheme, bucket, path = o.scheme.lower(), o.netloc, Path(o.path)
-        logger.debug("checkout template from [%s: %s]", scheme, location)
+        scheme, bucket, path, store_type = self._parse_blob_location()
+        logger.debug("checkout template from [%s: %s]", scheme, self.template.blob_url)
         if scheme == "file":
             return uncompress_tar_to_local_path(path)
-
-        if path.is_absolute():
-            # Ceph RGW 不支持绝对路径
-            path = path.relative_to("/")
-
-        store_type = {"s3": StoreType.S3, "bkrepo": StoreType.BKREPO}.get(scheme)
-        if not store_type:
-            logger.warning("unknown protocol type: %s, url: %s", o.scheme, location)
-
         return download_from_blob_store(bucket, path, store_type=store_type)
 
     def download_from_vcs_repository(self) -> Path:
         """从代码仓库下载模板代码"""
-        source_type = get_sourcectl_type(self.template.repo_type)
-        # NOTE: 用户并一不定有开发框架模板代码仓库的权限，所以必须用在代码仓库中配置的公共账号下载
-        repo_controller = source_type.repo_controller_class.init_by_server_config(
-            self.template.repo_type, self.template.repo_url
-        )
+        repo_controller = self._make_repo_controller()
 
         dest_dir = Path(tempfile.mkdtemp())
         source_dir = self.template.source_dir
@@ -118,6 +109,77 @@ class TemplateRenderer:
                     shutil.move(str(path), str(dest_dir / path.relative_to(real_source_dir)))
         return dest_dir
 
+    def download(self) -> Path:
+        """下载模板代码到新的临时目录"""
+        # 插件模板的代码存放在代码仓库中
+        if self.template.type == TemplateType.PLUGIN:
+            return self.download_from_vcs_repository()
+        # 模板代码默认存放在对象存储中
+        return self.download_from_blob_storage()
+
+    def get_revision(self) -> Optional[str]:
+        """获取模板代码当前的版本，用作本地缓存的键。无法获取时返回 None，此时不使用缓存"""
+        revision: Optional[str]
+        try:
+            if self.template.type == TemplateType.PLUGIN:
+                revision = self._get_vcs_revision()
+            else:
+                revision = self._get_blob_revision()
+        except Exception:
+            logger.warning("failed to get the revision of template %s", self.template.name, exc_info=True)
+            return None
+
+        if not revision:
+            return None
+        # 模板的存储位置等配置变更后，缓存同样需要失效
+        return f"{self.template.updated.isoformat()}:{revision}"
+
+    def _get_blob_revision(self) -> Optional[str]:
+        """以对象的 ETag 等元数据作为对象存储中模板代码的版本"""
+        scheme, bucket, path, store_type = self._parse_blob_location()
+        if scheme == "file":
+            stat = path.stat()
+            return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+        metadata = make_blob_store(bucket, store_type=store_type).get_file_metadata(str(path))
+        # S3 与 bkrepo 返回的字段名称不同（如 ContentLength 与 Content-Length），统一格式后再读取
+        fields = {k.lower().replace("-", ""): v for k, v in (metadata or {}).items()}
+        if etag := fields.get("etag"):
+            return str(etag)
+        if (last_modified := fields.get("lastmodified")) and (length := fields.get("contentlength")):
+            return f"{last_modified}-{length}"
+        return None
+
+    def _get_vcs_revision(self) -> str:
+        """以默认分支的最新 commit id 作为代码仓库中模板代码的版本"""
+        # 下载模板时未指定版本，导出的是默认分支的代码
+        return self._make_repo_controller().extract_smart_revision(f"branch:{DEFAULT_REPO_REF}")
+
+    def _parse_blob_location(self) -> Tuple[str, str, Path, Optional[StoreType]]:
+        """解析模板在对象存储中的地址
+
+        :return: (协议, bucket, 路径, 对象存储类型)
+        """
+        location = self.template.blob_url
+        o = urlparse(location)
+        scheme, bucket, path = o.scheme.lower(), o.netloc, Path(o.path)
+        if scheme == "file":
+            return scheme, bucket, path, None
+
+        if path.is_absolute():
+            # Ceph RGW 不支持绝对路径
+            path = path.relative_to("/")
+
+        store_type = {"s3": StoreType.S3, "bkrepo": StoreType.BKREPO}.get(scheme)
+        if not store_type:
+            logger.warning("unknown protocol type: %s, url: %s", o.scheme, location)
+        return scheme, bucket, path, store_type
+
+    def _make_repo_controller(self):
+        source_type = get_sourcectl_type(self.template.repo_type)
+        # NOTE: 用户并一不定有开发框架模板代码仓库的权限，所以必须用在代码仓库中配置的公共账号下载
+        return source_type.repo_controller_class.init_by_server_config(self.template.repo_type, self.template.repo_url)
+
     def render_template(self, source_path: Path, target_path: Path):
         """将模板渲染到目标目录，根据模板类型使用不同的渲染引擎：
 
@@ -149,22 +211,36 @@ class TemplateRenderer:
 
     def write_to_dir(self, target_path: Path):
         """下载模板并将渲染后写入目标目录，包含以下步骤：
-        - 下载模板代码到本地
+        - 下载模板代码到本地（优先使用本地缓存）
         - 将模板中的变量用 context 渲染
 
         :param target_path: 模板代码写入的路径，是已存在的空目录
         """
-        try:
-            # 插件模板的代码存放在代码仓库中
-            if self.template.type == TemplateType.PLUGIN:
-                source_path = self.download_from_vcs_repository()
-            else:
-                # 模板代码默认存放在对象存储中
-                source_path = self.download_from_blob_storage()
+        self.timings = {}
+        started_at = time.perf_counter()
+        with self._checkout() as source_path:
+            rendering_at = time.perf_counter()
+            self.timings["download"] = rendering_at - started_at
 
             self.render_template(source_path, target_path)
+            self.timings["render"] = time.perf_counter() - rendering_at
+
+        logger.debug("template %s written, timings: %s", self.template.name, self.timings)
+
+    @contextmanager
+    def _checkout(self) -> Iterator[Path]:
+        """获取模板代码所在的目录，模板代码只能读取，不能修改"""
+        cache = get_template_artifact_cache()
+        revision = self.get_revision() if cache else None
+        if cache and revision:
+            yield cache.get_or_fetch(self.template.name, revision, self.download)
+            return
+
+        source_path = self.download()
+        try:
+            yield source_path
         finally:
-            if "source_path" in locals() and source_path.exists():
+            if source_path.exists():
                 if source_path.is_file():
                     source_path.unlink()
                 else:
@@ -702,6 +702,12 @@ BK_IAM_SKIP = settings.get("BK_IAM_SKIP", False)
 # 退出用户组同理，因此在退出的一定时间内，需要先 exclude 掉避免退出后还可以看到应用的问题
 IAM_PERM_EFFECTIVE_TIMEDELTA = settings.get("BK_IAM_PERM_EFFECTIVE_TIMEDELTA", 5 * 60)
 
+# 批量获取应用角色成员时，成员缓存的有效时间（单位：秒），设置为 0 时不缓存
+# 通过开发者中心增删成员时会主动清理缓存，但在权限中心直接申请/续期的变更需等待缓存过期后才可见
+IAM_ROLE_MEMBERS_CACHE_TTL = settings.get("IAM_ROLE_MEMBERS_CACHE_TTL", 5 * 60, cast="@int")
+# 批量获取应用角色成员时，并发请求权限中心的数量
+IAM_FETCH_ROLE_MEMBERS_CONCURRENCY = settings.get("IAM_FETCH_ROLE_MEMBERS_CONCURRENCY", 8, cast="@int")
+
 # 蓝鲸的云 API 地址，用于内置环境变量的配置项
 BK_COMPONENT_API_URL = settings.get("BK_COMPONENT_API_URL", "")
 # 蓝鲸的组件 API 地址，网关 SDK 依赖该配置项（该项值与 BK_COMPONENT_API_URL 一致）
@@ -732,6 +738,12 @@ IS_ALLOW_CREATE_SMART_APP_BY_DEFAULT = settings.get("IS_ALLOW_CREATE_SMART_APP_B
 # 使用“应用迁移”功能，迁移到云原生应用时所使用的目标集群名称
 MGRLEGACY_CLOUD_NATIVE_TARGET_CLUSTER = settings.get("MGRLEGACY_CLOUD_NATIVE_TARGET_CLUSTER", "")
 
+# 云原生应用模型（BkApp manifest）的缓存时间（秒），仅用于查看、导出等只读场景，部署时总是重新生成，设置为 0 时关闭缓存
+BKAPP_MANIFEST_CACHE_TTL = settings.get("BKAPP_MANIFEST_CACHE_TTL", 5 * 60, cast="@int")
+
+# 用户配置类环境变量（环境变量、应用描述文件预设变量）在进程内的缓存时间（秒），变量修改时缓存自动失效，设置为 0 时关闭缓存
+ENV_VARS_SOURCE_CACHE_TTL = settings.get("ENV_VARS_SOURCE_CACHE_TTL", 10 * 60, cast="@int")
+
 # 开发者中心使用的 k8s 集群组件（helm chart 名称）
 BKPAAS_K8S_CLUSTER_COMPONENTS = settings.get(
     "BKPAAS_K8S_CLUSTER_COMPONENTS",
@@ -1073,8 +1085,14 @@ PAAS_SERVICE_JWT_CLIENTS = get_paas_service_jwt_clients(settings)
 BLOBSTORE_BUCKET_APP_SOURCE = settings.get("BLOBSTORE_BUCKET_APP_SOURCE", "bkpaas3-slug-packages")
 # Bucket 名称：保存应用模板代码
 BLOBSTORE_BUCKET_TEMPLATES = settings.get("BLOBSTORE_BUCKET_TEMPLATES", "bkpaas3-apps-tmpls")
+# 模板代码的本地缓存目录，以模板名称及版本（对象的 ETag 或仓库的 commit id）为键，设置为空时关闭缓存
+TEMPLATE_ARTIFACT_CACHE_DIR = settings.get("TEMPLATE_ARTIFACT_CACHE_DIR", "/tmp/bkpaas-template-artifacts")
+# 本地最多缓存的模板版本数量，超出时清理最久未使用的版本
+TEMPLATE_ARTIFACT_CACHE_MAX_ENTRIES = settings.get("TEMPLATE_ARTIFACT_CACHE_MAX_ENTRIES", 50, cast="@int")
 # Bucket 名称：存储源码包
 BLOBSTORE_BUCKET_AP_PACKAGES = settings.get("BLOBSTORE_BUCKET_AP_PACKAGES", "bkpaas3-source-packages")
+# 源码包成员索引（及小文件内容）的缓存时间（秒），以源码包 sha256 为键，设置为 0 时关闭缓存
+SOURCE_PACKAGE_INDEX_CACHE_TTL = settings.get("SOURCE_PACKAGE_INDEX_CACHE_TTL", 3600 * 24, cast="@int")
 
 # S-Mart 应用默认增强服务配置信息
 SMART_APP_DEFAULT_SERVICES_CONFIG = settings.get("SMART_APP_DEFAULT_SERVICES_CONFIG", {"mysql": {}})
@@ -1142,6 +1160,11 @@ SERVICE_REMOTE_ENDPOINTS: List[Dict] = get_service_remote_endpoints(settings)
 if hasattr(SERVICE_REMOTE_ENDPOINTS, "to_list"):
     SERVICE_REMOTE_ENDPOINTS = SERVICE_REMOTE_ENDPOINTS.to_list()
 
+# 远程增强服务实例详情（含凭证信息，加密存储）的缓存时间（单位：秒），设置为 0 时不缓存
+REMOTE_SERVICE_INSTANCE_CACHE_TTL = settings.get("REMOTE_SERVICE_INSTANCE_CACHE_TTL", 30, cast="@int")
+# 批量获取远程增强服务实例详情时的最大并发数
+REMOTE_SERVICE_FETCH_CONCURRENCY = settings.get("REMOTE_SERVICE_FETCH_CONCURRENCY", 8, cast="@int")
+
 # ---------------
 # 应用市场相关配置
 # ---------------
@@ -1166,6 +1189,10 @@ PAAS_API_LOG_REDIS_HANDLER = settings.get(
         "url": "redis://localhost:6379/0",
         "queue_name": "paas_ng-meters",
         "tags": [],
+        # 日志由后台线程批量写入 Redis：进程内队列的最大长度（队列满时丢弃最早的日志）、每批条数、写入间隔（秒）
+        "max_queue_size": 10000,
+        "batch_size": 500,
+        "flush_interval": 1.0,
     },
 )
 
@@ -1187,6 +1214,10 @@ ELASTICSEARCH_HOSTS = settings.get(
 
 # 日志 ES 搜索超时时间
 DEFAULT_ES_SEARCH_TIMEOUT = 30
+# 日志 ES 的索引列表和 mappings 的缓存时间(秒), 设置为 0 时不缓存
+ES_LOG_METADATA_CACHE_TTL = settings.get("ES_LOG_METADATA_CACHE_TTL", 60, cast="@int")
+# 查询日志时, 若 ES 返回的命中总数只是下限(命中数过多), 是否跳过额外的 count 请求. 跳过后返回的总数可能不精确
+ES_LOG_SKIP_EXACT_COUNT = settings.get("ES_LOG_SKIP_EXACT_COUNT", False, cast="@bool")
 
 # 日志 Index 名称模式
 ES_K8S_LOG_INDEX_PATTERNS = settings.get("ES_K8S_LOG_INDEX_PATTERNS", "app_log-*")
@@ -1386,6 +1417,9 @@ PLUGIN_APP_DEFAULT_LOGO = settings.get(
     "PLUGIN_APP_DEFAULT_LOGO", default=f"{BKPAAS_URL}/static/images/plugin-default.svg"
 )
 
+# 插件类型表单范式在 Redis 中的缓存时间（秒），插件类型定义变更时缓存会立即失效
+PLUGIN_SCHEMA_CACHE_TIMEOUT = settings.get("PLUGIN_SCHEMA_CACHE_TIMEOUT", 3600)
+
 # -----------------
 # 蓝鲸监控配置项
 # -----------------
@@ -1403,6 +1437,10 @@ BKREPO_MONITOR_CONF = settings.get("BKREPO_MONITOR_CONF", {})
 GCS_MYSQL_MONITOR_CONF = settings.get("GCS_MYSQL_MONITOR_CONF", {})
 # 蓝鲸监控网关的环境
 BK_MONITOR_APIGW_SERVICE_STAGE = settings.get("BK_MONITOR_APIGW_SERVICE_STAGE", "stage")
+# 资源使用量指标（CPU、内存）查询结果的缓存时间（秒），设置为 0 时关闭缓存
+METRICS_QUERY_CACHE_TTL = settings.get("METRICS_QUERY_CACHE_TTL", 30, cast="@int")
+# 查询资源使用量指标时的最大并发请求数
+METRICS_QUERY_CONCURRENCY = settings.get("METRICS_QUERY_CONCURRENCY", 8, cast="@int")
 
 # ---------------------------------------------
 # 蓝鲸通知中心配置
@@ -1439,6 +1477,13 @@ BK_AUDIT_SETTINGS = {
     "bk_data_token": BK_AUDIT_DATA_TOKEN,
 }
 
+# 是否在事务提交后，异步批量写入由 signal 触发的审计记录（如创建应用、模块），关闭后将在触发时同步写入
+ENABLE_ASYNC_AUDIT_RECORDS = settings.get("ENABLE_ASYNC_AUDIT_RECORDS", True)
+# 异步写入审计记录的配置：队列长度、每批写入的数量、写入间隔（秒）
+AUDIT_RECORD_PIPELINE_CONFIG = settings.get(
+    "AUDIT_RECORD_PIPELINE_CONFIG", {"max_queue_size": 10000, "batch_size": 200, "flush_interval": 1.0}
+)
+
 # ---------------------------------------------
 # 蓝鲸容器服务配置
 # ---------------------------------------------
@@ -1503,6 +1548,8 @@ BKPAAS_PLATFORM_MANAGERS = settings.get("BKPAAS_PLATFORM_MANAGERS", [])
 ENABLE_SEND_OPERATION_REPORT_EMAIL_TO_PLAT_MANAGE = settings.get(
     "ENABLE_SEND_OPERATION_REPORT_EMAIL_TO_PLAT_MANAGE", False
 )
+# 采集应用运营报告时，每个子任务（分片）采集的应用数量
+APP_OPERATION_REPORT_COLLECT_SHARD_SIZE = settings.get("APP_OPERATION_REPORT_COLLECT_SHARD_SIZE", 50, cast="@int")
 
 # 发送验证码，没有配置通知渠道的版本可以关闭该功能
 ENABLE_VERIFICATION_CODE = settings.get("ENABLE_VERIFICATION_CODE", False)
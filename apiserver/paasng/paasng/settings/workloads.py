@@ -113,6 +113,12 @@ DEV_SANDBOX_CLUSTER = settings.get("DEV_SANDBOX_CLUSTER", "")
 AGENT_SANDBOX_DEFAULT_IMAGE = settings.get("AGENT_SANDBOX_DEFAULT_IMAGE", "bkpaas/agent-sandbox:latest")
 # Sandbox Router 验证 Token，用于 apiserver 与 router 之间的身份校验，不配置则不校验
 AGENT_SANDBOX_ROUTER_AUTH_TOKEN = settings.get("AGENT_SANDBOX_ROUTER_AUTH_TOKEN", "")
+# Agent Sandbox 预热池大小，格式为 {app_code: size}，预先启动若干 daemon 已就绪的空闲沙箱，创建沙箱时直接认领
+AGENT_SANDBOX_WARM_POOL_SIZES = settings.get("AGENT_SANDBOX_WARM_POOL_SIZES", {})
+# 预热池中空闲沙箱的最长保留时间（秒），超过后将被回收重建，避免长期占用资源的沙箱状态陈旧
+AGENT_SANDBOX_WARM_POOL_MAX_IDLE_SECONDS = settings.get(
+    "AGENT_SANDBOX_WARM_POOL_MAX_IDLE_SECONDS", 6 * 60 * 60, cast="@int"
+)
 
 # ---------------
 # 资源命名配置
@@ -155,9 +161,30 @@ MUL_MODULE_VOLUME_HOST_PATH_APP_LOGGING_DIR = settings.get(
 K8S_DEFAULT_CONNECT_TIMEOUT = 5
 K8S_DEFAULT_READ_TIMEOUT = 60
 
+# 集群 API 发现结果（版本、资源列表等）的缓存时间，单位为秒
+K8S_DISCOVERY_CACHE_TTL = settings.get("K8S_DISCOVERY_CACHE_TTL", 5 * 60)
+
 # 指定 kubectl 使用的 config.yaml 文件路径，容器化交付时由 secret 挂载而来
 KUBE_CONFIG_FILE = settings.get("KUBE_CONFIG_FILE", "/data/kubelet/conf/kubeconfig.yaml")
 
+# 是否从 watch 到的 BkApp 资源中读取云原生应用的部署状态，需同时运行（单副本）`run_bkapp_watchers` 命令，
+# 关闭后将定时从集群拉取 BkApp 资源
+ENABLE_BKAPP_STATUS_WATCH = settings.get("ENABLE_BKAPP_STATUS_WATCH", False, cast="@bool")
+
+# 是否在定时任务（`run_scheduler` 命令）中扫描各集群中不可用 Deployment，供指标导出时读取
+ENABLE_UNAVAILABLE_DEPLOYMENTS_SCAN = settings.get("ENABLE_UNAVAILABLE_DEPLOYMENTS_SCAN", True, cast="@bool")
+# 扫描各集群中不可用 Deployment 的间隔时间（秒），扫描结果存储在 Redis 中，供指标导出时读取
+UNAVAILABLE_DEPLOYMENTS_SCAN_INTERVAL = settings.get("UNAVAILABLE_DEPLOYMENTS_SCAN_INTERVAL", 5 * 60, cast="@int")
+# 扫描单个集群的超时时间（秒）
+UNAVAILABLE_DEPLOYMENTS_SCAN_TIMEOUT = settings.get("UNAVAILABLE_DEPLOYMENTS_SCAN_TIMEOUT", 60, cast="@int")
+# 同时扫描的集群数量
+UNAVAILABLE_DEPLOYMENTS_SCAN_CONCURRENCY = settings.get("UNAVAILABLE_DEPLOYMENTS_SCAN_CONCURRENCY", 8, cast="@int")
+# 分页查询 Deployment 时每页的数量
+UNAVAILABLE_DEPLOYMENTS_SCAN_PAGE_SIZE = settings.get("UNAVAILABLE_DEPLOYMENTS_SCAN_PAGE_SIZE", 500, cast="@int")
+
+# 进程内集群快照检查全局版本号的最小间隔（秒），其他进程对集群配置的变更最多延迟该时间后生效
+CLUSTER_REGISTRY_VERSION_CHECK_INTERVAL = settings.get("CLUSTER_REGISTRY_VERSION_CHECK_INTERVAL", 2)
+
 # 和 Deployment 资源回滚相关，设置值宜小，减轻 controller-manager 压力
 MAX_RS_RETAIN = 3
 
@@ -15,18 +15,21 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import atexit
 import json
 import logging
+import os
+import threading
 import time
-from typing import Dict
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
 
 import redis
 from django.conf import settings
 from django.http.response import HttpResponse
 from django.urls import resolve
-from django.utils.encoding import force_str
 
-from paasng.misc.metrics import API_VISITED_COUNTER, API_VISITED_TIME_CONSUME_HISTOGRAM
+from paasng.misc.metrics import API_LOG_DROPPED_COUNTER, API_VISITED_COUNTER, API_VISITED_TIME_CONSUME_HISTOGRAM
 from paasng.utils.basic import get_client_ip
 
 logger = logging.getLogger(__name__)
@@ -60,7 +63,7 @@ class ApiLogMiddleware:
         API_VISITED_TIME_CONSUME_HISTOGRAM.labels(**data).observe(msecs_cost)
 
         try:
-            api_data = self.get_api_data(request, response)
+            api_data = self.get_api_data(request, response, msecs_cost)
             self.save_data(api_data)
         except Exception as error:  # noqa: BLE001
             if not settings.DEBUG:
@@ -68,12 +71,14 @@ class ApiLogMiddleware:
 
         return response
 
-    def truncate(self, content):
+    def truncate(self, content: bytes) -> str:
+        """Truncate the content, only the leading part of the content will be decoded"""
         if len(content) > self.max_content_size:
-            content = content[: self.max_content_size] + "...(truncated)"
-        return content
+            # A multi-byte character may be cut off at the end, ignore it
+            return content[: self.max_content_size].decode("utf-8", errors="ignore") + "...(truncated)"
+        return content.decode("utf-8", errors="replace")
 
-    def get_api_data(self, request, response):
+    def get_api_data(self, request, response, msecs_cost: int) -> Optional["ApiLogRecord"]:
         if request.method == "OPTIONS":
             return None
 
@@ -84,9 +89,11 @@ class ApiLogMiddleware:
 
         # django.http.response.StreamingHttpResponse just ignore
         if isinstance(response, HttpResponse):
-            content = self.truncate(force_str(response.content))
+            # Slice the content before shipping to avoid holding the whole body, the decoding
+            # and truncating are deferred to the shipper's thread
+            content = response.content[: self.max_content_size + 1]
         else:
-            content = ""
+            content = b""
 
         data = {
             "project_code": self.project_code,
@@ -96,44 +103,151 @@ class ApiLogMiddleware:
             "client_ip": get_client_ip(request),
             "method": request.method,
             "path": request.path,
-            "params": json.dumps(request.GET.dict()),
-            "msecs_cost": int((time.time() - request.start_time) * 1000),
+            "params": request.GET.dict(),
+            "msecs_cost": msecs_cost,
             "status": response.status_code,
             "response_content": content,
             "type": self.doc_type,
         }
-        return data
+        return ApiLogRecord(data, truncate=self.truncate)
 
-    def save_data(self, data):
+    def save_data(self, data: Optional["ApiLogRecord"]):
         if not data:
             return
 
         save_redis(data)
 
 
-_redis_client = None
+class ApiLogRecord:
+    """An API log record whose serialization is deferred until it's shipped
 
+    :param data: the raw data, "params" is a dict and "response_content" is bytes
+    :param truncate: the function to truncate and decode the response content
+    """
+
+    def __init__(self, data: Dict[str, Any], truncate):
+        self.data = data
+        self.truncate = truncate
+
+    def dumps(self, tags: List[str]) -> str:
+        doc = dict(self.data)
+        doc["params"] = json.dumps(doc["params"])
+        doc["response_content"] = self.truncate(doc["response_content"])
+        doc["tags"] = tags
+        return json.dumps(doc)
+
+
+class ApiLogShipper:
+    """Ship API log records to the redis queue in a background thread, by batches.
+
+    Records are put into a bounded in-process queue, when the queue is full (e.g. redis is slow
+    or unavailable), the oldest records are dropped, so shipping logs never blocks the requests.
+
+    :param handler_config: the config of the redis handler, see `settings.PAAS_API_LOG_REDIS_HANDLER`
+    """
 
-def save_redis(doc: Dict):
+    def __init__(self, handler_config: Dict):
+        self.handler_config = handler_config
+        self.max_queue_size: int = handler_config.get("max_queue_size", 10000)
+        self.batch_size: int = handler_config.get("batch_size", 500)
+        self.flush_interval: float = handler_config.get("flush_interval", 1.0)
+
+        self._queue: Deque[ApiLogRecord] = deque(maxlen=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        # The process which started the flusher thread, threads are not inherited by forked processes
+        self._pid: Optional[int] = None
+        self._redis_client = None
+
+    def put(self, record: ApiLogRecord):
+        with self._lock:
+            if len(self._queue) == self.max_queue_size:
+                API_LOG_DROPPED_COUNTER.labels(reason="queue_full").inc()
+            self._queue.append(record)
+            should_wakeup = len(self._queue) >= self.batch_size
+            self._ensure_flusher()
+        if should_wakeup:
+            self._wakeup.set()
+
+    def flush(self):
+        """Ship all queued records"""
+        while batch := self._pop_batch():
+            self._ship(batch)
+
+    def _pop_batch(self) -> List[ApiLogRecord]:
+        with self._lock:
+            return [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+
+    def _ship(self, batch: List[ApiLogRecord]):
+        tags = self.handler_config.get("tags", [])
+        values = []
+        for record in batch:
+            try:
+                values.append(record.dumps(tags))
+            except Exception as e:  # noqa: BLE001
+                logger.warning(f"unable to dump api log data: {e}")
+
+        if not values:
+            return
+        try:
+            self._get_redis_client().rpush(self.handler_config["queue_name"], *values)
+        except Exception:
+            logger.exception("Failed to ship api logs to redis")
+            API_LOG_DROPPED_COUNTER.labels(reason="redis_error").inc(len(values))
+
+    def _get_redis_client(self):
+        if self._redis_client is None:
+            connection_options = getattr(settings, "REDIS_CONNECTION_OPTIONS", {})
+            # TODO ee 版本如果开启, 再支持 sentinel 模式. 届时 PAAS_API_LOG_REDIS_HANDLER 参数也要适配调整
+            self._redis_client = redis.from_url(self.handler_config["url"], **connection_options)
+        return self._redis_client
+
+    def _ensure_flusher(self):
+        """Start the flusher thread if it's not running in current process, must be called with the lock held"""
+        if self._flusher is not None and self._pid == os.getpid():
+            return
+
+        if self._pid is not None and self._pid != os.getpid():
+            # Forked from a process which has started the flusher, the connection pool can not be
+            # shared, and the records belong to the parent process.
+            self._redis_client = None
+            self._queue.clear()
+        self._pid = os.getpid()
+        self._flusher = threading.Thread(target=self._run_flusher, name="api-log-shipper", daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Unexpected error when shipping api logs")
+
+
+_shipper: Optional[ApiLogShipper] = None
+_shipper_lock = threading.Lock()
+
+
+def get_shipper() -> ApiLogShipper:
+    global _shipper
+    if _shipper is None:
+        with _shipper_lock:
+            if _shipper is None:
+                _shipper = ApiLogShipper(settings.PAAS_API_LOG_REDIS_HANDLER)
+                # Ship the remaining records when the process exits normally
+                atexit.register(_shipper.flush)
+    return _shipper
+
+
+def save_redis(record: ApiLogRecord):
     """
-    保存日志数据到 Redis 队列
+    保存日志数据到 Redis 队列, 数据由后台线程批量写入, 不阻塞当前请求
     """
     handler_config = settings.PAAS_API_LOG_REDIS_HANDLER
     if not handler_config.get("enabled", False):
         return
 
-    # Connect to redis and save the connection pool afterwards
-    global _redis_client
-    if _redis_client is None:
-        connection_options = getattr(settings, "REDIS_CONNECTION_OPTIONS", {})
-        # TODO ee 版本如果开启, 再支持 sentinel 模式. 届时 PAAS_API_LOG_REDIS_HANDLER 参数也要适配调整
-        _redis_client = redis.from_url(handler_config["url"], **connection_options)
-
-    doc["tags"] = handler_config.get("tags", [])
-    try:
-        data = json.dumps(doc)
-    except Exception as e:  # noqa: BLE001
-        logger.warning(f"unable to dump api log data: {e}")
-        return
-
-    _redis_client.rpush(handler_config["queue_name"], data)
+    get_shipper().put(record)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class LayerDigests(NamedTuple):
+    # the digest of the (compressed) layer blob
+    digest: str
+    # the size of the (compressed) layer blob
+    size: int
+    # the digest of the uncompressed tarball
+    diff_id: str
+
+
+class LayerDigestCache:
+    """Cache the digests of layers, so that the same layer won't be hashed again.
+
+    Local layers are keyed by (path, mtime, size) of the file, remote layers are keyed by their digest.
+    Entries are kept in memory, and persisted to `cache_dir` if given, so they can survive the process
+    and be shared by other processes on the same host.
+
+    :param cache_dir: the directory to persist entries, defaults to env `MOBY_DISTRIBUTION_DIGEST_CACHE_DIR`
+    :param max_entries: the max number of entries kept in memory
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, max_entries: int = 1024):
+        cache_dir = cache_dir or os.getenv("MOBY_DISTRIBUTION_DIGEST_CACHE_DIR")
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, LayerDigests] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_local(self, path: Path) -> Optional[LayerDigests]:
+        """Get the digests of a local layer, return None if not cached or the file has been changed"""
+        return self._get(self._make_local_key(path))
+
+    def set_local(self, path: Path, digests: LayerDigests):
+        self._set(self._make_local_key(path), digests)
+
+    def get_remote(self, digest: str) -> Optional[LayerDigests]:
+        """Get the digests of a layer in registry"""
+        return self._get(f"remote:{digest}")
+
+    def set_remote(self, digests: LayerDigests):
+        self._set(f"remote:{digests.digest}", digests)
+
+    def clear(self):
+        """Clear the entries in memory, persisted entries are kept"""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _make_local_key(path: Path) -> str:
+        stat = path.stat()
+        return f"local:{path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _get(self, key: str) -> Optional[LayerDigests]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        digests = self._load(key)
+        if digests is not None:
+            self._remember(key, digests)
+        return digests
+
+    def _set(self, key: str, digests: LayerDigests):
+        self._remember(key, digests)
+        self._dump(key, digests)
+
+    def _remember(self, key: str, digests: LayerDigests):
+        with self._lock:
+            self._entries[key] = digests
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _entry_path(self, key: str) -> Path:
+        assert self.cache_dir
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def _load(self, key: str) -> Optional[LayerDigests]:
+        if self.cache_dir is None:
+            return None
+        try:
+            data = json.loads(self._entry_path(key).read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Failed to load layer digests from cache, key: %s", key)
+            return None
+        # Guard against hash collisions of the file names
+        if data.get("key") != key:
+            return None
+        return LayerDigests(digest=data["digest"], size=data["size"], diff_id=data["diff_id"])
+
+    def _dump(self, key: str, digests: LayerDigests):
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file then rename it, so readers never see a partial entry
+            with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".tmp", delete=False) as fh:
+                json.dump({"key": key, **digests._asdict()}, fh)
+            os.replace(fh.name, self._entry_path(key))
+        except OSError:
+            logger.warning("Failed to persist layer digests to cache, key: %s", key)
+
+
+default_digest_cache = LayerDigestCache()
@@ -87,14 +87,21 @@ class Blob(RepositoryResource):
                 fh.write(chunk)
 
     def upload(self) -> Descriptor:
-        """upload the blob from `local_path` or `fileobj` to the registry by streaming"""
+        """upload the blob from `local_path` or `fileobj` to the registry by streaming
+
+        if the digest is given, the content won't be hashed again, the registry will verify it when committing.
+        """
         uuid, location = self._initiate_blob_upload()
         blob = BlobWriter(uuid, location, client=self.client)
         with self.accessor.open(mode="rb") as fh:
-            signer = HashSignWrapper(fh=blob)
-            shutil.copyfileobj(fsrc=fh, fdst=signer, length=1024 * 1024 * 64)
+            if self.digest:
+                shutil.copyfileobj(fsrc=fh, fdst=blob, length=1024 * 1024 * 64)
+                digest = self.digest
+            else:
+                signer = HashSignWrapper(fh=blob)
+                shutil.copyfileobj(fsrc=fh, fdst=signer, length=1024 * 1024 * 64)
+                digest = signer.digest()
 
-        digest = signer.digest()
         blob.commit(digest)
         self.digest = digest
         return self.stat()
@@ -307,3 +314,32 @@ class HashSignWrapper:
     def digest(self) -> str:
         """return hexdigest with hash method name"""
         return f"{self.signer.name}:{self.signer.hexdigest()}"
+
+
+class HashSignReader:
+    """A Wrapper can sign the content of fh when reading it.
+
+    Usage:
+    >>> import gzip, shutil
+    >>> reader = HashSignReader(open("somewhere.tar.gz", mode="rb"))
+    >>> shutil.copyfileobj(gzip.GzipFile(fileobj=reader), HashSignWrapper())
+    >>> reader.digest()
+    """
+
+    def __init__(self, fh: IO, constructor=hashlib.sha256):
+        self._raw_fh = fh
+        self.signer = constructor()
+        self._size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._raw_fh.read(size)
+        self.signer.update(chunk)
+        self._size += len(chunk)
+        return chunk
+
+    def tell(self) -> int:
+        return self._size
+
+    def digest(self) -> str:
+        """return hexdigest with hash method name"""
+        return f"{self.signer.name}:{self.signer.hexdigest()}"
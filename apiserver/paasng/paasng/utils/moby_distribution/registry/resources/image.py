@@ -37,8 +37,14 @@ except ImportError:
     pydantic_version = _pydantic.VERSION
 
 from paasng.utils.moby_distribution.registry.client import DockerRegistryV2Client, default_client
+from paasng.utils.moby_distribution.registry.digest_cache import (
+    LayerDigestCache,
+    LayerDigests,
+    default_digest_cache,
+)
+from paasng.utils.moby_distribution.registry.exceptions import ResourceNotFound
 from paasng.utils.moby_distribution.registry.resources import RepositoryResource
-from paasng.utils.moby_distribution.registry.resources.blobs import Blob, HashSignWrapper
+from paasng.utils.moby_distribution.registry.resources.blobs import Blob, HashSignReader, HashSignWrapper
 from paasng.utils.moby_distribution.registry.resources.manifests import ManifestRef
 from paasng.utils.moby_distribution.registry.utils import (
     TypeTimeout,
@@ -46,6 +52,7 @@ from paasng.utils.moby_distribution.registry.utils import (
     generate_temp_dir,
     parse_image,
 )
+from paasng.utils.moby_distribution.spec.base import Descriptor
 from paasng.utils.moby_distribution.spec.image_json import History, ImageJSON, default_created
 from paasng.utils.moby_distribution.spec.manifest import (
     DockerManifestConfigDescriptor,
@@ -55,6 +62,8 @@ from paasng.utils.moby_distribution.spec.manifest import (
 
 logger = logging.getLogger(__name__)
 
+COPY_BUFFER_SIZE = 1024 * 1024
+
 
 class ImageManifest(BaseModel):
     config: str = Field(default="", alias="Config")
@@ -70,6 +79,29 @@ class LayerRef(BaseModel):
     local_path: Optional[Path] = None
 
 
+def sign_layer(path: Path) -> LayerDigests:
+    """Calculate the digest, size and diff_id of a local layer by reading it only once.
+
+    The compressed bytes are hashed while being decompressed, if the layer is not gzip compressed,
+    the diff_id is the same as the digest.
+    """
+    uncompressed_signer = HashSignWrapper()
+    with path.open(mode="rb") as fh:
+        raw_tarball_signer = HashSignReader(fh)
+        try:
+            with gzip.GzipFile(fileobj=raw_tarball_signer, mode="rb") as uncompressed:  # type: ignore[call-overload]
+                shutil.copyfileobj(uncompressed, uncompressed_signer, COPY_BUFFER_SIZE)
+        except OSError:
+            # Not a gzipped tarball, sign the rest of the file
+            while raw_tarball_signer.read(COPY_BUFFER_SIZE):
+                pass
+            uncompressed_signer = raw_tarball_signer  # type: ignore[assignment]
+
+    return LayerDigests(
+        digest=raw_tarball_signer.digest(), size=raw_tarball_signer.tell(), diff_id=uncompressed_signer.digest()
+    )
+
+
 class ImageRef(RepositoryResource):
     """ImageRef is used to Manipulate Docker images"""
 
@@ -82,8 +114,10 @@ class ImageRef(RepositoryResource):
         client: DockerRegistryV2Client = default_client,
         *,
         timeout: TypeTimeout = client_default_timeout,
+        digest_cache: LayerDigestCache = default_digest_cache,
     ):
         super().__init__(repo, client, timeout=timeout)
+        self.digest_cache = digest_cache
         self.reference = reference
         self.layers = layers
         self._initial_config = initial_config
@@ -136,6 +170,8 @@ class ImageRef(RepositoryResource):
         to_repo: Optional[str] = None,
         to_reference: Optional[str] = None,
         client: DockerRegistryV2Client = default_client,
+        *,
+        digest_cache: LayerDigestCache = default_digest_cache,
     ):
         """Initial a `ImageRef` from a tarball locate in local disk, but will named it as `{to_repo, to_reference}`
 
@@ -166,22 +202,27 @@ class ImageRef(RepositoryResource):
 
             layers = []
             for layer in manifest.Layers:
-                # gzip it for smaller size
+                # gzip it for smaller size, sign both the uncompressed and the gzipped content while compressing
                 gzipped_filepath = workplace / (layer + ".gz")
-                with (workplace / layer).open(mode="rb") as fh, gzip.open(gzipped_filepath, mode="wb") as compressed:
-                    shutil.copyfileobj(fh, compressed)
-
-                # The gzipped file can only be obtained after the compressed object is closed
-                # (because the gzip context information has not yet been written).
-                gzipped_signer = HashSignWrapper()
-                with gzipped_filepath.open(mode="rb") as fh:
-                    shutil.copyfileobj(fh, gzipped_signer)
+                with (workplace / layer).open(mode="rb") as fh, gzipped_filepath.open(mode="wb") as gzipped_fh:
+                    uncompressed_signer = HashSignReader(fh)
+                    gzipped_signer = HashSignWrapper(gzipped_fh)
+                    # The gzipped file can only be obtained after the compressed object is closed
+                    # (because the gzip context information has not yet been written).
+                    with gzip.GzipFile(fileobj=gzipped_signer, mode="wb") as compressed:  # type: ignore[call-overload]
+                        shutil.copyfileobj(uncompressed_signer, compressed, COPY_BUFFER_SIZE)
+                    layer_digests = LayerDigests(
+                        digest=gzipped_signer.digest(),
+                        size=gzipped_signer.tell(),
+                        diff_id=uncompressed_signer.digest(),
+                    )
 
+                digest_cache.set_local(gzipped_filepath, layer_digests)
                 layers.append(
                     LayerRef(
                         repo=to_repo,
-                        digest=gzipped_signer.digest(),
-                        size=gzipped_signer.tell(),
+                        digest=layer_digests.digest,
+                        size=layer_digests.size,
                         local_path=gzipped_filepath,
                     )
                 )
@@ -192,6 +233,7 @@ class ImageRef(RepositoryResource):
                 layers=layers,
                 initial_config=(workplace / manifest.config).read_text(),
                 client=client,
+                digest_cache=digest_cache,
             )
 
     def save(self, dest: str):
@@ -259,71 +301,53 @@ class ImageRef(RepositoryResource):
         Step:
           1. calculate the sha256 sum for the gzipped_tarball, as digest
           2. calculate the sha256 sum for the uncompressed_tarball, as diff_id
+
+        Both sums are calculated in a single pass, and cached in `digest_cache`, so that
+        adding the same layer again won't read it at all.
         """
         if not layer.exists and not layer.local_path:
             raise ValueError("Unknown layer")
 
-        uncompressed_tarball_signer = HashSignWrapper()
         # Add local layer
         if layer.local_path:
-            # Step 1: calculate the sha256 sum for the tarball file
-            raw_tarball_signer = HashSignWrapper()
-            with layer.local_path.open(mode="rb") as gzipped:
-                shutil.copyfileobj(gzipped, raw_tarball_signer)
-                size = raw_tarball_signer.tell()
-
-            # Step 2: calculate the sha256 sum for the uncompressed_tarball
-            # for gzipped tarball, we need decompress first
-            try:
-                with gzip.open(filename=layer.local_path) as uncompressed:
-                    shutil.copyfileobj(uncompressed, uncompressed_tarball_signer)
-            except OSError:
-                uncompressed_tarball_signer = raw_tarball_signer
+            layer_digests = self.digest_cache.get_local(layer.local_path)
+            if layer_digests is None:
+                layer_digests = sign_layer(layer.local_path)
+                self.digest_cache.set_local(layer.local_path, layer_digests)
 
-            if layer.digest and layer.digest != raw_tarball_signer.digest():
+            if layer.digest and layer.digest != layer_digests.digest:
                 raise ValueError(
                     "Wrong digest, layer.digest<'%s'> != signer.digest<'%s'>",
                     layer.digest,
-                    raw_tarball_signer.digest(),
+                    layer_digests.digest,
                 )
 
-            layer.digest = raw_tarball_signer.digest()
+            layer.digest = layer_digests.digest
             layer.repo = self.repo
-            layer.size = size
+            layer.size = layer_digests.size
 
         # Add remote layer if the layer is exists in registry
         else:
-            with generate_temp_dir() as temp_dir:
-                # Step 1: calculate the sha256 sum for the gzipped_tarball
-                with (temp_dir / "blob").open(mode="wb") as fh:
-                    raw_tarball_signer = HashSignWrapper(fh=fh)
-                    Blob(
-                        repo=layer.repo,
-                        digest=layer.digest,
-                        fileobj=raw_tarball_signer,
-                        client=self.client,
-                    ).download()
-                    size = raw_tarball_signer.tell()
-
-                # Step 2: calculate the sha256 sum for the uncompressed_tarball
-                with gzip.open(filename=(temp_dir / "blob")) as uncompressed:
-                    shutil.copyfileobj(uncompressed, uncompressed_tarball_signer)
-
-            if layer.size != size:
+            layer_digests = self.digest_cache.get_remote(layer.digest)
+            if layer_digests is None:
+                layer_digests = self._sign_remote_layer(layer)
+                self.digest_cache.set_remote(layer_digests)
+
+            if layer.size != layer_digests.size:
                 raise ValueError(
                     "Wrong Size, layer.size<'%d'> != signer.size<'%d'>",
                     layer.size,
-                    size,
+                    layer_digests.size,
                 )
-            if layer.digest != raw_tarball_signer.digest():
+            if layer.digest != layer_digests.digest:
                 raise ValueError(
                     "Wrong digest, layer.digest<'%s'> != signer.digest<'%s'>",
                     layer.digest,
-                    raw_tarball_signer.digest(),
+                    layer_digests.digest,
                 )
 
         self._dirty = True
-        self._append_diff_ids.append(uncompressed_tarball_signer.digest())
+        self._append_diff_ids.append(layer_digests.diff_id)
         self._append_historys.append(
             history
             or History(
@@ -336,8 +360,29 @@ class ImageRef(RepositoryResource):
         self.layers.append(layer)
 
         return DockerManifestLayerDescriptor(
-            digest=raw_tarball_signer.digest(),
-            size=size,
+            digest=layer_digests.digest,
+            size=layer_digests.size,
+        )
+
+    def _sign_remote_layer(self, layer: LayerRef) -> LayerDigests:
+        """Download the layer from registry, calculate its digests while downloading"""
+        with generate_temp_dir() as temp_dir:
+            with (temp_dir / "blob").open(mode="wb") as fh:
+                raw_tarball_signer = HashSignWrapper(fh=fh)
+                Blob(
+                    repo=layer.repo,
+                    digest=layer.digest,
+                    fileobj=raw_tarball_signer,
+                    client=self.client,
+                ).download()
+                size = raw_tarball_signer.tell()
+
+            # for gzipped tarball, we need decompress first
+            uncompressed_tarball_signer = HashSignWrapper()
+            with gzip.open(filename=(temp_dir / "blob")) as uncompressed:
+                shutil.copyfileobj(uncompressed, uncompressed_tarball_signer, COPY_BUFFER_SIZE)
+        return LayerDigests(
+            digest=raw_tarball_signer.digest(), size=size, diff_id=uncompressed_tarball_signer.digest()
         )
 
     @property
@@ -380,11 +425,22 @@ class ImageRef(RepositoryResource):
                 client=self.client,
             ).download()
 
+        # The diff_id is known if the layer was added or signed before, skip hashing it again
+        layer_digests = (
+            self.digest_cache.get_local(layer.local_path)
+            if layer.local_path
+            else self.digest_cache.get_remote(layer.digest)
+        )
         with gzip.open(filename=gzip_path) as uncompressed, temp_tarball_path.open(mode="wb") as fh:
-            signer = HashSignWrapper(fh)
-            shutil.copyfileobj(uncompressed, signer)
-
-        tarball_path = f"{signer.digest()}/layer.tar"
+            if layer_digests is not None:
+                shutil.copyfileobj(uncompressed, fh, COPY_BUFFER_SIZE)
+                diff_id = layer_digests.diff_id
+            else:
+                signer = HashSignWrapper(fh)
+                shutil.copyfileobj(uncompressed, signer, COPY_BUFFER_SIZE)
+                diff_id = signer.digest()
+
+        tarball_path = f"{diff_id}/layer.tar"
         (workplace / tarball_path).parent.mkdir(exist_ok=True, parents=True)
 
         if layer.local_path is None:
@@ -406,8 +462,8 @@ class ImageRef(RepositoryResource):
         if layer.exists and layer.repo != self.repo:
             descriptor = Blob(repo=self.repo, digest=layer.digest, client=self.client).mount_from(from_repo=layer.repo)
         elif not layer.exists:
-            blob = Blob(repo=self.repo, local_path=layer.local_path, client=self.client)
-            descriptor = blob.upload()
+            blob = Blob(repo=self.repo, digest=layer.digest or None, local_path=layer.local_path, client=self.client)
+            descriptor = self._stat_blob(blob) or blob.upload()
         else:
             descriptor = Blob(repo=self.repo, client=self.client).stat(layer.digest)
 
@@ -417,6 +473,15 @@ class ImageRef(RepositoryResource):
             urls=descriptor.urls,
         )
 
+    def _stat_blob(self, blob: Blob) -> Optional[Descriptor]:
+        """Stat the blob in the registry, return None if it does not exist(or the digest is unknown)"""
+        if not blob.digest:
+            return None
+        try:
+            return blob.stat()
+        except ResourceNotFound:
+            return None
+
     def _upload_config(self, image_json_str: str) -> DockerManifestConfigDescriptor:
         """Upload the Image JSON to the registry
 
@@ -25,6 +25,24 @@ from rest_framework.status import HTTP_429_TOO_MANY_REQUESTS
 
 from paasng.core.core.storages.redisdb import get_default_redis
 from paasng.utils.rate_limit.constants import UserAction
+from paasng.utils.rate_limit.local import local_deny_cache
+
+# 固定窗口计数，检查及计数在同一个脚本中原子地完成
+#
+# KEYS[1]: 当前窗口的 key
+# ARGV[1]: 时间窗口长度（秒）
+# ARGV[2]: 时间窗口内的次数阈值
+# 返回值：是否允许
+FIXED_WINDOW_SCRIPT = """
+local count = tonumber(redis.call('GET', KEYS[1]) or '0')
+if count >= tonumber(ARGV[2]) then
+    return 0
+end
+if redis.call('INCR', KEYS[1]) == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return 1
+"""
 
 
 class RedisFixedWindowRateLimiter(abc.ABC):
@@ -39,12 +57,13 @@ class RedisFixedWindowRateLimiter(abc.ABC):
         self.redis_db = redis_db
         self.window_size = window_size
         self.threshold = threshold
+        self._script = redis_db.register_script(FIXED_WINDOW_SCRIPT)
 
     def is_allowed(self) -> bool:
         """
         是否允许当前行为（未受速率限制影响）
 
-        固定窗口实现：
+        固定窗口实现，检查及计数在 Redis 中通过脚本原子地完成，仅需一次请求：
         +--------------+      +---------------------+      +------------------+  < threshold   +---------------------+
         | user request | ---> | calc current window | ---> | check used count | -------------> | increase used count |
         +--------------+      +---------------------+      +------------------+                +---------------------+
@@ -53,19 +72,21 @@ class RedisFixedWindowRateLimiter(abc.ABC):
                                                                      v
                                                            +----------------------+
                                                            | [✗] cause rate limit |
+                                                           |   deny locally until |
+                                                           |   the window ends    |
                                                            +----------------------+
         """
-        cur_window = int(time.time() / self.window_size)
+        now = time.time()
+        cur_window = int(now / self.window_size)
         key = self._gen_key(cur_window)
-        count = self.redis_db.get(key)
-        if not count:
-            self.redis_db.set(key, 1, ex=self.window_size)
-            return True
+        if local_deny_cache.is_denied(key):
+            return False
 
-        if int(count) < self.threshold:
-            self.redis_db.incr(key)
+        if self._script(keys=[key], args=[self.window_size, self.threshold]):
             return True
 
+        # 当前窗口结束前，该 key 的请求必定会被拒绝，无需再请求 Redis
+        local_deny_cache.deny(key, (cur_window + 1) * self.window_size - now)
         return False
 
     @abc.abstractmethod
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalDenyCache:
+    """Remember the keys which are denied by the rate limiters in current process, the requests of
+    these keys can be denied locally without contacting redis until the deny expires.
+
+    A key is only cached when the limiter is sure that the requests before the expiry time will be
+    denied, so the local denial never rejects a request which redis would allow.
+
+    :param max_size: The max number of keys to be cached, the least recently denied keys are evicted first.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # {key: deny until(monotonic time)}
+        self._data: "OrderedDict[str, float]" = OrderedDict()
+
+    def is_denied(self, key: str) -> bool:
+        with self._lock:
+            deny_until = self._data.get(key)
+            if deny_until is None:
+                return False
+            if deny_until > time.monotonic():
+                return True
+            del self._data[key]
+            return False
+
+    def deny(self, key: str, seconds: float):
+        """Deny the key for given seconds"""
+        if seconds <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = time.monotonic() + seconds
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self):
+        """Remove the expired keys, then the oldest keys if the cache is still full"""
+        now = time.monotonic()
+        for key in [k for k, deny_until in self._data.items() if deny_until <= now]:
+            del self._data[key]
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+
+local_deny_cache = LocalDenyCache()
@@ -16,16 +16,41 @@
 # to the current version of the project delivered to anyone in the future.
 
 import abc
-import time
 
-import msgpack
 import redis
 
 from paasng.utils.rate_limit.constants import UserAction
+from paasng.utils.rate_limit.local import local_deny_cache
+
+# GCRA（通用信元速率算法）实现的令牌桶，桶的状态仅为一个时间戳：理论到达时间（TAT）
+# 每个请求将 TAT 推后一个发放间隔，当 TAT 超出当前时间一个时间窗口以上时，说明令牌已耗尽
+#
+# KEYS[1]: 令牌桶的 key
+# ARGV[1]: 令牌发放间隔（毫秒），即 window_size / threshold
+# ARGV[2]: 时间窗口长度（毫秒）
+# 返回值：{是否允许, 需要等待的毫秒数}
+GCRA_SCRIPT = """
+redis.replicate_commands()
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+if new_tat - now > window then
+    return {0, math.ceil(new_tat - now - window)}
+end
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+return {1, 0}
+"""
 
 
 class RedisTokenBucketRateLimiter(abc.ABC):
-    """基于 Redis 的令牌桶速率控制器"""
+    """基于 Redis 的令牌桶速率控制器，令牌以 window_size / threshold 的间隔匀速发放，桶的容量为 threshold"""
 
     def __init__(self, redis_db: redis.Redis, window_size: int, threshold: int):
         """
@@ -36,51 +61,45 @@ class RedisTokenBucketRateLimiter(abc.ABC):
         self.redis_db = redis_db
         self.window_size = window_size
         self.threshold = threshold
+        self._script = redis_db.register_script(GCRA_SCRIPT)
 
     def is_allowed(self) -> bool:
         """
         是否允许当前行为（未受速率限制影响）
 
-        令牌桶实现：
+        令牌桶实现（GCRA），判断及更新在 Redis 中通过脚本原子地完成，仅需一次请求：
         +------------------------------------------+
         |               user request               |
         +------------------------------------------+
                            |
-                           |
-                           v
-        +------------------------------------------+    < threshold     +------------------------------+
-        |           check queue length             | -----------------> | [✓] lpush current timestamp  |
-        +------------------------------------------+                    +------------------------------+
-                           |
-                           | >= threshold
                            v
-        +------------------------------------------+   < window_size    +----------------------+
-        |   check timedelta (current and oldest)   | -----------------> | [✗] cause rate limit |
+        +------------------------------------------+    denied before   +----------------------+
+        |        check local deny cache            | -----------------> | [✗] cause rate limit |
         +------------------------------------------+                    +----------------------+
                            |
-                           | >= window_size
+                           v
+        +------------------------------------------+   > window_size    +----------------------+
+        |  calc new TAT = max(TAT, now) + interval | -----------------> | [✗] cause rate limit |
+        |  check timedelta (new TAT and now)       |                    |   deny locally until |
+        +------------------------------------------+                    |   a token is issued  |
+                           |                                            +----------------------+
+                           | <= window_size
                            v
         +------------------------------------------+
-        |   [✓] rpop and lpush current timestamp   |
+        |          [✓] save the new TAT            |
         +------------------------------------------+
         """
-        cur_timestamp = int(time.time())
         key = self._gen_key()
+        if local_deny_cache.is_denied(key):
+            return False
 
-        raw = self.redis_db.get(key)
-        self.records = msgpack.unpackb(raw) if raw else []
-
-        if len(self.records) < self.threshold:
-            self.records.insert(0, cur_timestamp)
-            self.redis_db.set(key, msgpack.packb(self.records), ex=self.window_size)
-            return True
-
-        if cur_timestamp - self.records[-1] >= self.window_size:
-            self.records.insert(0, cur_timestamp)
-            self.records.pop()
-            self.redis_db.set(key, msgpack.packb(self.records), ex=self.window_size)
+        interval = self.window_size * 1000 / self.threshold
+        allowed, wait_ms = self._script(keys=[key], args=[f"{interval:.3f}", self.window_size * 1000])
+        if allowed:
             return True
 
+        # 在下一个令牌发放前，该 key 的请求必定会被拒绝，无需再请求 Redis
+        local_deny_cache.deny(key, wait_ms / 1000)
         return False
 
     @abc.abstractmethod
@@ -39,6 +39,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from paas_wl.infras.cluster.constants import ClusterAllocationPolicyType
 from paas_wl.infras.cluster.entities import AllocationPolicy
 from paas_wl.infras.cluster.models import APIServer, Cluster, ClusterAllocationPolicy
+from paas_wl.infras.cluster.registry import cluster_registry
 from paas_wl.infras.resources.base.base import get_client_by_cluster_name
 from paas_wl.workloads.networking.entrance.addrs import Address, AddressType
 from paasng.accessories.publish.sync_market.handlers import (
@@ -163,8 +164,8 @@ def django_db_setup(django_db_setup, django_db_blocker):
 @pytest.fixture(scope="session")
 def skip_if_old_k8s_version(django_db_setup, django_db_blocker):
     """Skip tests when the configured testing cluster version is lower than 1.20."""
-    with django_db_blocker.unblock(), get_client_by_cluster_name(CLUSTER_NAME_FOR_TESTING) as k8s_client:
-        k8s_version = VersionApi(k8s_client).get_code()
+    with django_db_blocker.unblock():
+        k8s_version = VersionApi(get_client_by_cluster_name(CLUSTER_NAME_FOR_TESTING)).get_code()
 
     if kube_ver_lt(k8s_version, (1, 20)):
         pytest.skip("Skip tests because current k8s version less than 1.20")
@@ -214,6 +215,33 @@ def _skip_iam_migrations():
         yield
 
 
+@pytest.fixture(autouse=True, scope="session")
+def _disable_remote_data_caches():
+    # 测试用例会直接修改 Stub/Mock 中的数据，为避免读取到其他用例的缓存，默认不缓存
+    with override_settings(
+        IAM_ROLE_MEMBERS_CACHE_TTL=0,
+        REMOTE_SERVICE_INSTANCE_CACHE_TTL=0,
+        BKAPP_MANIFEST_CACHE_TTL=0,
+        ENV_VARS_SOURCE_CACHE_TTL=0,
+        METRICS_QUERY_CACHE_TTL=0,
+        TEMPLATE_ARTIFACT_CACHE_DIR="",
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _write_audit_records_synchronously():
+    # 测试中的事务不会提交，需要在 signal 触发时同步写入审计记录
+    with override_settings(ENABLE_ASYNC_AUDIT_RECORDS=False):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _clear_cluster_registry():
+    # 测试用例中的数据会被回滚（不会触发 signal），需要清理进程内的集群快照，避免读取到其他用例的集群
+    cluster_registry.clear()
+
+
 @pytest.fixture(autouse=True)
 def _skip_bk_audit_add_event():
     with override_settings(ENABLE_BK_AUDIT=False):
@@ -397,7 +425,7 @@ def _mock_iam():
         user_roles = fetch_user_roles(application.code, get_username_by_bkpaas_user_id(user.pk))
         return any(role in user_roles and action in get_app_actions_by_role(role) for role in APP_DEFAULT_ROLES)
 
-    from tests.utils.mocks.iam import StubBKIAMClient
+    from tests.utils.mocks.iam import StubBKIAMClient, StubThreadPoolExecutor
     from tests.utils.mocks.permissions import StubApplicationPermission
 
     with (
@@ -406,6 +434,10 @@ def _mock_iam():
             "paasng.infras.iam.helpers.BKIAMClient",
             new=StubBKIAMClient,
         ),
+        mock.patch(
+            "paasng.infras.iam.helpers.ThreadPoolExecutor",
+            new=StubThreadPoolExecutor,
+        ),
         mock.patch(
             "paasng.platform.applications.helpers.BKIAMClient",
             new=StubBKIAMClient,
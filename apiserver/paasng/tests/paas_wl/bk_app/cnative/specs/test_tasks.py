@@ -22,9 +22,13 @@ from unittest.mock import patch
 import arrow
 import pytest
 from blue_krill.async_utils.poll_task import CallbackResult, CallbackStatus, PollingMetadata, PollingStatus
+from django.test.utils import override_settings
 
 from paas_wl.bk_app.cnative.specs.constants import DeployStatus, MResConditionType, MResPhaseType
 from paas_wl.bk_app.cnative.specs.resource import ModelResState
+from paas_wl.bk_app.cnative.specs.watcher import BkAppStore
+from paas_wl.core.resource import generate_bkapp_name
+from paas_wl.infras.cluster.utils import get_cluster_by_app
 from paasng.platform.engine.deploy.bg_wait.wait_bkapp import AbortedDetails, DeployStatusHandler, WaitAppModelReady
 from tests.paas_wl.bk_app.cnative.specs.utils import (
     create_cnative_deploy,
@@ -94,6 +98,52 @@ class TestWaitAppModelReady:
         assert "last_update" in extra_data
 
 
+class TestWaitAppModelReadyWatched:
+    @pytest.fixture()
+    def watched_poller(self, bk_stag_env, dp):
+        with override_settings(ENABLE_BKAPP_STATUS_WATCH=True):
+            metadata = PollingMetadata(retries=0, query_started_at=time.time(), queried_count=1)
+            yield WaitAppModelReady(params={"env_id": bk_stag_env.id, "deploy_id": dp.id}, metadata=metadata)
+
+    @pytest.fixture()
+    def store(self, bk_stag_env):
+        return BkAppStore(get_cluster_by_app(bk_stag_env.wl_app).name)
+
+    @pytest.fixture()
+    def bkapp_key(self, bk_stag_env):
+        return bk_stag_env.wl_app.namespace, generate_bkapp_name(bk_stag_env)
+
+    @pytest.fixture()
+    def ready_res(self, dp):
+        return create_res(
+            with_deploy_id(deploy_id=str(dp.id)),
+            with_conds([create_condition(MResConditionType.APP_AVAILABLE, "True")], MResPhaseType.AppRunning),
+        )
+
+    def test_read_from_store(self, watched_poller, store, bkapp_key, ready_res):
+        store.put(store.start_epoch({}), bkapp_key, ready_res.dict())
+
+        with patch("paasng.platform.engine.deploy.bg_wait.wait_bkapp.get_mres_from_cluster") as mocked_fetch:
+            ret = watched_poller.query()
+
+        assert ret.status == PollingStatus.DONE
+        assert mocked_fetch.call_count == 0
+        # The BkApp is registered, so that the watcher keeps it in store
+        assert store.is_interested(bkapp_key)
+
+    def test_fallback_to_cluster(self, watched_poller, store, bkapp_key, ready_res):
+        store.put("stale-epoch", bkapp_key, None)
+        store.end_epoch()
+
+        with patch(
+            "paasng.platform.engine.deploy.bg_wait.wait_bkapp.get_mres_from_cluster", return_value=ready_res
+        ) as mocked_fetch:
+            ret = watched_poller.query()
+
+        assert ret.status == PollingStatus.DONE
+        assert mocked_fetch.call_count == 1
+
+
 class TestDeployStatusHandler:
     def test_handle_failed(self, dp, poller):
         DeployStatusHandler().handle(result=CallbackResult(status=CallbackStatus.EXCEPTION), poller=poller)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import uuid
+
+import pytest
+
+from paas_wl.bk_app.cnative.specs.watcher import BkAppStore, BkAppWatcher
+from tests.paas_wl.bk_app.cnative.specs.utils import FakeBkAppSource, make_raw_bkapp, wait_until
+
+
+@pytest.fixture()
+def cluster_name():
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture()
+def store(cluster_name):
+    store = BkAppStore(cluster_name)
+    store.add_interest("default", "foo")
+    return store
+
+
+@pytest.fixture()
+def source():
+    return FakeBkAppSource([make_raw_bkapp("foo", "1"), make_raw_bkapp("bar", "1")])
+
+
+@pytest.fixture()
+def watcher(cluster_name, store, source):
+    watcher = BkAppWatcher(cluster_name, source.list, source.watch)
+    watcher.start()
+    assert wait_until(watcher.is_synced)
+    yield watcher
+    watcher.stop()
+
+
+def get_rv(store: BkAppStore, name: str):
+    """Get the resource version of the BkApp in store, "" means it does not exist"""
+    found, obj = store.get("default", name)
+    assert found
+    return obj["metadata"]["resourceVersion"] if obj else ""
+
+
+class TestBkAppWatcher:
+    def test_listed(self, watcher, store):
+        assert get_rv(store, "foo") == "1"
+        # Only the interested BkApps are stored
+        assert store.get("default", "bar") == (False, None)
+
+    def test_modified(self, watcher, store, source):
+        source.events.put({"type": "MODIFIED", "raw_object": make_raw_bkapp("foo", "2")})
+        source.events.put({"type": "MODIFIED", "raw_object": make_raw_bkapp("bar", "2")})
+        assert wait_until(lambda: get_rv(store, "foo") == "2")
+        assert store.get("default", "bar") == (False, None)
+
+    def test_new_interest(self, watcher, store, source):
+        store.add_interest("default", "bar")
+        source.events.put({"type": "MODIFIED", "raw_object": make_raw_bkapp("bar", "2")})
+        assert wait_until(lambda: store.get("default", "bar")[0])
+        assert get_rv(store, "bar") == "2"
+
+    def test_deleted(self, watcher, store, source):
+        source.events.put({"type": "DELETED", "raw_object": make_raw_bkapp("foo", "2")})
+        assert wait_until(lambda: get_rv(store, "foo") == "")
+
+    def test_relist_after_error(self, watcher, store, source):
+        source.items = [make_raw_bkapp("foo", "5")]
+        source.events.put({"type": "ERROR", "raw_object": {"message": "too old resource version"}})
+        assert wait_until(lambda: source.list_count == 2 and watcher.is_synced())
+        assert get_rv(store, "foo") == "5"
+
+    def test_invalid_when_broken(self, cluster_name, store):
+        source = FakeBkAppSource([make_raw_bkapp("foo", "1")])
+        source.list_error = True
+        watcher = BkAppWatcher(cluster_name, source.list, source.watch)
+        # The objects written in previous epochs are not used
+        store.put("stale-epoch", ("default", "foo"), make_raw_bkapp("foo", "1"))
+        watcher.start()
+        try:
+            assert wait_until(lambda: source.list_count >= 1)
+            assert store.get("default", "foo") == (False, None)
+        finally:
+            watcher.stop()
+
+    def test_invalid_after_stopped(self, watcher, store):
+        watcher.stop()
+        assert wait_until(lambda: not store.get("default", "foo")[0])
+
+
+class TestBkAppStore:
+    def test_expired_interests(self, store):
+        store._redis.hset(f"{store._prefix}:interests", "default/bar", 0)
+        assert store.list_interests() == {("default", "foo")}
+        assert not store.is_interested(("default", "bar"))
@@ -15,7 +15,9 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import TYPE_CHECKING, Callable, List, Literal, Optional, Union
+import queue
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Literal, Optional, Tuple, Union
 
 from bkpaas_auth.models import User
 
@@ -125,3 +127,40 @@ def create_res(*applys: Callable[[BkAppResource], None]):
     for apply in applys:
         apply(mres)
     return mres
+
+
+def make_raw_bkapp(name: str, rv: str, namespace: str = "default") -> Dict:
+    return {"metadata": {"name": name, "namespace": namespace, "resourceVersion": rv}, "status": {}}
+
+
+def wait_until(predicate, timeout: float = 3) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class FakeBkAppSource:
+    """A fake upstream of BkApps, the events put into `events` are yielded by the watch streams"""
+
+    def __init__(self, items: List[Dict], resource_version: str = "1"):
+        self.items = items
+        self.resource_version = resource_version
+        self.events: queue.Queue = queue.Queue()
+        self.list_count = 0
+        self.list_error = False
+
+    def list(self) -> Tuple[List[Dict], str]:
+        self.list_count += 1
+        if self.list_error:
+            raise RuntimeError("list failed")
+        return list(self.items), self.resource_version
+
+    def watch(self, resource_version: str, timeout_seconds: int) -> Iterator[Dict]:
+        while True:
+            try:
+                yield self.events.get(timeout=0.05)
+            except queue.Empty:
+                return
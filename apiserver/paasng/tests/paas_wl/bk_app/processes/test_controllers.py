@@ -18,10 +18,11 @@
 import pytest
 
 from paas_wl.bk_app.applications.models import WlApp
-from paas_wl.bk_app.processes.controllers import list_processes
+from paas_wl.bk_app.processes.controllers import list_processes, make_processes_info
 from paas_wl.bk_app.processes.entities import Runtime
 from paas_wl.bk_app.processes.kres_entities import Instance, Process, Schedule
 from paas_wl.infras.resources.generation.version import AppResVerManager
+from tests.paas_wl.utils.wl_app import create_wl_app
 
 pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
 
@@ -93,3 +94,23 @@ def test_list_processes_without_release(bk_stag_env, wl_app, wl_release, mock_re
     mock_reader.set_instances([Instance(app=wl_app, name="web", process_type="web")])
     wl_release.delete()
     assert len(list_processes(bk_stag_env).processes) == 1
+
+
+def test_make_processes_info_join_by_app(bk_stag_env, wl_app):
+    other_app = create_wl_app()
+    procs = [make_process(wl_app, "web"), make_process(other_app, "web"), make_process(wl_app, "worker")]
+    insts = [
+        Instance(app=other_app, name="web-2", process_type="web"),
+        Instance(app=wl_app, name="web-1", process_type="web"),
+        Instance(app=wl_app, name="web-3", process_type="web"),
+        # The instance of unknown process is ignored
+        Instance(app=wl_app, name="beat-1", process_type="beat"),
+    ]
+
+    info = make_processes_info(procs, insts, rv_proc="1", rv_inst="1", ignore_idle=True)
+    assert [(p.app, p.type, [i.name for i in p.instances]) for p in info.processes] == [
+        (wl_app, "web", ["web-1", "web-3"]),
+        (other_app, "web", ["web-2"]),
+    ]
+    # The given process objects are not modified
+    assert all(not p.instances for p in procs)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import queue
+import threading
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+import pytest
+
+from paas_wl.bk_app.processes.informer import InformerSource, ResourceStore, SharedInformer
+from paas_wl.infras.resources.kube_res.base import WatchEvent
+
+pytestmark = pytest.mark.django_db
+
+
+@dataclass
+class FakeObj:
+    name: str
+    rv: str
+    app: SimpleNamespace = field(default_factory=lambda: SimpleNamespace(name="foo-app"))
+
+    def get_resource_version(self) -> Optional[str]:
+        return self.rv
+
+
+def make_obj(name: str, rv: str) -> Any:
+    """Make a fake object which stands in for a KresAppEntity"""
+    return FakeObj(name, rv)
+
+
+def attrs_of(events: Optional[List[WatchEvent]], attr: str) -> List[str]:
+    """Get the attribute of the objects in given events"""
+    assert events is not None
+    return [getattr(e.res_object, attr) for e in events]
+
+
+def make_list(items, rv: str):
+    return SimpleNamespace(items=items, get_resource_version=lambda: rv)
+
+
+class TestResourceStore:
+    def test_apply(self):
+        store = ResourceStore()
+        store.replace([make_obj("a", "1")], 10)
+        assert store.apply(WatchEvent(type="ADDED", res_object=make_obj("b", "11")))
+        assert store.apply(WatchEvent(type="DELETED", res_object=make_obj("a", "12")))
+        # Stale events are ignored
+        assert not store.apply(WatchEvent(type="MODIFIED", res_object=make_obj("b", "11")))
+
+        assert [obj.name for obj in store.list()] == ["b"]
+        assert [obj.name for obj in store.list_by_app("foo-app")] == ["b"]
+        assert store.resource_version == 12
+
+    def test_events_since(self):
+        store = ResourceStore(history_size=2)
+        store.replace([], 10)
+        for rv in ["11", "12", "13"]:
+            store.apply(WatchEvent(type="ADDED", res_object=make_obj(f"obj-{rv}", rv)))
+
+        assert store.events_since(None) == []
+        assert attrs_of(store.events_since(12), "rv") == ["13"]
+        # The event with rv 11 was evicted, but events after it are still kept
+        assert attrs_of(store.events_since(11), "rv") == ["12", "13"]
+        assert store.events_since(10) is None
+
+    def test_events_since_before_list(self):
+        store = ResourceStore()
+        store.replace([], 10)
+        store.apply(WatchEvent(type="ADDED", res_object=make_obj("obj-11", "11")))
+        # Listed before the store did, the changes between 5 and 10 are unknown
+        assert store.events_since(5) is None
+        assert attrs_of(store.events_since(10), "rv") == ["11"]
+
+    def test_replace_diff(self):
+        store = ResourceStore()
+        assert store.replace([make_obj("a", "1"), make_obj("b", "2")], 10) == []
+
+        events = store.replace([make_obj("a", "1"), make_obj("b", "3"), make_obj("c", "4")], 20)
+        assert sorted(zip([e.type for e in events], attrs_of(events, "name"), strict=True)) == [
+            ("ADDED", "c"),
+            ("MODIFIED", "b"),
+        ]
+
+
+class TestSharedInformer:
+    @pytest.fixture()
+    def upstream(self):
+        """A fake upstream, events put into the queue will be yielded by the watch function"""
+        events: queue.Queue = queue.Queue()
+        calls = {"list": 0, "watch": 0}
+
+        def list_func():
+            calls["list"] += 1
+            return make_list([make_obj("a", "1")], "10")
+
+        def watch_func(rv, timeout):
+            calls["watch"] += 1
+            while True:
+                try:
+                    yield events.get(timeout=0.1)
+                except queue.Empty:
+                    return
+
+        return SimpleNamespace(events=events, calls=calls, source=InformerSource("process", list_func, watch_func))
+
+    def test_fan_out(self, upstream):
+        informer = SharedInformer("test", [upstream.source], idle_timeout=1)
+        informer.start()
+        assert informer.wait_for_synced(5)
+
+        results: dict = {}
+
+        def consume(idx):
+            results[idx] = attrs_of(list(informer.watch(1, {"process": "10"})), "name")
+
+        threads = [threading.Thread(target=consume, args=(i,)) for i in range(5)]
+        for t in threads:
+            t.start()
+        upstream.events.put(WatchEvent(type="ADDED", res_object=make_obj("b", "11")))
+        for t in threads:
+            t.join()
+        informer.stop()
+
+        assert all(names == ["b"] for names in results.values())
+        assert upstream.calls["list"] == 1
+
+    def test_resource_version_before_list(self, upstream):
+        informer = SharedInformer("test", [upstream.source], idle_timeout=1)
+        informer.start()
+
+        # The resource version is older than the informer's list, the subscriber must list again
+        events = list(informer.watch(1, {"process": 5}))
+        informer.stop()
+        assert [e.type for e in events] == ["ERROR"]
+
+    def test_expired_resource_version(self, upstream):
+        informer = SharedInformer("test", [upstream.source], idle_timeout=1)
+        informer.stores["process"] = ResourceStore(history_size=1)
+        informer.start()
+        assert informer.wait_for_synced(5)
+        for rv in ["11", "12"]:
+            upstream.events.put(WatchEvent(type="ADDED", res_object=make_obj(f"obj-{rv}", rv)))
+        # Wait until the events were applied
+        for _ in range(50):
+            if informer.stores["process"].resource_version == 12:
+                break
+            threading.Event().wait(0.1)
+
+        events = list(informer.watch(1, {"process": "10"}))
+        informer.stop()
+        assert [e.type for e in events] == ["ERROR"]
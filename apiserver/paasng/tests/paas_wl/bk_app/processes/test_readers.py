@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from kubernetes.dynamic import ResourceInstance
+
+from paas_wl.bk_app.cnative.specs.constants import (
+    BKAPP_CODE_ANNO_KEY,
+    ENVIRONMENT_ANNO_KEY,
+    MODULE_NAME_ANNO_KEY,
+    WLAPP_NAME_ANNO_KEY,
+)
+from paas_wl.bk_app.processes.readers import (
+    WlAppResolver,
+    ns_instance_kmodel,
+    retrieve_associated_wl_app,
+    wl_app_resolver_scope,
+)
+from paas_wl.infras.resources.base.exceptions import NotAppScopedResource
+from tests.paas_wl.utils.wl_app import create_wl_app
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+
+def _count_queries(func, *args):
+    with (
+        CaptureQueriesContext(connections["default"]) as default_ctx,
+        CaptureQueriesContext(connections["workloads"]) as wl_ctx,
+    ):
+        ret = func(*args)
+    return ret, len(default_ctx.captured_queries) + len(wl_ctx.captured_queries)
+
+
+class TestWlAppResolver:
+    @pytest.fixture()
+    def env_labels(self, bk_app, bk_module):
+        return {BKAPP_CODE_ANNO_KEY: bk_app.code, MODULE_NAME_ANNO_KEY: bk_module.name, ENVIRONMENT_ANNO_KEY: "stag"}
+
+    def test_resolve_many_by_names(self):
+        apps = [create_wl_app() for _ in range(5)]
+        labels_list = [{WLAPP_NAME_ANNO_KEY: app.name} for app in apps * 20]
+
+        ret, num_queries = _count_queries(WlAppResolver().resolve_many, labels_list)
+        assert ret == apps * 20
+        assert num_queries == 1
+
+    def test_resolve_many_by_env(self, bk_stag_wl_app, env_labels):
+        ret, num_queries = _count_queries(WlAppResolver().resolve_many, [env_labels] * 10)
+        assert ret == [bk_stag_wl_app] * 10
+        assert num_queries == 2
+
+    def test_resolve_many_mixed(self, bk_stag_wl_app, env_labels):
+        app = create_wl_app()
+        labels_list = [
+            {WLAPP_NAME_ANNO_KEY: app.name},
+            env_labels,
+            {},
+            {WLAPP_NAME_ANNO_KEY: "not-exists"},
+            # The wl app name takes precedence over the env labels
+            {WLAPP_NAME_ANNO_KEY: "not-exists", **env_labels},
+            {**env_labels, ENVIRONMENT_ANNO_KEY: "prod-not-exists"},
+        ]
+        ret, num_queries = _count_queries(WlAppResolver().resolve_many, labels_list)
+        assert ret == [app, bk_stag_wl_app, None, None, None, None]
+        assert num_queries <= 3
+
+    def test_identity_map(self, bk_stag_wl_app, env_labels):
+        resolver = WlAppResolver()
+        by_name = resolver.resolve({WLAPP_NAME_ANNO_KEY: bk_stag_wl_app.name})
+        by_env = resolver.resolve(env_labels)
+        assert by_name is by_env
+
+        _, num_queries = _count_queries(resolver.resolve_many, [env_labels, {WLAPP_NAME_ANNO_KEY: by_name.name}])
+        assert num_queries == 0
+
+    def test_resolve_not_found(self):
+        with pytest.raises(NotAppScopedResource):
+            WlAppResolver().resolve({WLAPP_NAME_ANNO_KEY: "not-exists"})
+
+
+class TestWlAppResolverScope:
+    def test_shared_in_scope(self, bk_stag_wl_app):
+        labels = {WLAPP_NAME_ANNO_KEY: bk_stag_wl_app.name}
+        with wl_app_resolver_scope() as resolver:
+            wl_app = retrieve_associated_wl_app(labels)
+            assert resolver.resolve(labels) is wl_app
+
+            # The nested scope reuses the outer resolver
+            with wl_app_resolver_scope() as inner_resolver:
+                assert inner_resolver is resolver
+                _, num_queries = _count_queries(retrieve_associated_wl_app, labels)
+                assert num_queries == 0
+
+        _, num_queries = _count_queries(retrieve_associated_wl_app, labels)
+        assert num_queries == 1
+
+
+def test_retrieve_associated_kres_apps(bk_stag_wl_app):
+    kube_data_list = [
+        ResourceInstance(
+            None, {"metadata": {"name": f"pod-{i}", "labels": {WLAPP_NAME_ANNO_KEY: bk_stag_wl_app.name}}}
+        )
+        for i in range(200)
+    ]
+    kube_data_list.append(ResourceInstance(None, {"metadata": {"name": "foo"}}))
+
+    ret, num_queries = _count_queries(ns_instance_kmodel.retrieve_associated_kres_apps, kube_data_list)
+    assert ret == [bk_stag_wl_app] * 200 + [None]
+    assert num_queries == 1
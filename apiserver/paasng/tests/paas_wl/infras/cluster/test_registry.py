@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from unittest import mock
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from django_dynamic_fixture import G
+
+from paas_wl.infras.cluster.models import APIServer, Cluster, ClusterAppImageRegistry
+from paas_wl.infras.cluster.registry import ClusterRegistry, cluster_registry
+from paasng.core.core.storages.redisdb import get_default_redis
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+
+class TestClusterRegistry:
+    @pytest.fixture
+    def registry(self):
+        return cluster_registry
+
+    @pytest.fixture
+    def cluster(self):
+        cluster = G(Cluster, name="registry-foo")
+        G(APIServer, cluster=cluster, host="https://foo-b:6553")
+        G(APIServer, cluster=cluster, host="https://foo-a:6553")
+        return cluster
+
+    def test_get(self, registry, cluster):
+        assert registry.get("registry-foo").pk == cluster.pk
+        assert registry.find("registry-invalid") is None
+        with pytest.raises(Cluster.DoesNotExist):
+            registry.get("registry-invalid")
+
+    def test_lookup_without_queries(self, registry, cluster):
+        registry.get_snapshot()
+
+        with CaptureQueriesContext(connections["workloads"]) as ctx:
+            for _ in range(10):
+                c = registry.get("registry-foo")
+                assert [s.host for s in c.api_servers.all()] == ["https://foo-b:6553", "https://foo-a:6553"]
+                assert registry.get_snapshot().get_app_image_registry("registry-foo") is None
+        assert len(ctx.captured_queries) == 0
+
+    def test_refresh_on_change(self, registry, cluster):
+        snapshot = registry.get_snapshot()
+        assert registry.get_snapshot() is snapshot
+
+        cluster.description = "updated"
+        cluster.save()
+        assert registry.get_snapshot() is not snapshot
+        assert registry.get("registry-foo").description == "updated"
+
+        G(ClusterAppImageRegistry, cluster=cluster, host="registry.example.com")
+        assert registry.get_snapshot().get_app_image_registry("registry-foo").host == "registry.example.com"
+
+        cluster.delete()
+        assert registry.find("registry-foo") is None
+
+    def test_refresh_on_version_changed(self, registry, cluster):
+        snapshot = registry.get_snapshot()
+        # Simulate a change made by other processes
+        get_default_redis().incr(ClusterRegistry._version_key)
+
+        with override_settings(CLUSTER_REGISTRY_VERSION_CHECK_INTERVAL=60):
+            assert registry.get_snapshot() is snapshot
+        with override_settings(CLUSTER_REGISTRY_VERSION_CHECK_INTERVAL=0):
+            assert registry.get_snapshot() is not snapshot
+
+    def test_redis_unavailable(self, registry, cluster):
+        snapshot = registry.get_snapshot()
+
+        broken_redis = mock.MagicMock()
+        broken_redis.get.side_effect = ConnectionError
+        broken_redis.incr.side_effect = ConnectionError
+        with (
+            mock.patch("paas_wl.infras.cluster.registry.get_default_redis", return_value=broken_redis),
+            override_settings(CLUSTER_REGISTRY_VERSION_CHECK_INTERVAL=0),
+        ):
+            # Serve the snapshot in current process
+            assert registry.get_snapshot() is snapshot
+
+            # Load from database after the changes in current process
+            cluster.description = "updated"
+            cluster.save()
+            assert registry.get("registry-foo").description == "updated"
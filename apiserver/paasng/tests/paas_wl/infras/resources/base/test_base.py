@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import gc
+import weakref
+from unittest import mock
+
+import pytest
+
+from paas_wl.infras.resources.base.base import EnhancedApiClient, _ClientRegistry
+from paas_wl.infras.resources.base.kube_client import DynamicClientCache
+
+
+class TestClientRegistry:
+    @pytest.fixture()
+    def ep_pool(self):
+        return mock.MagicMock()
+
+    def test_reuse(self, ep_pool):
+        registry = _ClientRegistry()
+        client = registry.get("v1", "foo", ep_pool)
+        assert isinstance(client, EnhancedApiClient)
+        assert registry.get("v1", "foo", ep_pool) is client
+        assert registry.get("v1", "bar", ep_pool) is not client
+
+    def test_version_changed(self, ep_pool):
+        registry = _ClientRegistry()
+        client = registry.get("v1", "foo", ep_pool)
+        assert registry.get("v2", "foo", ep_pool) is not client
+
+    def test_clear(self, ep_pool):
+        registry = _ClientRegistry()
+        client = registry.get("v1", "foo", ep_pool)
+        registry.clear()
+        assert registry.get("v1", "foo", ep_pool) is not client
+
+
+class FakeApiClient:
+    def __init__(self):
+        self.configuration = mock.MagicMock(host="https://127.0.0.1:6443")
+
+
+class FakeDynamicClient:
+    def __init__(self, client):
+        self.client = client
+
+
+class TestDynamicClientCache:
+    @pytest.fixture()
+    def mocked_dynamic_client(self):
+        with mock.patch(
+            "paas_wl.infras.resources.base.kube_client.CoreDynamicClient", side_effect=FakeDynamicClient
+        ) as m:
+            yield m
+
+    def test_reuse(self, settings, mocked_dynamic_client):
+        settings.K8S_DISCOVERY_CACHE_TTL = 60
+        cache = DynamicClientCache()
+        client = FakeApiClient()
+        assert cache.get(client) is cache.get(client)
+        assert mocked_dynamic_client.call_count == 1
+        assert cache.get(FakeApiClient()) is not cache.get(client)
+
+    def test_expired(self, settings, mocked_dynamic_client):
+        settings.K8S_DISCOVERY_CACHE_TTL = 0
+        cache = DynamicClientCache()
+        client = FakeApiClient()
+        assert cache.get(client) is not cache.get(client)
+        assert mocked_dynamic_client.call_count == 2
+
+    def test_released_with_client(self, settings, mocked_dynamic_client):
+        settings.K8S_DISCOVERY_CACHE_TTL = 60
+        cache = DynamicClientCache()
+        client = FakeApiClient()
+        client_ref = weakref.ref(client)
+        dynamic_client_ref = weakref.ref(cache.get(client))
+        # The mock keeps the call args, which reference the client
+        mocked_dynamic_client.reset_mock()
+
+        del client
+        gc.collect()
+        assert client_ref() is None
+        assert dynamic_client_ref() is None
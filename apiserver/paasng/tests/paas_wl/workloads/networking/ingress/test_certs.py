@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import logging
+import time
+from typing import List, Optional
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from paas_wl.workloads.networking.ingress.certs import SharedCertIndex, pick_shared_cert, shared_cert_indexes
+from paas_wl.workloads.networking.ingress.models import AppDomainSharedCert
+
+logger = logging.getLogger(__name__)
+
+
+def match_one_by_one(certs: List[AppDomainSharedCert], host: str) -> Optional[AppDomainSharedCert]:
+    for cert in certs:
+        if cert.match_hostname(host):
+            return cert
+    return None
+
+
+class TestSharedCertIndex:
+    @pytest.fixture()
+    def certs(self) -> List[AppDomainSharedCert]:
+        return [
+            AppDomainSharedCert(name="c0", auto_match_cns="*.foo.com;bar.com"),
+            AppDomainSharedCert(name="c1", auto_match_cns="bar.com;*.bar.com"),
+            AppDomainSharedCert(name="c2", auto_match_cns="*.a.foo.com;api-*.baz.com;"),
+            AppDomainSharedCert(name="c3", auto_match_cns="*.baz.com"),
+        ]
+
+    @pytest.mark.parametrize(
+        ("host", "expected_name"),
+        [
+            ("bar.com", "c0"),
+            ("x.foo.com", "c0"),
+            ("x-y.foo.com", "c0"),
+            ("foo.com", None),
+            ("foobar.com", None),
+            ("x.y.foo.com", None),
+            ("x_y.foo.com", None),
+            ("x.bar.com", "c1"),
+            ("x.a.foo.com", "c2"),
+            ("api-v1.baz.com", "c2"),
+            ("web.baz.com", "c3"),
+        ],
+    )
+    def test_match(self, certs, host, expected_name):
+        cert = SharedCertIndex(certs).match(host)
+        assert (cert.name if cert else None) == expected_name
+        assert cert is match_one_by_one(certs, host)
+
+    def test_benchmark(self):
+        """Match 10k domains with 1k certs"""
+        certs = [
+            AppDomainSharedCert(name=f"c{i}", auto_match_cns=f"*.app{i}.example.com;app{i}.example.com")
+            for i in range(1000)
+        ]
+        hosts = [f"svc{i}.app{i % 1500}.example.com" for i in range(10000)]
+
+        started_at = time.perf_counter()
+        index = SharedCertIndex(certs)
+        results = [index.match(host) for host in hosts]
+        index_cost = time.perf_counter() - started_at
+
+        # Matching one by one is too slow for all domains, only a sample of 1% is checked
+        sample = hosts[::100]
+        started_at = time.perf_counter()
+        expected = [match_one_by_one(certs, host) for host in sample]
+        one_by_one_cost = time.perf_counter() - started_at
+
+        logger.info("Matching 10k domains, index: %.3fs, one by one(1%% sampled): %.3fs", index_cost, one_by_one_cost)
+        assert results[::100] == expected
+        assert sum(r is not None for r in results) == 7000
+        assert index_cost < one_by_one_cost
+
+
+@pytest.mark.django_db(databases=["workloads"])
+class TestPickSharedCert:
+    def test_rebuilt_after_changed(self):
+        tenant_id = "test-tenant"
+        assert pick_shared_cert(tenant_id, "x.foo.com") is None
+
+        cert = AppDomainSharedCert.objects.create(tenant_id=tenant_id, name="foo", auto_match_cns="*.foo.com")
+        assert pick_shared_cert(tenant_id, "x.foo.com") == cert
+
+        cert.auto_match_cns = "*.bar.com"
+        cert.save()
+        assert pick_shared_cert(tenant_id, "x.foo.com") is None
+        assert pick_shared_cert(tenant_id, "x.bar.com") == cert
+
+        cert.delete()
+        assert pick_shared_cert(tenant_id, "x.bar.com") is None
+
+    def test_batch(self):
+        tenant_id = "test-tenant"
+        cert = AppDomainSharedCert.objects.create(tenant_id=tenant_id, name="foo", auto_match_cns="*.foo.com")
+        with shared_cert_indexes.batch(), CaptureQueriesContext(connections["workloads"]) as ctx:
+            for i in range(100):
+                assert pick_shared_cert(tenant_id, f"x{i}.foo.com") == cert
+        # Only the version check and the loading of certs
+        assert len(ctx.captured_queries) <= 2
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import time
+from unittest import mock
+
+import pytest
+
+from paasng.accessories.log.client import ESLogClient, ESMetadataCache, es_metadata_cache
+from paasng.accessories.log.models import ElasticSearchHost
+from paasng.utils.es_log.time_range import SmartTimeRange
+
+
+class TestESMetadataCache:
+    def test_fresh(self):
+        cache = ESMetadataCache()
+        fetch = mock.Mock(return_value=["foo"])
+        assert cache.get("key", fetch, ttl=60) == ["foo"]
+        assert cache.get("key", fetch, ttl=60) == ["foo"]
+        assert fetch.call_count == 1
+
+    def test_disabled(self):
+        cache = ESMetadataCache()
+        fetch = mock.Mock(return_value=["foo"])
+        cache.get("key", fetch, ttl=0)
+        cache.get("key", fetch, ttl=0)
+        assert fetch.call_count == 2
+
+    def test_refresh_in_background(self):
+        cache = ESMetadataCache()
+        cache.get("key", lambda: "old", ttl=0.2)
+        time.sleep(0.3)
+
+        # The expired value is served while being refreshed
+        assert cache.get("key", lambda: "new", ttl=0.2) == "old"
+        time.sleep(0.1)
+        assert cache.get("key", lambda: "newer", ttl=0.2) == "new"
+
+    def test_too_old(self):
+        cache = ESMetadataCache()
+        cache.get("key", lambda: "old", ttl=0.1)
+        time.sleep(0.25)
+        assert cache.get("key", lambda: "new", ttl=0.1) == "new"
+
+    def test_max_size(self):
+        cache = ESMetadataCache(max_size=2)
+        for key in ["a", "b", "c"]:
+            cache.get(key, lambda: "value", ttl=60)
+
+        fetch = mock.Mock(return_value="value")
+        cache.get("a", fetch, ttl=60)
+        cache.get("c", fetch, ttl=60)
+        assert fetch.call_count == 1
+
+
+class TestESLogClient:
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self):
+        es_metadata_cache.clear()
+        yield
+        es_metadata_cache.clear()
+
+    @pytest.fixture()
+    def log_client(self):
+        client = ESLogClient(ElasticSearchHost(host="localhost", port=9200))
+        with mock.patch.object(client, "_client") as mocked_client:
+            mocked_client.indices.stats.return_value = {"indices": {"app_log-2024.01.01": {}}}
+            mocked_client.indices.get_mapping.return_value = {
+                "app_log-2024.01.01": {"mappings": {"properties": {"message": {"type": "text"}}}}
+            }
+            yield client
+
+    def test_metadata_cached(self, settings, log_client):
+        settings.ES_LOG_METADATA_CACHE_TTL = 60
+        time_range = SmartTimeRange(time_range="1h")
+        for _ in range(3):
+            assert log_client.get_mappings("app_log-*", time_range, timeout=30) == {"message": {"type": "text"}}
+
+        assert log_client._client.indices.stats.call_count == 1
+        assert log_client._client.indices.get_mapping.call_count == 1
+
+    def test_cache_key_without_credentials(self):
+        client = ESLogClient(ElasticSearchHost(host="localhost", port=9200, http_auth="admin:secret"))
+        assert "secret" not in str(client._cache_key_prefix)
+
+    @pytest.mark.parametrize(
+        ("skip_exact_count", "expected_total", "count_calls"), [(True, 10000, 0), (False, 12345, 1)]
+    )
+    def test_skip_exact_count(self, log_client, skip_exact_count, expected_total, count_calls):
+        log_client.skip_exact_count = skip_exact_count
+        log_client._client.search.return_value = {"hits": {"total": {"value": 10000, "relation": "gte"}, "hits": []}}
+        log_client._client.count.return_value = {"count": 12345}
+
+        search = mock.MagicMock(time_range=SmartTimeRange(time_range="1h"))
+        search.to_dict.return_value = {}
+        _, total = log_client.execute_search("app_log-*", search, timeout=30)
+
+        assert total == expected_total
+        assert log_client._client.count.call_count == count_calls
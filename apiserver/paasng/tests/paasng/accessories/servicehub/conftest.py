@@ -40,7 +40,7 @@ def _faked_remote_services():
         "jwt_auth_conf": {"iss": "foo", "key": "s1"},
     }
     meta_info = {"version": None}
-    with mock.patch("requests.get") as mocked_get:
+    with mock.patch("requests.Session.get") as mocked_get:
         # Mock requests response
         mocked_get.return_value = mock_json_response(data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON)
 
@@ -33,19 +33,19 @@ class TestClient:
     def client(self, config):
         return RemoteServiceClient(config=config)
 
-    @mock.patch("requests.get")
+    @mock.patch("requests.Session.get")
     def test_list_services_error(self, mocked_get, client):
         mocked_get.side_effect = RequestException("faked requests exception")
         with pytest.raises(RemoteClientError):
             client.list_services()
 
-    @mock.patch("requests.get")
+    @mock.patch("requests.Session.get")
     def test_list_services_status_code_error(self, mocked_get, client):
         mocked_get.return_value = mock_json_response({}, status_code=400)
         with pytest.raises(RClientResponseError):
             client.list_services()
 
-    @mock.patch("requests.get")
+    @mock.patch("requests.Session.get")
     def test_list_services_normal(self, mocked_get, client):
         mocked_get.return_value = mock_json_response(data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON)
 
@@ -55,7 +55,7 @@ class TestClient:
         auth_inst = mocked_get.call_args[1]["auth"]
         assert isinstance(auth_inst, ClientJWTAuth)
 
-    @mock.patch("requests.get")
+    @mock.patch("requests.Session.get")
     def test_retrieve_instance_normal(self, mocked_get, client):
         mocked_get.return_value = mock_json_response(data_mocks.REMOTE_INSTANCE_JSON)
 
@@ -66,7 +66,7 @@ class TestClient:
         auth_inst = mocked_get.call_args[1]["auth"]
         assert isinstance(auth_inst, ClientJWTAuth)
 
-    @mock.patch("requests.get")
+    @mock.patch("requests.Session.get")
     def test_retrieve_instance_to_be_deleted_normal(self, mocked_get, client):
         mocked_get.return_value = mock_json_response(data_mocks.REMOTE_INSTANCE_JSON)
 
@@ -77,7 +77,7 @@ class TestClient:
         auth_inst = mocked_get.call_args[1]["auth"]
         assert isinstance(auth_inst, ClientJWTAuth)
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_provision_instance_normal(self, mocked_post, client):
         mocked_post.return_value = mock_json_response(data_mocks.REMOTE_INSTANCE_JSON)
 
@@ -90,7 +90,7 @@ class TestClient:
         auth_inst = mocked_post.call_args[1]["auth"]
         assert isinstance(auth_inst, ClientJWTAuth)
 
-    @mock.patch("requests.get")
+    @mock.patch("requests.Session.get")
     def test_retrieve_instance_has_created_field(self, mocked_get, client):
         mocked_get.return_value = mock_json_response(data_mocks.REMOTE_INSTANCE_JSON)
 
@@ -34,7 +34,7 @@ class TestInitialize:
         with pytest.raises(ImproperlyConfigured):
             initialize_remote_services(store)
 
-    @mock.patch("requests.get")
+    @mock.patch("requests.Session.get")
     def test_normal(self, mocked_get, config):
         mocked_get.return_value = mock_json_response(data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON)
         mocked_store = mock.MagicMock()
@@ -193,7 +193,7 @@ class TestRemoteMgrWithRealStore:
     @pytest.fixture(autouse=True)
     def _setup_data(self, config, store, bk_service, bk_plan_1, bk_plan_2):
         meta_info = {"version": None}
-        with mock.patch("requests.get") as mocked_get:
+        with mock.patch("requests.Session.get") as mocked_get:
             # Mock requests response
             bk_service.plans = [bk_plan_1, bk_plan_2]
             mocked_get.return_value = mock_json_response(
@@ -294,6 +294,35 @@ class TestRemoteMgr:
 
                 assert mixed_service_mgr.get_env_vars(env.engine_app) != {}
 
+    @mock.patch("paasng.accessories.servicehub.remote.manager.get_cluster_egress_info")
+    @mock.patch("paasng.accessories.servicehub.remote.client.RemoteServiceClient.update_instance_config")
+    @mock.patch("paasng.accessories.servicehub.remote.client.RemoteServiceClient.retrieve_instance")
+    @mock.patch("paasng.accessories.servicehub.remote.client.RemoteServiceClient.provision_instance")
+    def test_get_instance_cached(
+        self, mocked_provision, mocked_retrieve, mocked_update, get_cluster_egress_info, settings, store, bk_module
+    ):
+        settings.REMOTE_SERVICE_INSTANCE_CACHE_TTL = 60
+        get_cluster_egress_info.return_value = {"egress_ips": ["1.1.1.1"], "digest_version": "foo"}
+        mgr = RemoteServiceMgr(store=store)
+        mgr.bind_service(mgr.get(id_of_first_service), bk_module)
+        env = bk_module.get_envs("stag")
+        for rel in mgr.list_unprovisioned_rels(env.engine_app):
+            rel.provision()
+
+        rel = next(iter(mgr.list_provisioned_rels(env.engine_app)))
+        data = data_mocks.REMOTE_INSTANCE_JSON.copy()
+        data["uuid"] = str(rel.db_obj.service_instance_id)
+        mocked_retrieve.return_value = data
+
+        for _ in range(3):
+            assert mixed_service_mgr.get_env_vars(env.engine_app)["CEPH_BUCKET"] == "pig-bucket-2"
+        assert mocked_retrieve.call_count == 1
+
+        # The cache is invalidated after the instance config was updated
+        rel.sync_instance_config()
+        assert mixed_service_mgr.get_env_vars(env.engine_app) != {}
+        assert mocked_retrieve.call_count == 2
+
     @mock.patch("paasng.accessories.servicehub.remote.manager.get_cluster_egress_info")
     @mock.patch("paasng.accessories.servicehub.remote.client.RemoteServiceClient.retrieve_instance")
     @mock.patch("paasng.accessories.servicehub.remote.client.RemoteServiceClient.provision_instance")
@@ -35,7 +35,7 @@ class TestRemoteStore:
     @pytest.fixture(autouse=True)
     def _setup_data(self, config, raw_store):
         meta_info = {"version": None}
-        with mock.patch("requests.get") as mocked_get:
+        with mock.patch("requests.Session.get") as mocked_get:
             # Mock requests response
             mocked_get.return_value = mock_json_response(data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON)
             fetcher = collector.RemoteSvcFetcher(config)
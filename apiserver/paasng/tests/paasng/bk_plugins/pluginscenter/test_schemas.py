@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from paasng.bk_plugins.pluginscenter.schemas import (
+    get_basic_info_schema,
+    get_config_schema,
+    get_plugins_schema,
+    plugin_schema_cache,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _invalidate_schemas():
+    # 测试用例中的数据会被回滚（不会触发 signal），需要令其他用例缓存的范式失效
+    plugin_schema_cache.invalidate()
+
+
+class TestPluginSchemaCache:
+    def test_cached(self, pd):
+        schema = get_basic_info_schema(pd.identifier)
+        assert schema.data["extra_fields_order"] == []
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert get_basic_info_schema(pd.identifier) == schema
+            # Cached in redis, shared by other processes
+            plugin_schema_cache.clear()
+            assert get_basic_info_schema(pd.identifier) == schema
+        assert len(ctx.captured_queries) == 0
+
+    def test_invalidated_on_definition_change(self, pd):
+        schema = get_basic_info_schema(pd.identifier)
+        plugins_schema = get_plugins_schema()
+
+        pd.basic_info_definition.extra_fields_order = ["email", "distributor_codes"]
+        pd.basic_info_definition.save()
+
+        new_schema = get_basic_info_schema(pd.identifier)
+        assert new_schema.data["extra_fields_order"] == ["email", "distributor_codes"]
+        assert new_schema.etag != schema.etag
+        assert get_plugins_schema().etag != plugins_schema.etag
+
+    def test_redis_unavailable(self, pd):
+        broken_redis = mock.MagicMock()
+        broken_redis.get.side_effect = ConnectionError
+        broken_redis.set.side_effect = ConnectionError
+        broken_redis.incr.side_effect = ConnectionError
+        with mock.patch("paasng.bk_plugins.pluginscenter.schemas.get_default_redis", return_value=broken_redis):
+            assert get_basic_info_schema(pd.identifier).data["extra_fields_order"] == []
+
+            # Definition changes are still saved, the schema is compiled from the database
+            pd.basic_info_definition.extra_fields_order = ["email"]
+            pd.basic_info_definition.save()
+            assert get_basic_info_schema(pd.identifier).data["extra_fields_order"] == ["email"]
+
+    def test_plugins_schema(self, pd):
+        data = get_plugins_schema().data
+        assert pd.identifier in [item["plugin_type"]["id"] for item in data]
+
+    def test_config_schema_undefined(self, pd):
+        pd.config_definition.delete()
+        assert get_config_schema(pd.identifier).data == {}
+
+
+class TestSchemaViewSet:
+    def test_conditional_request(self, api_client, pd):
+        url = f"/api/bkplugins/plugin_definitions/{pd.identifier}/basic_info_schema/"
+        resp = api_client.get(url)
+        assert resp.status_code == 200
+        assert resp.json()["id"]["title"] == "插件ID"
+        etag = resp["ETag"]
+
+        resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 304
+        assert resp["ETag"] == etag
+
+        pd.basic_info_definition.extra_fields_order = ["email"]
+        pd.basic_info_definition.save()
+        resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 200
+        assert resp["ETag"] != etag
+
+    def test_not_found(self, api_client):
+        resp = api_client.get("/api/bkplugins/plugin_definitions/not-exists/basic_info_schema/")
+        assert resp.status_code == 404
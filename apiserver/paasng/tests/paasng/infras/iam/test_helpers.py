@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import pytest
+
+from paasng.infras.iam.helpers import add_role_members, delete_role_members, fetch_role_members_in_bulk
+from paasng.infras.iam.members.models import ApplicationUserGroup
+from paasng.platform.applications.constants import ApplicationRole
+from tests.utils.helpers import create_app
+from tests.utils.mocks.iam import StubBKIAMClient
+
+pytestmark = pytest.mark.django_db
+
+
+class TestFetchRoleMembersInBulk:
+    def test_multiple_apps(self, bk_app, bk_user):
+        another_app = create_app(owner_username="another-user")
+        add_role_members(bk_app.code, ApplicationRole.DEVELOPER, "foo")
+
+        members = fetch_role_members_in_bulk(
+            [
+                (bk_app.code, ApplicationRole.ADMINISTRATOR),
+                (bk_app.code, ApplicationRole.DEVELOPER),
+                (another_app.code, ApplicationRole.ADMINISTRATOR),
+                ("no-such-app", ApplicationRole.ADMINISTRATOR),
+            ]
+        )
+        assert members == {
+            (bk_app.code, ApplicationRole.ADMINISTRATOR): [bk_user.username],
+            (bk_app.code, ApplicationRole.DEVELOPER): ["foo"],
+            (another_app.code, ApplicationRole.ADMINISTRATOR): ["another-user"],
+        }
+
+    def test_cache_invalidated_on_write(self, settings, bk_app):
+        settings.IAM_ROLE_MEMBERS_CACHE_TTL = 60
+        app_role = (bk_app.code, ApplicationRole.DEVELOPER)
+        assert fetch_role_members_in_bulk([app_role]) == {app_role: []}
+
+        # Members changed outside the platform are not visible until the cache expires
+        group = ApplicationUserGroup.objects.get(app_code=bk_app.code, role=ApplicationRole.DEVELOPER)
+        StubBKIAMClient(group.tenant_id).add_user_group_members(group.user_group_id, ["foo"], -1)
+        assert fetch_role_members_in_bulk([app_role]) == {app_role: []}
+
+        add_role_members(bk_app.code, ApplicationRole.DEVELOPER, "bar")
+        assert sorted(fetch_role_members_in_bulk([app_role])[app_role]) == ["bar", "foo"]
+
+        delete_role_members(bk_app.code, ApplicationRole.DEVELOPER, ["foo", "bar"])
+        assert fetch_role_members_in_bulk([app_role]) == {app_role: []}
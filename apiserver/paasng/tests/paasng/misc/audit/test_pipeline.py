@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from unittest import mock
+
+import pytest
+from django.db import transaction
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from paasng.misc.audit.constants import OperationEnum, OperationTarget
+from paasng.misc.audit.models import AppLatestOperationRecord, AppOperationRecord
+from paasng.misc.audit.pipeline import AppAuditRecordEvent, AuditRecordPipeline, LatestOperationEvent
+from paasng.misc.audit.service import add_app_audit_record
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def pipeline():
+    pipeline = AuditRecordPipeline(batch_size=2)
+    # Write the events by calling `flush` in tests
+    with (
+        mock.patch.object(pipeline, "_ensure_flusher"),
+        override_settings(ENABLE_ASYNC_AUDIT_RECORDS=True),
+    ):
+        yield pipeline
+
+
+def make_event(app, operation=OperationEnum.RELEASE_TO_MARKET) -> AppAuditRecordEvent:
+    return AppAuditRecordEvent(
+        kwargs=dict(
+            app_code=app.code,
+            tenant_id=app.tenant_id,
+            user=app.owner,
+            action_id="",
+            operation=operation,
+            target=OperationTarget.APP,
+        )
+    )
+
+
+class TestAuditRecordPipeline:
+    def test_emit_on_commit(self, pipeline, bk_app):
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            pipeline.emit(make_event(bk_app))
+            # Nothing is queued before the transaction commits
+            assert len(pipeline._queue) == 0
+        assert len(pipeline._queue) == 1
+
+        pipeline.flush()
+        record = AppOperationRecord.objects.filter(app_code=bk_app.code).latest("created")
+        assert record.operation == OperationEnum.RELEASE_TO_MARKET
+        assert AppLatestOperationRecord.objects.get(application=bk_app).operation_id == record.pk
+
+    def test_rollback(self, pipeline, bk_app):
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    pipeline.emit(make_event(bk_app))
+                    raise RuntimeError("rollback")
+            except RuntimeError:
+                pass
+        assert len(pipeline._queue) == 0
+
+    def test_order_preserved(self, pipeline, bk_app):
+        record = add_app_audit_record(
+            app_code=bk_app.code,
+            tenant_id=bk_app.tenant_id,
+            user=bk_app.owner,
+            action_id="",
+            operation=OperationEnum.CREATE_APP,
+            target=OperationTarget.APP,
+        )
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            pipeline.emit(make_event(bk_app, OperationEnum.RELEASE_TO_MARKET))
+            pipeline.emit(make_event(bk_app, OperationEnum.OFFLINE_MARKET))
+            # The event of the earlier record is emitted at last
+            pipeline.emit(LatestOperationEvent(bk_app.code, record.pk, record.created))
+            pipeline.emit(make_event(bk_app, OperationEnum.DEPLOY))
+
+        pipeline.flush()
+        latest = AppLatestOperationRecord.objects.get(application=bk_app)
+        assert latest.operation.operation == OperationEnum.DEPLOY
+
+    def test_queue_full(self, pipeline, bk_app):
+        pipeline.max_queue_size = 1
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            pipeline.emit(make_event(bk_app, OperationEnum.RELEASE_TO_MARKET))
+            pipeline.emit(make_event(bk_app, OperationEnum.OFFLINE_MARKET))
+
+        # The first event is written by the caller to make room
+        assert len(pipeline._queue) == 1
+        assert AppOperationRecord.objects.filter(
+            app_code=bk_app.code, operation=OperationEnum.RELEASE_TO_MARKET
+        ).exists()
+        pipeline.flush()
+        assert AppOperationRecord.objects.filter(app_code=bk_app.code, operation=OperationEnum.OFFLINE_MARKET).exists()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import time
+from unittest import mock
+
+import pytest
+
+from paasng.misc.metrics.workloads.deployment import (
+    UnavailableDeploymentScanAgeMetric,
+    UnavailableDeploymentsScanner,
+    UnavailableDeploymentsStore,
+    UnavailableDeploymentTotalMetric,
+    scan_unavailable_deployments,
+)
+
+
+@pytest.fixture()
+def store():
+    store = UnavailableDeploymentsStore()
+    store.redis_db.delete(store.key)
+    yield store
+    store.redis_db.delete(store.key, store.lock_key)
+
+
+class TestUnavailableDeploymentsScanner:
+    def test_scan(self, store):
+        def fake_list(client, **kwargs):
+            if client == "cluster-1":
+                raise TimeoutError("listing deployments timed out")
+            return [mock.MagicMock()] * 2
+
+        cluster_model = mock.MagicMock()
+        cluster_model.objects.values_list.return_value = ["cluster-1", "cluster-2", "cluster-3"]
+        with (
+            mock.patch("paasng.misc.metrics.workloads.deployment.Cluster", cluster_model),
+            # Use the cluster name as the client for testing
+            mock.patch(
+                "paasng.misc.metrics.workloads.deployment.get_client_by_cluster_name",
+                side_effect=lambda cluster_name: cluster_name,
+            ),
+            mock.patch(
+                "paasng.misc.metrics.workloads.deployment.dynamic_client_cache.get", side_effect=lambda client: client
+            ),
+            mock.patch("paasng.misc.metrics.workloads.deployment.list_unavailable_deployment", side_effect=fake_list),
+        ):
+            store.redis_db.hset(store.key, "removed-cluster", '{"count": 1, "scanned_at": 0}')
+            UnavailableDeploymentsScanner(store).scan()
+
+        results = store.get_all()
+        # The failed cluster and the removed cluster are absent
+        assert set(results) == {"cluster-2", "cluster-3"}
+        assert all(count == 2 for count, _ in results.values())
+
+    def test_scan_lock(self, store):
+        assert store.acquire_scan_lock(60)
+        assert not store.acquire_scan_lock(60)
+
+    def test_scan_once_per_interval(self, store):
+        with mock.patch("paasng.misc.metrics.workloads.deployment.UnavailableDeploymentsScanner") as scanner_cls:
+            scan_unavailable_deployments()
+            scan_unavailable_deployments()
+        assert scanner_cls.return_value.scan.call_count == 1
+
+
+class TestUnavailableDeploymentMetrics:
+    def test_calc_metric(self, store):
+        store.save({"foo": 3}, ["foo"])
+        store.redis_db.hset(store.key, "bar", f'{{"count": 1, "scanned_at": {time.time() - 600}}}')
+
+        samples = {s.labels["cluster_name"]: s for s in UnavailableDeploymentTotalMetric.calc_metric().samples}
+        assert samples["foo"].value == 3
+        assert samples["bar"].value == 1
+
+        ages = {s.labels["cluster_name"]: s.value for s in UnavailableDeploymentScanAgeMetric.calc_metric().samples}
+        assert ages["foo"] < 60
+        assert ages["bar"] >= 600
@@ -15,10 +15,16 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+from unittest import mock
+
 import pytest
+from django.test.utils import override_settings
+from django.utils.crypto import get_random_string
 
-from paasng.misc.monitoring.metrics.clients import BkPromResult
+from paasng.misc.monitoring.metrics.clients import BkPromResult, PrometheusMetricClient
+from paasng.misc.monitoring.metrics.clients.base import MetricQueryCache, make_instance_names_regex, run_concurrently
 from paasng.misc.monitoring.metrics.clients.prometheus import PromResult
+from paasng.misc.monitoring.metrics.constants import MetricsResourceType, MetricsSeriesType
 
 
 class TestPromResult:
@@ -244,3 +250,73 @@ class TestBkPrometheusResult:
             [1673257280, "1073741824"],
             [1673257290, "1073741824"],
         ]
+
+
+class TestGroupedQuery:
+    fake_range_result = {
+        "status": "success",
+        "data": {
+            "resultType": "matrix",
+            "result": [
+                {"metric": {"container_name": "web", "pod_name": "pod-a"}, "values": [[1590000844, "1"]]},
+                {"metric": {"container_name": "sidecar", "pod_name": "pod-a"}, "values": [[1590000844, "2"]]},
+                {"metric": {"container": "web", "pod": "pod-b"}, "values": [[1590000844, "3"]]},
+            ],
+        },
+    }
+
+    def test_get_raws_by_pod_name(self):
+        pr = PromResult.from_resp(raw_resp=self.fake_range_result)
+        raws = pr.get_raws_by_pod_name("web")
+        assert {name: raw["values"] for name, raw in raws.items()} == {
+            "pod-a": [[1590000844, "1"]],
+            "pod-b": [[1590000844, "3"]],
+        }
+        # The first result of every pod is used when no container name is given
+        assert pr.get_raws_by_pod_name()["pod-a"]["values"] == [[1590000844, "1"]]
+
+    def test_make_instance_names_regex(self):
+        assert make_instance_names_regex(["pod-a", "pod.b"]) == "pod-a|pod\\\\.b"
+
+    def test_get_grouped_query_promql(self):
+        client = PrometheusMetricClient(basic_auth=("foo", "bar"), host="http://prometheus.example.com")
+        promql = client.get_grouped_query_promql(
+            MetricsResourceType.MEM, MetricsSeriesType.CURRENT, ["pod-a", "pod-b"], "BCS-K8S-00000"
+        )
+        assert 'pod_name=~"pod-a|pod-b"' in promql
+        assert promql.startswith("sum by(container_name, pod_name)")
+
+
+def test_run_concurrently():
+    assert run_concurrently(lambda x: x * 2, range(20)) == [x * 2 for x in range(20)]
+
+
+@override_settings(METRICS_QUERY_CACHE_TTL=30)
+class TestMetricQueryCache:
+    def test_get_or_fetch(self):
+        query_cache = MetricQueryCache(backend=get_random_string(8))
+        fetch = mock.Mock(return_value=[1])
+
+        assert query_cache.get_or_fetch("up{a='b'}", "1", "2", "15s", fetch) == [1]
+        # The normalized query hits the cache
+        assert query_cache.get_or_fetch("  up{a='b'}\n", "1", "2", "15s", fetch) == [1]
+        assert fetch.call_count == 1
+
+        query_cache.get_or_fetch("up{a='b'}", "1", "3", "15s", fetch)
+        assert fetch.call_count == 2
+
+    def test_exception_not_cached(self):
+        query_cache = MetricQueryCache(backend=get_random_string(8))
+        fetch = mock.Mock(side_effect=[ValueError("boom"), [1]])
+
+        with pytest.raises(ValueError, match="boom"):
+            query_cache.get_or_fetch("up", "1", "2", "15s", fetch)
+        assert query_cache.get_or_fetch("up", "1", "2", "15s", fetch) == [1]
+
+    def test_disabled(self):
+        query_cache = MetricQueryCache(backend=get_random_string(8))
+        fetch = mock.Mock(return_value=[1])
+        with override_settings(METRICS_QUERY_CACHE_TTL=0):
+            query_cache.get_or_fetch("up", "1", "2", "15s", fetch)
+            query_cache.get_or_fetch("up", "1", "2", "15s", fetch)
+        assert fetch.call_count == 2
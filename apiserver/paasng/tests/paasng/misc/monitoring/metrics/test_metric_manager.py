@@ -16,7 +16,7 @@
 # to the current version of the project delivered to anyone in the future.
 
 import datetime
-from typing import List, NamedTuple
+from typing import NamedTuple
 from unittest.mock import Mock, patch
 
 import pytest
@@ -26,7 +26,7 @@ from paas_wl.bk_app.processes.managers import AppProcessManager
 from paasng.misc.monitoring.metrics.clients import BkMonitorMetricClient
 from paasng.misc.monitoring.metrics.constants import MetricsResourceType, MetricsSeriesType
 from paasng.misc.monitoring.metrics.exceptions import RequestMetricBackendError
-from paasng.misc.monitoring.metrics.models import ResourceMetricManager
+from paasng.misc.monitoring.metrics.models import ResourceMetricManager, query_processes_metrics
 from paasng.misc.monitoring.metrics.utils import MetricSmartTimeRange
 from tests.paas_wl.utils.wl_app import create_wl_app, create_wl_instance, create_wl_release
 
@@ -47,11 +47,23 @@ class TestResourceMetricManager:
     def metric_client(self, tenant_id):
         return BkMonitorMetricClient(bk_biz_id="123", tenant_id=tenant_id)
 
+    @staticmethod
+    def make_series(process, values):
+        """Make the series returned by bkmonitor, `values` is a dict of {instance_name: datapoints}"""
+        return [
+            {
+                "dimensions": {"container_name": process.main_container_name, "pod_name": instance_name},
+                "datapoints": datapoints,
+            }
+            for instance_name, datapoints in values.items()
+        ]
+
     def test_normal_gen_series_query(self, metric_client):
         manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id="")
-        fake_metrics_value = [[1234, 1234], [1234, 1234], [1234, 1234]]
-        query_range_mock = Mock(return_value=fake_metrics_value)
-        with patch("paasng.misc.monitoring.metrics.clients.BkMonitorMetricClient._query_range", query_range_mock):
+        inst_1, inst_2 = self.web_process.instances
+        series = self.make_series(self.web_process, {inst_1.name: [[1, 1000000]], inst_2.name: [[2, 2000000]]})
+        request_mock = Mock(return_value=series)
+        with patch("paasng.misc.monitoring.metrics.clients.BkMonitorMetricClient._request", request_mock):
             result = list(
                 manager.get_all_instances_metrics(
                     time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
@@ -60,15 +72,58 @@ class TestResourceMetricManager:
             )
 
             assert len(result) == 2
+            assert result[0].instance_name == inst_1.name
             assert result[0].results[0].type_name == "mem"
-            assert result[0].results[0].results[0].type_name == "current"
-            assert result[0].results[0].results[0].results == fake_metrics_value
+            assert [r.type_name for r in result[0].results[0].results] == ["current", "limit"]
+            assert result[0].results[0].results[0].results == [[1000, "1"]]
+            assert result[1].results[0].results[0].results == [[2000, "2"]]
+            # All the instances are queried in a single request for every series type
+            assert request_mock.call_count == 2
+
+    def test_batch_instances(self, metric_client):
+        manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id="")
+        manager.max_instances_per_query = 1
+        request_mock = Mock(return_value=[])
+        with patch("paasng.misc.monitoring.metrics.clients.BkMonitorMetricClient._request", request_mock):
+            manager.get_all_instances_metrics(
+                time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
+                resource_types=[MetricsResourceType.MEM, MetricsResourceType.CPU],
+                series_type=MetricsSeriesType.CURRENT,
+            )
+
+        assert request_mock.call_count == 4
+        promqls = sorted(c.args[0] for c in request_mock.call_args_list)
+        assert all(f'pod_name=~"{inst.name}"' in "".join(promqls) for inst in self.web_process.instances)
+
+    def test_query_processes_metrics(self, metric_client):
+        web_manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id="")
+        worker_manager = ResourceMetricManager(
+            process=self.worker_process, metric_client=metric_client, bcs_cluster_id=""
+        )
+        inst_1, inst_2 = self.web_process.instances
+        (inst_3,) = self.worker_process.instances
+        series = self.make_series(self.web_process, {inst_1.name: [[1, 1000000]], inst_3.name: [[3, 3000000]]})
+        request_mock = Mock(return_value=series)
+        with patch("paasng.misc.monitoring.metrics.clients.BkMonitorMetricClient._request", request_mock):
+            web_result, worker_result = query_processes_metrics(
+                [web_manager, worker_manager],
+                time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
+                resource_types=[MetricsResourceType.MEM],
+                series_type=MetricsSeriesType.CURRENT,
+            )
+
+        # The instances of both processes are queried by a single request
+        assert request_mock.call_count == 1
+        assert [r.instance_name for r in web_result] == [inst_1.name, inst_2.name]
+        assert web_result[0].results[0].results[0].results == [[1000, "1"]]
+        assert web_result[1].results[0].results[0].results == []
+        assert [r.instance_name for r in worker_result] == [inst_3.name]
+        assert worker_result[0].results[0].results[0].results == [[3000, "3"]]
 
     def test_empty_gen_series_query(self, metric_client):
         manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id="")
-        fake_metrics_value: List = []
-        query_range_mock = Mock(return_value=fake_metrics_value)
-        with patch("paasng.misc.monitoring.metrics.clients.BkMonitorMetricClient._query_range", query_range_mock):
+        request_mock = Mock(return_value=[])
+        with patch("paasng.misc.monitoring.metrics.clients.BkMonitorMetricClient._request", request_mock):
             result = list(
                 manager.get_all_instances_metrics(
                     time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
@@ -78,7 +133,7 @@ class TestResourceMetricManager:
 
             assert result[0].results[0].type_name == "mem"
             assert result[0].results[0].results[0].type_name == "current"
-            assert result[0].results[0].results[0].results == fake_metrics_value
+            assert result[0].results[0].results[0].results == []
 
     def test_exception_gen_series_query(self, metric_client):
         manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id="")
@@ -86,8 +141,8 @@ class TestResourceMetricManager:
         class FakeResponse(NamedTuple):
             status_code: int
 
-        query_range_mock = Mock(side_effect=RequestMetricBackendError(FakeResponse(status_code=400)))
-        with patch("paasng.misc.monitoring.metrics.clients.BkMonitorMetricClient._query_range", query_range_mock):
+        request_mock = Mock(side_effect=RequestMetricBackendError(FakeResponse(status_code=400)))
+        with patch("paasng.misc.monitoring.metrics.clients.BkMonitorMetricClient._request", request_mock):
             result = list(
                 manager.get_all_instances_metrics(
                     time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
@@ -96,6 +151,23 @@ class TestResourceMetricManager:
             )
 
             assert len(result) == 2
+            assert result[0].results[0].results[0].results == []
+
+    def test_get_instance_metrics(self, metric_client):
+        manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id="")
+        fake_metrics_value = [[1234, 1234]]
+        query_range_mock = Mock(return_value=fake_metrics_value)
+        with patch("paasng.misc.monitoring.metrics.clients.BkMonitorMetricClient._query_range", query_range_mock):
+            result = manager.get_instance_metrics(
+                instance_name=self.web_process.instances[0].name,
+                time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
+                resource_types=[MetricsResourceType.MEM, MetricsResourceType.CPU],
+            )
+
+        assert [r.type_name for r in result] == ["mem", "cpu"]
+        assert [s.type_name for s in result[1].results] == ["current", "limit"]
+        assert result[1].results[0].results == fake_metrics_value
+        assert query_range_mock.call_count == 4
 
     def test_gen_series_query(self, metric_client):
         temp_process = self.worker_process
@@ -142,3 +214,11 @@ class TestTimeRange:
 
         # 精确到秒
         assert int(tr.end) - int(tr.start) == 3600
+
+    def test_aligned_to_step(self):
+        tr = MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58", step="1m")
+        aligned = tr.aligned_to_step()
+
+        assert (aligned.start, aligned.end) == ("1368278580", "1368278700")
+        # The original object is not modified
+        assert tr.start == "1368278638"
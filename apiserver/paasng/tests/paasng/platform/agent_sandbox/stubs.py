@@ -21,6 +21,21 @@ This module provides stub implementations of sandbox components for testing,
 enabling unit and API tests without real K8s/daemon dependencies.
 """
 
+import copy
+import threading
+from typing import BinaryIO, Iterator
+
+from django.utils import timezone
+from kubernetes.client.exceptions import ApiException
+from kubernetes.dynamic import ResourceInstance
+
+from paas_wl.bk_app.agent_sandbox.kres_entities import AgentSandbox, AgentSandboxKresApp
+from paas_wl.bk_app.agent_sandbox.kres_slzs import (
+    AgentSandboxDeserializer,
+    AgentSandboxLabels,
+    AgentSandboxSerializer,
+)
+from paas_wl.infras.resources.kube_res.base import GVKConfig
 from paasng.platform.agent_sandbox.daemon_client import ExecuteResult
 
 # The default working directory in sandbox container
@@ -86,6 +101,16 @@ class StubDaemonClient:
             raise SandboxDaemonAPIError(f"File not found: {path}")
         return self._files[path]
 
+    def upload_stream(self, fileobj: BinaryIO, dest_path: str, **kwargs) -> int:
+        """Upload a file-like object to the in-memory storage."""
+        self._files[dest_path] = fileobj.read()
+        return len(self._files[dest_path])
+
+    def download_stream(self, path: str, chunk_size: int = 4, **kwargs) -> Iterator[bytes]:
+        """Download a file from the in-memory storage as chunks."""
+        content = self.download_file(path)
+        return iter([content[i : i + chunk_size] for i in range(0, len(content), chunk_size)])
+
     def delete_file(self, path: str, recursive: bool = False) -> None:
         """Delete a file or folder from the in-memory storage."""
         if path in self._files:
@@ -132,3 +157,83 @@ class StubDaemonClientFactory:
     def reset(self) -> None:
         """Reset the factory, clearing the cached client."""
         self._client = None
+
+
+_POD_GVK_CONFIG = GVKConfig(server_version="1.20", kind="Pod", available_apiversions=["v1"], preferred_apiversion="v1")
+
+
+class FakeSandboxPoolPods:
+    """An in-memory fake of the kubernetes pods in a sandbox warm pool.
+
+    It shares the interface with `SandboxPoolPods`, the pods are stored as manifests and modifications
+    are checked by "resourceVersion" like the kubernetes API server does.
+
+    :param kres_app: The kres app which the pool pods belong to.
+    """
+
+    def __init__(self, kres_app: AgentSandboxKresApp):
+        self.kres_app = kres_app
+        self.manifests: dict[str, dict] = {}
+        # When set, every "list" call waits on the barrier after reading the pods, useful for
+        # making concurrent claims read the same snapshot.
+        self.list_barrier: threading.Barrier | None = None
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def list(self, pool_state: str) -> list[AgentSandbox]:
+        with self._lock:
+            manifests = [
+                copy.deepcopy(m)
+                for m in self.manifests.values()
+                if m["metadata"]["labels"].get(AgentSandboxLabels.key_pool_state) == pool_state
+            ]
+        if self.list_barrier:
+            self.list_barrier.wait()
+        return [self._to_entity(m) for m in manifests]
+
+    def prepare(self) -> None:
+        """Nothing to prepare for the fake"""
+
+    def create(self, sandbox: AgentSandbox) -> None:
+        manifest = AgentSandboxSerializer(AgentSandbox, _POD_GVK_CONFIG).serialize(sandbox)
+        manifest["metadata"]["creationTimestamp"] = timezone.now().isoformat()
+        manifest["status"] = {"phase": "Pending"}
+        with self._lock:
+            if sandbox.name in self.manifests:
+                raise ApiException(status=409)
+            manifest["metadata"]["resourceVersion"] = self._next_version()
+            self.manifests[sandbox.name] = manifest
+
+    def mark_claimed(self, sandbox: AgentSandbox) -> None:
+        with self._lock:
+            manifest = self.manifests.get(sandbox.name)
+            if not manifest:
+                raise ApiException(status=404)
+            if manifest["metadata"]["resourceVersion"] != sandbox.get_resource_version():
+                raise ApiException(status=409)
+            manifest["metadata"]["labels"][AgentSandboxLabels.key_pool_state] = "claimed"
+            manifest["metadata"]["resourceVersion"] = self._next_version()
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            self.manifests.pop(name, None)
+
+    def set_status(self, name: str, phase: str, ready: bool = False) -> None:
+        """Simulate the status changes of a pod, e.g. started by kubelet."""
+        with self._lock:
+            manifest = self.manifests[name]
+            manifest["status"] = {
+                "phase": phase,
+                "conditions": [{"type": "Ready", "status": "True" if ready else "False"}],
+            }
+            manifest["metadata"]["resourceVersion"] = self._next_version()
+
+    def _next_version(self) -> str:
+        self._version += 1
+        return str(self._version)
+
+    def _to_entity(self, manifest: dict) -> AgentSandbox:
+        kube_data = ResourceInstance(None, manifest)
+        entity = AgentSandboxDeserializer(AgentSandbox, _POD_GVK_CONFIG).deserialize(self.kres_app, kube_data)
+        entity._kube_data = kube_data
+        return entity
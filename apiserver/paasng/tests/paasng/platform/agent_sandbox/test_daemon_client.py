@@ -15,13 +15,30 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import hashlib
+import io
+import json
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
 from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 import requests
 
-from paasng.platform.agent_sandbox.daemon_client import DEFAULT_REQUEST_TIMEOUT, ExecuteResult, SandboxDaemonClient
-from paasng.platform.agent_sandbox.exceptions import SandboxDaemonAPIError, SandboxServiceNotReady
+from paasng.platform.agent_sandbox.daemon_client import (
+    CHUNK_CHECKSUM_HEADER,
+    DEFAULT_REQUEST_TIMEOUT,
+    ExecuteResult,
+    SandboxDaemonClient,
+)
+from paasng.platform.agent_sandbox.exceptions import (
+    SandboxDaemonAPIError,
+    SandboxDaemonAPINotFound,
+    SandboxServiceNotReady,
+)
 
 
 class TestSandboxDaemonClient:
@@ -174,6 +191,22 @@ class TestSandboxDaemonClient:
         ):
             client.execute("echo hello")
 
+    def test_request_404_raises_not_found(self, client: SandboxDaemonClient):
+        """Test that 404 of an unknown route, whose body is not JSON, raises SandboxDaemonAPINotFound."""
+        mock_response = mock.MagicMock()
+        mock_response.status_code = 404
+        mock_response.json.side_effect = ValueError("not json")
+        mock_response.text = "404 page not found"
+
+        http_error = requests.HTTPError(response=mock_response)
+        with (
+            mock.patch.object(client._session, "request", side_effect=http_error) as mock_request,
+            pytest.raises(SandboxDaemonAPINotFound, match="404 page not found"),
+        ):
+            client.upload_stream(io.BytesIO(b"data"), "/workspace/test.txt")
+        # Not retried
+        mock_request.assert_called_once()
+
     def test_request_502_raises_service_not_ready(self, client: SandboxDaemonClient):
         """Test that 502 Bad Gateway raises SandboxServiceNotReady."""
         mock_response = mock.MagicMock()
@@ -200,6 +233,250 @@ class TestSandboxDaemonClient:
             assert client.base_url == "http://agent-sbx-router.example.com"
 
 
+# The repeated pattern of synthetic file content
+_PATTERN = bytes(range(256)) * 4096
+
+
+def _synthetic_bytes(start: int, end: int) -> Iterator[bytes]:
+    """Generate the synthetic content in range [start, end) piece by piece."""
+    pos = start
+    while pos < end:
+        offset = pos % len(_PATTERN)
+        piece = _PATTERN[offset : offset + min(end - pos, len(_PATTERN) - offset)]
+        yield piece
+        pos += len(piece)
+
+
+def _synthetic_checksum(size: int) -> str:
+    hasher = hashlib.sha256()
+    for piece in _synthetic_bytes(0, size):
+        hasher.update(piece)
+    return hasher.hexdigest()
+
+
+def _synthetic_chunk_checksums(size: int, chunk_size: int) -> list[str]:
+    src = _SyntheticFile(size)
+    return [hashlib.sha256(chunk).hexdigest() for chunk in iter(lambda: src.read(chunk_size), b"")]
+
+
+class _SyntheticFile(io.RawIOBase):
+    """A read-only file of synthetic content, the content is generated on reading."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self.pos = offset
+        return self.pos
+
+    def readinto(self, b) -> int:
+        n = 0
+        for piece in _synthetic_bytes(self.pos, min(self.pos + len(b), self.size)):
+            b[n : n + len(piece)] = piece
+            n += len(piece)
+        self.pos += n
+        return n
+
+
+class _StandInDaemonServer(ThreadingHTTPServer):
+    """A local stand-in of the sandbox daemon which implements the file transfer APIs. Only the size
+    and the checksum of the uploaded content are kept, downloads are served with synthetic content.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, download_size: int = 0):
+        super().__init__(("127.0.0.1", 0), _StandInDaemonHandler)
+        self.download_size = download_size
+        self.received = 0
+        self.chunk_checksums: list[str] = []
+        self.uploaded: dict[str, tuple[int, list[str]]] = {}
+        # Fault injection: the offsets of chunks to reject once, the offset to truncate a download at
+        self.fail_chunk_offsets: set[int] = set()
+        self.truncate_download_at: int | None = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"127.0.0.1:{self.server_address[1]}"
+
+
+class _StandInDaemonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _StandInDaemonServer
+
+    def log_message(self, format, *args):
+        """Keep the test output clean"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/files/upload/chunk":
+            self._send_json(200, {"offset": self.server.received})
+        elif url.path == "/files/download" and self.server.download_size:
+            self._serve_download()
+        else:
+            self._send_json(404, {"message": "not found"})
+
+    def do_PUT(self):
+        offset = int(parse_qs(urlparse(self.path).query)["offset"][0])
+        length = int(self.headers["Content-Length"])
+        # Read the body piece by piece into a fixed buffer to keep the memory of the stand-in bounded
+        hasher = hashlib.sha256()
+        buf = memoryview(bytearray(1024 * 1024))
+        remaining = length
+        while remaining:
+            n = self.rfile.readinto(buf[: min(remaining, len(buf))])
+            hasher.update(buf[:n])
+            remaining -= n
+
+        if offset in self.server.fail_chunk_offsets:
+            self.server.fail_chunk_offsets.discard(offset)
+            self._send_json(500, {"message": "injected failure"})
+            return
+        if offset != self.server.received:
+            self._send_json(409, {"message": "unexpected offset"})
+            return
+        checksum = hasher.hexdigest()
+        if checksum != self.headers[CHUNK_CHECKSUM_HEADER]:
+            self._send_json(400, {"message": "chunk checksum mismatch"})
+            return
+
+        self.server.received += length
+        self.server.chunk_checksums.append(checksum)
+        self._send_json(200, {"offset": self.server.received})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if body["size"] != self.server.received:
+            self._send_json(409, {"message": "size mismatch"})
+            return
+        self.server.uploaded[body["path"]] = (self.server.received, self.server.chunk_checksums)
+        self.send_response(204)
+        self.end_headers()
+
+    def _serve_download(self):
+        start, status = 0, 200
+        if range_header := self.headers.get("Range"):
+            start, status = int(range_header.removeprefix("bytes=").rstrip("-")), 206
+
+        size = self.server.download_size
+        end = size
+        if self.server.truncate_download_at is not None and start < self.server.truncate_download_at:
+            # Close the connection in the middle of the body
+            end = self.server.truncate_download_at
+            self.server.truncate_download_at = None
+            self.close_connection = True
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size - start))
+        self.end_headers()
+        for piece in _synthetic_bytes(start, end):
+            self.wfile.write(piece)
+
+    def _send_json(self, status: int, data: dict):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture()
+def stand_in_daemon() -> Iterator[_StandInDaemonServer]:
+    server = _StandInDaemonServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def stand_in_client(stand_in_daemon) -> Iterator[SandboxDaemonClient]:
+    with SandboxDaemonClient(stand_in_daemon.endpoint, "token", "sbx-1", "ns-1") as client:
+        yield client
+
+
+class TestStreamingTransfer:
+    """Test the streaming file transfer with a local stand-in daemon."""
+
+    chunk_size = 4 * 1024 * 1024
+
+    def test_upload_1gb_with_constant_memory(self, stand_in_daemon, stand_in_client):
+        size = 1024 * 1024 * 1024
+
+        tracemalloc.start()
+        try:
+            uploaded = stand_in_client.upload_stream(_SyntheticFile(size), "/data/big.bin", chunk_size=self.chunk_size)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert uploaded == size
+        assert stand_in_daemon.uploaded["/data/big.bin"] == (size, _synthetic_chunk_checksums(size, self.chunk_size))
+        # Only a few chunks are held in memory at the same time, no matter how large the file is
+        assert peak < 8 * self.chunk_size
+
+    def test_download_1gb_with_constant_memory(self, stand_in_daemon, stand_in_client):
+        size = 1024 * 1024 * 1024
+        stand_in_daemon.download_size = size
+
+        hasher = hashlib.sha256()
+        received = 0
+        tracemalloc.start()
+        try:
+            for chunk in stand_in_client.download_stream("/data/big.bin", chunk_size=self.chunk_size):
+                hasher.update(chunk)
+                received += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert received == size
+        assert hasher.hexdigest() == _synthetic_checksum(size)
+        assert peak < 8 * self.chunk_size
+
+    def test_upload_retry_failed_chunk(self, stand_in_daemon, stand_in_client):
+        size = 10 * 1024 * 1024 + 1
+        stand_in_daemon.fail_chunk_offsets = {4 * 1024 * 1024}
+
+        stand_in_client.upload_stream(_SyntheticFile(size), "/data/f.bin", chunk_size=self.chunk_size)
+        assert stand_in_daemon.uploaded["/data/f.bin"] == (size, _synthetic_chunk_checksums(size, self.chunk_size))
+
+    def test_upload_resume(self, stand_in_daemon, stand_in_client):
+        size = 10 * 1024 * 1024
+        # Part of the file has been received by a previous interrupted upload
+        src = _SyntheticFile(size)
+        stand_in_client._upload_chunk("/data/f.bin", 0, src.read(self.chunk_size), timeout=None)
+
+        with mock.patch.object(stand_in_client, "_upload_chunk", wraps=stand_in_client._upload_chunk) as upload_chunk:
+            stand_in_client.upload_stream(_SyntheticFile(size), "/data/f.bin", chunk_size=self.chunk_size, resume=True)
+
+        assert upload_chunk.call_args_list[0].args[1] == self.chunk_size
+        assert stand_in_daemon.uploaded["/data/f.bin"] == (size, _synthetic_chunk_checksums(size, self.chunk_size))
+
+    def test_download_resume_after_interrupted(self, stand_in_daemon, stand_in_client):
+        size = 10 * 1024 * 1024
+        stand_in_daemon.download_size = size
+        stand_in_daemon.truncate_download_at = 3 * 1024 * 1024 + 7
+
+        content = b"".join(stand_in_client.download_stream("/data/f.bin", chunk_size=self.chunk_size))
+        assert len(content) == size
+        assert hashlib.sha256(content).hexdigest() == _synthetic_checksum(size)
+
+    def test_download_missing_file(self, stand_in_client):
+        with pytest.raises(SandboxDaemonAPIError, match="HTTP error 404"):
+            stand_in_client.download_stream("/data/missing.bin")
+
+
 class TestExecuteResult:
     """Test ExecuteResult data class."""
 
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from paas_wl.bk_app.agent_sandbox.kres_slzs import AgentSandboxLabels
+from paasng.platform.agent_sandbox.constants import SandboxStatus
+from paasng.platform.agent_sandbox.pool import SandboxWarmPool
+from paasng.platform.agent_sandbox.sandbox import AgentSandboxResManager, create_sandbox
+
+from .stubs import FakeSandboxPoolPods
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+
+@pytest.fixture()
+def fake_pods(stub_kres_app) -> FakeSandboxPoolPods:
+    return FakeSandboxPoolPods(stub_kres_app)
+
+
+@pytest.fixture()
+def make_pool(bk_app, fake_pods):
+    def _make(size: int) -> SandboxWarmPool:
+        return SandboxWarmPool(bk_app, target="default", size=size, pods=fake_pods)
+
+    return _make
+
+
+def _start_all(fake_pods: FakeSandboxPoolPods):
+    for name in list(fake_pods.manifests):
+        fake_pods.set_status(name, "Running", ready=True)
+
+
+def _pool_state(fake_pods: FakeSandboxPoolPods, name: str) -> str:
+    return fake_pods.manifests[name]["metadata"]["labels"][AgentSandboxLabels.key_pool_state]
+
+
+class TestClaim:
+    def test_claim_ready_pod_only(self, make_pool, fake_pods):
+        pool = make_pool(2)
+        pool.reconcile()
+        # Pods are still pending
+        assert pool.claim() is None
+
+        ready_name = next(iter(fake_pods.manifests))
+        fake_pods.set_status(ready_name, "Running", ready=True)
+        sandbox = pool.claim()
+        assert sandbox is not None
+        assert sandbox.name == ready_name
+        assert sandbox.env["TOKEN"]
+        assert _pool_state(fake_pods, ready_name) == "claimed"
+
+    def test_exhausted(self, make_pool, fake_pods):
+        pool = make_pool(1)
+        pool.reconcile()
+        _start_all(fake_pods)
+
+        assert pool.claim() is not None
+        assert pool.claim() is None
+
+    def test_concurrent_claims(self, make_pool, fake_pods):
+        pool = make_pool(3)
+        pool.reconcile()
+        _start_all(fake_pods)
+
+        # All claims read the same pods before patching, so most of them will conflict at first
+        workers = 5
+        fake_pods.list_barrier = threading.Barrier(workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda _: pool.claim(), range(workers)))
+
+        claimed = [r.name for r in results if r]
+        assert len(claimed) == 3
+        assert len(set(claimed)) == 3
+        assert results.count(None) == 2
+        assert all(_pool_state(fake_pods, name) == "claimed" for name in claimed)
+
+
+class TestReconcile:
+    def test_fill(self, make_pool, fake_pods):
+        result = make_pool(3).reconcile()
+
+        assert (result.idle, result.created, result.recycled) == (3, 3, 0)
+        assert len(fake_pods.manifests) == 3
+        tokens = {m["spec"]["containers"][0]["env"][0]["value"] for m in fake_pods.manifests.values()}
+        assert len(tokens) == 3
+
+    def test_refill_after_claim(self, make_pool, fake_pods):
+        pool = make_pool(2)
+        pool.reconcile()
+        _start_all(fake_pods)
+        pool.claim()
+
+        result = pool.reconcile()
+        assert (result.idle, result.created) == (2, 1)
+        # The claimed pod is kept
+        assert len(fake_pods.manifests) == 3
+
+    def test_recycle(self, make_pool, fake_pods):
+        pool = make_pool(3)
+        pool.reconcile()
+        failed, stale, normal = list(fake_pods.manifests)
+        fake_pods.set_status(failed, "Failed")
+        fake_pods.manifests[stale]["metadata"]["creationTimestamp"] = (
+            timezone.now() - timedelta(seconds=7 * 60 * 60)
+        ).isoformat()
+
+        with override_settings(AGENT_SANDBOX_WARM_POOL_MAX_IDLE_SECONDS=6 * 60 * 60):
+            result = pool.reconcile()
+        assert (result.idle, result.created, result.recycled) == (3, 2, 2)
+        assert failed not in fake_pods.manifests
+        assert stale not in fake_pods.manifests
+        assert normal in fake_pods.manifests
+
+    def test_shrink(self, make_pool, fake_pods):
+        make_pool(3).reconcile()
+        result = make_pool(1).reconcile()
+        assert (result.idle, result.created, result.recycled) == (1, 0, 2)
+        assert len(fake_pods.manifests) == 1
+
+
+class TestCreateSandboxFromPool:
+    @pytest.fixture(autouse=True)
+    def _setup(self, bk_app, make_pool, fake_pods):
+        pool = make_pool(1)
+        pool.reconcile()
+        _start_all(fake_pods)
+        with (
+            override_settings(AGENT_SANDBOX_WARM_POOL_SIZES={bk_app.code: 1}),
+            mock.patch.object(SandboxWarmPool, "from_app", return_value=pool),
+            mock.patch("paasng.platform.agent_sandbox.sandbox.refill_agent_sandbox_pool") as self.mock_refill,
+            mock.patch.object(AgentSandboxResManager, "provision") as self.mock_provision,
+        ):
+            yield
+        pool.clear_refill_request()
+
+    def test_claimed(self, bk_app, bk_user, fake_pods):
+        pod_name = next(iter(fake_pods.manifests))
+        sandbox = create_sandbox(application=bk_app, creator=bk_user.pk)
+
+        assert sandbox.name == pod_name
+        assert (
+            sandbox.uuid.hex == fake_pods.manifests[pod_name]["metadata"]["labels"][AgentSandboxLabels.key_sandbox_id]
+        )
+        assert sandbox.daemon_token == fake_pods.manifests[pod_name]["spec"]["containers"][0]["env"][0]["value"]
+        assert sandbox.status == SandboxStatus.RUNNING.value
+        self.mock_provision.assert_not_called()
+        self.mock_refill.delay.assert_called_once_with(bk_app.code)
+
+    def test_fallback_when_exhausted(self, bk_app, bk_user):
+        create_sandbox(application=bk_app, creator=bk_user.pk)
+        sandbox = create_sandbox(application=bk_app, creator=bk_user.pk)
+
+        assert sandbox.status == SandboxStatus.RUNNING.value
+        self.mock_provision.assert_called_once()
+        # Only the claimed sandbox triggers refilling
+        self.mock_refill.delay.assert_called_once_with(bk_app.code)
+
+    def test_refill_deduplicated(self, bk_app, bk_user, make_pool, fake_pods):
+        pool = make_pool(3)
+        pool.reconcile()
+        _start_all(fake_pods)
+        with mock.patch.object(SandboxWarmPool, "from_app", return_value=pool):
+            create_sandbox(application=bk_app, creator=bk_user.pk)
+            create_sandbox(application=bk_app, creator=bk_user.pk)
+            self.mock_refill.delay.assert_called_once_with(bk_app.code)
+
+            # The refill task clears the request, the later claims can request again
+            pool.clear_refill_request()
+            create_sandbox(application=bk_app, creator=bk_user.pk)
+            assert self.mock_refill.delay.call_count == 2
+
+    def test_not_eligible(self, bk_app, bk_user, fake_pods):
+        create_sandbox(application=bk_app, creator=bk_user.pk, env_vars={"FOO": "BAR"})
+
+        self.mock_provision.assert_called_once()
+        self.mock_refill.delay.assert_not_called()
+        assert all(_pool_state(fake_pods, name) == "idle" for name in fake_pods.manifests)
@@ -15,15 +15,24 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import io
+from unittest import mock
+
 import pytest
 
-from paasng.platform.agent_sandbox.exceptions import SandboxError, SandboxFileError
+from paasng.platform.agent_sandbox.exceptions import SandboxDaemonAPINotFound, SandboxError, SandboxFileError
 
 from .conftest import DEFAULT_WORKDIR
 
 pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
 
 
+def _read_and_raise_404(fileobj):
+    # An older daemon rejects the first chunk after it has been read
+    fileobj.read(4)
+    raise SandboxDaemonAPINotFound("HTTP error 404 on /files/upload/chunk: 404 page not found")
+
+
 class TestKubernetesPodSandboxWithStub:
     """Test KubernetesPodSandbox using StubDaemonClient backend.
 
@@ -61,6 +70,35 @@ class TestKubernetesPodSandboxWithStub:
         downloaded = stub_k8s_sandbox.download_file(remote_path)
         assert downloaded == payload
 
+    def test_upload_and_download_stream(self, stub_k8s_sandbox, stub_daemon_client):
+        """Test streaming file upload and download operations."""
+        payload = b"hello\x00world\n"
+        remote_path = f"{DEFAULT_WORKDIR}/stream.bin"
+
+        stub_k8s_sandbox.upload_stream(io.BytesIO(payload), remote_path)
+        assert stub_daemon_client._files[remote_path] == payload
+
+        chunks = list(stub_k8s_sandbox.download_stream(remote_path))
+        assert len(chunks) > 1
+        assert b"".join(chunks) == payload
+
+    def test_upload_stream_fallback(self, stub_k8s_sandbox, stub_daemon_client):
+        """Test that the whole file is uploaded when the daemon does not support chunked uploads."""
+        payload = b"hello\x00world\n"
+        remote_path = f"{DEFAULT_WORKDIR}/legacy.bin"
+
+        fileobj = io.BytesIO(payload)
+        with mock.patch.object(
+            stub_daemon_client, "upload_stream", side_effect=lambda fileobj, **kwargs: _read_and_raise_404(fileobj)
+        ):
+            stub_k8s_sandbox.upload_stream(fileobj, remote_path)
+        assert stub_daemon_client._files[remote_path] == payload
+
+    def test_download_stream_nonexistent_file(self, stub_k8s_sandbox):
+        """Test that the error of a missing file is raised before iterating."""
+        with pytest.raises(SandboxFileError, match="failed to download file"):
+            stub_k8s_sandbox.download_stream("/nonexistent/file.txt")
+
     def test_delete_file(self, stub_k8s_sandbox, stub_daemon_client):
         """Test file deletion from sandbox."""
         remote_path = f"{DEFAULT_WORKDIR}/to_delete.txt"
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import logging
+import time
+from typing import Any, Dict
+
+import pytest
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django_dynamic_fixture import G
+
+from paasng.platform.bkapp_model.manifest import get_bkapp_resource, get_cached_bkapp_resource
+from paasng.platform.bkapp_model.manifest_cache import (
+    AppliedManifestRecord,
+    ManifestRevision,
+    bump_manifest_revision,
+    diff_manifests,
+    get_section_digests,
+)
+from paasng.platform.bkapp_model.models import ModuleProcessSpec
+from paasng.platform.engine.models.config_var import ConfigVar
+from paasng.platform.engine.models.managers import ConfigVarManager
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+logger = logging.getLogger(__name__)
+
+
+class TestDiffManifests:
+    @pytest.fixture()
+    def manifest(self):
+        return {
+            "metadata": {"name": "foo"},
+            "spec": {"processes": [{"name": "web", "replicas": 1}], "hooks": None},
+        }
+
+    def test_section_digests(self, manifest):
+        digests = get_section_digests(manifest)
+        assert set(digests) == {"metadata", "spec.processes", "spec.hooks"}
+
+    def test_unknown_old(self, manifest):
+        diff = diff_manifests(None, get_section_digests(manifest))
+        assert diff.all_changed
+        assert diff.is_changed("spec.svcDiscovery")
+
+    def test_changed_sections(self, manifest):
+        old = get_section_digests(manifest)
+        manifest["spec"]["processes"][0]["replicas"] = 2
+        manifest["spec"]["svcDiscovery"] = {"bkSaaS": []}
+        diff = diff_manifests(old, get_section_digests(manifest))
+        assert not diff.all_changed
+        assert diff.changed_sections == ["spec.processes", "spec.svcDiscovery"]
+        assert not diff.is_changed("metadata")
+
+    def test_unchanged(self, manifest):
+        assert diff_manifests(get_section_digests(manifest), get_section_digests(manifest)).changed_sections == []
+
+
+@override_settings(BKAPP_MANIFEST_CACHE_TTL=300)
+class TestGetCachedBkAppResource:
+    @pytest.fixture(autouse=True)
+    def _setup(self, bk_module):
+        G(ModuleProcessSpec, module=bk_module, name="web", proc_command="start -b ${PORT:-5000}")
+        # Abandon the manifests cached by other tests
+        bump_manifest_revision(module_id=bk_module.pk, application_id=bk_module.application_id)
+
+    def test_cached(self, bk_module):
+        obj = get_cached_bkapp_resource(bk_module)
+        with (
+            CaptureQueriesContext(connections["default"]) as default_ctx,
+            CaptureQueriesContext(connections["workloads"]) as wl_ctx,
+        ):
+            cached_obj = get_cached_bkapp_resource(bk_module)
+
+        assert len(default_ctx.captured_queries) == 0
+        assert len(wl_ctx.captured_queries) == 0
+        assert cached_obj.to_deployable() == obj.to_deployable()
+        assert cached_obj.to_deployable() == get_bkapp_resource(bk_module).to_deployable()
+
+    def test_invalidated_by_model_changes(self, bk_module, bk_stag_env):
+        assert "FOO" not in get_cached_bkapp_resource(bk_module).json()
+
+        ConfigVar.objects.create(module=bk_module, environment=bk_stag_env, key="FOO", value="bar")
+        assert "FOO" in get_cached_bkapp_resource(bk_module).json()
+
+        ModuleProcessSpec.objects.filter(module=bk_module, name="web").delete()
+        G(ModuleProcessSpec, module=bk_module, name="worker", proc_command="celery")
+        assert get_cached_bkapp_resource(bk_module).spec.processes[0].name == "worker"
+
+    def test_invalidated_by_batch_save(self, bk_module, bk_stag_env):
+        assert "BAR" not in get_cached_bkapp_resource(bk_module).json()
+
+        ConfigVarManager().batch_save(
+            bk_module, [ConfigVar(module=bk_module, environment=bk_stag_env, key="BAR", value="baz")]
+        )
+        assert "BAR" in get_cached_bkapp_resource(bk_module).json()
+
+    def test_bumped_after_commit(self, bk_module):
+        revision = ManifestRevision()
+        with TestCase.captureOnCommitCallbacks() as callbacks:
+            bump_manifest_revision(module_id=bk_module.pk)
+            # A reader may cache the uncommitted data with this revision
+            bumped = revision.get(bk_module)
+
+        assert len(callbacks) == 1
+        callbacks[0]()
+        assert revision.get(bk_module) != bumped
+
+    def test_benchmark(self, bk_module):
+        def _build(func):
+            with (
+                CaptureQueriesContext(connections["default"]) as default_ctx,
+                CaptureQueriesContext(connections["workloads"]) as wl_ctx,
+            ):
+                started_at = time.perf_counter()
+                func(bk_module)
+                duration = time.perf_counter() - started_at
+            return len(default_ctx.captured_queries) + len(wl_ctx.captured_queries), duration
+
+        cold_queries, cold_duration = _build(get_cached_bkapp_resource)
+        cached_queries, cached_duration = _build(get_cached_bkapp_resource)
+        logger.info(
+            "Building manifest, cold: %s queries in %.2fms, cached: %s queries in %.2fms",
+            cold_queries,
+            cold_duration * 1000,
+            cached_queries,
+            cached_duration * 1000,
+        )
+        assert cached_queries < cold_queries
+
+
+class TestAppliedManifestRecord:
+    def test_diff(self, bk_stag_env):
+        manifest: Dict[str, Any] = {"metadata": {"name": "foo"}, "spec": {"processes": [{"name": "web"}]}}
+        record = AppliedManifestRecord(bk_stag_env)
+        record.redis_db.delete(record.key)
+        assert record.diff(manifest).all_changed
+
+        record.save(manifest)
+        assert record.diff(manifest).changed_sections == []
+
+        manifest["spec"]["svcDiscovery"] = {"bkSaaS": []}
+        diff = record.diff(manifest)
+        assert not diff.all_changed
+        assert diff.changed_sections == ["spec.svcDiscovery"]
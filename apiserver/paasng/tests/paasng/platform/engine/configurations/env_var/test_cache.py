@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+from unittest import mock
+
+import pytest
+from django.test.utils import override_settings
+
+from paasng.platform.engine.configurations.env_var.cache import EnvVarsSourceVersions, ResolvedEnvVarsCache
+from paasng.platform.engine.configurations.env_var.entities import EnvVariableList, EnvVariableObj
+
+
+@pytest.fixture()
+def env_list():
+    return EnvVariableList([EnvVariableObj(key="FOO", value="bar", description=None)])
+
+
+@override_settings(ENV_VARS_SOURCE_CACHE_TTL=600)
+class TestResolvedEnvVarsCache:
+    def test_get_set(self, env_list):
+        cache = ResolvedEnvVarsCache()
+        cache.set(1, "user_configured", "v1", env_list)
+
+        assert cache.get(1, "user_configured", "v1") == env_list
+        assert cache.get(1, "user_configured", "v2") is None
+        assert cache.get(2, "user_configured", "v1") is None
+
+    def test_result_copied(self, env_list):
+        cache = ResolvedEnvVarsCache()
+        cache.set(1, "user_configured", "v1", env_list)
+        cached = cache.get(1, "user_configured", "v1")
+        assert cached is not None
+        cached.append(EnvVariableObj(key="BAZ", value="1", description=None))
+        assert cache.get(1, "user_configured", "v1") == env_list
+
+    def test_lru(self, env_list):
+        cache = ResolvedEnvVarsCache(max_size=2)
+        cache.set(1, "user_configured", "v1", env_list)
+        cache.set(2, "user_configured", "v1", env_list)
+        cache.get(1, "user_configured", "v1")
+        cache.set(3, "user_configured", "v1", env_list)
+
+        assert cache.get(1, "user_configured", "v1") is not None
+        assert cache.get(2, "user_configured", "v1") is None
+
+    def test_expired(self, env_list):
+        cache = ResolvedEnvVarsCache()
+        with mock.patch("paasng.platform.engine.configurations.env_var.cache.time.monotonic", return_value=0):
+            cache.set(1, "user_configured", "v1", env_list)
+        with mock.patch("paasng.platform.engine.configurations.env_var.cache.time.monotonic", return_value=601):
+            assert cache.get(1, "user_configured", "v1") is None
+
+    def test_disabled(self, env_list):
+        cache = ResolvedEnvVarsCache()
+        with override_settings(ENV_VARS_SOURCE_CACHE_TTL=0):
+            cache.set(1, "user_configured", "v1", env_list)
+        assert cache.get(1, "user_configured", "v1") is None
+
+
+class TestEnvVarsSourceVersions:
+    def test_bump(self):
+        versions = EnvVarsSourceVersions()
+        ret = versions.get_many("foo-module", ["user_configured", "user_preset"])
+        assert ret == versions.get_many("foo-module", ["user_configured", "user_preset"])
+
+        versions.bump("foo-module", "user_configured")
+        new_ret = versions.get_many("foo-module", ["user_configured", "user_preset"])
+        assert new_ret["user_configured"] != ret["user_configured"]
+        assert new_ret["user_preset"] == ret["user_preset"]
+
+    def test_redis_unavailable(self):
+        versions = EnvVarsSourceVersions()
+        with mock.patch.object(versions, "redis_db") as redis_db:
+            redis_db.mget.side_effect = ConnectionError
+            assert versions.get_many("foo-module", ["user_configured"]) == {}
@@ -16,11 +16,13 @@
 # to the current version of the project delivered to anyone in the future.
 
 from textwrap import dedent
+from unittest import mock
 
 import pytest
 import yaml
 from blue_krill.contextlib import nullcontext as does_not_raise
 from django.conf import settings
+from django.test.utils import override_settings
 from django_dynamic_fixture import G
 
 from paasng.platform.applications.constants import ApplicationType
@@ -35,7 +37,11 @@ from paasng.platform.engine.configurations.config_var import (
     list_conflicted_env_vars_for_view,
     list_vars_builtin_runtime,
 )
+from paasng.platform.engine.configurations.env_var.cache import resolved_env_vars_cache
+from paasng.platform.engine.constants import ConfigVarEnvName
 from paasng.platform.engine.models.config_var import BuiltinConfigVar, ConfigVar
+from paasng.platform.engine.models.managers import ConfigVarManager
+from paasng.platform.engine.models.preset_envvars import PresetEnvVariable
 from paasng.platform.modules.models.module import Module
 from tests.utils.helpers import override_region_configs
 
@@ -265,3 +271,70 @@ class TestUnifiedEnvVarsReader:
 
         assert isinstance(conflicts, list)
         assert any(item.override_conflicted is not None for item in conflicts)
+
+
+def _spy_listers(reader: UnifiedEnvVarsReader) -> dict:
+    """Replace the listers of the reader with spies, return the spies by source"""
+    spies = {}
+    for source, func in reader._source_lister_func_map.items():
+        spies[source] = mock.Mock(wraps=func)
+    reader._source_lister_func_map = spies
+    return spies
+
+
+@pytest.mark.usefixtures("_with_wl_apps")
+class TestUnifiedEnvVarsReaderCache:
+    @pytest.fixture(autouse=True)
+    def _enable_cache(self):
+        resolved_env_vars_cache.clear()
+        with override_settings(ENV_VARS_SOURCE_CACHE_TTL=600):
+            yield
+        resolved_env_vars_cache.clear()
+
+    def test_source_listed_once_by_reader(self, bk_stag_env):
+        reader = UnifiedEnvVarsReader(bk_stag_env)
+        spies = _spy_listers(reader)
+
+        reader.get_kv_map()
+        reader.list_conflicted_info()
+        assert all(spy.call_count == 1 for spy in spies.values())
+
+    def test_versioned_sources_cached(self, bk_module, bk_stag_env):
+        ConfigVar.objects.create(module=bk_module, environment=bk_stag_env, key="FOO", value="bar")
+        env_vars = UnifiedEnvVarsReader(bk_stag_env).get_kv_map()
+
+        reader = UnifiedEnvVarsReader(bk_stag_env)
+        spies = _spy_listers(reader)
+        assert reader.get_kv_map() == env_vars
+        assert spies[EnvVarSource.USER_CONFIGURED].call_count == 0
+        assert spies[EnvVarSource.USER_PRESET].call_count == 0
+        # The sources which are not versioned are always listed
+        assert spies[EnvVarSource.BUILTIN_ADDONS].call_count == 1
+
+    def test_only_changed_source_relisted(self, bk_module, bk_stag_env):
+        UnifiedEnvVarsReader(bk_stag_env).get_kv_map()
+        ConfigVar.objects.create(module=bk_module, environment=bk_stag_env, key="FOO", value="bar")
+
+        reader = UnifiedEnvVarsReader(bk_stag_env)
+        spies = _spy_listers(reader)
+        assert reader.get_kv_map()["FOO"] == "bar"
+        assert spies[EnvVarSource.USER_CONFIGURED].call_count == 1
+        assert spies[EnvVarSource.USER_PRESET].call_count == 0
+
+        PresetEnvVariable.objects.create(
+            module=bk_module, environment_name=ConfigVarEnvName.GLOBAL, key="BAZ", value="1"
+        )
+        assert UnifiedEnvVarsReader(bk_stag_env).get_kv_map()["BAZ"] == "1"
+
+    def test_invalidated_by_batch_save(self, bk_module, bk_stag_env):
+        var = ConfigVar.objects.create(module=bk_module, environment=bk_stag_env, key="FOO", value="bar")
+        assert UnifiedEnvVarsReader(bk_stag_env).get_kv_map()["FOO"] == "bar"
+
+        var.value = "baz"
+        ConfigVarManager().batch_save(bk_module, [var])
+        assert UnifiedEnvVarsReader(bk_stag_env).get_kv_map()["FOO"] == "baz"
+
+    def test_other_env_not_affected(self, bk_module, bk_stag_env, bk_prod_env):
+        ConfigVar.objects.create(module=bk_module, environment=bk_stag_env, key="FOO", value="bar")
+        assert "FOO" not in UnifiedEnvVarsReader(bk_prod_env).get_kv_map()
+        assert UnifiedEnvVarsReader(bk_stag_env).get_kv_map()["FOO"] == "bar"
@@ -19,13 +19,18 @@ import uuid
 from unittest import mock
 
 import pytest
-from blue_krill.async_utils.poll_task import CallbackResult, CallbackStatus
+from blue_krill.async_utils.poll_task import CallbackResult, CallbackStatus, PollingMetadata
 
 from paasng.platform.declarative.handlers import get_deploy_desc_handler
 from paasng.platform.engine.constants import JobStatus
-from paasng.platform.engine.deploy.building import ApplicationBuilder, BuildProcessResultHandler, DockerBuilder
+from paasng.platform.engine.deploy.building import (
+    ApplicationBuilder,
+    BuildProcessPoller,
+    BuildProcessResultHandler,
+    DockerBuilder,
+)
 from paasng.platform.engine.handlers import attach_all_phases
-from paasng.platform.engine.models import Deployment, DeployPhaseTypes
+from paasng.platform.engine.models import Deployment, DeployPhase, DeployPhaseTypes
 from paasng.platform.engine.phases_steps.phases import DeployPhaseManager
 from paasng.platform.sourcectl.exceptions import GetAppYamlError, GetProcfileError
 from tests.utils.mocks.poll_task import FakeTaskPoller
@@ -231,3 +236,31 @@ class TestBuildProcessResultHandler:
             deployment.refresh_from_db()
             assert deployment.status == JobStatus.PENDING.value
             assert mocked_release_mgr.called
+
+
+class TestBuildProcessPollerUpdateSteps:
+    @pytest.fixture()
+    def poller(self, bk_deployment, build_proc):
+        DeployPhase.objects.create(
+            type=DeployPhaseTypes.BUILD.value,
+            engine_app=bk_deployment.get_engine_app(),
+            deployment=bk_deployment,
+            tenant_id=bk_deployment.tenant_id,
+        )
+        params = {"deployment_id": bk_deployment.id, "build_process_id": build_proc.pk}
+        return BuildProcessPoller(params, PollingMetadata(retries=0, query_started_at=0, queried_count=0))
+
+    def test_only_new_lines_scanned(self, poller, bk_deployment, build_proc):
+        build_proc.output_stream.bulk_write([("line-1", "STDOUT"), ("line-2", "STDOUT")])
+        with mock.patch("paasng.platform.engine.deploy.building.PhaseStepsUpdater") as mocked_updater:
+            poller.update_steps(bk_deployment, build_proc)
+            assert [c.args[0] for c in mocked_updater().update_by_line.call_args_list] == ["line-1", "line-2"]
+
+            mocked_updater.reset_mock()
+            build_proc.output_stream.bulk_write([("line-3", "STDOUT")])
+            poller.update_steps(bk_deployment, build_proc)
+            assert [c.args[0] for c in mocked_updater().update_by_line.call_args_list] == ["line-3"]
+
+            mocked_updater.reset_mock()
+            poller.update_steps(bk_deployment, build_proc)
+            assert not mocked_updater().update_by_line.called
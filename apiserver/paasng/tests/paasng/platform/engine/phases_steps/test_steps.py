@@ -16,11 +16,19 @@
 # to the current version of the project delivered to anyone in the future.
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from paasng.platform.engine.constants import JobStatus
 from paasng.platform.engine.models import Deployment, DeployPhase, DeployPhaseTypes
 from paasng.platform.engine.models.steps import DeployStep, DeployStepMeta, StepMetaSet
-from paasng.platform.engine.phases_steps.steps import DeployStepPicker, update_step_by_line
+from paasng.platform.engine.phases_steps.steps import (
+    DeployStepPicker,
+    PhaseStepsUpdater,
+    StepPatternMatcher,
+    get_step_pattern_matcher,
+    update_step_by_line,
+)
 from paasng.platform.modules.helpers import ModuleRuntimeBinder
 from paasng.platform.modules.models import AppSlugBuilder, AppSlugRunner
 
@@ -253,3 +261,58 @@ class TestUpdateStepByLine:
             steps_status[x["name"]] = x["status"]
 
         assert steps_status == expected
+
+    def test_steps_loaded_once(self, phase_factory):
+        phase = phase_factory(DeployPhaseTypes.BUILD, {"aa": (["xxx"], ["yyy"]), "bb": (["qqq"], ["www"])})
+        saved_maps = {
+            JobStatus.PENDING: phase.get_started_pattern_map(),
+            JobStatus.SUCCESSFUL: phase.get_finished_pattern_map(),
+        }
+        updater = PhaseStepsUpdater(phase, saved_maps)
+        # Warm up the step objects
+        updater.update_by_line("xxx")
+
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(100):
+                updater.update_by_line("no match")
+            updater.update_by_line("yyy")
+        # Only the queries for marking the step "aa" as successful
+        assert 0 < len(ctx.captured_queries) < 5
+        assert phase.steps.get(name="aa").status == "successful"
+
+
+class TestStepPatternMatcher:
+    @pytest.mark.parametrize(
+        ("line", "expected"),
+        [
+            ("foo", []),
+            ("Step setup BEGIN", [(JobStatus.PENDING, "setup")]),
+            ("step setup done, step build begin", [(JobStatus.PENDING, "build"), (JobStatus.SUCCESSFUL, "setup")]),
+            ("x" * 2048 + "step setup begin", []),
+        ],
+    )
+    def test_match(self, line, expected):
+        matcher = StepPatternMatcher(
+            {
+                JobStatus.PENDING: {"step setup begin": "setup", "step build begin": "build"},
+                JobStatus.SUCCESSFUL: {"step setup done": "setup"},
+            }
+        )
+        assert matcher.match(line) == expected
+
+    def test_uncombinable_patterns(self):
+        matcher = StepPatternMatcher(
+            {JobStatus.PENDING: {"(b)x": "bx", r"(a)\1": "aa", "[invalid": "bad", "(?P<n>c)": "c"}},
+        )
+        assert matcher.match("xaax") == [(JobStatus.PENDING, "aa")]
+        assert matcher.match("xax") == []
+        assert matcher.match("bx c") == [(JobStatus.PENDING, "bx"), (JobStatus.PENDING, "c")]
+
+        # The same group name is used in different patterns
+        matcher = StepPatternMatcher({JobStatus.PENDING: {"(?P<n>a)": "a"}, JobStatus.SUCCESSFUL: {"(?P<n>b)": "b"}})
+        assert matcher.match("b") == [(JobStatus.SUCCESSFUL, "b")]
+
+    def test_cached(self):
+        maps = {JobStatus.PENDING: {"foo": "a"}, JobStatus.SUCCESSFUL: {"bar": "a"}}
+        assert get_step_pattern_matcher(maps) is get_step_pattern_matcher(dict(maps))
+        assert get_step_pattern_matcher(maps) is not get_step_pattern_matcher({JobStatus.PENDING: {"foo": "b"}})
@@ -15,11 +15,25 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import logging
+import time
+import uuid
 from unittest import mock
 
 import pytest
+from blue_krill.redis_tools.messaging import StreamChannel, StreamChannelSubscriber
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
 
-from paasng.platform.engine.utils.output import ConsoleStream, RedisWithModelStream, sanitize_message
+from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.platform.engine.utils.output import (
+    BufferedRedisWithModelStream,
+    ConsoleStream,
+    RedisWithModelStream,
+    sanitize_message,
+)
+
+logger = logging.getLogger(__name__)
 
 pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
 
@@ -63,3 +77,84 @@ class TestMixStream:
     def test_write_title(self, build_proc):
         RedisWithModelStream(build_proc, mock.MagicMock()).write_title("title")
         assert build_proc.output_stream.lines.count() == 0, "title should not be saved"
+
+
+@pytest.fixture()
+def stream_channel():
+    channel = StreamChannel(uuid.uuid4().hex, redis_db=get_default_redis())
+    channel.initialize()
+    yield channel
+    channel.destroy()
+
+
+class TestBufferedStream:
+    def test_flush_by_size(self, build_proc, stream_channel):
+        stream = BufferedRedisWithModelStream(
+            build_proc.output_stream, stream_channel, max_batch_size=3, flush_interval=None
+        )
+        for i in range(4):
+            stream.write_message(f"line {i}")
+        assert build_proc.output_stream.lines.count() == 3
+
+        stream.flush()
+        assert list(build_proc.output_stream.lines.values_list("line", flat=True)) == [
+            "line 0\n",
+            "line 1\n",
+            "line 2\n",
+            "line 3\n",
+        ]
+
+    def test_events_order(self, build_proc, stream_channel):
+        stream = BufferedRedisWithModelStream(build_proc.output_stream, stream_channel, flush_interval=None)
+        stream.write_message("foo")
+        stream.write_title("title")
+        stream.write_message("bar", "STDERR")
+        stream.close()
+
+        subscriber = StreamChannelSubscriber(stream_channel.channel_id, redis_db=get_default_redis())
+        events = subscriber.get_history_events()
+        assert [e["event"] for e in events] == ["msg", "title", "msg"]
+        assert [e["id"] for e in events] == [2, 3, 4]
+        # The "last_event_id" should work as usual
+        assert [e["id"] for e in subscriber.get_history_events(last_event_id=3)] == [4]
+
+    def test_flush_by_time(self, build_proc, stream_channel):
+        stream = BufferedRedisWithModelStream(build_proc.output_stream, stream_channel, flush_interval=0.1)
+        # The flusher thread uses its own database connection, so only the redis channel is checked
+        with mock.patch.object(build_proc.output_stream, "bulk_write"):
+            stream.write_message("foo")
+            time.sleep(0.5)
+
+        subscriber = StreamChannelSubscriber(stream_channel.channel_id, redis_db=get_default_redis())
+        assert [e["event"] for e in subscriber.get_history_events()] == ["msg"]
+
+
+class TestStreamWriterBenchmark:
+    """Compare the database writes of the buffered writer with the plain writer, the throughput
+    numbers are only logged because wall-clock timing is unreliable on shared machines.
+    """
+
+    LINES_COUNT = 2000
+
+    def _write_lines(self, stream) -> float:
+        started_at = time.perf_counter()
+        for i in range(self.LINES_COUNT):
+            stream.write_message(f"npm http fetch GET 200 https://registry.example.com/pkg-{i} 12ms")
+        stream.flush()
+        return self.LINES_COUNT / (time.perf_counter() - started_at)
+
+    def test_rows_per_second(self, build_proc, stream_channel):
+        output_stream = build_proc.output_stream
+
+        plain_stream = RedisWithModelStream(output_stream, stream_channel)
+        with CaptureQueriesContext(connections["workloads"]) as plain_ctx:
+            plain_rps = self._write_lines(plain_stream)
+
+        buffered_stream = BufferedRedisWithModelStream(output_stream, stream_channel, flush_interval=None)
+        with CaptureQueriesContext(connections["workloads"]) as buffered_ctx:
+            buffered_rps = self._write_lines(buffered_stream)
+
+        logger.info("Stream writer rows/s, plain: %.1f, buffered: %.1f", plain_rps, buffered_rps)
+        assert output_stream.lines.count() == self.LINES_COUNT * 2
+        assert len(plain_ctx.captured_queries) >= self.LINES_COUNT
+        assert len(buffered_ctx.captured_queries) * 100 <= len(plain_ctx.captured_queries)
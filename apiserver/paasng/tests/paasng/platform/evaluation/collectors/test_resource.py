@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+from unittest import mock
+
+import pytest
+
+from paasng.platform.evaluation.collectors.resource import AppResQuotaCollector
+from tests.utils.helpers import create_app
+
+pytestmark = pytest.mark.django_db
+
+
+class TestAppResQuotaCollector:
+    @pytest.fixture()
+    def apps(self):
+        return [create_app(), create_app()]
+
+    @pytest.fixture(autouse=True)
+    def _list_proc_managers(self):
+        def _list(collector, env):
+            return [({"name": "web"}, mock.Mock(app_code=collector.app.code))]
+
+        with mock.patch.object(AppResQuotaCollector, "_list_proc_managers", autospec=True, side_effect=_list):
+            yield
+
+    @mock.patch.object(AppResQuotaCollector, "_make_app_summary", autospec=True)
+    def test_fallback_to_query_by_app(self, make_app_summary, apps):
+        failed_app_code = apps[0].code
+
+        def _query(managers, **kwargs):
+            if any(mgr.app_code == failed_app_code for mgr in managers):
+                raise ValueError("bad query")
+            return [[] for _ in managers]
+
+        with mock.patch(
+            "paasng.platform.evaluation.collectors.resource.query_processes_metrics", side_effect=_query
+        ) as query:
+            AppResQuotaCollector.collect_in_batch(apps)
+
+        # One query for the batch, then one query for each app
+        assert query.call_count == 3
+        metrics = make_app_summary.call_args.args[2]
+        assert {mgr.app_code for mgr in query.call_args_list[2].args[0]} == {apps[1].code}
+        # Only the metrics of the processes of the app which succeed are collected
+        assert len(metrics) == 2
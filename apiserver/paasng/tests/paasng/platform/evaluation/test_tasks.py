@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import time
+from unittest import mock
+
+import pytest
+from django.test.utils import override_settings
+
+from paasng.platform.evaluation.constants import BatchTaskStatus
+from paasng.platform.evaluation.models import AppOperationReportCollectionTask
+from paasng.platform.evaluation.tasks import CollectionCheckpoint, collect_and_update_app_operation_reports
+from tests.utils.helpers import create_app
+
+pytestmark = pytest.mark.django_db
+
+
+class TestCollectionCheckpoint:
+    @pytest.fixture()
+    def checkpoint(self):
+        checkpoint = CollectionCheckpoint(task_id=0)
+        checkpoint.init(["app-a", "app-b", "app-c"], resumable=True)
+        yield checkpoint
+        checkpoint.clear()
+
+    def test_progress(self, checkpoint):
+        checkpoint.mark_collected("app-a", succeed=True)
+        checkpoint.mark_collected("app-b", succeed=False)
+
+        assert checkpoint.list_pending() == ["app-c"]
+        assert checkpoint.get_progress() == (2, ["app-b"])
+        assert checkpoint.is_resumable()
+        assert checkpoint.is_active()
+
+    def test_inactive(self, checkpoint):
+        with mock.patch(
+            "paasng.platform.evaluation.tasks.time.time",
+            return_value=time.time() + CollectionCheckpoint.inactive_threshold + 1,
+        ):
+            assert not checkpoint.is_active()
+
+
+@mock.patch("paasng.platform.evaluation.tasks.fetch_role_members_in_bulk", return_value={})
+@mock.patch("paasng.platform.evaluation.tasks.AppResQuotaCollector.collect_in_batch", return_value=[])
+@mock.patch("paasng.platform.evaluation.tasks._update_or_create_operation_report")
+class TestCollectAppOperationReports:
+    @pytest.fixture()
+    def apps(self):
+        return sorted([create_app(), create_app(), create_app()], key=lambda app: app.code)
+
+    @override_settings(APP_OPERATION_REPORT_COLLECT_SHARD_SIZE=2)
+    def test_collect_in_shards(self, update_report, collect_in_batch, fetch_members, apps):
+        update_report.side_effect = lambda app, *args: _raise_if(app.code == apps[1].code)
+        collect_and_update_app_operation_reports([app.code for app in apps], async_shards=False)
+
+        # 3 apps are split into 2 shards
+        assert collect_in_batch.call_count == 2
+        assert update_report.call_count == 3
+        task = AppOperationReportCollectionTask.objects.latest("start_at")
+        assert task.status == BatchTaskStatus.FINISHED
+        assert task.succeed_count == 2
+        assert task.failed_app_codes == [apps[1].code]
+
+    def test_resume(self, update_report, collect_in_batch, fetch_members, apps):
+        # An interrupted full collection task which has collected the first app
+        task = AppOperationReportCollectionTask.objects.create(total_count=len(apps))
+        checkpoint = CollectionCheckpoint(task.id)
+        checkpoint.init([app.code for app in apps], resumable=True)
+        checkpoint.mark_collected(apps[0].code, succeed=True)
+
+        # Skip the collection if the task is still running
+        collect_and_update_app_operation_reports([], async_shards=False)
+        assert update_report.call_count == 0
+
+        with mock.patch.object(CollectionCheckpoint, "is_active", return_value=False):
+            collect_and_update_app_operation_reports([], async_shards=False)
+
+        assert [c.args[0].code for c in update_report.call_args_list] == [app.code for app in apps[1:]]
+        task.refresh_from_db()
+        assert task.status == BatchTaskStatus.FINISHED
+        assert task.succeed_count == len(apps)
+
+    def test_abandon_unresumable(self, update_report, collect_in_batch, fetch_members, apps):
+        # The checkpoint of the task has expired
+        expired_task = AppOperationReportCollectionTask.objects.create(total_count=len(apps), succeed_count=1)
+        # An interrupted task which collects the specified apps
+        partial_task = AppOperationReportCollectionTask.objects.create(total_count=1)
+        checkpoint = CollectionCheckpoint(partial_task.id)
+        checkpoint.init([apps[0].code], resumable=False)
+
+        with mock.patch.object(CollectionCheckpoint, "is_active", return_value=False):
+            collect_and_update_app_operation_reports([], async_shards=False)
+
+        expired_task.refresh_from_db()
+        assert expired_task.status == BatchTaskStatus.FINISHED
+        assert expired_task.succeed_count == 1
+        partial_task.refresh_from_db()
+        assert partial_task.status == BatchTaskStatus.FINISHED
+        assert not checkpoint.exists()
+        # A new full collection task was started
+        assert update_report.call_count == len(apps)
+
+
+def _raise_if(cond: bool):
+    if cond:
+        raise RuntimeError("collect failed")
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import gzip
+import io
+import random
+import tarfile
+from contextlib import contextmanager
+from unittest import mock
+
+import pytest
+from blue_krill.contextlib import nullcontext as does_not_raise
+from django.test.utils import override_settings
+
+from paasng.platform.sourcectl.exceptions import (
+    PackageIndexUnavailableError,
+    ReadFileNotFoundError,
+    ReadLinkFileOutsideDirectoryError,
+)
+from paasng.platform.sourcectl.package.indexed import (
+    GzipRangeFile,
+    IndexedPackageClient,
+    LocalFileRangeReader,
+    build_package_index,
+)
+from paasng.platform.sourcectl.utils import generate_temp_dir, generate_temp_file
+from tests.paasng.platform.sourcectl.packages.utils import dump_contents_to_fs, gen_tar, gen_zip
+
+
+def gen_plain_tar(target_path, contents=None, symbolic_links=None):
+    """Generate an uncompressed tarball"""
+    with (
+        dump_contents_to_fs(contents=contents, symbolic_links=symbolic_links) as source_dir,
+        tarfile.open(target_path, mode="w:") as tar,
+    ):
+        tar.add(source_dir, arcname=".")
+
+
+@contextmanager
+def make_client(archive_maker, contents, symbolic_links=None, relative_path="./", digest=None):
+    with generate_temp_file() as file_path:
+        archive_maker(file_path, contents, symbolic_links)
+        with IndexedPackageClient(LocalFileRangeReader(file_path), relative_path, digest=digest) as client:
+            yield client
+
+
+@pytest.mark.parametrize(
+    ("archive_maker", "expected_format"), [(gen_tar, "tar.gz"), (gen_plain_tar, "tar"), (gen_zip, "zip")]
+)
+class TestIndexedPackageClient:
+    @pytest.mark.parametrize(
+        ("contents", "filename", "ctx", "expected"),
+        [
+            ({"File": "A: B\n"}, "File", does_not_raise(), b"A: B\n"),
+            ({"File": "A: B\n"}, "./File", does_not_raise(), b"A: B\n"),
+            ({"foo/File": "A: B\n"}, "foo/File", does_not_raise(), b"A: B\n"),
+            ({"File": b"\x00" * 300 * 1024}, "File", does_not_raise(), b"\x00" * 300 * 1024),
+            ({"File": "A: B\n"}, "file", pytest.raises(ReadFileNotFoundError), None),
+            ({"foo/File": "A: B\n"}, "foo", pytest.raises(ReadFileNotFoundError), None),
+        ],
+    )
+    def test_read_file(self, archive_maker, expected_format, contents, filename, ctx, expected):
+        with make_client(archive_maker, contents) as client:
+            assert client.index.format == expected_format
+            with ctx:
+                assert client.read_file(filename) == expected
+
+    def test_relative_path(self, archive_maker, expected_format):
+        with make_client(archive_maker, {"foo/Procfile": "web: run"}, relative_path="./foo/") as client:
+            assert client.read_file("Procfile") == b"web: run"
+
+    def test_read_many_files(self, archive_maker, expected_format):
+        contents = {f"dir{i}/file{i}": f"content-{i}" * i for i in range(50)}
+        with make_client(archive_maker, contents) as client:
+            for name, content in contents.items():
+                assert client.read_file(name) == content.encode()
+
+    def test_cached(self, archive_maker, expected_format):
+        digest = f"test-{archive_maker.__name__}"
+        with override_settings(SOURCE_PACKAGE_INDEX_CACHE_TTL=60):
+            with make_client(archive_maker, {"File": "A: B\n"}, digest=digest) as client:
+                assert client.read_file("File") == b"A: B\n"
+
+            # The package won't be read again when both the index and the file are cached
+            with make_client(archive_maker, {"File": "A: B\n"}, digest=digest) as client:
+                with mock.patch.object(LocalFileRangeReader, "read_range") as read_range:
+                    assert client.read_file("File") == b"A: B\n"
+                    with pytest.raises(ReadFileNotFoundError):
+                        client.read_file("Other")
+                assert not read_range.called
+
+
+@pytest.mark.parametrize("archive_maker", [gen_tar, gen_plain_tar])
+class TestIndexedPackageClientSymlinks:
+    @pytest.mark.parametrize(
+        ("symbolic_links", "filename", "ctx", "expected"),
+        [
+            ({"link": "File"}, "link", does_not_raise(), b"A: B\n"),
+            ({"foo/link": "../File"}, "foo/link", does_not_raise(), b"A: B\n"),
+            ({"link": "../File"}, "link", pytest.raises(ReadLinkFileOutsideDirectoryError), None),
+            ({"link": "/etc/passwd"}, "link", pytest.raises(ReadLinkFileOutsideDirectoryError), None),
+        ],
+    )
+    def test_read_link(self, archive_maker, symbolic_links, filename, ctx, expected):
+        with make_client(archive_maker, {"File": "A: B\n"}, symbolic_links) as client, ctx:
+            assert client.read_file(filename) == expected
+
+    def test_export(self, archive_maker):
+        with make_client(archive_maker, {"foo/File": "A: B\n"}) as client, generate_temp_dir() as working_dir:
+            client.export(str(working_dir))
+            assert (working_dir / "foo/File").read_text() == "A: B\n"
+
+
+class TestGzipRangeFile:
+    @pytest.fixture()
+    def data(self):
+        return random.Random(42).randbytes(1024 * 1024)
+
+    @contextmanager
+    def open_file(self, content: bytes):
+        with generate_temp_file() as file_path:
+            file_path.write_bytes(content)
+            reader = LocalFileRangeReader(file_path)
+            yield io.BufferedReader(GzipRangeFile(reader, span=64 * 1024))
+            reader.close()
+
+    def test_seek(self, data):
+        with self.open_file(gzip.compress(data)) as fileobj:
+            assert fileobj.read() == data
+            # Access points were saved while decompressing
+            assert len(fileobj.raw._points) > 1
+            for offset, size in [(900 * 1024, 100), (0, 10), (300 * 1024, 200 * 1024), (len(data) - 1, 10)]:
+                fileobj.seek(offset)
+                assert fileobj.read(size) == data[offset : offset + size]
+
+    def test_multi_members(self, data):
+        content = gzip.compress(data[:1000]) + gzip.compress(data[1000:]) + b"\x00" * 512
+        with self.open_file(content) as fileobj:
+            fileobj.seek(500 * 1024)
+            assert fileobj.read() == data[500 * 1024 :]
+            fileobj.seek(0)
+            assert fileobj.read(2000) == data[:2000]
+
+
+def test_unsupported_format():
+    with generate_temp_file() as file_path:
+        file_path.write_bytes(b"not a package" * 100)
+        reader = LocalFileRangeReader(file_path)
+        with pytest.raises(PackageIndexUnavailableError):
+            build_package_index(reader)
+        reader.close()
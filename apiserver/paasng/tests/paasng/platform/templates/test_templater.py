@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.test.utils import override_settings
+
+from paasng.platform.sourcectl.utils import generate_temp_dir
+from paasng.platform.templates.cache import TemplateArtifactCache
+from paasng.platform.templates.templater import TemplateRenderer
+
+pytestmark = pytest.mark.django_db
+
+
+def _make_fetch(content: str):
+    def _fetch() -> Path:
+        path = Path(tempfile.mkdtemp())
+        (path / "app.py").write_text(content)
+        return path
+
+    return _fetch
+
+
+class TestTemplateArtifactCache:
+    def test_get_or_fetch(self, tmp_path):
+        cache = TemplateArtifactCache(tmp_path, max_entries=10)
+        fetch = mock.Mock(side_effect=_make_fetch("v1"))
+
+        path = cache.get_or_fetch("foo", "rev1", fetch)
+        assert (path / "app.py").read_text() == "v1"
+        assert cache.get_or_fetch("foo", "rev1", fetch) == path
+        assert fetch.call_count == 1
+
+        # A new revision should be fetched again
+        path_v2 = cache.get_or_fetch("foo", "rev2", _make_fetch("v2"))
+        assert path_v2 != path
+        assert (path_v2 / "app.py").read_text() == "v2"
+
+    def test_fetch_failed(self, tmp_path):
+        cache = TemplateArtifactCache(tmp_path, max_entries=10)
+        with pytest.raises(RuntimeError, match="boom"):
+            cache.get_or_fetch("foo", "rev1", mock.Mock(side_effect=RuntimeError("boom")))
+
+        path = cache.get_or_fetch("foo", "rev1", _make_fetch("v1"))
+        assert (path / "app.py").read_text() == "v1"
+
+    def test_concurrent_fetch(self, tmp_path):
+        cache = TemplateArtifactCache(tmp_path, max_entries=10)
+        fetch_count = 0
+
+        def _slow_fetch():
+            nonlocal fetch_count
+            fetch_count += 1
+            time.sleep(0.2)
+            return _make_fetch("v1")()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_fetch("foo", "rev1", _slow_fetch)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert fetch_count == 1
+        assert len(set(results)) == 1
+
+    def test_prune(self, tmp_path):
+        cache = TemplateArtifactCache(tmp_path, max_entries=2)
+        paths = [cache.get_or_fetch("foo", f"rev{i}", _make_fetch(str(i))) for i in range(3)]
+
+        assert not paths[0].exists()
+        assert paths[1].exists()
+        assert paths[2].exists()
+
+
+@pytest.mark.usefixtures("_init_tmpls")
+class TestTemplateRendererCache:
+    @pytest.fixture
+    def context(self, bk_app, bk_user):
+        return {
+            "region": settings.DEFAULT_REGION_NAME,
+            "owner_username": bk_user.username,
+            "app_code": bk_app.code,
+            "app_secret": "fake-secret-created-by-unittests",
+            "app_name": bk_app.name,
+        }
+
+    def test_write_to_dir_cached(self, tmp_path, context):
+        with (
+            override_settings(TEMPLATE_ARTIFACT_CACHE_DIR=str(tmp_path)),
+            mock.patch.object(
+                TemplateRenderer,
+                "download_from_blob_storage",
+                autospec=True,
+                side_effect=TemplateRenderer.download_from_blob_storage,
+            ) as mocked_download,
+        ):
+            outputs = []
+            for _ in range(3):
+                renderer = TemplateRenderer(settings.DUMMY_TEMPLATE_NAME, context)
+                with generate_temp_dir() as target_path:
+                    renderer.write_to_dir(target_path)
+                    outputs.append(sorted(str(p.relative_to(target_path)) for p in target_path.rglob("*")))
+                assert set(renderer.timings) == {"download", "render"}
+
+        assert mocked_download.call_count == 1
+        assert outputs[0]
+        assert outputs[0] == outputs[1] == outputs[2]
+
+    def test_write_to_dir_no_cache(self, context):
+        with mock.patch.object(
+            TemplateRenderer,
+            "download_from_blob_storage",
+            autospec=True,
+            side_effect=TemplateRenderer.download_from_blob_storage,
+        ) as mocked_download:
+            for _ in range(2):
+                with generate_temp_dir() as target_path:
+                    TemplateRenderer(settings.DUMMY_TEMPLATE_NAME, context).write_to_dir(target_path)
+
+        assert mocked_download.call_count == 2
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import gzip
+import hashlib
+import os
+
+import pytest
+
+from paasng.utils.moby_distribution.registry.digest_cache import LayerDigestCache, LayerDigests
+from paasng.utils.moby_distribution.registry.resources.image import sign_layer
+
+
+@pytest.fixture()
+def layer_content() -> bytes:
+    return os.urandom(1024 * 1024) + b"\0" * 1024 * 1024
+
+
+def sha256(content: bytes) -> str:
+    return "sha256:" + hashlib.sha256(content).hexdigest()
+
+
+class TestSignLayer:
+    def test_gzipped(self, tmp_path, layer_content):
+        path = tmp_path / "layer.tar.gz"
+        path.write_bytes(gzip.compress(layer_content))
+
+        digests = sign_layer(path)
+        assert digests.digest == sha256(path.read_bytes())
+        assert digests.size == path.stat().st_size
+        assert digests.diff_id == sha256(layer_content)
+
+    def test_uncompressed(self, tmp_path, layer_content):
+        path = tmp_path / "layer.tar"
+        path.write_bytes(layer_content)
+
+        digests = sign_layer(path)
+        assert digests.digest == digests.diff_id == sha256(layer_content)
+        assert digests.size == len(layer_content)
+
+
+class TestLayerDigestCache:
+    @pytest.fixture()
+    def layer_path(self, tmp_path):
+        path = tmp_path / "layer.tar"
+        path.write_bytes(b"foo")
+        return path
+
+    @pytest.fixture()
+    def digests(self):
+        return LayerDigests(digest="sha256:foo", size=3, diff_id="sha256:bar")
+
+    def test_local(self, layer_path, digests):
+        cache = LayerDigestCache()
+        assert cache.get_local(layer_path) is None
+        cache.set_local(layer_path, digests)
+        assert cache.get_local(layer_path) == digests
+
+        # The entry becomes invalid once the file has been modified
+        layer_path.write_bytes(b"foobar")
+        assert cache.get_local(layer_path) is None
+
+    def test_remote(self, digests):
+        cache = LayerDigestCache()
+        assert cache.get_remote(digests.digest) is None
+        cache.set_remote(digests)
+        assert cache.get_remote(digests.digest) == digests
+
+    def test_persisted(self, tmp_path, layer_path, digests):
+        LayerDigestCache(cache_dir=tmp_path / "cache").set_local(layer_path, digests)
+        assert LayerDigestCache(cache_dir=tmp_path / "cache").get_local(layer_path) == digests
+        assert LayerDigestCache().get_local(layer_path) is None
+
+    def test_max_entries(self, digests):
+        cache = LayerDigestCache(max_entries=2)
+        for i in range(3):
+            cache.set_remote(digests._replace(digest=f"sha256:{i}"))
+        assert cache.get_remote("sha256:0") is None
+        assert cache.get_remote("sha256:2") is not None
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import json
+import time
+from unittest import mock
+
+import pytest
+
+from paasng.misc.metrics import API_LOG_DROPPED_COUNTER
+from paasng.utils.api_middleware import ApiLogMiddleware, ApiLogRecord, ApiLogShipper
+
+
+def make_record(i: int = 0, content: bytes = b"{}") -> ApiLogRecord:
+    data = {"path": f"/api/{i}/", "params": {"a": "1"}, "response_content": content}
+    return ApiLogRecord(data, truncate=ApiLogMiddleware(None).truncate)
+
+
+@pytest.fixture()
+def redis_client():
+    return mock.MagicMock()
+
+
+@pytest.fixture()
+def make_shipper(redis_client):
+    def _make(background: bool = False, **kwargs) -> ApiLogShipper:
+        config = {"url": "redis://localhost:6379/0", "queue_name": "test-queue", "tags": ["foo"], **kwargs}
+        shipper = ApiLogShipper(config)
+        shipper._redis_client = redis_client
+        if not background:
+            # Flush manually to get a deterministic result
+            shipper._ensure_flusher = mock.MagicMock()  # type: ignore[method-assign]
+        return shipper
+
+    return _make
+
+
+class TestApiLogRecord:
+    @pytest.mark.parametrize(
+        ("content", "expected"),
+        [
+            (b'{"foo": "bar"}', '{"foo": "bar"}'),
+            (b"a" * 1025, "a" * 1024 + "...(truncated)"),
+            # The multi-byte character which is cut off is ignored
+            (b"a" * 1023 + "中".encode(), "a" * 1023 + "...(truncated)"),
+        ],
+    )
+    def test_dumps(self, content, expected):
+        doc = json.loads(make_record(content=content).dumps(tags=["foo"]))
+        assert doc["response_content"] == expected
+        assert doc["params"] == '{"a": "1"}'
+        assert doc["tags"] == ["foo"]
+
+
+class TestApiLogShipper:
+    def test_ship_by_batches(self, make_shipper, redis_client):
+        shipper = make_shipper(batch_size=2)
+        for i in range(5):
+            shipper.put(make_record(i))
+        shipper.flush()
+
+        assert redis_client.rpush.call_count == 3
+        shipped = [json.loads(v)["path"] for c in redis_client.rpush.call_args_list for v in c.args[1:]]
+        assert shipped == [f"/api/{i}/" for i in range(5)]
+
+    def test_ship_in_background(self, make_shipper, redis_client):
+        shipper = make_shipper(background=True, flush_interval=0.1)
+        shipper.put(make_record())
+        time.sleep(0.5)
+        assert redis_client.rpush.call_count == 1
+
+    def test_drop_oldest(self, make_shipper, redis_client):
+        shipper = make_shipper(max_queue_size=3)
+        dropped = API_LOG_DROPPED_COUNTER.labels(reason="queue_full")
+        dropped_before = dropped._value.get()
+        for i in range(5):
+            shipper.put(make_record(i))
+        shipper.flush()
+
+        assert dropped._value.get() - dropped_before == 2
+        shipped = [json.loads(v)["path"] for v in redis_client.rpush.call_args.args[1:]]
+        assert shipped == ["/api/2/", "/api/3/", "/api/4/"]
+
+    def test_redis_error(self, make_shipper, redis_client):
+        redis_client.rpush.side_effect = ConnectionError
+        shipper = make_shipper()
+        shipper.put(make_record())
+        # Errors are swallowed, the records are dropped
+        shipper.flush()
+        assert not shipper._queue
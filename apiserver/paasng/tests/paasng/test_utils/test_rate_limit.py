@@ -15,7 +15,9 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import threading
 import time
+from unittest import mock
 
 import pytest
 from django.http import HttpRequest
@@ -26,10 +28,18 @@ from paasng.core.core.storages.redisdb import get_default_redis
 from paasng.utils.rate_limit.constants import UserAction
 from paasng.utils.rate_limit.fixed_window import UserActionRateLimiter as UserActionFixedWindowRateLimiter
 from paasng.utils.rate_limit.fixed_window import rate_limits_by_user
+from paasng.utils.rate_limit.local import LocalDenyCache, local_deny_cache
 from paasng.utils.rate_limit.token_bucket import UserActionRateLimiter as UserActionTokenBucketRateLimiter
 from tests.utils.auth import create_user
 
 
+@pytest.fixture(autouse=True)
+def _clear_local_deny_cache():
+    local_deny_cache.clear()
+    yield
+    local_deny_cache.clear()
+
+
 @pytest.mark.parametrize("limiter_cls", [UserActionTokenBucketRateLimiter, UserActionFixedWindowRateLimiter])
 def test_UserActionRateLimiter(limiter_cls):  # noqa: N802
     window_size, threshold = 3, 2
@@ -67,3 +77,57 @@ def test_rate_limits_on_view_func():
     assert viewset.fake_view_func().status_code == HTTP_429_TOO_MANY_REQUESTS
     time.sleep(window_size)
     assert viewset.fake_view_func().status_code == HTTP_200_OK
+
+
+@pytest.mark.parametrize("limiter_cls", [UserActionTokenBucketRateLimiter, UserActionFixedWindowRateLimiter])
+def test_concurrent_requests(limiter_cls):
+    window_size, threshold = 60, 20
+    username = create_user().username
+    results: list[bool] = []
+    barrier = threading.Barrier(10)
+
+    def _request():
+        rate_limiter = limiter_cls(get_default_redis(), username, UserAction.WATCH_PROCESS, window_size, threshold)
+        barrier.wait()
+        results.extend(rate_limiter.is_allowed() for _ in range(10))
+
+    threads = [threading.Thread(target=_request) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # No more requests than the threshold are allowed
+    assert results.count(True) == threshold
+    assert len(results) == 100
+
+
+@pytest.mark.parametrize("limiter_cls", [UserActionTokenBucketRateLimiter, UserActionFixedWindowRateLimiter])
+def test_deny_locally(limiter_cls):
+    rate_limiter = limiter_cls(get_default_redis(), create_user().username, UserAction.WATCH_PROCESS, 60, 1)
+    assert rate_limiter.is_allowed()
+    assert not rate_limiter.is_allowed()
+
+    with mock.patch.object(rate_limiter, "_script") as script:
+        assert not rate_limiter.is_allowed()
+    script.assert_not_called()
+
+
+class TestLocalDenyCache:
+    def test_deny(self):
+        cache = LocalDenyCache()
+        cache.deny("foo", 60)
+        cache.deny("bar", 0)
+        assert cache.is_denied("foo")
+        assert not cache.is_denied("bar")
+
+        with mock.patch("paasng.utils.rate_limit.local.time.monotonic", return_value=time.monotonic() + 61):
+            assert not cache.is_denied("foo")
+
+    def test_max_size(self):
+        cache = LocalDenyCache(max_size=2)
+        for key in ["a", "b", "c"]:
+            cache.deny(key, 60)
+        assert not cache.is_denied("a")
+        assert cache.is_denied("b")
+        assert cache.is_denied("c")
@@ -16,7 +16,7 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 
 from bkpaas_auth import get_user_by_user_id
 
@@ -28,6 +28,25 @@ from tests.utils.auth import create_user
 logger = logging.getLogger(__name__)
 
 
+class StubThreadPoolExecutor:
+    """在当前线程中依次执行任务的线程池（仅供单元测试使用）
+
+    StubBKIAMClient 从数据库中读取成员，而子线程无法读取到测试事务中的数据
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def map(self, fn: Callable, *iterables: Iterable) -> Iterator:
+        return map(fn, *iterables)
+
+
 class StubBKIAMClient:
     """bk-iam 通过 APIGW 提供的 API（仅供单元测试使用）"""
 
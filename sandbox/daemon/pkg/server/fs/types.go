@@ -4,3 +4,12 @@ type CreateFolderRequest struct {
 	Path string `json:"path" validate:"required"`
 	Mode string `json:"mode,omitempty" validate:"optional"`
 }
+
+type UploadOffsetResponse struct {
+	Offset int64 `json:"offset"`
+}
+
+type CompleteUploadRequest struct {
+	Path string `json:"path" validate:"required"`
+	Size int64  `json:"size" validate:"gte=0"`
+}
@@ -0,0 +1,200 @@
+package fs
+
+import (
+	"crypto/sha256"
+	"encoding/hex"
+	"errors"
+	"fmt"
+	"io"
+	"os"
+	"path/filepath"
+	"strconv"
+	"strings"
+
+	"github.com/gin-gonic/gin"
+
+	"github.com/TencentBlueking/blueking-paas/sandbox/daemon/pkg/server/httputil"
+)
+
+// ChunkChecksumHeader is the request header carrying the hex encoded sha256 checksum of a chunk
+const ChunkChecksumHeader = "X-Chunk-Sha256"
+
+// The chunks are appended to a partial file, which will be renamed to the destination path when
+// the upload is completed, so that a half-uploaded file is never visible at the destination path.
+const partialFileSuffix = ".partial"
+
+func partialFilePath(path string) string {
+	return path + partialFileSuffix
+}
+
+// createPartialFile opens the partial file for writing, the parent directories are created if missing,
+// same as the non-chunked upload
+func createPartialFile(path string) (*os.File, error) {
+	if err := os.MkdirAll(filepath.Dir(path), 0o750); err != nil {
+		return nil, err
+	}
+	return os.OpenFile(partialFilePath(path), os.O_CREATE|os.O_WRONLY, 0o644)
+}
+
+// getPartialFileSize returns the size of the partial file, 0 if it does not exist
+func getPartialFileSize(path string) (int64, error) {
+	info, err := os.Stat(partialFilePath(path))
+	if err != nil {
+		if os.IsNotExist(err) {
+			return 0, nil
+		}
+		return 0, err
+	}
+	return info.Size(), nil
+}
+
+// GetUploadOffset godoc
+//
+//	@Summary		Get the offset of a chunked upload
+//	@Description	Get the number of bytes already received for a chunked upload, the client resumes the upload from this offset
+//	@Tags			files
+//	@Produce		json
+//	@Param			path	query		string	true	"Destination path of the upload"
+//	@Success		200		{object}	UploadOffsetResponse
+//	@Router			/files/upload/chunk [get]
+//
+//	@id				GetUploadOffset
+func GetUploadOffset(c *gin.Context) {
+	path := c.Query("path")
+	if path == "" {
+		httputil.BadRequestResponse(c, errors.New("path is required"))
+		return
+	}
+
+	size, err := getPartialFileSize(path)
+	if err != nil {
+		httputil.BadRequestResponse(c, err)
+		return
+	}
+	httputil.SuccessResponse(c, UploadOffsetResponse{Offset: size})
+}
+
+// UploadChunk godoc
+//
+//	@Summary		Upload a chunk
+//	@Description	Write a chunk at the given offset of a chunked upload, the chunk is verified by its sha256 checksum
+//	@Tags			files
+//	@Accept			octet-stream
+//	@Produce		json
+//	@Param			path			query		string	true	"Destination path of the upload"
+//	@Param			offset			query		int		true	"Offset of the chunk"
+//	@Param			X-Chunk-Sha256	header		string	true	"Hex encoded sha256 checksum of the chunk"
+//	@Success		200				{object}	UploadOffsetResponse
+//	@Router			/files/upload/chunk [put]
+//
+//	@id				UploadChunk
+func UploadChunk(c *gin.Context) {
+	path := c.Query("path")
+	if path == "" {
+		httputil.BadRequestResponse(c, errors.New("path is required"))
+		return
+	}
+	offset, err := strconv.ParseInt(c.Query("offset"), 10, 64)
+	if err != nil || offset < 0 {
+		httputil.BadRequestResponse(c, errors.New("offset must be a non-negative integer"))
+		return
+	}
+	checksum := strings.ToLower(c.GetHeader(ChunkChecksumHeader))
+	if checksum == "" {
+		httputil.BadRequestResponse(c, fmt.Errorf("header %s is required", ChunkChecksumHeader))
+		return
+	}
+
+	size, err := getPartialFileSize(path)
+	if err != nil {
+		httputil.BadRequestResponse(c, err)
+		return
+	}
+	// Chunks must be written in order, a gap means some chunks are missing
+	if offset > size {
+		httputil.ConflictResponse(c, fmt.Errorf("offset %d is beyond the received size %d", offset, size))
+		return
+	}
+
+	f, err := createPartialFile(path)
+	if err != nil {
+		httputil.BadRequestResponse(c, err)
+		return
+	}
+	defer f.Close() // nolint
+
+	// Drop the data after the offset, which may be written by a failed attempt of the same chunk
+	if err = f.Truncate(offset); err != nil {
+		httputil.InternalErrorResponse(c, err)
+		return
+	}
+	if _, err = f.Seek(offset, io.SeekStart); err != nil {
+		httputil.InternalErrorResponse(c, err)
+		return
+	}
+
+	hasher := sha256.New()
+	written, err := io.Copy(io.MultiWriter(f, hasher), c.Request.Body)
+	if err != nil {
+		_ = f.Truncate(offset)
+		httputil.BadRequestResponse(c, err)
+		return
+	}
+	if hex.EncodeToString(hasher.Sum(nil)) != checksum {
+		_ = f.Truncate(offset)
+		httputil.BadRequestResponse(c, errors.New("chunk checksum mismatch"))
+		return
+	}
+
+	httputil.SuccessResponse(c, UploadOffsetResponse{Offset: offset + written})
+}
+
+// CompleteUpload godoc
+//
+//	@Summary		Complete a chunked upload
+//	@Description	Move the received file to the destination path after all chunks are uploaded
+//	@Tags			files
+//	@Accept			json
+//	@Param			request	body	CompleteUploadRequest	true	"Upload completion request"
+//	@Success		204
+//	@Router			/files/upload/complete [post]
+//
+//	@id				CompleteUpload
+func CompleteUpload(c *gin.Context) {
+	var request CompleteUploadRequest
+
+	if err := c.ShouldBindJSON(&request); err != nil {
+		if errors.Is(err, io.EOF) {
+			httputil.BadRequestResponse(c, errors.New("request body is empty or missing"))
+		} else {
+			httputil.BadRequestResponse(c, err)
+		}
+		return
+	}
+
+	size, err := getPartialFileSize(request.Path)
+	if err != nil {
+		httputil.BadRequestResponse(c, err)
+		return
+	}
+	if size != request.Size {
+		httputil.ConflictResponse(c, fmt.Errorf("size mismatch, expected %d, received %d", request.Size, size))
+		return
+	}
+
+	// An empty file has no chunks, create it directly
+	if size == 0 {
+		f, err := createPartialFile(request.Path)
+		if err != nil {
+			httputil.BadRequestResponse(c, err)
+			return
+		}
+		f.Close() // nolint
+	}
+
+	if err = os.Rename(partialFilePath(request.Path), request.Path); err != nil {
+		httputil.BadRequestResponse(c, err)
+		return
+	}
+	httputil.NoContentResponse(c)
+}
@@ -0,0 +1,158 @@
+package fs
+
+import (
+	"bytes"
+	"crypto/sha256"
+	"encoding/hex"
+	"encoding/json"
+	"fmt"
+	"net/http"
+	"net/http/httptest"
+	"net/url"
+	"os"
+	"path/filepath"
+
+	"github.com/gin-gonic/gin"
+	. "github.com/onsi/ginkgo/v2"
+	. "github.com/onsi/gomega"
+
+	"github.com/TencentBlueking/blueking-paas/sandbox/daemon/pkg/server/httputil"
+)
+
+var _ = Describe("ChunkedUpload", func() {
+	var (
+		router   *gin.Engine
+		tmpDir   string
+		destPath string
+	)
+
+	BeforeEach(func() {
+		gin.SetMode(gin.TestMode)
+
+		var err error
+		tmpDir, err = os.MkdirTemp("", "upload-chunk-test-*")
+		Expect(err).NotTo(HaveOccurred())
+		destPath = filepath.Join(tmpDir, "data.bin")
+
+		router = gin.New()
+		router.Use(httputil.ErrorMiddleware())
+		router.GET("/files/upload/chunk", GetUploadOffset)
+		router.PUT("/files/upload/chunk", UploadChunk)
+		router.POST("/files/upload/complete", CompleteUpload)
+	})
+
+	AfterEach(func() {
+		if tmpDir != "" {
+			os.RemoveAll(tmpDir) // nolint
+		}
+	})
+
+	checksumOf := func(data []byte) string {
+		sum := sha256.Sum256(data)
+		return hex.EncodeToString(sum[:])
+	}
+
+	putChunk := func(offset int, data []byte, checksum string) *httptest.ResponseRecorder {
+		target := fmt.Sprintf("/files/upload/chunk?path=%s&offset=%d", url.QueryEscape(destPath), offset)
+		req, _ := http.NewRequest("PUT", target, bytes.NewReader(data))
+		req.Header.Set(ChunkChecksumHeader, checksum)
+		w := httptest.NewRecorder()
+		router.ServeHTTP(w, req)
+		return w
+	}
+
+	getOffset := func() int64 {
+		req, _ := http.NewRequest("GET", "/files/upload/chunk?path="+url.QueryEscape(destPath), nil)
+		w := httptest.NewRecorder()
+		router.ServeHTTP(w, req)
+		Expect(w.Code).To(Equal(http.StatusOK))
+
+		var resp UploadOffsetResponse
+		Expect(json.Unmarshal(w.Body.Bytes(), &resp)).To(Succeed())
+		return resp.Offset
+	}
+
+	complete := func(size int) *httptest.ResponseRecorder {
+		body, _ := json.Marshal(CompleteUploadRequest{Path: destPath, Size: int64(size)})
+		req, _ := http.NewRequest("POST", "/files/upload/complete", bytes.NewReader(body))
+		req.Header.Set("Content-Type", "application/json")
+		w := httptest.NewRecorder()
+		router.ServeHTTP(w, req)
+		return w
+	}
+
+	It("should upload chunks and complete", func() {
+		first, second := []byte("hello, "), []byte("world")
+
+		Expect(putChunk(0, first, checksumOf(first)).Code).To(Equal(http.StatusOK))
+		Expect(putChunk(len(first), second, checksumOf(second)).Code).To(Equal(http.StatusOK))
+		Expect(getOffset()).To(Equal(int64(len(first) + len(second))))
+
+		// The destination is not visible before completion
+		_, err := os.Stat(destPath)
+		Expect(os.IsNotExist(err)).To(BeTrue())
+
+		Expect(complete(len(first) + len(second)).Code).To(Equal(http.StatusNoContent))
+		data, err := os.ReadFile(destPath)
+		Expect(err).NotTo(HaveOccurred())
+		Expect(string(data)).To(Equal("hello, world"))
+	})
+
+	It("should create the missing parent directories", func() {
+		destPath = filepath.Join(tmpDir, "nested", "dir", "data.bin")
+		data := []byte("nested data")
+
+		Expect(putChunk(0, data, checksumOf(data)).Code).To(Equal(http.StatusOK))
+		Expect(getOffset()).To(Equal(int64(len(data))))
+		Expect(complete(len(data)).Code).To(Equal(http.StatusNoContent))
+
+		content, err := os.ReadFile(destPath)
+		Expect(err).NotTo(HaveOccurred())
+		Expect(string(content)).To(Equal("nested data"))
+	})
+
+	It("should complete an empty upload in a nested directory", func() {
+		destPath = filepath.Join(tmpDir, "nested", "empty.bin")
+		Expect(complete(0).Code).To(Equal(http.StatusNoContent))
+
+		content, err := os.ReadFile(destPath)
+		Expect(err).NotTo(HaveOccurred())
+		Expect(content).To(BeEmpty())
+	})
+
+	It("should reject chunk with wrong checksum", func() {
+		data := []byte("some data")
+
+		w := putChunk(0, data, checksumOf([]byte("other data")))
+		Expect(w.Code).To(Equal(http.StatusBadRequest))
+		Expect(w.Body.String()).To(ContainSubstring("checksum mismatch"))
+		Expect(getOffset()).To(Equal(int64(0)))
+	})
+
+	It("should overwrite the data of a retried chunk", func() {
+		first := []byte("aaaa")
+		Expect(putChunk(0, first, checksumOf(first)).Code).To(Equal(http.StatusOK))
+		Expect(putChunk(4, []byte("bbbb"), checksumOf([]byte("bbbb"))).Code).To(Equal(http.StatusOK))
+		// Retry the second chunk
+		Expect(putChunk(4, []byte("cc"), checksumOf([]byte("cc"))).Code).To(Equal(http.StatusOK))
+		Expect(getOffset()).To(Equal(int64(6)))
+	})
+
+	It("should reject chunk beyond the received size", func() {
+		data := []byte("data")
+		Expect(putChunk(10, data, checksumOf(data)).Code).To(Equal(http.StatusConflict))
+	})
+
+	It("should reject completion with mismatched size", func() {
+		data := []byte("data")
+		Expect(putChunk(0, data, checksumOf(data)).Code).To(Equal(http.StatusOK))
+		Expect(complete(100).Code).To(Equal(http.StatusConflict))
+	})
+
+	It("should complete an empty upload", func() {
+		Expect(complete(0).Code).To(Equal(http.StatusNoContent))
+		data, err := os.ReadFile(destPath)
+		Expect(err).NotTo(HaveOccurred())
+		Expect(data).To(BeEmpty())
+	})
+})
@@ -50,6 +50,11 @@ func NotFoundResponse(c *gin.Context, err error) {
 	c.AbortWithError(http.StatusNotFound, err) // nolint
 }
 
+// ConflictResponse sends a conflict response
+func ConflictResponse(c *gin.Context, err error) {
+	c.AbortWithError(http.StatusConflict, err) // nolint
+}
+
 // InternalErrorResponse sends an internal error response
 func InternalErrorResponse(c *gin.Context, err error) {
 	c.AbortWithError(http.StatusInternalServerError, err) // nolint
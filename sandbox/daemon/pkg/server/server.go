@@ -55,6 +55,10 @@ func Start() error {
 	fsController := r.Group("/files")
 	// 上传文件
 	fsController.POST("/upload", fs.UploadFile)
+	// 分块上传文件，支持断点续传
+	fsController.GET("/upload/chunk", fs.GetUploadOffset)
+	fsController.PUT("/upload/chunk", fs.UploadChunk)
+	fsController.POST("/upload/complete", fs.CompleteUpload)
 	// 下载文件
 	fsController.GET("/download", fs.DownloadFile)
 	// 创建文件夹